@@ -1,5 +1,4 @@
 """Base service class with auto-registration and standard endpoints."""
-import asyncio
 import signal
 from typing import List, Optional, Dict, Any
 from contextlib import asynccontextmanager
@@ -7,8 +6,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from core.service_registry import ServiceInfo, ServiceRegistryClient
+from core.service_registry import (
+    ServiceInfo, ServiceRegistryClient, InstanceRegistration, LoadTracker, advertise_host
+)
 from shared.utils.logger import setup_logger, LogEmoji
+from shared.utils.auth import authenticator
 from shared.config import settings
 
 
@@ -17,11 +19,13 @@ class BaseService:
     Base class for all microservices in REE AI platform.
 
     Features:
-    - Auto-registration with Service Registry
+    - Auto-registration with Service Registry (one entry per replica, with load)
     - Standard health check endpoints
     - Graceful shutdown handling
     - Structured logging
     - CORS middleware
+    - JWT authentication middleware (auth=True): request.state.user_id,
+      Depends(self.authenticator.require_user) for protected routes
     """
 
     def __init__(
@@ -30,7 +34,8 @@ class BaseService:
         version: str,
         capabilities: List[str],
         port: int = 8080,
-        host: str = "0.0.0.0"
+        host: str = "0.0.0.0",
+        auth: bool = False
     ):
         self.name = name
         self.version = version
@@ -43,6 +48,8 @@ class BaseService:
 
         # Service registry client
         self.registry_client = ServiceRegistryClient(settings.SERVICE_REGISTRY_URL)
+        self.load_tracker = LoadTracker()
+        self.registration: Optional[InstanceRegistration] = None
 
         # FastAPI app with lifespan
         @asynccontextmanager
@@ -75,6 +82,14 @@ class BaseService:
             allow_headers=["*"],
         )
 
+        # In-flight requests and latency, reported with registry heartbeats
+        self.app.middleware("http")(self.load_tracker.middleware)
+
+        # Verified-token cache shared by all routes of the process
+        self.authenticator = authenticator
+        if auth:
+            self.app.middleware("http")(self.authenticator.middleware)
+
         # Setup custom routes FIRST (to be implemented by subclasses)
         # This allows services to override default routes like "/"
         self.setup_routes()
@@ -120,23 +135,25 @@ class BaseService:
         """Service startup logic."""
         self.logger.info(f"{LogEmoji.STARTUP} Starting {self.name} v{self.version}")
 
-        # Register with service registry
+        # Register this replica with service registry (heartbeats keep it registered)
         service_info = ServiceInfo(
             name=self.name,
             version=self.version,
-            host=self.name.replace("_", "-"),  # Docker service name
+            host=advertise_host(self.name.replace("_", "-")),  # Falls back to Docker service name
             port=self.port,
             capabilities=self.capabilities
         )
+        self.registration = InstanceRegistration(
+            self.registry_client, service_info, load=self.load_tracker, logger=self.logger
+        )
 
-        success = await self.registry_client.register(service_info)
+        success = await self.registration.start()
         if success:
-            self.logger.info(f"{LogEmoji.SUCCESS} Registered with Service Registry")
+            self.logger.info(
+                f"{LogEmoji.SUCCESS} Registered with Service Registry as {service_info.instance_id}"
+            )
         else:
-            self.logger.warning(f"{LogEmoji.WARNING} Failed to register with Service Registry")
-
-        # Start heartbeat task
-        asyncio.create_task(self._heartbeat_loop())
+            self.logger.warning(f"{LogEmoji.WARNING} Failed to register with Service Registry (will retry)")
 
         self.logger.info(f"{LogEmoji.SUCCESS} {self.name} started successfully on port {self.port}")
 
@@ -144,23 +161,15 @@ class BaseService:
         """Service shutdown logic."""
         self.logger.info(f"{LogEmoji.WARNING} Shutting down {self.name}")
 
-        # Deregister from service registry
-        await self.registry_client.deregister(self.name)
+        # Deregister this replica from service registry
+        if self.registration:
+            await self.registration.stop()
 
         # Close registry client
         await self.registry_client.close()
 
         self.logger.info(f"{LogEmoji.SUCCESS} {self.name} shutdown complete")
 
-    async def _heartbeat_loop(self):
-        """Send periodic heartbeat to service registry."""
-        while True:
-            try:
-                await asyncio.sleep(30)  # Heartbeat every 30 seconds
-                await self.registry_client.heartbeat(self.name)
-            except Exception as e:
-                self.logger.error(f"{LogEmoji.ERROR} Heartbeat failed: {e}")
-
     def run(self):
         """Run the service."""
         uvicorn.run(
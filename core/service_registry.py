@@ -1,12 +1,19 @@
 """Service Registry models and client for service discovery."""
-from typing import List, Optional, Dict, Any
+import asyncio
+import ipaddress
+import random
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel, Field
 import httpx
 
+from shared.config import settings
+
 
 class ServiceInfo(BaseModel):
-    """Information about a registered service."""
+    """Information about a registered service instance."""
     name: str = Field(..., description="Service name")
     version: str = Field(..., description="Service version")
     host: str = Field(..., description="Service host")
@@ -16,6 +23,9 @@ class ServiceInfo(BaseModel):
     registered_at: Optional[datetime] = None
     last_heartbeat: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
+    instance_id: Optional[str] = Field(None, description="Unique per replica (defaults to host:port)")
+    inflight: int = Field(0, description="Requests in progress at the last heartbeat")
+    latency_ms: Optional[float] = Field(None, description="Recent mean request latency at the last heartbeat")
 
     @property
     def base_url(self) -> str:
@@ -23,6 +33,33 @@ class ServiceInfo(BaseModel):
         return f"http://{self.host}:{self.port}"
 
 
+class InstanceHeartbeat(BaseModel):
+    """Load reported with each heartbeat."""
+    inflight: int = Field(0, description="Requests in progress")
+    latency_ms: Optional[float] = Field(None, description="Recent mean request latency")
+
+
+def advertise_host(default: str) -> str:
+    """
+    Address other containers can reach this replica on.
+
+    SERVICE_ADVERTISE_HOST if set, else this container's IP (distinct per
+    replica, unlike the compose service name), else `default`. Loopback
+    addresses (hostname mapped to 127.x in /etc/hosts) fall back to
+    `default`: other hosts would reach themselves instead.
+    """
+    if settings.SERVICE_ADVERTISE_HOST:
+        return settings.SERVICE_ADVERTISE_HOST
+    try:
+        address = socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return default
+    ip = ipaddress.ip_address(address)
+    if ip.is_loopback or ip.is_unspecified:
+        return default
+    return address
+
+
 class ServiceRegistryClient:
     """Client for interacting with Service Registry."""
 
@@ -31,11 +68,11 @@ class ServiceRegistryClient:
         self.client = httpx.AsyncClient(timeout=10.0)
 
     async def register(self, service_info: ServiceInfo) -> bool:
-        """Register a service with the registry."""
+        """Register a service instance with the registry."""
         try:
             response = await self.client.post(
                 f"{self.registry_url}/register",
-                json=service_info.dict()
+                json=service_info.model_dump(mode="json")
             )
             response.raise_for_status()
             return True
@@ -43,19 +80,20 @@ class ServiceRegistryClient:
             print(f"❌ Failed to register service: {e}")
             return False
 
-    async def deregister(self, service_name: str) -> bool:
-        """Deregister a service from the registry."""
+    async def deregister(self, service_name: str, instance_id: Optional[str] = None) -> bool:
+        """Deregister one instance (or every instance) of a service."""
+        path = f"/services/{service_name}"
+        if instance_id:
+            path += f"/instances/{instance_id}"
         try:
-            response = await self.client.delete(
-                f"{self.registry_url}/services/{service_name}"
-            )
+            response = await self.client.delete(f"{self.registry_url}{path}")
             response.raise_for_status()
             return True
         except Exception:
             return False
 
     async def get_service(self, service_name: str) -> Optional[ServiceInfo]:
-        """Get information about a specific service."""
+        """Get the least loaded live instance of a service."""
         try:
             response = await self.client.get(
                 f"{self.registry_url}/services/{service_name}"
@@ -65,8 +103,41 @@ class ServiceRegistryClient:
         except Exception:
             return None
 
+    async def get_instances(
+        self,
+        service_name: str,
+        index: Optional[int] = None,
+        wait: Optional[float] = None
+    ) -> Tuple[List[ServiceInfo], int]:
+        """
+        Live instances of a service.
+
+        Args:
+            service_name: Registered service name
+            index: Registry index from a previous call; with `wait`, the
+                call blocks until membership changes past it (watch)
+            wait: Max seconds to block
+
+        Returns:
+            (instances, registry index)
+
+        Raises:
+            httpx.HTTPError: Registry unreachable or error response
+        """
+        params = {}
+        if index is not None and wait:
+            params = {"index": index, "wait": wait}
+        response = await self.client.get(
+            f"{self.registry_url}/services/{service_name}/instances",
+            params=params,
+            timeout=(wait or 0) + 10.0
+        )
+        response.raise_for_status()
+        data = response.json()
+        return [ServiceInfo(**s) for s in data["instances"]], data["index"]
+
     async def get_all_services(self) -> List[ServiceInfo]:
-        """Get all registered services."""
+        """Get all live service instances."""
         try:
             response = await self.client.get(f"{self.registry_url}/services")
             response.raise_for_status()
@@ -85,11 +156,20 @@ class ServiceRegistryClient:
         except Exception:
             return []
 
-    async def heartbeat(self, service_name: str) -> bool:
-        """Send heartbeat for a service."""
+    async def heartbeat(
+        self,
+        service_name: str,
+        instance_id: Optional[str] = None,
+        load: Optional[InstanceHeartbeat] = None
+    ) -> bool:
+        """Send heartbeat for a service instance (False if unknown to the registry)."""
+        path = f"/heartbeat/{service_name}"
+        if instance_id:
+            path += f"/{instance_id}"
         try:
             response = await self.client.post(
-                f"{self.registry_url}/heartbeat/{service_name}"
+                f"{self.registry_url}{path}",
+                json=load.model_dump() if load else None
             )
             response.raise_for_status()
             return True
@@ -99,3 +179,389 @@ class ServiceRegistryClient:
     async def close(self):
         """Close the HTTP client."""
         await self.client.aclose()
+
+
+# ============================================================================
+# Instance side: load tracking and registration
+# ============================================================================
+
+class LoadTracker:
+    """In-flight requests and latency EWMA of this instance (sent with heartbeats)."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.inflight = 0
+        self.latency_ms: Optional[float] = None
+
+    async def middleware(self, request, call_next):
+        """FastAPI HTTP middleware: app.middleware("http")(tracker.middleware)"""
+        self.inflight += 1
+        start = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            self.inflight -= 1
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if self.latency_ms is None:
+                self.latency_ms = elapsed_ms
+            else:
+                self.latency_ms += self.alpha * (elapsed_ms - self.latency_ms)
+
+    def snapshot(self) -> InstanceHeartbeat:
+        return InstanceHeartbeat(inflight=self.inflight, latency_ms=self.latency_ms)
+
+
+class InstanceRegistration:
+    """
+    Keeps one service instance registered.
+
+    Registers on start, heartbeats with current load every
+    SERVICE_HEARTBEAT_INTERVAL seconds, re-registers whenever a heartbeat
+    is rejected (e.g. the registry restarted or expired this instance) and
+    deregisters on stop.
+    """
+
+    def __init__(
+        self,
+        client: ServiceRegistryClient,
+        service_info: ServiceInfo,
+        load: Optional[LoadTracker] = None,
+        interval: float = settings.SERVICE_HEARTBEAT_INTERVAL,
+        logger=None
+    ):
+        if not service_info.instance_id:
+            service_info.instance_id = f"{service_info.host}:{service_info.port}"
+        self.client = client
+        self.service_info = service_info
+        self.load = load
+        self.interval = interval
+        self.logger = logger
+        self.registered = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        """Register now and keep heartbeating in the background."""
+        self.registered = await self.client.register(self.service_info)
+        if self._task is None:
+            self._task = asyncio.create_task(self._heartbeat_loop())
+        return self.registered
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.client.deregister(self.service_info.name, self.service_info.instance_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                load = self.load.snapshot() if self.load else None
+                if not await self.client.heartbeat(self.service_info.name, self.service_info.instance_id, load):
+                    if load:
+                        self.service_info.inflight = load.inflight
+                        self.service_info.latency_ms = load.latency_ms
+                    self.registered = await self.client.register(self.service_info)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Heartbeat failed: {e}")
+
+
+# ============================================================================
+# Client side: instance selection
+# ============================================================================
+
+class Endpoint:
+    """One instance as seen by a ServiceBalancer"""
+
+    __slots__ = (
+        "instance_id", "host", "port", "outstanding", "latency_ms",
+        "consecutive_failures", "ejected_until", "ejections", "requests", "failures"
+    )
+
+    def __init__(self, info: ServiceInfo):
+        self.instance_id = info.instance_id or f"{info.host}:{info.port}"
+        self.host = info.host
+        self.port = info.port
+        self.outstanding = 0
+        # Seeded from the registry until this client has its own measurements
+        self.latency_ms: Optional[float] = info.latency_ms
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+
+    def cost(self) -> float:
+        """Expected wait: queue length x mean latency"""
+        return (self.outstanding + 1) * (self.latency_ms or 1.0)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "address": f"{self.host}:{self.port}",
+            "outstanding": self.outstanding,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected_for_s": round(max(0.0, self.ejected_until - now), 1),
+        }
+
+
+class ServiceBalancer:
+    """
+    Cached, self-refreshing instance list of one service with client-side
+    load balancing.
+
+    - Discovery: "watch" long-polls the registry and sees membership changes
+      immediately; "poll" re-reads the list every poll_interval seconds.
+      The last known list is kept while the registry is unreachable.
+    - Selection: "p2c" (power of two choices) samples two instances and
+      takes the one with the lower (outstanding + 1) x latency;
+      "least_outstanding" scans all instances for the fewest in flight.
+    - Outlier ejection: consecutive_failures connection errors / 5xx in a
+      row eject an instance for ejection_time x (times ejected) seconds,
+      never more than max_ejection_percent of the instances at once. If
+      every instance is ejected, all are used again (panic mode).
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        registry: ServiceRegistryClient,
+        strategy: str = settings.SERVICE_LB_STRATEGY,
+        mode: str = settings.SERVICE_DISCOVERY_MODE,
+        poll_interval: float = settings.SERVICE_DISCOVERY_POLL_INTERVAL,
+        watch_timeout: float = 30.0,
+        consecutive_failures: int = settings.SERVICE_OUTLIER_CONSECUTIVE_FAILURES,
+        ejection_time: float = settings.SERVICE_OUTLIER_EJECTION_TIME,
+        max_ejection_percent: float = settings.SERVICE_OUTLIER_MAX_EJECTION_PERCENT,
+        latency_alpha: float = 0.3,
+        logger=None
+    ):
+        self.service_name = service_name
+        self.registry = registry
+        self.strategy = strategy
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.watch_timeout = watch_timeout
+        self.consecutive_failures = consecutive_failures
+        self.ejection_time = ejection_time
+        self.max_ejection_percent = max_ejection_percent
+        self.latency_alpha = latency_alpha
+        self.logger = logger
+
+        self.endpoints: Dict[str, Endpoint] = {}
+        self._index: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Load the instance list and keep it current in the background."""
+        if self.mode == "off" or self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self, wait: Optional[float] = None) -> bool:
+        """Fetch the instance list (blocking up to `wait` for a change); False on error"""
+        try:
+            instances, index = await self.registry.get_instances(self.service_name, self._index, wait)
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"Service discovery for {self.service_name} failed: {e}")
+            return False
+        self._index = index
+        self._update(instances)
+        return True
+
+    def _update(self, instances: List[ServiceInfo]):
+        current = {}
+        for info in instances:
+            endpoint = Endpoint(info)
+            # Keep local counters of instances we already know
+            current[endpoint.instance_id] = self.endpoints.get(endpoint.instance_id, endpoint)
+        if self.logger and current.keys() != self.endpoints.keys():
+            self.logger.info(f"{self.service_name}: {len(current)} instance(s) {sorted(current)}")
+        self.endpoints = current
+
+    async def _refresh_loop(self):
+        while True:
+            if self.mode == "watch":
+                ok = await self.refresh(wait=self.watch_timeout)
+                if not ok:
+                    await asyncio.sleep(self.poll_interval)
+            else:
+                await asyncio.sleep(self.poll_interval)
+                await self.refresh()
+
+    # ------------------------------------------------------------------
+    # Selection and feedback
+    # ------------------------------------------------------------------
+
+    def pick(self) -> Optional[Endpoint]:
+        """Instance for the next request, or None if none are known"""
+        if not self.endpoints:
+            return None
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints.values() if e.ejected_until <= now]
+        if not candidates:
+            candidates = list(self.endpoints.values())  # Panic mode
+        if len(candidates) == 1:
+            return candidates[0]
+
+        if self.strategy == "least_outstanding":
+            fewest = min(e.outstanding for e in candidates)
+            return random.choice([e for e in candidates if e.outstanding == fewest])
+
+        first, second = random.sample(candidates, 2)
+        return first if first.cost() <= second.cost() else second
+
+    def begin(self, endpoint: Endpoint):
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+
+    def end(self, endpoint: Endpoint):
+        endpoint.outstanding = max(0, endpoint.outstanding - 1)
+
+    def record(self, endpoint: Endpoint, success: bool, latency_ms: Optional[float] = None):
+        """Feed back the outcome of a request (latency up to response headers)"""
+        if latency_ms is not None:
+            if endpoint.latency_ms is None:
+                endpoint.latency_ms = latency_ms
+            else:
+                endpoint.latency_ms += self.latency_alpha * (latency_ms - endpoint.latency_ms)
+
+        if success:
+            endpoint.consecutive_failures = 0
+            return
+
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.consecutive_failures:
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint):
+        now = time.monotonic()
+        if endpoint.ejected_until > now:
+            return
+        ejected = sum(1 for e in self.endpoints.values() if e.ejected_until > now)
+        if (ejected + 1) * 100 > self.max_ejection_percent * len(self.endpoints):
+            return
+        endpoint.ejections += 1
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = now + self.ejection_time * endpoint.ejections
+        if self.logger:
+            self.logger.warning(
+                f"{self.service_name}: ejected {endpoint.host}:{endpoint.port} "
+                f"for {self.ejection_time * endpoint.ejections:.0f}s"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "mode": self.mode,
+            "registry_index": self._index,
+            "instances": {i: e.snapshot(now) for i, e in self.endpoints.items()},
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when it is closed (end of the request)"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class BalancedTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport routing requests for logical service hosts to instances.
+
+    Requests whose URL host is a key of `balancers` (e.g. the compose name
+    "ree-ai-db-gateway") are sent to the instance the balancer picks; the
+    instance stays "outstanding" until the response body is closed. Other
+    hosts, and services with no known instances, go to the URL unchanged.
+
+    Usage:
+        client = httpx.AsyncClient(transport=BalancedTransport(
+            {"ree-ai-db-gateway": ServiceBalancer("db_gateway", registry)},
+            httpx.AsyncHTTPTransport(limits=limits)
+        ))
+    """
+
+    def __init__(
+        self,
+        balancers: Dict[str, ServiceBalancer],
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.balancers = balancers
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        balancer = self.balancers.get(request.url.host)
+        endpoint = balancer.pick() if balancer else None
+        if endpoint is None:
+            return await self.transport.handle_async_request(request)
+
+        request.url = request.url.copy_with(host=endpoint.host, port=endpoint.port)
+        request.headers["Host"] = f"{endpoint.host}:{endpoint.port}"
+
+        balancer.begin(endpoint)
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            balancer.record(endpoint, success=False)
+            balancer.end(endpoint)
+            raise
+        except BaseException:
+            # Cancelled (e.g. an abandoned speculative request): not the
+            # instance's fault, but it is no longer outstanding
+            balancer.end(endpoint)
+            raise
+
+        # From here on the response stream ends the request when closed
+        balancer.record(
+            endpoint,
+            success=response.status_code < 500,
+            latency_ms=(time.perf_counter() - start) * 1000
+        )
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, lambda: balancer.end(endpoint)),
+            extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
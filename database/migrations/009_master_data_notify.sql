@@ -0,0 +1,47 @@
+-- Migration 009: Master data change notifications
+-- Description: Emit pg_notify('master_data_changed', <table>) on every write to a
+-- master data table so services holding the in-memory MasterDataIndex
+-- (shared/database/master_data_index.py) reload it without polling.
+
+CREATE OR REPLACE FUNCTION notify_master_data_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('master_data_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Attach a statement-level trigger to every master table that exists
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        -- i18n schema (001_create_master_data_schema.sql)
+        'districts', 'districts_translations',
+        'property_types', 'property_types_translations',
+        'amenities', 'amenities_translations',
+        'directions', 'directions_translations',
+        'furniture_types', 'furniture_types_translations',
+        'legal_statuses', 'legal_statuses_translations',
+        'view_types', 'view_types_translations',
+        -- master_* schema (006/008)
+        'master_districts', 'master_property_types', 'master_amenities',
+        'master_furniture_types', 'master_directions', 'master_legal_status',
+        'master_countries', 'master_currencies'
+    ]
+    LOOP
+        IF to_regclass(tbl) IS NOT NULL THEN
+            EXECUTE format('DROP TRIGGER IF EXISTS trigger_notify_master_data_changed ON %I', tbl);
+            EXECUTE format(
+                'CREATE TRIGGER trigger_notify_master_data_changed
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                 FOR EACH STATEMENT EXECUTE FUNCTION notify_master_data_changed()',
+                tbl
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION notify_master_data_changed() IS 'Signals MasterDataIndex listeners to reload master data';
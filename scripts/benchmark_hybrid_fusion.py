@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark hybrid search fusion strategies
+
+Replays recorded BM25/vector hit lists through every strategy in
+services/db_gateway/hybrid_search.FUSION_STRATEGIES (plus the previous
+full-sort convex merge as a baseline) and reports:
+- latency per query (mean / p50 / p95 / p99)
+- overlap@k between strategies (Jaccard of the returned property ids)
+- overlap@k with the raw BM25 and vector lists
+
+Fixtures are JSONL, one query per line:
+    {"query": "...", "bm25": [{"property_id": "...", "score": 12.3}, ...],
+     "vector": [{"property_id": "...", "score": 0.81}, ...]}
+
+Usage:
+    # Record fixtures from a running OpenSearch (one query per line in queries.txt)
+    python scripts/benchmark_hybrid_fusion.py --record queries.txt --fixtures fusion_fixtures.jsonl
+
+    # Benchmark recorded fixtures
+    python scripts/benchmark_hybrid_fusion.py --fixtures fusion_fixtures.jsonl --k 10 50 200
+
+    # No fixtures handy: synthetic correlated hit lists
+    python scripts/benchmark_hybrid_fusion.py --synthetic 200 --candidates 400
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.db_gateway.hybrid_search import (
+    FUSION_STRATEGIES,
+    DEFAULT_RRF_K,
+    combine_results,
+    normalize_scores,
+)
+
+
+def legacy_convex(bm25_results: List[Dict], vector_results: List[Dict], alpha: float, limit: int) -> List[Dict]:
+    """Previous implementation: normalize in place, merge every hit, full sort"""
+    bm25_results = normalize_scores([dict(r) for r in bm25_results])
+    vector_results = normalize_scores([dict(r) for r in vector_results])
+    bm25_map = {r['property_id']: r for r in bm25_results}
+    vector_map = {r['property_id']: r for r in vector_results}
+
+    merged = []
+    for prop_id in set(bm25_map) | set(vector_map):
+        bm25_result = bm25_map.get(prop_id)
+        vector_result = vector_map.get(prop_id)
+        bm25_score = bm25_result['normalized_score'] if bm25_result else 0.0
+        vector_score = vector_result['normalized_score'] if vector_result else 0.0
+        hybrid_score = alpha * bm25_score + (1 - alpha) * vector_score
+        merged.append({
+            **(bm25_result or vector_result),
+            'hybrid_score': hybrid_score,
+            'bm25_score': bm25_score,
+            'vector_score': vector_score,
+            'score': hybrid_score,
+            'search_method': 'hybrid'
+        })
+    merged.sort(key=lambda x: x['hybrid_score'], reverse=True)
+    return merged[:limit]
+
+
+def load_fixtures(path: Path) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_fixtures(n_queries: int, n_candidates: int, seed: int = 42) -> List[Dict]:
+    """Two partially overlapping ranked lists per query, with BM25-like and cosine-like scores"""
+    rng = random.Random(seed)
+    pool_size = int(n_candidates * 1.6)
+    fixtures = []
+    for q in range(n_queries):
+        pool = [f"prop-{q}-{i}" for i in range(pool_size)]
+        relevance = {pid: rng.random() for pid in pool}
+        bm25_ids = sorted(pool, key=lambda p: relevance[p] + rng.gauss(0, 0.3), reverse=True)[:n_candidates]
+        vector_ids = sorted(pool, key=lambda p: relevance[p] + rng.gauss(0, 0.3), reverse=True)[:n_candidates]
+        fixtures.append({
+            "query": f"synthetic-{q}",
+            "bm25": [
+                {"property_id": pid, "score": 25.0 / (1 + 0.05 * rank), "title": pid}
+                for rank, pid in enumerate(bm25_ids)
+            ],
+            "vector": [
+                {"property_id": pid, "score": 0.95 - 0.4 * rank / n_candidates, "title": pid}
+                for rank, pid in enumerate(vector_ids)
+            ],
+        })
+    return fixtures
+
+
+async def record_fixtures(queries_path: Path, out_path: Path, candidates: int):
+    """Run the real BM25 and vector searches and save their hit lists"""
+    from opensearchpy import AsyncOpenSearch
+    from shared.config import settings
+    from services.db_gateway.embedding_service import EmbeddingService
+    from services.db_gateway.hybrid_search import execute_bm25_search, execute_vector_search
+
+    client = AsyncOpenSearch(
+        hosts=[{'host': settings.OPENSEARCH_HOST, 'port': settings.OPENSEARCH_PORT}],
+        http_auth=(settings.OPENSEARCH_USER, settings.OPENSEARCH_PASSWORD) if settings.OPENSEARCH_USER else None,
+        use_ssl=settings.OPENSEARCH_USE_SSL,
+        verify_certs=settings.OPENSEARCH_VERIFY_CERTS,
+        ssl_show_warn=False
+    )
+    embedding_service = EmbeddingService()
+    embedding_service.start()
+    while embedding_service.state == "loading":
+        await asyncio.sleep(0.5)
+    print(f"Embedding model: {embedding_service.state}")
+
+    queries = [q.strip() for q in queries_path.read_text(encoding="utf-8").splitlines() if q.strip()]
+    try:
+        with open(out_path, "w", encoding="utf-8") as out:
+            for query in queries:
+                bm25 = await execute_bm25_search(client, query, None, candidates)
+                vector = await execute_vector_search(client, embedding_service, query, None, candidates)
+                out.write(json.dumps({
+                    "query": query,
+                    "bm25": [{"property_id": h["property_id"], "score": h["score"]} for h in bm25],
+                    "vector": [{"property_id": h["property_id"], "score": h["score"]} for h in vector],
+                }, ensure_ascii=False) + "\n")
+                print(f"  {query!r}: bm25={len(bm25)} vector={len(vector)}")
+    finally:
+        await embedding_service.stop()
+        await client.close()
+    print(f"Saved {len(queries)} fixtures to {out_path}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    sa, sb = set(a), set(b)
+    return len(sa & sb) / len(sa | sb) if sa or sb else 1.0
+
+
+def run_benchmark(fixtures: List[Dict], k: int, alpha: float, rrf_k: int, repeats: int):
+    strategies = {"legacy_convex": lambda b, v: legacy_convex(b, v, alpha, k)}
+    for strategy in FUSION_STRATEGIES:
+        strategies[strategy] = (
+            lambda b, v, s=strategy: combine_results(b, v, alpha, strategy=s, limit=k, rrf_k=rrf_k)
+        )
+
+    latencies: Dict[str, List[float]] = {name: [] for name in strategies}
+    top_ids: Dict[str, List[List[str]]] = {name: [] for name in strategies}
+
+    for fixture in fixtures:
+        bm25, vector = fixture["bm25"], fixture["vector"]
+        for name, fuse in strategies.items():
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fused = fuse(bm25, vector)
+                latencies[name].append((time.perf_counter() - start) * 1e6)
+            top_ids[name].append([r["property_id"] for r in fused])
+
+    print(f"\n=== k={k}, alpha={alpha}, rrf_k={rrf_k}, queries={len(fixtures)}, repeats={repeats} ===")
+    print(f"{'strategy':<16}{'mean µs':>10}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}"
+          f"{'∩bm25@k':>10}{'∩vec@k':>10}")
+    for name in strategies:
+        lat = latencies[name]
+        bm25_overlap = statistics.mean(
+            jaccard(ids, [h["property_id"] for h in f["bm25"][:k]])
+            for ids, f in zip(top_ids[name], fixtures)
+        )
+        vector_overlap = statistics.mean(
+            jaccard(ids, [h["property_id"] for h in f["vector"][:k]])
+            for ids, f in zip(top_ids[name], fixtures)
+        )
+        print(f"{name:<16}{statistics.mean(lat):>10.1f}{percentile(lat, 50):>10.1f}"
+              f"{percentile(lat, 95):>10.1f}{percentile(lat, 99):>10.1f}"
+              f"{bm25_overlap:>10.2f}{vector_overlap:>10.2f}")
+
+    print(f"\nPairwise overlap@{k} (mean Jaccard)")
+    for a, b in combinations(strategies, 2):
+        overlap = statistics.mean(jaccard(x, y) for x, y in zip(top_ids[a], top_ids[b]))
+        print(f"  {a:<14} vs {b:<14} {overlap:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid search fusion strategies")
+    parser.add_argument("--fixtures", type=Path, help="JSONL fixtures (read, or written with --record)")
+    parser.add_argument("--record", type=Path, help="Record fixtures for the queries in this file")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N synthetic queries instead")
+    parser.add_argument("--candidates", type=int, default=100, help="Hits per list when recording/generating")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 50], help="Top-k values to benchmark")
+    parser.add_argument("--alpha", type=float, default=0.3, help="BM25 weight")
+    parser.add_argument("--rrf-k", type=int, default=DEFAULT_RRF_K, help="RRF smoothing constant")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per query and strategy")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.fixtures:
+            parser.error("--record requires --fixtures as the output path")
+        asyncio.run(record_fixtures(args.record, args.fixtures, args.candidates))
+        return
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    elif args.synthetic:
+        fixtures = synthetic_fixtures(args.synthetic, args.candidates)
+    else:
+        parser.error("provide --fixtures or --synthetic")
+
+    for k in args.k:
+        run_benchmark(fixtures, k, args.alpha, args.rrf_k, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Load test: /users/me latency during a login storm
+
+Measures /users/me latency twice: first alone (baseline), then while
+--storm-concurrency clients hammer /login. With bcrypt running inline in
+the handlers, every login blocks the event loop and /users/me p99 climbs
+to several bcrypt durations. With shared/utils/password_hasher.py it
+should stay flat; logins beyond the hashing queue get 503 instead.
+
+Two targets:
+- A running auth_service / user_management (default): a test user is
+  registered if needed, then logged in with the same credentials
+- --local: in-process FastAPI apps (no database) comparing inline bcrypt
+  with PasswordHasher on the same event loop
+
+Usage:
+    python scripts/benchmark_login_storm.py --base-url http://localhost:8089
+    python scripts/benchmark_login_storm.py --local --rounds 12 --storm-concurrency 32
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(name: str, latencies_ms: List[float]) -> str:
+    return (
+        f"{name:<22} n={len(latencies_ms):<6} "
+        f"p50={percentile(latencies_ms, 50):8.1f}ms  "
+        f"p95={percentile(latencies_ms, 95):8.1f}ms  "
+        f"p99={percentile(latencies_ms, 99):8.1f}ms  "
+        f"max={max(latencies_ms, default=float('nan')):8.1f}ms"
+    )
+
+
+async def probe_me(client: httpx.AsyncClient, headers: Dict[str, str], duration: float, interval: float) -> List[float]:
+    """
+    Sequential /users/me requests for `duration` seconds
+
+    Latency is counted from when the probe meant to send (after `interval`),
+    so time spent waiting for a blocked event loop is included.
+    """
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        response = await client.get("/users/me", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+async def login_storm(client: httpx.AsyncClient, credentials: Dict[str, str], concurrency: int, stop: asyncio.Event) -> Dict[str, int]:
+    """`concurrency` clients logging in back to back until stopped"""
+    statuses: Dict[str, int] = {}
+
+    async def worker():
+        while not stop.is_set():
+            response = await client.post("/login", json=credentials)
+            key = str(response.status_code)
+            statuses[key] = statuses.get(key, 0) + 1
+            # Yield even when the request completed without suspending (in-process transport)
+            await asyncio.sleep(0.05 if response.status_code == 503 else 0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+
+async def run_scenario(client: httpx.AsyncClient, credentials: Dict[str, str], args) -> None:
+    response = await client.post("/login", json=credentials)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    baseline = await probe_me(client, headers, args.duration, args.probe_interval)
+    print(summarize("/users/me (idle)", baseline))
+
+    stop = asyncio.Event()
+    storm = asyncio.create_task(login_storm(client, credentials, args.storm_concurrency, stop))
+    await asyncio.sleep(0.5)  # Let the storm build up
+    during = await probe_me(client, headers, args.duration, args.probe_interval)
+    stop.set()
+    statuses = await storm
+    print(summarize("/users/me (storm)", during))
+    logins = sum(statuses.values())
+    print(f"{'/login':<22} {logins} requests ({logins / (args.duration + 0.5):.1f}/s), status codes {statuses}")
+
+
+async def run_remote(args) -> None:
+    credentials = {"email": args.email or f"loadtest-{uuid.uuid4().hex[:8]}@example.com", "password": args.password}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        response = await client.post("/register", json={
+            **credentials,
+            "full_name": "Load Test",
+            "user_type": "buyer",
+        })
+        if response.status_code not in (200, 400):  # 400 = already registered
+            response.raise_for_status()
+        await run_scenario(client, credentials, args)
+
+
+def build_local_app(use_pool: bool, rounds: int, workers: int):
+    """Minimal auth app: /login checks a bcrypt hash, /users/me does no hashing"""
+    import bcrypt
+    from fastapi import FastAPI, HTTPException, Header
+    from shared.utils.password_hasher import PasswordHasher, HasherOverloaded
+
+    app = FastAPI()
+    hasher = PasswordHasher("benchmark", rounds=rounds, workers=workers)
+    stored = bcrypt.hashpw(b"password", bcrypt.gensalt(rounds))
+
+    @app.post("/login")
+    async def login(body: Dict[str, str]):
+        password = body["password"].encode("utf-8")
+        if use_pool:
+            try:
+                ok = await hasher.verify(body["password"], stored.decode("utf-8"))
+            except HasherOverloaded:
+                raise HTTPException(status_code=503, headers={"Retry-After": "1"})
+        else:
+            ok = bcrypt.checkpw(password, stored)
+        if not ok:
+            raise HTTPException(status_code=401)
+        return {"access_token": "token"}
+
+    @app.get("/users/me")
+    async def me(authorization: str = Header(None)):
+        return {"id": "user", "authorization": authorization}
+
+    return app, hasher
+
+
+async def run_local(args) -> None:
+    credentials = {"email": "loadtest@example.com", "password": "password"}
+    for label, use_pool in (("inline bcrypt", False), ("process pool", True)):
+        print(f"\n=== {label} (cost {args.rounds}) ===")
+        app, hasher = build_local_app(use_pool, args.rounds, args.workers)
+        if use_pool:
+            hasher.start()
+            await asyncio.sleep(1.0)  # Workers spawned
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://local", timeout=60.0) as client:
+            await run_scenario(client, credentials, args)
+        await hasher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/users/me latency during a login storm")
+    parser.add_argument("--base-url", default="http://localhost:8089", help="auth_service / user_management URL")
+    parser.add_argument("--email", help="Existing test user (default: register a new one)")
+    parser.add_argument("--password", default="LoadTest!2345")
+    parser.add_argument("--local", action="store_true", help="In-process comparison, no running service needed")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost (--local)")
+    parser.add_argument("--workers", type=int, default=2, help="Hashing pool processes (--local)")
+    parser.add_argument("--storm-concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="Pause between /users/me probes")
+    args = parser.parse_args()
+
+    if args.local:
+        asyncio.run(run_local(args))
+    else:
+        print(f"Target: {args.base_url}")
+        asyncio.run(run_remote(args))
+
+
+if __name__ == "__main__":
+    main()
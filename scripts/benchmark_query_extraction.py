@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark query normalization + regex extraction
+
+Compares the per-pattern implementations (one re.sub / re.search per
+abbreviation or keyword pattern, as QueryNormalizer and SimpleRegexExtractor
+used to do) with the precompiled versions (one substitution pass per
+rewrite step, keyword-prefiltered extraction), on the same query corpus.
+Every query is also checked for identical output, so the script doubles as
+an equivalence test.
+
+Reports per-query latency (mean / p50 / p95 / p99) and the speedup for:
+- normalization (QueryNormalizer.normalize)
+- extraction (SimpleRegexExtractor.extract on the normalized query)
+
+Usage:
+    # Built-in synthetic corpus (Vietnamese + English search queries)
+    python scripts/benchmark_query_extraction.py --synthetic 2000
+
+    # Real queries, one per line
+    python scripts/benchmark_query_extraction.py --queries queries.txt --repeat 5
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from shared.utils.query_normalizer import QueryNormalizer
+from services.attribute_extraction.regex_extractor_simple import SimpleRegexExtractor
+
+
+# ============================================================================
+# Previous implementations (baseline)
+# ============================================================================
+
+class LegacyQueryNormalizer(QueryNormalizer):
+    """Previous rewrite steps: one re.sub per abbreviation / pattern"""
+
+    def _expand_districts(self, query: str) -> str:
+        result = query
+        sorted_patterns = sorted(self.district_map.items(), key=lambda x: len(x[0]), reverse=True)
+        for abbr, full in sorted_patterns:
+            pattern = r'\b' + re.escape(abbr) + r'\b'
+            result = re.sub(pattern, full, result, flags=re.IGNORECASE)
+        return result
+
+    def _expand_bedrooms(self, query: str) -> str:
+        result = query
+        patterns = [
+            (r'(\d+)\s*BR\b', r'\1 phòng ngủ'),
+            (r'(\d+)\s*-\s*BR\b', r'\1 phòng ngủ'),
+            (r'(\d+)\s+bedroom(?:s)?\b', r'\1 phòng ngủ'),
+        ]
+        for pattern, replacement in patterns:
+            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        return result
+
+    def _expand_prices(self, query: str) -> str:
+        result = query
+        replacements = {
+            r'(\d+)\s*B\b': r'\1 tỷ',
+            r'(\d+)\s*M\b': r'\1 triệu',
+            r'(\d+)\s*billion\b': r'\1 tỷ',
+            r'(\d+)\s*million\b': r'\1 triệu',
+        }
+        for pattern, replacement in replacements.items():
+            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        return result
+
+    def _expand_multiple_districts(self, query: str) -> str:
+        result = query
+        patterns = [
+            (r'(Quận|quan)\s+(\d+)(?:\s*,\s*(\d+))+', lambda m: self._expand_district_list(m, 'Quận')),
+            (r'(District|district)\s+(\d+)(?:\s*,\s*(\d+))+', lambda m: self._expand_district_list(m, 'Quận')),
+            (r'([QD])(\d+)(?:\s*,\s*[QD]?(\d+))+', lambda m: self._expand_abbreviated_district_list(m)),
+        ]
+        for pattern, handler in patterns:
+            matches = list(re.finditer(pattern, result))
+            for match in reversed(matches):
+                result = result[:match.start()] + handler(match) + result[match.end():]
+        return result
+
+    def normalize(self, query: str) -> str:
+        if not query:
+            return query
+        normalized = self._expand_districts(query)
+        normalized = self._expand_bedrooms(normalized)
+        normalized = self._expand_prices(normalized)
+        normalized = self._expand_multiple_districts(normalized)
+        return re.sub(r'\s+', ' ', normalized).strip()
+
+
+def _first_search(patterns: List[str], query: str) -> Optional[re.Match]:
+    for pattern in patterns:
+        match = re.search(pattern, query, re.IGNORECASE)
+        if match:
+            return match
+    return None
+
+
+def legacy_extract(extractor: SimpleRegexExtractor, query: str) -> Dict[str, Any]:
+    """Previous extraction: re.search over each category's pattern list in order"""
+    entities = {}
+
+    match = _first_search(extractor.district_patterns, query)
+    if match:
+        district = extractor._extract_district(match)
+        if district:
+            entities['district'] = district
+
+    for attr, patterns in (
+        ('property_type', extractor.property_type_patterns),
+        ('listing_type', extractor.listing_type_patterns),
+    ):
+        for pattern, value in patterns:
+            if re.search(pattern, query, re.IGNORECASE):
+                entities[attr] = value
+                break
+
+    for idx, (pattern, _) in enumerate(extractor.price_patterns):
+        match = re.search(pattern, query, re.IGNORECASE)
+        if match:
+            entities.update(extractor._extract_price(idx, match))
+            break
+
+    for attr, patterns in (
+        ('bedrooms', extractor.bedroom_patterns),
+        ('bathrooms', extractor.bathroom_patterns),
+        ('area', extractor.area_patterns),
+    ):
+        for pattern, handler in patterns:
+            match = re.search(pattern, query, re.IGNORECASE)
+            if match:
+                value = handler(match)
+                if value:
+                    entities[attr] = value
+                break
+
+    return entities
+
+
+# ============================================================================
+# Corpus
+# ============================================================================
+
+def synthetic_queries(n_queries: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    verbs = ["Tìm", "Find", "Cần", "Need", "Looking for", "Cho thuê", "Bán", "Mua", ""]
+    types = ["căn hộ", "chung cư", "nhà phố", "biệt thự", "đất", "apartment", "condo", "house",
+             "villa", "land", "townhouse", "văn phòng", "office", ""]
+    listing = ["cho thuê", "bán", "for rent", "for sale", "to rent", ""]
+    districts = (
+        [f"Q{n}" for n in range(1, 13)] + [f"D{n}" for n in range(1, 13)]
+        + [f"Quận {n}" for n in range(1, 13)] + [f"District {n}" for n in range(1, 13)]
+        + ["Q1, Q2, Q7", "Quận 1, 2, 7", "District 2, 9", "Bình Thạnh", "Thủ Đức", "Cầu Giấy", ""]
+    )
+    bedrooms = ["{n}BR", "{n} BR", "{n}-BR", "{n} bedrooms", "{n} phòng ngủ", "{n}PN", ""]
+    prices = ["dưới {n} tỷ", "under {n}B", "{n}M", "{n} triệu", "over {n} billion", "giá {n}.5 tỷ", "price 0", ""]
+    extras = ["{n} WC", "{n}m2", "{n} sqm", "gần trường", "view sông", "near metro", ""]
+
+    queries = []
+    for _ in range(n_queries):
+        verb = rng.choice(verbs)
+        parts = [
+            rng.choice(types), rng.choice(listing),
+            rng.choice(bedrooms).format(n=rng.randint(1, 5)),
+            rng.choice(districts),
+            rng.choice(prices).format(n=rng.randint(1, 30)),
+            rng.choice(extras).format(n=rng.randint(1, 200)),
+        ]
+        rng.shuffle(parts)
+        query = " ".join(p for p in [verb] + parts if p)
+        queries.append(query.lower() if rng.random() < 0.2 else query)
+    return queries
+
+
+def load_queries(path: Path) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def time_calls(fn: Callable[[str], Any], queries: List[str], repeat: int) -> List[float]:
+    """Per-call latencies in microseconds"""
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+    }
+
+
+def report(name: str, legacy: List[float], current: List[float]):
+    before, after = summarize(legacy), summarize(current)
+    print(f"\n{name} (µs per query)")
+    print(f"  {'':<12}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for label, stats in (("per-pattern", before), ("compiled", after)):
+        print(f"  {label:<12}" + "".join(f"{stats[k]:>10.1f}" for k in ("mean", "p50", "p95", "p99")))
+    print(f"  speedup (mean): {before['mean'] / after['mean']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query normalization + regex extraction")
+    parser.add_argument("--queries", type=Path, help="Text file, one query per line")
+    parser.add_argument("--synthetic", type=int, default=2000, help="Synthetic queries when --queries is not given")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per implementation")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else synthetic_queries(args.synthetic, args.seed)
+
+    legacy_normalizer = LegacyQueryNormalizer()
+    normalizer = QueryNormalizer()
+    extractor = SimpleRegexExtractor()
+
+    # Equivalence check
+    mismatches = 0
+    for query in queries:
+        normalized = normalizer.normalize(query)
+        expected_normalized = legacy_normalizer.normalize(query)
+        entities = extractor.extract(normalized)
+        expected_entities = legacy_extract(extractor, normalized)
+        if normalized != expected_normalized or entities != expected_entities:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"MISMATCH: {query!r}")
+                print(f"  per-pattern: {expected_normalized!r} -> {expected_entities}")
+                print(f"  compiled: {normalized!r} -> {entities}")
+
+    print(f"Queries: {len(queries)} (x{args.repeat}), mismatches: {mismatches}")
+
+    report(
+        "Normalization",
+        time_calls(legacy_normalizer.normalize, queries, args.repeat),
+        time_calls(normalizer.normalize, queries, args.repeat),
+    )
+
+    normalized_queries = [normalizer.normalize(q) for q in queries]
+    report(
+        "Extraction",
+        time_calls(lambda q: legacy_extract(extractor, q), normalized_queries, args.repeat),
+        time_calls(extractor.extract, normalized_queries, args.repeat),
+    )
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark rule-based reranking scoring
+
+Compares the per-candidate path (awaiting each feature calculator per
+property dict, building FeatureScores / RankedPropertyResult models, then
+sorting, as /rerank used to do) with the vectorized path (feature columns
+as NumPy arrays, one FEATURE_WEIGHTS dot product, argpartition top-k) on
+the same synthetic candidates and FeatureSnapshot. Feature scores and the
+ranking are also compared, so the script doubles as an equivalence test.
+
+The database is not involved: both paths score from an in-memory
+FeatureSnapshot, i.e. only Stage 2 (scoring + sort) of /rerank is timed.
+
+Usage:
+    python scripts/benchmark_reranking.py
+    python scripts/benchmark_reranking.py --sizes 10 100 1000 5000 --repeat 50 --top-k 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# The reranking service imports its packages relative to its own directory
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "services" / "reranking"))
+
+from database.db import FeatureSnapshot
+from features.completeness import calculate_property_quality_score
+from features.seller_reputation import calculate_seller_reputation_score
+from features.freshness import calculate_freshness_score
+from features.engagement import calculate_engagement_score
+from features.personalization import calculate_personalization_score
+from features.vectorized import FEATURE_NAMES, score_features, weight_vector, top_k_indices, feature_rows
+
+try:
+    from models.rerank import FeatureScores, RankedPropertyResult
+    HAS_PYDANTIC = True
+except ImportError:
+    HAS_PYDANTIC = False
+
+# Same values as services/reranking/main.py
+FEATURE_WEIGHTS = {
+    "property_quality": 0.40,
+    "seller_reputation": 0.20,
+    "freshness": 0.15,
+    "engagement": 0.15,
+    "personalization": 0.10
+}
+BLEND_ALPHA = 0.5
+
+TOTAL_KEYS = {
+    "property_quality": "property_quality_total",
+    "seller_reputation": "seller_reputation_total",
+    "freshness": "freshness_total",
+    "engagement": "engagement_total",
+    "personalization": "personalization_total"
+}
+
+
+# ============================================================================
+# Synthetic candidates
+# ============================================================================
+
+def synthetic_batch(n: int, seed: int = 42) -> Tuple[List[Dict[str, Any]], FeatureSnapshot, str]:
+    """Candidate dicts plus a snapshot with partial stats coverage"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    districts = ["Quận 1", "Quận 2", "Quận 7", "Bình Thạnh", "Thủ Đức", "Cầu Giấy", None]
+    types = ["apartment", "house", "villa", "land", None]
+    owners = [f"owner-{i}" for i in range(max(1, n // 5))]
+
+    def timestamp(max_days: int) -> Optional[str]:
+        roll = rng.random()
+        if roll < 0.1:
+            return None
+        if roll < 0.13:
+            return "not-a-date"
+        moment = now - timedelta(days=rng.uniform(0, max_days))
+        return moment.isoformat().replace("+00:00", "Z") if roll < 0.5 else moment.isoformat()
+
+    properties = []
+    for i in range(n):
+        created_at = timestamp(400)
+        properties.append({
+            "property_id": f"prop-{i}",
+            "score": rng.random(),
+            "title": rng.choice(["Căn hộ view sông 2PN", "House", None, "Biệt thự sân vườn gần trường quốc tế"]),
+            "description": rng.choice([
+                None, "",
+                "Căn hộ đẹp, full nội thất, gần chợ, trường học, an ninh 24/7. " * rng.randint(1, 8),
+                "Nice apartment with pool, gym and parking near the metro station. " * rng.randint(1, 5),
+            ]),
+            "property_type": rng.choice(types),
+            "listing_type": rng.choice(["sale", "rent", None]),
+            "price": rng.choice([None, rng.uniform(5e8, 3e10)]),
+            "area": rng.choice([None, rng.uniform(20, 400)]),
+            "bedrooms": rng.choice([None, rng.randint(1, 6)]),
+            "bathrooms": rng.choice([None, rng.randint(1, 4)]),
+            "city": rng.choice(["Hồ Chí Minh", "Hà Nội", None]),
+            "district": rng.choice(districts),
+            "ward": rng.choice(["Phường 1", None]),
+            "street_address": rng.choice(["12 Nguyễn Huệ", None]),
+            "images": [f"img-{k}.jpg" for k in range(rng.choice([0, 0, 1, 3, 5, 12]))],
+            "videos": [],
+            "contact_name": rng.choice(["Anh Minh", None]),
+            "contact_phone": rng.choice(["0900000000", None]),
+            "owner_id": rng.choice(owners + [None]),
+            "verified": rng.random() < 0.3,
+            "created_at": created_at,
+            "updated_at": timestamp(60) if created_at else None,
+            "amenities": rng.sample(["pool", "gym", "parking", "garden"], rng.randint(0, 4)),
+            "legal_status": rng.choice(["Sổ hồng", None]),
+            "furniture": rng.choice(["full", None]),
+        })
+
+    seller_stats = {
+        owner: {
+            "response_rate": rng.random(),
+            "closure_rate": rng.random(),
+            "avg_response_time_hours": rng.uniform(0, 72)
+        }
+        for owner in owners if rng.random() < 0.7
+    }
+    property_stats = {}
+    for p in properties:
+        if rng.random() < 0.6:
+            property_stats[p["property_id"]] = {
+                "views_7d": rng.randint(0, 200),
+                "inquiries_7d": rng.randint(0, 20),
+                "favorites_7d": rng.choice([None, rng.randint(0, 10)]),
+                "ctr": rng.choice([None, rng.uniform(0, 0.3)])
+            }
+    user_id = "user-1"
+    interaction_history = {
+        p["property_id"]: {
+            "has_clicked": rng.random() < 0.6,
+            "has_favorited": rng.random() < 0.3,
+            "has_inquired": rng.random() < 0.1
+        }
+        for p in properties if rng.random() < 0.2
+    }
+    snapshot = FeatureSnapshot(
+        seller_stats=seller_stats,
+        property_stats=property_stats,
+        user_preferences={
+            "min_price": 2e9,
+            "max_price": 8e9,
+            "preferred_districts": ["Quận 2", "Quận 7"],
+            "preferred_property_types": ["apartment"]
+        },
+        interaction_history=interaction_history,
+        user_id=user_id
+    )
+    return properties, snapshot, user_id
+
+
+# ============================================================================
+# Scoring paths
+# ============================================================================
+
+async def per_candidate(properties, snapshot, user_id, top_k=None) -> List[Dict[str, Any]]:
+    """Previous /rerank Stage 2: one await chain + model objects per candidate"""
+    ranked = []
+    for p in properties:
+        totals = {
+            "property_quality": calculate_property_quality_score(p),
+            "seller_reputation": await calculate_seller_reputation_score(p, snapshot),
+            "freshness": calculate_freshness_score(p),
+            "engagement": await calculate_engagement_score(p, snapshot),
+            "personalization": await calculate_personalization_score(p, user_id=user_id, db=snapshot)
+        }
+        scores = {name: totals[name][TOTAL_KEYS[name]] for name in FEATURE_NAMES}
+        weighted = sum(FEATURE_WEIGHTS[name] * scores[name] for name in FEATURE_NAMES)
+        final = BLEND_ALPHA * p["score"] + (1 - BLEND_ALPHA) * weighted
+        feature_scores = {
+            "completeness": scores["property_quality"],
+            "seller_reputation": scores["seller_reputation"],
+            "freshness": scores["freshness"],
+            "engagement": scores["engagement"],
+            "personalization": scores["personalization"],
+            "weighted_rerank_score": weighted
+        }
+        if HAS_PYDANTIC:
+            ranked.append(RankedPropertyResult(
+                **p,
+                final_score=final,
+                original_score=p["score"],
+                rerank_features=FeatureScores(**feature_scores)
+            ).model_dump())
+        else:
+            ranked.append({**p, "final_score": final, "original_score": p["score"], "rerank_features": feature_scores})
+
+    ranked.sort(key=lambda r: r["final_score"], reverse=True)
+    return ranked[:top_k] if top_k else ranked
+
+
+def vectorized(properties, snapshot, user_id, top_k=None) -> List[Dict[str, Any]]:
+    """Current /rerank Stage 2: feature columns, dot product, argpartition"""
+    features = score_features(properties, snapshot, user_id=user_id)
+    weighted = features @ weight_vector(FEATURE_WEIGHTS)
+    original = np.array([p["score"] for p in properties], dtype=float)
+    final = BLEND_ALPHA * original + (1 - BLEND_ALPHA) * weighted
+    order = top_k_indices(final, top_k)
+    return [
+        {**properties[i], "final_score": float(final[i]), "original_score": float(original[i]), "rerank_features": scores}
+        for i, scores in zip(order, feature_rows(features, weighted, order))
+    ]
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def compare(expected: List[Dict[str, Any]], actual: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    problems = []
+    if [r["property_id"] for r in expected] != [r["property_id"] for r in actual]:
+        problems.append("ranking order differs")
+    by_id = {r["property_id"]: r for r in actual}
+    for row in expected:
+        other = by_id.get(row["property_id"])
+        if other is None:
+            continue
+        for key, value in row["rerank_features"].items():
+            if abs(value - other["rerank_features"][key]) > tolerance:
+                problems.append(f"{row['property_id']}.{key}: {value!r} != {other['rerank_features'][key]!r}")
+        if abs(row["final_score"] - other["final_score"]) > tolerance:
+            problems.append(f"{row['property_id']}.final_score: {row['final_score']!r} != {other['final_score']!r}")
+    return problems
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule-based reranking scoring")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Candidate counts")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per size and path")
+    parser.add_argument("--top-k", type=int, default=None, help="Only keep the k best (default: all)")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Max score difference")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    mismatches = 0
+
+    if not HAS_PYDANTIC:
+        print("pydantic not installed: per-candidate path builds plain dicts (understates its cost)")
+
+    print(f"{'candidates':>10}  {'path':<14}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}   (ms)")
+    for size in args.sizes:
+        properties, snapshot, user_id = synthetic_batch(size, args.seed)
+
+        expected = loop.run_until_complete(per_candidate(properties, snapshot, user_id, args.top_k))
+        actual = vectorized(properties, snapshot, user_id, args.top_k)
+        problems = compare(expected, actual, args.tolerance)
+        if problems:
+            mismatches += len(problems)
+            for problem in problems[:10]:
+                print(f"MISMATCH ({size}): {problem}")
+
+        timings = {"per-candidate": [], "vectorized": []}
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            loop.run_until_complete(per_candidate(properties, snapshot, user_id, args.top_k))
+            timings["per-candidate"].append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            vectorized(properties, snapshot, user_id, args.top_k)
+            timings["vectorized"].append((time.perf_counter() - start) * 1000)
+
+        stats = {name: summarize(values) for name, values in timings.items()}
+        for name, values in stats.items():
+            print(f"{size:>10}  {name:<14}" + "".join(f"{values[k]:>10.3f}" for k in ("mean", "p50", "p95", "p99")))
+        print(f"{'':>10}  speedup (mean): {stats['per-candidate']['mean'] / stats['vectorized']['mean']:.1f}x")
+
+    loop.close()
+    print(f"\nMismatches: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
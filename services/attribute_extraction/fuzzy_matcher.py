@@ -7,16 +7,25 @@ import asyncpg
 from fuzzywuzzy import fuzz
 from shared.utils.logger import setup_logger, LogEmoji
 from shared.config import settings
+from shared.database.master_data_index import get_master_data_index
+
+
+# Sentinel: index not loaded, fall back to SQL
+_NOT_INDEXED = object()
 
 
 class FuzzyMatcher:
     """
     Fuzzy matching against PostgreSQL master data with multi-language support
+
+    Lookups are served from the shared in-memory MasterDataIndex once it is
+    loaded; the SQL paths below remain as a fallback.
     """
 
     def __init__(self):
         self.logger = setup_logger("fuzzy_matcher")
         self.db_pool: Optional[asyncpg.Pool] = None
+        self.index = get_master_data_index()
 
     async def initialize(self):
         """Initialize PostgreSQL connection pool"""
@@ -35,11 +44,51 @@ class FuzzyMatcher:
             self.logger.error(f"{LogEmoji.ERROR} Failed to connect to PostgreSQL: {e}")
             raise
 
+        try:
+            await self.index.start(self.db_pool)
+        except Exception as e:
+            self.logger.warning(f"{LogEmoji.WARNING} Master data index unavailable, using SQL matching: {e}")
+
     async def close(self):
         """Close database connection pool"""
+        await self.index.stop(self.db_pool)
         if self.db_pool:
             await self.db_pool.close()
 
+    def _match_from_index(
+        self,
+        table: str,
+        value: str,
+        source_language: str,
+        threshold: float,
+        include_category: bool = False
+    ) -> Any:
+        """
+        Match against the in-memory index
+
+        Returns:
+            Match dict, None if no match, or _NOT_INDEXED if the table is not loaded
+        """
+        entity_index = self.index.get(table)
+        if entity_index is None:
+            return _NOT_INDEXED
+
+        match = entity_index.match(value, source_language, threshold)
+        if not match:
+            return None
+
+        result = {
+            "id": match.record.id,
+            "code": match.record.code,
+            "name_en": match.record.name_en,
+            "name_translated": match.record.name_in(source_language),
+            "confidence": match.confidence,
+            "match_method": "fuzzy" if match.match_type == "fuzzy" else "exact"
+        }
+        if include_category:
+            result["category"] = match.record.extra.get("category")
+        return result
+
     async def match_district(
         self,
         value: str,
@@ -68,6 +117,10 @@ class FuzzyMatcher:
         if not self.db_pool:
             await self.initialize()
 
+        result = self._match_from_index("districts:hcmc", value, source_language, threshold)
+        if result is not _NOT_INDEXED:
+            return result
+
         try:
             async with self.db_pool.acquire() as conn:
                 # Query districts with translations
@@ -150,6 +203,10 @@ class FuzzyMatcher:
         if not self.db_pool:
             await self.initialize()
 
+        result = self._match_from_index("property_types", value, source_language, threshold)
+        if result is not _NOT_INDEXED:
+            return result
+
         try:
             async with self.db_pool.acquire() as conn:
                 query = """
@@ -228,6 +285,12 @@ class FuzzyMatcher:
         if not self.db_pool:
             await self.initialize()
 
+        result = self._match_from_index(
+            "amenities", value, source_language, threshold, include_category=True
+        )
+        if result is not _NOT_INDEXED:
+            return result
+
         try:
             async with self.db_pool.acquire() as conn:
                 query = """
@@ -334,6 +397,10 @@ class FuzzyMatcher:
             self.logger.warning(f"{LogEmoji.WARNING} Unknown table: {table}")
             return None
 
+        result = self._match_from_index(table, value, source_language, threshold)
+        if result is not _NOT_INDEXED:
+            return result
+
         try:
             async with self.db_pool.acquire() as conn:
                 # Build dynamic query
@@ -1371,6 +1371,16 @@ Output: {
 
         return " ".join(parts) if parts else t("attribute_extraction.display_default", language=language)
 
+    async def on_startup(self):
+        """Warm the master data index before serving traffic"""
+        await super().on_startup()
+        try:
+            await self.master_data_validator.initialize()
+            await self.master_data_extractor.initialize()
+            self._extractor_initialized = True
+        except Exception as e:
+            self.logger.warning(f"{LogEmoji.WARNING} Master data warm-up failed, will retry lazily: {e}")
+
     async def on_shutdown(self):
         """Cleanup on shutdown"""
         await self.http_client.aclose()
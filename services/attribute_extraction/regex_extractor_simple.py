@@ -10,6 +10,75 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 
 
+# Characters re.IGNORECASE treats as equal to a Latin letter that str.lower()
+# doesn't map to it (long s, dotted/dotless i)
+_CASE_FIXES = str.maketrans({"\u017f": "s", "\u0130": "i", "\u0131": "i"})
+
+
+def _fold(text: str) -> str:
+    """Case folding compatible with re.IGNORECASE for keyword presence checks"""
+    return text.translate(_CASE_FIXES).lower()
+
+
+class PatternScanner:
+    """
+    Ordered pattern lists for several categories, compiled once
+
+    Each pattern may declare keywords, one of which must occur in the text
+    (case-insensitively) for the pattern to match at all. A query is folded
+    once and checked for every keyword; only patterns whose keywords are
+    present are searched, in list order, so each category still yields the
+    first pattern in its list that matches anywhere (same result as calling
+    re.search() on every pattern in turn).
+    """
+
+    def __init__(
+        self,
+        categories: Dict[str, List[str]],
+        keywords: Dict[str, List[str]],
+        flags: int = re.IGNORECASE
+    ):
+        """
+        Args:
+            categories: Category name -> patterns in priority order
+            keywords: Pattern -> keywords it needs (patterns without an entry are always searched)
+            flags: Flags every pattern is compiled with
+        """
+        self.categories: Dict[str, List[Tuple[re.Pattern, Optional[frozenset]]]] = {}
+        all_keywords = set()
+        for category, patterns in categories.items():
+            compiled = []
+            for pattern in patterns:
+                required = keywords.get(pattern)
+                if required is not None:
+                    required = frozenset(_fold(kw) for kw in required)
+                    all_keywords |= required
+                compiled.append((re.compile(pattern, flags), required))
+            self.categories[category] = compiled
+        self._keywords = sorted(all_keywords)
+
+    def scan(self, text: str) -> Dict[str, Tuple[int, re.Match]]:
+        """
+        First matching pattern per category
+
+        Returns:
+            Category -> (pattern index, match); categories without a match are absent
+        """
+        folded = _fold(text)
+        present = {kw for kw in self._keywords if kw in folded}
+
+        hits: Dict[str, Tuple[int, re.Match]] = {}
+        for category, patterns in self.categories.items():
+            for idx, (regex, required) in enumerate(patterns):
+                if required is not None and present.isdisjoint(required):
+                    continue
+                match = regex.search(text)
+                if match:
+                    hits[category] = (idx, match)
+                    break
+        return hits
+
+
 class SimpleRegexExtractor:
     """
     Regex-based attribute extractor with i18n-compliant patterns.
@@ -40,15 +109,20 @@ class SimpleRegexExtractor:
                 f"RULE #0 violation: System cannot operate without master data! Error: {e}"
             )
 
+        # Keywords each pattern needs to match (prefilter for the scanner)
+        self.pattern_keywords: Dict[str, List[str]] = {}
+
         # Build district patterns from master data
         self.district_patterns = []
         district_config = self.keywords.get("district_abbreviations", {}).get("patterns", {})
         for abbr in district_config.keys():
             # Prevent matching digits before abbreviation (e.g., "10Q1" shouldn't match)
             if re.match(r'^[QD]\d+$', abbr):
-                self.district_patterns.append(f'(?<![0-9])\\b{re.escape(abbr)}\\b')
+                pattern = f'(?<![0-9])\\b{re.escape(abbr)}\\b'
             else:
-                self.district_patterns.append(f'\\b{re.escape(abbr)}\\b')
+                pattern = f'\\b{re.escape(abbr)}\\b'
+            self.district_patterns.append(pattern)
+            self.pattern_keywords[pattern] = [abbr]
 
         # Build property type patterns from master data (RULE #0 compliant)
         self.property_type_patterns = self._build_property_type_patterns()
@@ -68,6 +142,9 @@ class SimpleRegexExtractor:
         # Build area patterns from master data (RULE #0 compliant)
         self.area_patterns = self._build_area_patterns()
 
+        # Compile all of the above once, behind a keyword prefilter
+        self._scanner = self._build_scanner()
+
     def _build_property_type_patterns(self) -> List[Tuple[str, str]]:
         """
         Build property type regex patterns from master data
@@ -77,6 +154,16 @@ class SimpleRegexExtractor:
         patterns = []
         property_types = self.keywords.get("property_types", {})
 
+        # Master data is grouped by language first ({"vi": {type: [...]}});
+        # regroup by property type
+        if any(lang in property_types for lang in ("vi", "en")):
+            by_type: Dict[str, Dict[str, List[str]]] = {}
+            for lang, types in property_types.items():
+                if isinstance(types, dict):
+                    for prop_type_key, keywords in types.items():
+                        by_type.setdefault(prop_type_key, {})[lang] = keywords
+            property_types = by_type
+
         # For each property type, build regex from vi/en keywords
         for prop_type_key, langs in property_types.items():
             if prop_type_key == "description":
@@ -101,6 +188,7 @@ class SimpleRegexExtractor:
                     escaped = [re.escape(kw) for kw in all_keywords]
                     pattern = r'\b(' + '|'.join(escaped) + r')\b'
                     patterns.append((pattern, prop_type_key))
+                    self.pattern_keywords[pattern] = all_keywords
 
         return patterns
 
@@ -111,7 +199,7 @@ class SimpleRegexExtractor:
         RULE #0: Load from multilingual_keywords.json, NO hardcoding!
         """
         patterns = []
-        listing_type_config = self.keywords.get("attribute_keywords", {}).get("listing_type", {})
+        listing_type_config = self.keywords.get("property_attributes", {}).get("listing_type", {})
 
         if "values" in listing_type_config:
             for listing_value, langs in listing_type_config["values"].items():
@@ -127,6 +215,7 @@ class SimpleRegexExtractor:
                     escaped = [re.escape(kw) for kw in all_keywords]
                     pattern = r'\b(' + '|'.join(escaped) + r')\b'
                     patterns.append((pattern, listing_value))
+                    self.pattern_keywords[pattern] = all_keywords
 
         return patterns
 
@@ -138,7 +227,7 @@ class SimpleRegexExtractor:
         BUGFIX #30: Use master data units to prevent parsing errors
         """
         patterns = []
-        price_config = self.keywords.get("attribute_keywords", {}).get("price", {})
+        price_config = self.keywords.get("property_attributes", {}).get("price", {})
         price_units = price_config.get("units", {})
 
         # Get price keywords (giá, gia, price, etc.)
@@ -151,10 +240,9 @@ class SimpleRegexExtractor:
         # Zero price pattern
         if price_keywords:
             price_kw_pattern = '|'.join([re.escape(kw) for kw in price_keywords])
-            patterns.append((
-                f'\\b({price_kw_pattern})\\s*:?\\s*0\\b',
-                0
-            ))
+            pattern = f'\\b({price_kw_pattern})\\s*:?\\s*0\\b'
+            patterns.append((pattern, 0))
+            self.pattern_keywords[pattern] = price_keywords
 
         # Build patterns for each price unit from master data
         for unit_name, multiplier in price_units.items():
@@ -177,6 +265,10 @@ class SimpleRegexExtractor:
                 lambda m, mult=multiplier: {'min_price': float(m.group(1).replace(',', '.')) * mult}
             ))
 
+            # Every pattern for this unit needs the unit itself
+            for pattern, _ in patterns[-3:]:
+                self.pattern_keywords[pattern] = [unit_name]
+
         return patterns
 
     def _build_bedroom_patterns(self) -> List[Tuple[str, Any]]:
@@ -186,7 +278,7 @@ class SimpleRegexExtractor:
         RULE #0: Load bedroom keywords from multilingual_keywords.json!
         """
         patterns = []
-        bedrooms_config = self.keywords.get("attribute_keywords", {}).get("bedrooms", {})
+        bedrooms_config = self.keywords.get("property_attributes", {}).get("bedrooms", {})
 
         # Collect all bedroom keywords
         bedroom_keywords = []
@@ -202,6 +294,7 @@ class SimpleRegexExtractor:
             escaped = [re.escape(kw) for kw in bedroom_keywords]
             pattern = f'(\\d+)\\s*(?:{"|".join(escaped)})\\b'
             patterns.append((pattern, lambda m: int(m.group(1))))
+            self.pattern_keywords[pattern] = bedroom_keywords
 
         return patterns
 
@@ -212,7 +305,7 @@ class SimpleRegexExtractor:
         RULE #0: Load bathroom keywords from multilingual_keywords.json!
         """
         patterns = []
-        bathrooms_config = self.keywords.get("attribute_keywords", {}).get("bathrooms", {})
+        bathrooms_config = self.keywords.get("property_attributes", {}).get("bathrooms", {})
 
         # Collect all bathroom keywords
         bathroom_keywords = []
@@ -228,6 +321,7 @@ class SimpleRegexExtractor:
             escaped = [re.escape(kw) for kw in bathroom_keywords]
             pattern = f'(\\d+)\\s*(?:{"|".join(escaped)})\\b'
             patterns.append((pattern, lambda m: int(m.group(1))))
+            self.pattern_keywords[pattern] = bathroom_keywords
 
         return patterns
 
@@ -238,7 +332,7 @@ class SimpleRegexExtractor:
         RULE #0: Load area units from multilingual_keywords.json!
         """
         patterns = []
-        area_config = self.keywords.get("attribute_keywords", {}).get("area", {})
+        area_config = self.keywords.get("property_attributes", {}).get("area", {})
 
         # Get area units (m2, m², sqm, etc.)
         area_units = area_config.get("units", [])
@@ -248,9 +342,22 @@ class SimpleRegexExtractor:
             escaped = [re.escape(unit) for unit in area_units]
             pattern = f'(\\d+(?:\\.\\d+)?)\\s*(?:{"|".join(escaped)})\\b'
             patterns.append((pattern, lambda m: float(m.group(1))))
+            self.pattern_keywords[pattern] = area_units
 
         return patterns
 
+    def _build_scanner(self) -> "PatternScanner":
+        """Compile every category once, with its keyword prefilter"""
+        return PatternScanner({
+            "district": self.district_patterns,
+            "property_type": [pattern for pattern, _ in self.property_type_patterns],
+            "listing_type": [pattern for pattern, _ in self.listing_type_patterns],
+            "price": [pattern for pattern, _ in self.price_patterns],
+            "bedrooms": [pattern for pattern, _ in self.bedroom_patterns],
+            "bathrooms": [pattern for pattern, _ in self.bathroom_patterns],
+            "area": [pattern for pattern, _ in self.area_patterns],
+        }, self.pattern_keywords)
+
     def extract(self, query: str) -> Dict[str, Any]:
         """
         Extract entities using regex patterns
@@ -259,117 +366,76 @@ class SimpleRegexExtractor:
             Dict with extracted entities
         """
         entities = {}
+        hits = self._scanner.scan(query)
 
         # Extract district
-        district = self._extract_district(query)
-        if district:
-            entities['district'] = district
+        if "district" in hits:
+            district = self._extract_district(hits["district"][1])
+            if district:
+                entities['district'] = district
 
         # Extract property type
-        property_type = self._extract_property_type(query)
-        if property_type:
-            entities['property_type'] = property_type
+        if "property_type" in hits:
+            entities['property_type'] = self.property_type_patterns[hits["property_type"][0]][1]
 
         # Extract listing type
-        listing_type = self._extract_listing_type(query)
-        if listing_type:
-            entities['listing_type'] = listing_type
+        if "listing_type" in hits:
+            entities['listing_type'] = self.listing_type_patterns[hits["listing_type"][0]][1]
 
         # Extract price
-        price_info = self._extract_price(query)
-        if price_info:
-            entities.update(price_info)
+        if "price" in hits:
+            entities.update(self._extract_price(*hits["price"]))
 
         # Extract bedrooms
-        bedrooms = self._extract_bedrooms(query)
-        if bedrooms:
-            entities['bedrooms'] = bedrooms
+        if "bedrooms" in hits:
+            bedrooms = self._apply_handler(self.bedroom_patterns, *hits["bedrooms"])
+            if bedrooms:
+                entities['bedrooms'] = bedrooms
 
         # Extract bathrooms
-        bathrooms = self._extract_bathrooms(query)
-        if bathrooms:
-            entities['bathrooms'] = bathrooms
+        if "bathrooms" in hits:
+            bathrooms = self._apply_handler(self.bathroom_patterns, *hits["bathrooms"])
+            if bathrooms:
+                entities['bathrooms'] = bathrooms
 
         # Extract area
-        area = self._extract_area(query)
-        if area:
-            entities['area'] = area
+        if "area" in hits:
+            area = self._apply_handler(self.area_patterns, *hits["area"])
+            if area:
+                entities['area'] = area
 
         return entities
 
-    def _extract_district(self, query: str) -> Optional[str]:
-        """Extract district from query"""
-        for pattern in self.district_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                matched_text = match.group(0)
-                # Normalize: Q7 -> District 7, Quận 7 -> District 7
-                if re.match(r'^[QD](\d+)$', matched_text, re.IGNORECASE):
-                    num = re.search(r'\d+', matched_text).group()
-                    return f"District {num}"
-                elif 'quận' in matched_text.lower() or 'quan' in matched_text.lower():
-                    num = re.search(r'\d+', matched_text)
-                    if num:
-                        return f"District {num.group()}"
-                return matched_text.title()
-        return None
-
-    def _extract_property_type(self, query: str) -> Optional[str]:
-        """Extract property type from query"""
-        for pattern, prop_type in self.property_type_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                return prop_type
-        return None
-
-    def _extract_listing_type(self, query: str) -> Optional[str]:
-        """Extract listing type (rent/sale) from query"""
-        for pattern, listing_type in self.listing_type_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                return listing_type
-        return None
-
-    def _extract_price(self, query: str) -> Dict[str, Any]:
-        """Extract price information from query"""
+    def _extract_district(self, match: re.Match) -> Optional[str]:
+        """Normalize a matched district: Q7 -> District 7, Quận 7 -> District 7"""
+        matched_text = match.group(0)
+        if re.match(r'^[QD](\d+)$', matched_text, re.IGNORECASE):
+            num = re.search(r'\d+', matched_text).group()
+            return f"District {num}"
+        elif 'quận' in matched_text.lower() or 'quan' in matched_text.lower():
+            num = re.search(r'\d+', matched_text)
+            if num:
+                return f"District {num.group()}"
+        return matched_text.title()
+
+    def _extract_price(self, index: int, match: re.Match) -> Dict[str, Any]:
+        """Price information from the first matching price pattern"""
         price_info = {}
-
-        for pattern, handler in self.price_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                if callable(handler):
-                    result = handler(match)
-                    if isinstance(result, dict):
-                        price_info.update(result)
-                    else:
-                        price_info['price'] = result
-                else:
-                    price_info['price'] = handler
-                break  # Take first match
-
+        handler = self.price_patterns[index][1]
+        if callable(handler):
+            result = handler(match)
+            if isinstance(result, dict):
+                price_info.update(result)
+            else:
+                price_info['price'] = result
+        else:
+            price_info['price'] = handler
         return price_info
 
-    def _extract_bedrooms(self, query: str) -> Optional[int]:
-        """Extract number of bedrooms"""
-        for pattern, handler in self.bedroom_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return handler(match)
-        return None
-
-    def _extract_bathrooms(self, query: str) -> Optional[int]:
-        """Extract number of bathrooms"""
-        for pattern, handler in self.bathroom_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return handler(match)
-        return None
-
-    def _extract_area(self, query: str) -> Optional[float]:
-        """Extract area in square meters"""
-        for pattern, handler in self.area_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return handler(match)
-        return None
+    @staticmethod
+    def _apply_handler(patterns: List[Tuple[str, Any]], index: int, match: re.Match) -> Any:
+        """Run the handler of the pattern that matched"""
+        return patterns[index][1](match)
 
     def get_confidence(self, entities: Dict[str, Any]) -> float:
         """
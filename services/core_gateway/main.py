@@ -6,9 +6,11 @@ Enhanced with:
 - Multi-provider failover
 """
 import time
+import json
 import base64
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 import httpx
 from httpx import HTTPStatusError
 
@@ -20,6 +22,7 @@ from shared.models.core_gateway import (
 from shared.utils.logger import LogEmoji
 from shared.config import settings
 from shared.utils.redis_cache import get_semantic_cache
+from shared.utils.sse import SSE_HEADERS, sse_event, iter_sse_events
 from services.core_gateway.model_router import ModelRouter, QueryComplexity
 
 
@@ -55,6 +58,7 @@ class CoreGateway(BaseService):
         # NEW: Semantic cache for LLM responses
         # Cache similar queries to reduce latency + cost
         self.semantic_cache = get_semantic_cache(namespace="llm_responses")
+        self.semantic_cache.embed_fn = self._embed_for_cache
         self.cache_ttl = 3600  # 1 hour (LLM responses can change with time)
 
         # NEW: Intelligent model routing
@@ -152,6 +156,7 @@ class CoreGateway(BaseService):
             try:
                 start_time = time.time()
                 is_multimodal = request.is_multimodal()
+                original_model = request.model
 
                 # MEDIUM FIX Bug#3: Log comprehensive request context
                 self.logger.info(
@@ -167,9 +172,11 @@ class CoreGateway(BaseService):
                     last_user_message = user_messages[-1].content
                     if isinstance(last_user_message, str):
                         await self.semantic_cache.connect()
+                        # Tag by requested model + temperature so a hit never crosses models
                         cached_response = await self.semantic_cache.get_similar(
                             query=last_user_message,
-                            threshold=0.95
+                            model=request.model.value,
+                            temperature=request.temperature
                         )
 
                         if cached_response:
@@ -184,7 +191,6 @@ class CoreGateway(BaseService):
                             return LLMResponse(**cached_response)
 
                 # NEW STEP 2: Intelligent model routing (cost optimization)
-                original_model = request.model
                 if self.enable_intelligent_routing:
                     optimal_model = self.router.select_model(
                         current_model=request.model,
@@ -208,19 +214,7 @@ class CoreGateway(BaseService):
                         response = await self._call_openai(request)
                         self.logger.info(f"{LogEmoji.SUCCESS} Using OpenAI")
                     except (HTTPStatusError, Exception) as openai_error:
-                        error_str = str(openai_error)
-
-                        # Check status code for HTTP errors
-                        is_rate_limit = False
-                        if isinstance(openai_error, HTTPStatusError):
-                            is_rate_limit = openai_error.response.status_code == 429
-                        else:
-                            # Check string for rate limit indicators
-                            is_rate_limit = ("429" in error_str or
-                                           "rate_limit" in error_str.lower() or
-                                           "quota" in error_str.lower())
-
-                        if is_rate_limit:
+                        if self._is_rate_limit(openai_error):
                             self.logger.warning(
                                 f"{LogEmoji.WARNING} OpenAI rate limit/quota exceeded, "
                                 f"failing over to Ollama"
@@ -257,7 +251,9 @@ class CoreGateway(BaseService):
                         await self.semantic_cache.set_similar(
                             query=last_user_message,
                             response=response.dict(),
-                            ttl=self.cache_ttl
+                            ttl=self.cache_ttl,
+                            model=original_model.value,
+                            temperature=request.temperature
                         )
                         self.logger.info(f"{LogEmoji.SUCCESS} Response cached for future queries")
 
@@ -270,6 +266,52 @@ class CoreGateway(BaseService):
                 self.logger.error(f"{LogEmoji.ERROR} All LLM providers failed: {e}", exc_info=True)
                 raise HTTPException(status_code=500, detail="LLM service temporarily unavailable. Please try again later.")
 
+        @self.app.post("/chat/completions/stream")
+        async def chat_completions_stream(request: LLMRequest):
+            """
+            Streaming chat completions (Server-Sent Events)
+
+            Events:
+            - {"type": "token", "content"} as the provider produces them
+            - {"type": "done", "model", "finish_reason", "cached"} at the end
+            - {"type": "error", "message"} if every provider failed
+
+            Same cache / routing / failover as /chat/completions; failover to
+            Ollama only happens before the first token. Multimodal requests
+            are answered in one chunk.
+            """
+            async def event_generator():
+                try:
+                    if request.is_multimodal():
+                        response = await chat_completions(request)
+                        yield sse_event({"type": "token", "content": response.content})
+                        yield sse_event({
+                            "type": "done",
+                            "model": response.model,
+                            "finish_reason": response.finish_reason,
+                            "cached": False
+                        })
+                        return
+
+                    async for event in self._stream_completion(request):
+                        yield sse_event(event)
+
+                except Exception as e:
+                    # HIGH PRIORITY FIX: Don't expose internal error details
+                    self.logger.error(f"{LogEmoji.ERROR} LLM stream failed: {e}", exc_info=True)
+                    yield sse_event({"type": "error", "message": "LLM service temporarily unavailable. Please try again later."})
+
+            return StreamingResponse(
+                event_generator(),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
+
+        @self.app.get("/cache/stats")
+        async def cache_stats():
+            """Semantic cache hit/miss/near-miss counters."""
+            return self.semantic_cache.get_stats()
+
         @self.app.post("/embeddings", response_model=EmbeddingResponse)
         async def create_embeddings(request: EmbeddingRequest):
             """Create text embeddings."""
@@ -282,26 +324,8 @@ class CoreGateway(BaseService):
                         detail="OpenAI API key not configured"
                     )
 
-                # Call OpenAI embeddings API
-                headers = {
-                    "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-                    "Content-Type": "application/json"
-                }
-
                 texts = [request.input] if isinstance(request.input, str) else request.input
-
-                payload = {
-                    "model": request.model,
-                    "input": texts
-                }
-
-                response = await self.http_client.post(
-                    "https://api.openai.com/v1/embeddings",
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
+                data = await self._call_openai_embeddings(texts, request.model)
 
                 # Extract embeddings
                 embeddings = [item["embedding"] for item in data["data"]]
@@ -319,6 +343,140 @@ class CoreGateway(BaseService):
                 self.logger.error(f"{LogEmoji.ERROR} Embedding request failed: {e}", exc_info=True)
                 raise HTTPException(status_code=500, detail="Embedding service temporarily unavailable. Please try again later.")
 
+    @staticmethod
+    def _is_rate_limit(error: Exception) -> bool:
+        """Whether an OpenAI error is a rate limit / quota error (→ fail over to Ollama)."""
+        # Check status code for HTTP errors
+        if isinstance(error, HTTPStatusError):
+            return error.response.status_code == 429
+        # Check string for rate limit indicators
+        error_str = str(error).lower()
+        return "429" in error_str or "rate_limit" in error_str or "quota" in error_str
+
+    async def _stream_completion(self, request: LLMRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Token and done events for a text-only request.
+
+        Tokens are forwarded as soon as the provider sends them; the full
+        text is only assembled to populate the semantic cache afterwards.
+        """
+        start_time = time.time()
+        original_model = request.model
+
+        self.logger.info(
+            f"{LogEmoji.AI} LLM Stream Request: model={request.model.value}, "
+            f"messages={len(request.messages)}, max_tokens={request.max_tokens}, temp={request.temperature}"
+        )
+
+        user_messages = [msg for msg in request.messages if msg.role == "user"]
+        last_user_message = user_messages[-1].content if user_messages else None
+        cacheable = isinstance(last_user_message, str)
+
+        if cacheable:
+            await self.semantic_cache.connect()
+            cached_response = await self.semantic_cache.get_similar(
+                query=last_user_message,
+                model=request.model.value,
+                temperature=request.temperature
+            )
+            if cached_response:
+                self.logger.info(f"{LogEmoji.SUCCESS} CACHE HIT! Streaming cached response")
+                yield {"type": "token", "content": cached_response.get("content", "")}
+                yield {
+                    "type": "done",
+                    "model": cached_response.get("model"),
+                    "finish_reason": cached_response.get("finish_reason"),
+                    "cached": True
+                }
+                return
+
+        if self.enable_intelligent_routing:
+            request.model = self.router.select_model(
+                current_model=request.model,
+                messages=request.messages,
+                is_multimodal=False,
+                enable_routing=True
+            )
+            if request.model != original_model:
+                self.logger.info(
+                    f"{LogEmoji.SUCCESS} Model routing: {original_model.value} → {request.model.value}"
+                )
+
+        parts: List[str] = []
+        last_chunk: Dict[str, Any] = {}
+
+        if request.model.value.startswith("ollama/"):
+            chunks = self._stream_ollama_text_only(request)
+        else:
+            chunks = self._stream_openai_text_only(request)
+
+        try:
+            async for chunk in chunks:
+                last_chunk = chunk
+                if chunk["content"]:
+                    parts.append(chunk["content"])
+                    yield {"type": "token", "content": chunk["content"]}
+        except Exception as e:
+            # Failover is only possible before anything reached the client
+            if parts or request.model.value.startswith("ollama/") or not self._is_rate_limit(e):
+                raise
+            self.logger.warning(
+                f"{LogEmoji.WARNING} OpenAI rate limit/quota exceeded, failing over to Ollama"
+            )
+            async for chunk in self._stream_ollama_text_only(request):
+                last_chunk = chunk
+                if chunk["content"]:
+                    parts.append(chunk["content"])
+                    yield {"type": "token", "content": chunk["content"]}
+
+        model = last_chunk.get("model") or request.model.value
+        finish_reason = last_chunk.get("finish_reason") or "stop"
+        execution_time = (time.time() - start_time) * 1000
+        self.logger.info(
+            f"{LogEmoji.SUCCESS} LLM stream completed: model={model}, "
+            f"chunks={len(parts)}, time={execution_time:.2f}ms"
+        )
+
+        yield {"type": "done", "model": model, "finish_reason": finish_reason, "cached": False}
+
+        if cacheable and parts:
+            response = LLMResponse(
+                id=last_chunk.get("id") or f"stream-{int(time.time())}",
+                model=model,
+                content="".join(parts),
+                role="assistant",
+                finish_reason=finish_reason
+            )
+            await self.semantic_cache.set_similar(
+                query=last_user_message,
+                response=response.dict(),
+                ttl=self.cache_ttl,
+                model=original_model.value,
+                temperature=request.temperature
+            )
+
+    async def _call_openai_embeddings(self, texts: List[str], model: str) -> Dict[str, Any]:
+        """Call OpenAI embeddings API and return the raw response body."""
+        headers = {
+            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
+            "Content-Type": "application/json"
+        }
+
+        response = await self.http_client.post(
+            "https://api.openai.com/v1/embeddings",
+            headers=headers,
+            json={"model": model, "input": texts}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _embed_for_cache(self, texts: List[str]) -> List[List[float]]:
+        """Embedding function used by the semantic cache for query lookup."""
+        if not settings.OPENAI_API_KEY:
+            raise RuntimeError("OpenAI API key not configured")
+        data = await self._call_openai_embeddings(texts, settings.SEMANTIC_CACHE_EMBEDDING_MODEL)
+        return [item["embedding"] for item in data["data"]]
+
     async def _call_openai(self, request: LLMRequest) -> LLMResponse:
         """
         Call OpenAI API (routes to vision handler if multimodal).
@@ -338,19 +496,21 @@ class CoreGateway(BaseService):
         else:
             return await self._call_openai_text_only(request)
 
-    async def _call_openai_text_only(self, request: LLMRequest) -> LLMResponse:
-        """Call OpenAI API for text-only requests."""
+    def _openai_headers(self) -> Dict[str, str]:
+        """OpenAI auth headers (raises if no API key is configured)."""
         if not settings.OPENAI_API_KEY:
             raise HTTPException(
                 status_code=500,
                 detail="OpenAI API key not configured"
             )
 
-        headers = {
+        return {
             "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
             "Content-Type": "application/json"
         }
 
+    def _openai_text_payload(self, request: LLMRequest) -> Dict[str, Any]:
+        """Request body for OpenAI text-only chat completions."""
         payload = {
             "model": request.model.value,
             "messages": [msg.dict() for msg in request.messages],
@@ -366,10 +526,14 @@ class CoreGateway(BaseService):
         if request.frequency_penalty:
             payload["frequency_penalty"] = request.frequency_penalty
 
+        return payload
+
+    async def _call_openai_text_only(self, request: LLMRequest) -> LLMResponse:
+        """Call OpenAI API for text-only requests."""
         response = await self.http_client.post(
             "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload
+            headers=self._openai_headers(),
+            json=self._openai_text_payload(request)
         )
         response.raise_for_status()
         data = response.json()
@@ -387,6 +551,30 @@ class CoreGateway(BaseService):
             usage=Usage(**data["usage"]) if "usage" in data else None
         )
 
+    async def _stream_openai_text_only(self, request: LLMRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Stream OpenAI chunks for text-only requests (id, model, content, finish_reason)."""
+        payload = self._openai_text_payload(request)
+        payload["stream"] = True
+
+        async with self.http_client.stream(
+            "POST",
+            "https://api.openai.com/v1/chat/completions",
+            headers=self._openai_headers(),
+            json=payload
+        ) as response:
+            response.raise_for_status()
+            async for data in iter_sse_events(response):
+                choices = data.get("choices") or []
+                if not choices:
+                    continue
+                choice = choices[0]
+                yield {
+                    "id": data.get("id"),
+                    "model": data.get("model"),
+                    "content": (choice.get("delta") or {}).get("content") or "",
+                    "finish_reason": choice.get("finish_reason")
+                }
+
     async def _call_openai_multimodal(self, request: LLMRequest) -> LLMResponse:
         """
         Call OpenAI Vision API for multimodal requests (images + text).
@@ -477,8 +665,8 @@ class CoreGateway(BaseService):
         else:
             return await self._call_ollama_text_only(request)
 
-    async def _call_ollama_text_only(self, request: LLMRequest) -> LLMResponse:
-        """Call Ollama API for text-only requests."""
+    def _ollama_text_payload(self, request: LLMRequest) -> Dict[str, Any]:
+        """Request body for Ollama text-only chat."""
         # Extract model name (remove "ollama/" prefix)
         # If failover from OpenAI, use thinking-capable model for better intent detection
         if request.model.value.startswith("ollama/"):
@@ -511,6 +699,13 @@ class CoreGateway(BaseService):
         if request.max_tokens:
             payload["options"]["num_predict"] = request.max_tokens
 
+        return payload
+
+    async def _call_ollama_text_only(self, request: LLMRequest) -> LLMResponse:
+        """Call Ollama API for text-only requests."""
+        payload = self._ollama_text_payload(request)
+        model_name = payload["model"]
+
         response = await self.http_client.post(
             f"{settings.OLLAMA_BASE_URL}/api/chat",
             json=payload
@@ -539,6 +734,28 @@ class CoreGateway(BaseService):
             )
         )
 
+    async def _stream_ollama_text_only(self, request: LLMRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Stream Ollama chunks (NDJSON) for text-only requests."""
+        payload = self._ollama_text_payload(request)
+        payload["stream"] = True
+
+        async with self.http_client.stream(
+            "POST",
+            f"{settings.OLLAMA_BASE_URL}/api/chat",
+            json=payload
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                yield {
+                    "id": None,
+                    "model": payload["model"],
+                    "content": data.get("message", {}).get("content", ""),
+                    "finish_reason": "stop" if data.get("done") else None
+                }
+
     async def _call_ollama_vision(self, request: LLMRequest) -> LLMResponse:
         """
         Call Ollama Vision API for multimodal requests.
@@ -245,27 +245,30 @@ class AICrawlerCLI:
 
         crawl_mode = CrawlMode.FULL if mode == "full" else CrawlMode.INCREMENTAL
 
-        if domain:
-            # Crawl specific site
-            print(f"\n🚀 Starting {mode} crawl for: {domain}")
-
-            # Load config for this site
-            configs = await orchestrator.load_configs(enabled_only=False)
-            config = next((c for c in configs if c.site_domain == domain), None)
-
-            if not config:
-                print(f"❌ Site not found: {domain}")
-                return
-
-            if not config.enabled:
-                print(f"⚠️  Site is disabled. Enable it first with: python ai_crawler_cli.py enable {domain}")
-                return
-
-            await orchestrator.crawl_site(config, crawl_mode)
-        else:
-            # Crawl all enabled sites
-            print(f"\n🚀 Starting {mode} crawl for all enabled sites...")
-            await orchestrator.start_all(crawl_mode)
+        try:
+            if domain:
+                # Crawl specific site
+                print(f"\n🚀 Starting {mode} crawl for: {domain}")
+
+                # Load config for this site
+                configs = await orchestrator.load_configs(enabled_only=False)
+                config = next((c for c in configs if c.site_domain == domain), None)
+
+                if not config:
+                    print(f"❌ Site not found: {domain}")
+                    return
+
+                if not config.enabled:
+                    print(f"⚠️  Site is disabled. Enable it first with: python ai_crawler_cli.py enable {domain}")
+                    return
+
+                await orchestrator.crawl_site(config, crawl_mode)
+            else:
+                # Crawl all enabled sites
+                print(f"\n🚀 Starting {mode} crawl for all enabled sites...")
+                await orchestrator.start_all(crawl_mode)
+        finally:
+            await orchestrator.close()
 
     def status(self):
         """Show crawl status and statistics"""
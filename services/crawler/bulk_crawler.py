@@ -13,16 +13,19 @@ import os
 import json
 from typing import List, Dict, Any, Set
 from dataclasses import dataclass
-from collections import defaultdict
 import hashlib
 
 from crawl4ai import WebCrawler
 from bs4 import BeautifulSoup
 import re
 import httpx
+import psycopg2
 
 from shared.utils.logger import setup_logger, LogEmoji
 from shared.config import settings
+from services.crawler.seen_urls import SeenUrlSet, get_seen_url_set
+from services.crawler.crawl_scheduler import CrawlScheduler
+from services.crawler.metadata_extractor import ListingMetadataExtractor
 
 logger = setup_logger("bulk_crawler")
 
@@ -45,72 +48,69 @@ class CrawlConfig:
     css_selectors: Dict[str, str]
 
 
-class RateLimiter:
-    """Rate limiter per site to avoid being blocked"""
-
-    def __init__(self):
-        self.last_request_time: Dict[str, float] = defaultdict(float)
-        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
-
-    async def wait(self, site_name: str, rate_limit: float):
-        """
-        Wait if needed to respect rate limit
-        Uses minimal lock time to allow parallel workers
-        """
-        # Quick check without lock (not 100% accurate but allows parallelism)
-        now = time.time()
-        time_since_last = now - self.last_request_time.get(site_name, 0)
-
-        if time_since_last < rate_limit:
-            wait_time = rate_limit - time_since_last
-            # Don't log for small waits to reduce noise
-            if wait_time > 0.5:
-                logger.info(f"{LogEmoji.TIME} Rate limit: waiting {wait_time:.2f}s for {site_name}")
-            await asyncio.sleep(wait_time)
-
-        # Update last request time (atomic enough for our purposes)
-        self.last_request_time[site_name] = time.time()
-
-
 class PropertyDeduplicator:
-    """Deduplicate properties by URL and content hash"""
+    """
+    Deduplicate properties by URL and content hash
+
+    URLs go into a persistent, memory-mapped SeenUrlSet (checkpointed
+    incrementally); content hashes only need to be unique within a run.
+    """
 
     def __init__(self, checkpoint_file: str = None):
-        self.seen_urls: Set[str] = set()
-        self.seen_hashes: Set[str] = set()
         self.checkpoint_file = checkpoint_file
-
-        # Load existing URLs from checkpoint if available
-        if checkpoint_file and os.path.exists(checkpoint_file):
-            self._load_checkpoint()
+        if checkpoint_file:
+            self.seen_urls = get_seen_url_set(os.path.splitext(checkpoint_file)[0])
+            if not len(self.seen_urls) and os.path.exists(checkpoint_file):
+                self._load_checkpoint()
+        else:
+            self.seen_urls = SeenUrlSet()
+        self.seen_hashes: Set[str] = set()
 
     def _load_checkpoint(self):
-        """Load existing URLs from checkpoint file"""
+        """Import URLs from a legacy JSON checkpoint file"""
         try:
-            import json
             with open(self.checkpoint_file, 'r') as f:
                 data = json.load(f)
-                self.seen_urls = set(data.get('urls', []))
-                logger.info(f"📂 Loaded {len(self.seen_urls)} URLs from checkpoint")
+            self.seen_urls.add_many(data.get('urls', []))
+            self.seen_urls.checkpoint()
+            logger.info(f"📂 Loaded {len(self.seen_urls)} URLs from checkpoint")
         except Exception as e:
             logger.warning(f"⚠️  Failed to load checkpoint: {e}")
 
+    def warm_from_crawl_state(self):
+        """Add URLs already persisted by the other crawlers (best effort)"""
+        if not self.checkpoint_file:
+            return
+        try:
+            conn = psycopg2.connect(
+                host=settings.POSTGRES_HOST,
+                port=settings.POSTGRES_PORT,
+                database=settings.POSTGRES_DB,
+                user=settings.POSTGRES_USER,
+                password=settings.POSTGRES_PASSWORD
+            )
+            try:
+                self.seen_urls.warm_from_crawl_state(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not warm seen URLs from crawl_state: {e}")
+
     def save_checkpoint(self):
-        """Save current state to checkpoint file"""
+        """Persist URLs seen since the last checkpoint"""
         if not self.checkpoint_file:
             return
 
         try:
-            import json
-            with open(self.checkpoint_file, 'w') as f:
-                json.dump({
-                    'urls': list(self.seen_urls),
-                    'count': len(self.seen_urls)
-                }, f)
+            self.seen_urls.checkpoint()
             logger.info(f"💾 Saved checkpoint: {len(self.seen_urls)} URLs")
         except Exception as e:
             logger.warning(f"⚠️  Failed to save checkpoint: {e}")
 
+    def filter_seen(self, urls: List[str]) -> List[bool]:
+        """Batch URL check for a page (True = already seen)"""
+        return self.seen_urls.contains_many(urls)
+
     def is_duplicate(self, property_data: Dict[str, Any]) -> bool:
         """Check if property is duplicate"""
         # Check URL
@@ -151,7 +151,8 @@ class ParallelBulkCrawler:
     """
 
     def __init__(self, checkpoint_file: str = None, resume: bool = True):
-        self.rate_limiter = RateLimiter()
+        # Per-site token bucket + AIMD concurrency
+        self.scheduler = CrawlScheduler()
 
         # Use checkpoint file for resume capability
         if checkpoint_file is None:
@@ -163,13 +164,19 @@ class ParallelBulkCrawler:
 
         # Crawl configurations for each site
         self.configs = self._get_crawl_configs()
+        for config in self.configs:
+            self.scheduler.register(
+                config.site_name,
+                rate_limit_seconds=config.rate_limit,
+                max_concurrency=config.max_workers
+            )
 
         # HTTP client for LLM extraction calls
         self.http_client = httpx.AsyncClient(timeout=30.0)
         self.core_gateway_url = settings.get_core_gateway_url()
 
-        # Cache for extracted metadata (avoid redundant LLM calls)
-        self.extraction_cache: Dict[str, Dict[str, str]] = {}
+        # City/district/property_type: master data first, batched + cached LLM calls for the rest
+        self.metadata_extractor = ListingMetadataExtractor(self.http_client, self.core_gateway_url)
 
     def _get_crawl_configs(self) -> List[CrawlConfig]:
         """Get crawl configurations for all sites"""
@@ -218,6 +225,7 @@ class ParallelBulkCrawler:
         logger.info(f"{LogEmoji.STARTUP} Warming up crawler...")
         self.crawler = WebCrawler()
         self.crawler.warmup()
+        self.deduplicator.warm_from_crawl_state()
         logger.info(f"{LogEmoji.SUCCESS} Crawler ready!")
 
     async def crawl_page(
@@ -227,9 +235,6 @@ class ParallelBulkCrawler:
     ) -> List[Dict[str, Any]]:
         """Crawl a single page"""
 
-        # Apply rate limiting
-        await self.rate_limiter.wait(config.site_name, config.rate_limit)
-
         # Build URL
         if "{page}" in config.page_pattern:
             url = config.base_url + config.page_pattern.format(page=page_num)
@@ -239,11 +244,23 @@ class ParallelBulkCrawler:
         logger.info(f"{LogEmoji.SEARCH} Crawling {config.site_name} page {page_num}: {url}")
 
         try:
-            # Crawl
-            result = self.crawler.run(url=url)
-
-            if not result.success:
-                logger.warning(f"{LogEmoji.WARNING} Failed to crawl {url}")
+            # Crawl (paced per site by the scheduler)
+            async with self.scheduler.request(config.site_name) as ticket:
+                result = self.crawler.run(url=url)
+
+                if not result.success:
+                    ticket.fail()
+                    logger.warning(f"{LogEmoji.WARNING} Failed to crawl {url}")
+                    return []
+
+                rate_limit_type = ticket.record_response(
+                    getattr(result, 'status_code', None) or 200,
+                    result.html,
+                    getattr(result, 'headers', None) or {}
+                )
+
+            if rate_limit_type:
+                logger.warning(f"{LogEmoji.WARNING} Rate limit detected on {config.site_name}: {rate_limit_type}")
                 return []
 
             # Parse HTML
@@ -252,26 +269,30 @@ class ParallelBulkCrawler:
 
             logger.info(f"{LogEmoji.SUCCESS} Found {len(property_items)} items on page {page_num}")
 
-            # Extract properties (async with LLM enrichment)
-            extraction_tasks = [
-                self._extract_property(item, config)
-                for item in property_items
-            ]
-
-            # Execute extractions in parallel (faster!)
-            extracted_properties = await asyncio.gather(*extraction_tasks, return_exceptions=True)
+            # Skip listings seen in earlier runs before paying for LLM extraction
+            seen = self.deduplicator.filter_seen(
+                [self._property_url(item, config) for item in property_items]
+            )
+            property_items = [item for item, was_seen in zip(property_items, seen) if not was_seen]
 
-            # Filter valid results and check duplicates
+            # Parse cards and drop duplicates before metadata extraction
             properties = []
-            for prop_data in extracted_properties:
-                if isinstance(prop_data, Exception):
-                    logger.warning(f"{LogEmoji.WARNING} Extraction error: {prop_data}")
+            for item in property_items:
+                try:
+                    prop_data = self._parse_property(item, config)
+                except Exception as e:
+                    logger.warning(f"{LogEmoji.WARNING} Extraction error: {e}")
                     continue
 
-                if isinstance(prop_data, dict):
-                    # Check for duplicates
-                    if not self.deduplicator.is_duplicate(prop_data):
-                        properties.append(prop_data)
+                if not self.deduplicator.is_duplicate(prop_data):
+                    properties.append(prop_data)
+
+            # City, district, property_type for the whole page in one pass
+            metadata = await self.metadata_extractor.extract_many(
+                [(prop["title"], prop["location"]) for prop in properties]
+            )
+            for prop, meta in zip(properties, metadata):
+                prop.update(meta)
 
             return properties
 
@@ -279,71 +300,14 @@ class ParallelBulkCrawler:
             logger.error(f"{LogEmoji.ERROR} Error crawling page {page_num}: {e}")
             return []
 
-    async def _extract_metadata_with_llm(self, title: str, location: str) -> Dict[str, str]:
-        """
-        Extract city, district, property_type using LLM (NO HARDCODING!)
-
-        Uses cache to avoid redundant API calls for same patterns
-        """
-        cache_key = f"{title[:50]}_{location[:30]}"
-
-        # Check cache first
-        if cache_key in self.extraction_cache:
-            return self.extraction_cache[cache_key]
-
-        try:
-            prompt = f"""Extract structured metadata from this Vietnamese real estate listing.
-
-Title: {title}
-Location: {location}
-
-Return ONLY valid JSON with these exact fields:
-{{
-    "city": "Hồ Chí Minh" | "Hà Nội" | "Đà Nẵng" | etc,
-    "district": "Quận 1" | "Thủ Đức" | "Cầu Giấy" | etc (or empty string if not found),
-    "property_type": "căn hộ" | "nhà phố" | "biệt thự" | "đất" | "chung cư" | "shophouse" | etc
-}}
-
-Rules:
-- Infer city from district if not explicitly mentioned ("Quận 2" → city: "Hồ Chí Minh")
-- Normalize district names ("Q2" → "Quận 2", "Q.7" → "Quận 7")
-- Extract property_type from title keywords
-- Use empty string for missing fields, never null
-
-JSON:"""
-
-            response = await self.http_client.post(
-                f"{self.core_gateway_url}/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 150,
-                    "temperature": 0.0  # Deterministic
-                },
-                timeout=10.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                content = data.get("content", "").strip()
-
-                # Clean markdown
-                content = re.sub(r'^```(?:json)?\s*\n?', '', content)
-                content = re.sub(r'\n?```\s*$', '', content)
-
-                metadata = json.loads(content)
-
-                # Cache result
-                self.extraction_cache[cache_key] = metadata
-
-                return metadata
-            else:
-                logger.warning(f"LLM extraction failed: {response.status_code}")
-                return {"city": "", "district": "", "property_type": ""}
+    def _property_url(self, item: BeautifulSoup, config: CrawlConfig) -> str:
+        """Absolute listing URL for a card"""
+        link_elem = item.select_one(config.css_selectors["link"])
+        property_url = link_elem.get('href', '') if link_elem else ""
 
-        except Exception as e:
-            logger.warning(f"LLM extraction error: {e}")
-            return {"city": "", "district": "", "property_type": ""}
+        if property_url and not property_url.startswith('http'):
+            property_url = f"{config.base_url.split('/')[0]}//{config.base_url.split('/')[2]}{property_url}"
+        return property_url
 
     async def _extract_property(
         self,
@@ -351,6 +315,17 @@ JSON:"""
         config: CrawlConfig
     ) -> Dict[str, Any]:
         """Extract property data from HTML element with LLM-enriched metadata"""
+        prop_data = self._parse_property(item, config)
+        metadata = await self.metadata_extractor.extract_many([(prop_data["title"], prop_data["location"])])
+        prop_data.update(metadata[0])
+        return prop_data
+
+    def _parse_property(
+        self,
+        item: BeautifulSoup,
+        config: CrawlConfig
+    ) -> Dict[str, Any]:
+        """Extract property fields from HTML element (metadata filled in later)"""
 
         selectors = config.css_selectors
 
@@ -359,17 +334,13 @@ JSON:"""
         location_elem = item.select_one(selectors["location"])
         area_elem = item.select_one(selectors["area"])
         desc_elem = item.select_one(selectors["description"])
-        link_elem = item.select_one(selectors["link"])
 
         title = title_elem.get_text(strip=True) if title_elem else "N/A"
         price = price_elem.get_text(strip=True) if price_elem else "N/A"
         location = location_elem.get_text(strip=True) if location_elem else "N/A"
         area = area_elem.get_text(strip=True) if area_elem else "N/A"
         description = desc_elem.get_text(strip=True) if desc_elem else title
-        property_url = link_elem.get('href', '') if link_elem else ""
-
-        if property_url and not property_url.startswith('http'):
-            property_url = f"{config.base_url.split('/')[0]}//{config.base_url.split('/')[2]}{property_url}"
+        property_url = self._property_url(item, config)
 
         # Extract bedrooms/bathrooms from description (regex)
         bedrooms = 0
@@ -383,16 +354,13 @@ JSON:"""
         if bathroom_match:
             bathrooms = int(bathroom_match.group(1))
 
-        # Extract city, district, property_type using LLM (NO HARDCODING!)
-        metadata = await self._extract_metadata_with_llm(title, location)
-
         return {
             "title": title,
             "price": price,
             "location": location,
-            "city": metadata.get("city", ""),  # ← NEW!
-            "district": metadata.get("district", ""),  # ← NEW!
-            "property_type": metadata.get("property_type", ""),  # ← NEW!
+            "city": "",
+            "district": "",
+            "property_type": "",
             "bedrooms": bedrooms,
             "bathrooms": bathrooms,
             "area": area,
@@ -522,6 +490,7 @@ JSON:"""
             logger.info(f"{LogEmoji.PROPERTY} Total properties: {len(all_properties)}")
             logger.info(f"{LogEmoji.SUCCESS} Unique URLs: {dedup_stats['unique_urls']}")
             logger.info(f"{LogEmoji.SUCCESS} Unique content: {dedup_stats['unique_hashes']}")
+            logger.info(f"{LogEmoji.AI} Metadata extraction: {self.metadata_extractor.get_stats()}")
             logger.info(f"{LogEmoji.TIME} Time taken: {elapsed:.2f} seconds ({elapsed/60:.2f} minutes)")
             logger.info(f"{LogEmoji.FIRE} Speed: {len(all_properties)/elapsed:.2f} properties/second")
             logger.info(f"{LogEmoji.CHART} {'='*60}\n")
@@ -0,0 +1,438 @@
+"""
+Crawl Scheduler
+Per-domain politeness and throughput control shared by the crawlers
+Features:
+- Token bucket per domain (requests are paced, never burst past the rate)
+- AIMD concurrency and rate: additive increase while responses are fast,
+  multiplicative decrease plus backoff on rate limiting / Retry-After
+- One dispatcher across domains: free capacity goes to the waiting domain
+  with the highest priority (most stale listings)
+- Metrics for tokens, in-flight requests and backoff state
+"""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+
+from shared.utils.logger import setup_logger, LogEmoji
+
+try:
+    from shared.utils import metrics
+    HAS_PROMETHEUS = True
+except ImportError:
+    HAS_PROMETHEUS = False
+
+logger = setup_logger("crawl_scheduler")
+
+# Backoff when a rate limit carries no Retry-After: rate_limit * 2^n, capped
+MAX_BACKOFF_SECONDS = 300
+
+
+class RateLimitDetector:
+    """Detects rate limiting and adapts crawl speed"""
+
+    # Error patterns for different rate limit types
+    PATTERNS = {
+        "http_429": [429],
+        "cloudflare_challenge": ["Checking your browser", "Just a moment", "Enable JavaScript and cookies"],
+        "captcha": ["recaptcha", "hcaptcha"],
+        "ip_block": ["Access Denied", "Forbidden", "403 Forbidden", "blocked your access", "banned"],
+        "too_fast": ["slow down", "too many requests within"],
+    }
+
+    @classmethod
+    def detect(cls, status_code: int, html: str, headers: Dict[str, str]) -> Optional[str]:
+        """
+        Detect if response indicates rate limiting
+
+        IMPORTANT: Only detect ACTUAL blocking, not just presence of anti-bot code
+
+        Returns:
+            Rate limit type if detected, None otherwise
+        """
+        # Check HTTP status
+        if status_code in cls.PATTERNS["http_429"]:
+            return "http_429"
+
+        # If status code is 403, definitely blocked
+        if status_code == 403:
+            return "ip_block"
+
+        html_lower = html.lower()
+
+        # Check if page is mostly empty (< 1000 chars = likely blocked)
+        if len(html) < 1000:
+            return "ip_block"
+
+        # Check HTML content patterns (ONLY strict patterns)
+        for pattern_type, patterns in cls.PATTERNS.items():
+            if pattern_type == "http_429":
+                continue
+
+            for pattern in patterns:
+                if isinstance(pattern, str) and pattern.lower() in html_lower:
+                    # Additional validation: check if page has actual content
+                    # If page has > 10KB content, it's likely not blocked
+                    if len(html) > 10000:
+                        # This is just Cloudflare being present, not blocking
+                        continue
+                    return pattern_type
+
+        return None
+
+    @classmethod
+    def get_retry_after(cls, headers: Dict[str, str], default: int = 60) -> int:
+        """Extract Retry-After from headers"""
+        retry_after = headers.get('Retry-After', headers.get('retry-after'))
+        if retry_after:
+            try:
+                return int(retry_after)
+            except ValueError:
+                pass
+        return default
+
+
+class TokenBucket:
+    """Token bucket driven by the caller's clock (no internal locking needed)"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available"""
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self.refill(now)
+        self.tokens -= 1
+
+    def drain(self, now: float):
+        self.refill(now)
+        self.tokens = 0.0
+
+
+class DomainState:
+    """Scheduling state for one domain"""
+
+    def __init__(
+        self,
+        domain: str,
+        rate_limit_seconds: float,
+        max_concurrency: int,
+        priority: float,
+        max_rate_multiplier: float,
+        now: float
+    ):
+        self.domain = domain
+        self.rate_limit_seconds = max(rate_limit_seconds, 0.01)
+        self.base_rate = 1.0 / self.rate_limit_seconds
+        self.min_rate = self.base_rate / 8
+        self.max_rate = self.base_rate * max_rate_multiplier
+        self.max_concurrency = max(1, max_concurrency)
+        self.priority = priority
+
+        # Start conservatively: configured rate, one request at a time, no burst
+        self.bucket = TokenBucket(self.base_rate, capacity=1.0, now=now)
+        self.concurrency = 1.0
+        self.in_flight = 0
+        self.waiters: deque = deque()
+
+        self.backoff_until = 0.0
+        self.consecutive_backoffs = 0
+        self.latency_ewma: Optional[float] = None
+
+        self.stats = {
+            "requests": 0,
+            "fast": 0,
+            "slow": 0,
+            "errors": 0,
+            "rate_limited": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        return int(self.concurrency)
+
+    def delay(self, now: float) -> float:
+        """Seconds until the next request may start (ignoring concurrency)"""
+        return max(self.backoff_until - now, self.bucket.wait_time(now))
+
+    def set_rate(self, rate: float):
+        self.bucket.rate = min(self.max_rate, max(self.min_rate, rate))
+        # Allow a burst of up to one second's worth once the rate has grown
+        self.bucket.capacity = max(1.0, min(self.bucket.rate, float(self.max_concurrency)))
+
+
+class CrawlTicket:
+    """Handle for one scheduled request; report how it went"""
+
+    __slots__ = ("domain", "started_at", "rate_limit_type", "retry_after", "failed")
+
+    def __init__(self, domain: str, started_at: float):
+        self.domain = domain
+        self.started_at = started_at
+        self.rate_limit_type: Optional[str] = None
+        self.retry_after: Optional[float] = None
+        self.failed = False
+
+    def record_response(self, status_code: int, html: str, headers: Dict[str, str]) -> Optional[str]:
+        """Run rate limit detection on a response; returns the rate limit type if any"""
+        rate_limit_type = RateLimitDetector.detect(status_code, html or "", headers or {})
+        if rate_limit_type:
+            self.rate_limited(rate_limit_type, RateLimitDetector.get_retry_after(headers or {}, default=0) or None)
+        return rate_limit_type
+
+    def rate_limited(self, rate_limit_type: str = "http_429", retry_after: Optional[float] = None):
+        self.rate_limit_type = rate_limit_type
+        self.retry_after = retry_after
+
+    def fail(self):
+        """Request failed for a reason other than rate limiting"""
+        self.failed = True
+
+
+class CrawlScheduler:
+    """
+    Dispatches crawl requests across domains
+
+    Usage:
+        scheduler.register("batdongsan.com.vn", rate_limit_seconds=2.0, max_concurrency=5, priority=1200)
+        async with scheduler.request("batdongsan.com.vn") as ticket:
+            result = crawler.run(url=url)
+            ticket.record_response(status_code, result.html, headers)
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        fast_response_seconds: float = 2.0,
+        slow_response_seconds: float = 8.0,
+        max_rate_multiplier: float = 4.0
+    ):
+        """
+        Args:
+            max_in_flight: Requests in flight across all domains
+            fast_response_seconds: Latency below which a domain may speed up
+            slow_response_seconds: Latency above which a domain's concurrency shrinks
+            max_rate_multiplier: Ceiling for a domain's rate relative to its configured rate
+        """
+        self.max_in_flight = max_in_flight
+        self.fast_response_seconds = fast_response_seconds
+        self.slow_response_seconds = slow_response_seconds
+        self.max_rate_multiplier = max_rate_multiplier
+
+        self.domains: Dict[str, DomainState] = {}
+        self.in_flight = 0
+        self._wake_handle: Optional[asyncio.TimerHandle] = None
+        self._wake_at: Optional[float] = None
+
+    # ========================================================================
+    # Registration
+    # ========================================================================
+
+    def register(
+        self,
+        domain: str,
+        rate_limit_seconds: float,
+        max_concurrency: int = 1,
+        priority: float = 0.0
+    ) -> DomainState:
+        """Register a domain (re-registering keeps its adaptive state)"""
+        state = self.domains.get(domain)
+        if state is None:
+            state = DomainState(
+                domain, rate_limit_seconds, max_concurrency, priority,
+                self.max_rate_multiplier, self._now()
+            )
+            self.domains[domain] = state
+        else:
+            state.priority = priority
+        return state
+
+    def set_priority(self, domain: str, priority: float):
+        """Update a domain's share of idle capacity (e.g. as stale listings are refreshed)"""
+        if domain in self.domains:
+            self.domains[domain].priority = priority
+
+    @staticmethod
+    def _now() -> float:
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            return 0.0
+
+    # ========================================================================
+    # Dispatch
+    # ========================================================================
+
+    @asynccontextmanager
+    async def request(self, domain: str) -> AsyncIterator[CrawlTicket]:
+        """Wait for a slot and a token for `domain`, then run one request"""
+        state = self.domains.get(domain) or self.register(domain, rate_limit_seconds=1.0)
+        await self._acquire(state)
+
+        loop = asyncio.get_running_loop()
+        ticket = CrawlTicket(domain, loop.time())
+        try:
+            yield ticket
+        except BaseException:
+            ticket.fail()
+            raise
+        finally:
+            self._release(state, ticket, loop.time())
+
+    async def _acquire(self, state: DomainState):
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before cancellation: hand the slot back
+                state.in_flight -= 1
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self):
+        """Grant waiting requests, highest-priority domains first"""
+        self._wake_handle = None
+        self._wake_at = None
+        now = self._now()
+        next_wake: Optional[float] = None
+
+        waiting = [state for state in self.domains.values() if state.waiters]
+        waiting.sort(key=lambda s: (-s.priority, s.in_flight))
+
+        for state in waiting:
+            while state.waiters and self.in_flight < self.max_in_flight:
+                if state.waiters[0].done():  # Cancelled while queued
+                    state.waiters.popleft()
+                    continue
+                if state.in_flight >= state.limit:
+                    break  # Re-dispatched when one of its requests completes
+                delay = state.delay(now)
+                if delay > 0:
+                    next_wake = now + delay if next_wake is None else min(next_wake, now + delay)
+                    break
+                state.bucket.take(now)
+                state.in_flight += 1
+                self.in_flight += 1
+                state.stats["requests"] += 1
+                state.waiters.popleft().set_result(None)
+
+            self._export(state, now)
+            if self.in_flight >= self.max_in_flight:
+                break
+
+        if next_wake is not None:
+            self._schedule_wake(next_wake)
+
+    def _schedule_wake(self, when: float):
+        if self._wake_at is not None and self._wake_at <= when:
+            return
+        if self._wake_handle is not None:
+            self._wake_handle.cancel()
+        self._wake_at = when
+        self._wake_handle = asyncio.get_running_loop().call_at(when, self._dispatch)
+
+    # ========================================================================
+    # AIMD
+    # ========================================================================
+
+    def _release(self, state: DomainState, ticket: CrawlTicket, now: float):
+        state.in_flight -= 1
+        self.in_flight -= 1
+
+        if ticket.rate_limit_type:
+            self._on_rate_limited(state, ticket, now)
+        elif ticket.failed:
+            state.stats["errors"] += 1
+        else:
+            self._on_success(state, now - ticket.started_at)
+
+        self._dispatch()
+
+    def _on_success(self, state: DomainState, latency: float):
+        state.consecutive_backoffs = 0
+        state.latency_ewma = latency if state.latency_ewma is None else 0.8 * state.latency_ewma + 0.2 * latency
+
+        if state.latency_ewma <= self.fast_response_seconds:
+            # Additive increase: about +1 concurrency and +10% base rate per round trip
+            state.stats["fast"] += 1
+            state.concurrency = min(float(state.max_concurrency), state.concurrency + 1.0 / state.concurrency)
+            state.set_rate(state.bucket.rate + state.base_rate * 0.1 / state.concurrency)
+        elif state.latency_ewma >= self.slow_response_seconds:
+            # Server is struggling: shrink concurrency, keep the rate
+            state.stats["slow"] += 1
+            state.concurrency = max(1.0, state.concurrency * 0.75)
+
+    def _on_rate_limited(self, state: DomainState, ticket: CrawlTicket, now: float):
+        state.stats["rate_limited"] += 1
+        state.consecutive_backoffs += 1
+
+        # Multiplicative decrease
+        state.concurrency = max(1.0, state.concurrency / 2)
+        state.set_rate(state.bucket.rate / 2)
+        state.bucket.drain(now)
+
+        backoff = ticket.retry_after or min(
+            MAX_BACKOFF_SECONDS,
+            state.rate_limit_seconds * (2 ** state.consecutive_backoffs)
+        )
+        state.backoff_until = max(state.backoff_until, now + backoff)
+
+        logger.warning(
+            f"{LogEmoji.WARNING} [{state.domain}] {ticket.rate_limit_type}: backing off {backoff:.1f}s, "
+            f"rate={state.bucket.rate:.2f}/s, concurrency={state.limit}"
+        )
+        if HAS_PROMETHEUS:
+            metrics.crawler_rate_limit_events_total.labels(
+                domain=state.domain, event_type=ticket.rate_limit_type
+            ).inc()
+
+    # ========================================================================
+    # Metrics
+    # ========================================================================
+
+    def _export(self, state: DomainState, now: float):
+        if not HAS_PROMETHEUS:
+            return
+        metrics.crawler_domain_tokens.labels(domain=state.domain).set(state.bucket.tokens)
+        metrics.crawler_domain_rate.labels(domain=state.domain).set(state.bucket.rate)
+        metrics.crawler_domain_in_flight.labels(domain=state.domain).set(state.in_flight)
+        metrics.crawler_domain_concurrency_limit.labels(domain=state.domain).set(state.limit)
+        metrics.crawler_domain_backoff_seconds.labels(domain=state.domain).set(max(0.0, state.backoff_until - now))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of scheduler state"""
+        now = self._now()
+        domains = {}
+        for domain, state in self.domains.items():
+            state.bucket.refill(now)
+            self._export(state, now)
+            domains[domain] = {
+                "priority": state.priority,
+                "tokens": round(state.bucket.tokens, 3),
+                "rate": round(state.bucket.rate, 3),
+                "concurrency_limit": state.limit,
+                "in_flight": state.in_flight,
+                "waiting": sum(1 for w in state.waiters if not w.done()),
+                "backoff_remaining": round(max(0.0, state.backoff_until - now), 1),
+                "latency_ewma": round(state.latency_ewma, 3) if state.latency_ewma is not None else None,
+                **state.stats,
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "domains": domains,
+        }
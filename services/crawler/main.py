@@ -364,16 +364,21 @@ class RealEstateCrawler(BaseService):
             Number of successfully indexed properties
         """
         try:
+            # NDJSON streaming ingest: chunked, concurrent bulk requests, single refresh
+            body = "".join(
+                json.dumps(prop, ensure_ascii=False, default=str) + "\n" for prop in properties
+            ).encode("utf-8")
             response = await self.http_client.post(
-                f"{self.db_gateway_url}/bulk-insert",
-                json=properties,
+                f"{self.db_gateway_url}/bulk-insert/stream",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"},
                 timeout=120.0  # Longer timeout for bulk insert
             )
 
             if response.status_code == 200:
                 result = response.json()
-                indexed_count = result.get('indexed_count', 0)
-                failed_count = result.get('failed_count', 0)
+                indexed_count = result.get('indexed', 0)
+                failed_count = result.get('failed', 0)
 
                 if failed_count > 0:
                     self.logger.warning(f"{LogEmoji.WARNING} {failed_count} properties failed to index")
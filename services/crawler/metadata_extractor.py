@@ -0,0 +1,332 @@
+"""
+Listing Metadata Extraction for the bulk crawler
+
+Resolves city, district and property_type for crawled listings with as few
+LLM calls as possible:
+1. Dedupe by normalized (title, location) and reuse results cached on disk
+   across runs
+2. Resolve locally: extract_location_parts() + district/city master data
+   for the location, property type aliases for the title
+3. Pack whatever is left into multi-item prompts sent to Core Gateway,
+   with a cap on concurrent calls
+
+Location results from the LLM are cached separately, so later listings at
+the same location only need the (local) property type lookup.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import List, Dict, Optional, Tuple
+
+import httpx
+
+from shared.config import settings
+from shared.master_data import get_city_master, get_district_master, get_property_type_master
+from shared.utils.data_normalizer import extract_location_parts
+from shared.utils.logger import setup_logger, LogEmoji
+
+logger = setup_logger("metadata_extractor")
+
+EMPTY_METADATA = {"city": "", "district": "", "property_type": ""}
+
+# District-level prefixes accepted from raw location text (wards are not districts)
+DISTRICT_PREFIXES = ("Quận", "Huyện", "Thị xã", "Thành phố", "District")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case-fold and collapse whitespace"""
+    return " ".join((text or "").casefold().split())
+
+
+class ListingMetadataExtractor:
+    """Batched, cached city/district/property_type extraction"""
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        core_gateway_url: str,
+        cache_path: Optional[str] = settings.CRAWLER_METADATA_CACHE_PATH,
+        batch_size: int = settings.CRAWLER_LLM_BATCH_SIZE,
+        max_concurrency: int = settings.CRAWLER_LLM_CONCURRENCY,
+        model: str = "gpt-4o-mini"
+    ):
+        """
+        Args:
+            http_client: Shared client for Core Gateway calls
+            core_gateway_url: Core Gateway base URL
+            cache_path: JSONL file persisted across runs (None = memory only)
+            batch_size: Listings per LLM prompt
+            max_concurrency: Concurrent LLM calls
+            model: Model requested from Core Gateway
+        """
+        self.http_client = http_client
+        self.core_gateway_url = core_gateway_url
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.model = model
+        self._llm_semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.districts = get_district_master()
+        self.cities = get_city_master()
+        self._property_type_pattern = self._build_property_type_pattern()
+
+        # normalized (title, location) -> metadata; normalized location -> city/district
+        self._items: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._locations: Dict[str, Dict[str, str]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+        self.stats = {
+            "requested": 0,
+            "cache_hits": 0,
+            "local": 0,
+            "coalesced": 0,
+            "llm_items": 0,
+            "llm_calls": 0,
+            "llm_errors": 0,
+        }
+
+        if cache_path:
+            self._load_cache()
+
+    # ========================================================================
+    # Disk cache
+    # ========================================================================
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write
+                    if record.get("kind") == "item":
+                        self._items[tuple(record["key"])] = record["value"]
+                    elif record.get("kind") == "location":
+                        self._locations[record["key"]] = record["value"]
+            logger.info(
+                f"{LogEmoji.CACHE} Loaded metadata cache: {len(self._items)} listings, "
+                f"{len(self._locations)} locations"
+            )
+        except OSError as e:
+            logger.warning(f"{LogEmoji.WARNING} Could not read metadata cache: {e}")
+
+    def _append_cache(self, records: List[Dict]):
+        if not self.cache_path or not records:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"{LogEmoji.WARNING} Could not write metadata cache: {e}")
+
+    # ========================================================================
+    # Local resolution
+    # ========================================================================
+
+    def _build_property_type_pattern(self) -> re.Pattern:
+        master = get_property_type_master()
+        aliases = sorted(master.alias_to_standard, key=len, reverse=True)
+        self._property_type_aliases = master.alias_to_standard
+        return re.compile(r"(?<!\w)(" + "|".join(re.escape(a) for a in aliases) + r")(?!\w)")
+
+    def resolve_property_type(self, title: str) -> str:
+        """First property type alias mentioned in the title ("" if none)"""
+        match = self._property_type_pattern.search(title.lower())
+        return self._property_type_aliases[match.group(1)] if match else ""
+
+    def resolve_location(self, location: str) -> Optional[Dict[str, str]]:
+        """City/district from master data; None if the city can't be determined"""
+        key = normalize_text(location)
+        if key in self._locations:
+            return self._locations[key]
+        if not key or key == "n/a":
+            return None
+
+        raw_district, raw_city = extract_location_parts(location)
+
+        district = None
+        if raw_district:
+            district = self.districts.get_district(raw_district)
+        if district is None:
+            found = self.districts.extract_from_text(location)
+            district = found[1] if found else None
+
+        city = self.cities.normalize(raw_city) if raw_city else None
+        if city is None:
+            found = self.cities.extract_from_text(location)
+            city = found[1].standard_name if found else None
+        if city is None and district is not None:
+            city = district.city
+        if city is None:
+            return None
+
+        if district is not None and district.city == city:
+            district_name = district.standard_name
+        elif raw_district and raw_district.startswith(DISTRICT_PREFIXES):
+            district_name = raw_district
+        else:
+            district_name = ""
+
+        resolved = {"city": city, "district": district_name}
+        self._locations[key] = resolved
+        return resolved
+
+    # ========================================================================
+    # Extraction
+    # ========================================================================
+
+    async def extract_many(self, listings: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """
+        Metadata for (title, location) pairs, in input order
+
+        Returns:
+            Dicts with city, district, property_type ("" when unknown)
+        """
+        self.stats["requested"] += len(listings)
+        keys = [(normalize_text(title), normalize_text(location)) for title, location in listings]
+        originals = dict(zip(keys, listings))
+
+        results: Dict[Tuple[str, str], Dict[str, str]] = {}
+        waiting: Dict[Tuple[str, str], asyncio.Future] = {}
+        to_llm: List[Tuple[Tuple[str, str], Dict[str, str]]] = []
+
+        for key, (title, location) in originals.items():
+            if key in self._items:
+                self.stats["cache_hits"] += 1
+                results[key] = self._items[key]
+                continue
+            if key in self._inflight:
+                self.stats["coalesced"] += 1
+                waiting[key] = self._inflight[key]
+                continue
+
+            local = dict(EMPTY_METADATA)
+            location_data = self.resolve_location(location)
+            if location_data:
+                local.update(location_data)
+            local["property_type"] = self.resolve_property_type(title)
+
+            if location_data and local["property_type"]:
+                self.stats["local"] += 1
+                results[key] = local
+            else:
+                to_llm.append((key, local))
+
+        if to_llm:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key, _ in to_llm}
+            self._inflight.update(futures)
+            chunks = [to_llm[i:i + self.batch_size] for i in range(0, len(to_llm), self.batch_size)]
+            try:
+                await asyncio.gather(*(self._extract_chunk(chunk, originals) for chunk in chunks))
+            finally:
+                for key, future in futures.items():
+                    self._inflight.pop(key, None)
+                    if not future.done():
+                        future.cancel()  # Don't leave coalesced waiters hanging
+            for key, future in futures.items():
+                results[key] = future.result()
+
+        for key, future in waiting.items():
+            results[key] = await asyncio.shield(future)
+
+        return [dict(results[key]) for key in keys]
+
+    async def _extract_chunk(
+        self,
+        chunk: List[Tuple[Tuple[str, str], Dict[str, str]]],
+        originals: Dict[Tuple[str, str], Tuple[str, str]]
+    ):
+        """One multi-item LLM call; always resolves every future in the chunk"""
+        extracted: Dict[int, Dict[str, str]] = {}
+        try:
+            async with self._llm_semaphore:
+                extracted = await self._call_llm([originals[key] for key, _ in chunk])
+        except Exception as e:
+            self.stats["llm_errors"] += 1
+            logger.warning(f"LLM extraction error: {e}")
+
+        records = []
+        for idx, (key, local) in enumerate(chunk):
+            llm = extracted.get(idx)
+            metadata = dict(local)
+            if llm:
+                # Master-data values win; the LLM fills the gaps
+                for field in EMPTY_METADATA:
+                    if not metadata[field]:
+                        metadata[field] = str(llm.get(field) or "")
+                self._items[key] = metadata
+                records.append({"kind": "item", "key": list(key), "value": metadata})
+                if metadata["city"] and key[1] not in self._locations:
+                    location_data = {"city": metadata["city"], "district": metadata["district"]}
+                    self._locations[key[1]] = location_data
+                    records.append({"kind": "location", "key": key[1], "value": location_data})
+            self._inflight[key].set_result(metadata)
+
+        self._append_cache(records)
+
+    async def _call_llm(self, listings: List[Tuple[str, str]]) -> Dict[int, Dict[str, str]]:
+        """Send one prompt for several listings; returns results by position"""
+        self.stats["llm_calls"] += 1
+        self.stats["llm_items"] += len(listings)
+
+        items = [
+            {"id": idx, "title": title[:200], "location": location[:120]}
+            for idx, (title, location) in enumerate(listings)
+        ]
+        prompt = f"""Extract structured metadata from these Vietnamese real estate listings.
+
+Listings:
+{json.dumps(items, ensure_ascii=False)}
+
+Return ONLY a valid JSON array with one object per listing, using the same "id":
+[
+    {{"id": 0, "city": "Hồ Chí Minh" | "Hà Nội" | "Đà Nẵng" | etc, "district": "Quận 1" | "Thủ Đức" | "Cầu Giấy" | etc (or empty string if not found), "property_type": "căn hộ" | "nhà phố" | "biệt thự" | "đất" | "chung cư" | "shophouse" | etc}}
+]
+
+Rules:
+- Infer city from district if not explicitly mentioned ("Quận 2" → city: "Hồ Chí Minh")
+- Normalize district names ("Q2" → "Quận 2", "Q.7" → "Quận 7")
+- Extract property_type from title keywords
+- Use empty string for missing fields, never null
+
+JSON:"""
+
+        response = await self.http_client.post(
+            f"{self.core_gateway_url}/chat/completions",
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 60 * len(listings) + 50,
+                "temperature": 0.0  # Deterministic
+            },
+            timeout=30.0
+        )
+
+        if response.status_code != 200:
+            raise RuntimeError(f"LLM extraction failed: {response.status_code}")
+
+        content = response.json().get("content", "").strip()
+
+        # Clean markdown
+        content = re.sub(r'^```(?:json)?\s*\n?', '', content)
+        content = re.sub(r'\n?```\s*$', '', content)
+
+        parsed = json.loads(content)
+        if isinstance(parsed, dict):
+            parsed = parsed.get("listings") or parsed.get("items") or [parsed]
+
+        results = {}
+        for entry in parsed:
+            if isinstance(entry, dict) and isinstance(entry.get("id"), int) and 0 <= entry["id"] < len(listings):
+                results[entry["id"]] = entry
+        return results
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "cached_listings": len(self._items), "cached_locations": len(self._locations)}
@@ -4,7 +4,7 @@ Manages crawling across multiple real estate sites simultaneously
 Features:
 - Load configs from database
 - Parallel multi-site crawling
-- Adaptive rate limiting
+- Adaptive rate limiting (per-domain token bucket + AIMD, see crawl_scheduler)
 - Error detection and recovery
 - Incremental vs full crawl modes
 """
@@ -14,14 +14,16 @@ from typing import List, Dict, Any, Optional
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-import hashlib
 
 from crawl4ai import WebCrawler
 from bs4 import BeautifulSoup
 import psycopg2
 from psycopg2.extras import execute_values, RealDictCursor
+import asyncpg
 
 from shared.utils.logger import setup_logger, LogEmoji
+from services.crawler.property_store import PropertyStore
+from services.crawler.crawl_scheduler import CrawlScheduler, RateLimitDetector
 
 logger = setup_logger("orchestrator")
 
@@ -59,70 +61,6 @@ class CrawlConfig:
     data_fields: List[str]
 
 
-class RateLimitDetector:
-    """Detects rate limiting and adapts crawl speed"""
-
-    # Error patterns for different rate limit types
-    PATTERNS = {
-        "http_429": [429],
-        "cloudflare_challenge": ["Checking your browser", "Just a moment", "Enable JavaScript and cookies"],
-        "captcha": ["recaptcha", "hcaptcha"],
-        "ip_block": ["Access Denied", "Forbidden", "403 Forbidden", "blocked your access", "banned"],
-        "too_fast": ["slow down", "too many requests within"],
-    }
-
-    @classmethod
-    def detect(cls, status_code: int, html: str, headers: Dict[str, str]) -> Optional[str]:
-        """
-        Detect if response indicates rate limiting
-
-        IMPORTANT: Only detect ACTUAL blocking, not just presence of anti-bot code
-
-        Returns:
-            Rate limit type if detected, None otherwise
-        """
-        # Check HTTP status
-        if status_code in cls.PATTERNS["http_429"]:
-            return "http_429"
-
-        # If status code is 403, definitely blocked
-        if status_code == 403:
-            return "ip_block"
-
-        html_lower = html.lower()
-
-        # Check if page is mostly empty (< 1000 chars = likely blocked)
-        if len(html) < 1000:
-            return "ip_block"
-
-        # Check HTML content patterns (ONLY strict patterns)
-        for pattern_type, patterns in cls.PATTERNS.items():
-            if pattern_type == "http_429":
-                continue
-
-            for pattern in patterns:
-                if isinstance(pattern, str) and pattern.lower() in html_lower:
-                    # Additional validation: check if page has actual content
-                    # If page has > 10KB content, it's likely not blocked
-                    if len(html) > 10000:
-                        # This is just Cloudflare being present, not blocking
-                        continue
-                    return pattern_type
-
-        return None
-
-    @classmethod
-    def get_retry_after(cls, headers: Dict[str, str], default: int = 60) -> int:
-        """Extract Retry-After from headers"""
-        retry_after = headers.get('Retry-After', headers.get('retry-after'))
-        if retry_after:
-            try:
-                return int(retry_after)
-            except ValueError:
-                pass
-        return default
-
-
 class MultiSiteOrchestrator:
     """
     Orchestrates crawling across multiple sites
@@ -134,13 +72,19 @@ class MultiSiteOrchestrator:
     - State tracking
     """
 
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], max_in_flight: int = 16):
         self.db_config = db_config
         self.crawler = None
         self.running_jobs: Dict[str, asyncio.Task] = {}
 
-        # Global semaphore to limit total concurrent sites
-        self.global_semaphore = asyncio.Semaphore(5)  # Max 5 sites at once
+        # Paces requests per domain and shares request slots across sites,
+        # favouring sites with the most stale listings
+        self.scheduler = CrawlScheduler(max_in_flight=max_in_flight)
+
+        # asyncpg pool for property persistence (one connection per site at most)
+        self.db_pool: Optional[asyncpg.Pool] = None
+        self.property_store: Optional[PropertyStore] = None
+        self._pool_lock = asyncio.Lock()
 
     def warmup(self):
         """Initialize crawler"""
@@ -154,6 +98,24 @@ class MultiSiteOrchestrator:
         """Get database connection"""
         return psycopg2.connect(**self.db_config)
 
+    async def _get_property_store(self) -> PropertyStore:
+        """Lazily create the asyncpg pool used for bulk property persistence"""
+        if self.property_store is None:
+            async with self._pool_lock:
+                if self.property_store is None:
+                    self.db_pool = await asyncpg.create_pool(
+                        **self.db_config, min_size=1, max_size=5
+                    )
+                    self.property_store = PropertyStore(self.db_pool)
+        return self.property_store
+
+    async def close(self):
+        """Close the asyncpg pool"""
+        if self.db_pool is not None:
+            await self.db_pool.close()
+            self.db_pool = None
+            self.property_store = None
+
     async def load_configs(self, enabled_only: bool = True) -> List[CrawlConfig]:
         """Load crawl configurations from database"""
         logger.info(f"{LogEmoji.DATABASE} Loading site configs from database...")
@@ -213,6 +175,11 @@ class MultiSiteOrchestrator:
             logger.warning(f"{LogEmoji.WARNING} No enabled sites found in database")
             return
 
+        # Register sites with the scheduler, most stale listings first
+        staleness = await self._load_staleness()
+        for config in configs:
+            self._register_site(config, staleness.get(config.site_domain, 0))
+
         # Start crawl for each site
         logger.info(f"{LogEmoji.INFO} Starting crawl for {len(configs)} sites...")
 
@@ -239,6 +206,45 @@ class MultiSiteOrchestrator:
             logger.info(f"{LogEmoji.ERROR} Failed: {failed}/{len(results)} sites")
         logger.info(f"{LogEmoji.CHART} {'='*60}\n")
 
+    def _register_site(self, config: CrawlConfig, stale_listings: int = 0):
+        """Register a site with the scheduler (priority = stale listings)"""
+        self.scheduler.register(
+            config.site_domain,
+            rate_limit_seconds=config.rate_limit_seconds,
+            max_concurrency=config.max_workers,
+            priority=stale_listings
+        )
+
+    async def _load_staleness(self) -> Dict[str, int]:
+        """Count listings per site not seen within the site's crawl frequency"""
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            SELECT c.site_domain,
+                   COUNT(s.id) FILTER (
+                       WHERE s.last_seen < NOW() - CASE c.crawl_frequency
+                           WHEN 'hourly' THEN INTERVAL '1 hour'
+                           WHEN 'weekly' THEN INTERVAL '7 days'
+                           ELSE INTERVAL '1 day'
+                       END
+                   ) AS stale_listings
+            FROM crawl_configs c
+            LEFT JOIN crawl_state s ON s.site_domain = c.site_domain
+            GROUP BY c.site_domain
+            """
+        )
+        staleness = {site_domain: stale for site_domain, stale in cursor.fetchall()}
+
+        cursor.close()
+        conn.close()
+        return staleness
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Scheduler metrics: tokens, in-flight requests, backoff state per site"""
+        return self.scheduler.get_metrics()
+
     async def crawl_site(
         self,
         config: CrawlConfig,
@@ -258,122 +264,120 @@ class MultiSiteOrchestrator:
         if not self.crawler:
             self.warmup()
 
-        # Acquire global semaphore (limit total concurrent sites)
-        async with self.global_semaphore:
-            logger.info(
-                f"{LogEmoji.INFO} [{config.site_name}] Starting {mode} crawl"
-            )
+        if config.site_domain not in self.scheduler.domains:
+            self._register_site(config)
+
+        logger.info(
+            f"{LogEmoji.INFO} [{config.site_name}] Starting {mode} crawl"
+        )
+
+        # Create crawl job in database
+        job_id = await self._create_job(config.site_domain, mode)
+
+        start_time = time.time()
+        stats = {
+            "pages_crawled": 0,
+            "properties_found": 0,
+            "properties_new": 0,
+            "properties_updated": 0,
+            "errors": 0,
+        }
 
-            # Create crawl job in database
-            job_id = await self._create_job(config.site_domain, mode)
-
-            start_time = time.time()
-            stats = {
-                "pages_crawled": 0,
-                "properties_found": 0,
-                "properties_new": 0,
-                "properties_updated": 0,
-                "errors": 0,
-            }
-
-            try:
-                # Determine pages to crawl
-                if mode == CrawlMode.FULL:
-                    pages_needed = config.pagination['max_pages']
-                else:
-                    # Incremental: only first 5-10 pages (new listings)
-                    pages_needed = min(10, config.pagination['max_pages'])
-
-                # Crawl with parallel workers
-                all_properties = []
-                page_num = 1
-                consecutive_errors = 0
-
-                while page_num <= pages_needed:
-                    # Create batch for workers
-                    batch_size = min(config.max_workers, pages_needed - page_num + 1)
-                    page_batch = range(page_num, page_num + batch_size)
-
-                    # Crawl batch in parallel
-                    tasks = [
-                        self._crawl_page(config, page, stats)
-                        for page in page_batch
-                    ]
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                    # Collect results
-                    for result in results:
-                        if isinstance(result, Exception):
-                            stats["errors"] += 1
-                            consecutive_errors += 1
-                            logger.error(f"{LogEmoji.ERROR} [{config.site_name}] Error: {result}")
-
-                            # Too many errors? Stop crawling
-                            if consecutive_errors >= 5:
-                                logger.warning(
-                                    f"{LogEmoji.WARNING} [{config.site_name}] "
-                                    f"Too many consecutive errors, stopping"
-                                )
-                                await self._update_site_status(
-                                    config.site_domain,
-                                    SiteStatus.FAILED,
-                                    str(result)
-                                )
-                                break
-                        elif isinstance(result, list):
-                            all_properties.extend(result)
-                            consecutive_errors = 0  # Reset on success
-                        elif result == "rate_limited":
+        try:
+            # Determine pages to crawl
+            if mode == CrawlMode.FULL:
+                pages_needed = config.pagination['max_pages']
+            else:
+                # Incremental: only first 5-10 pages (new listings)
+                pages_needed = min(10, config.pagination['max_pages'])
+
+            # Crawl with parallel workers
+            all_properties = []
+            page_num = 1
+            consecutive_errors = 0
+
+            while page_num <= pages_needed:
+                # Create batch for workers
+                batch_size = min(config.max_workers, pages_needed - page_num + 1)
+                page_batch = range(page_num, page_num + batch_size)
+
+                # Crawl batch in parallel
+                tasks = [
+                    self._crawl_page(config, page, stats)
+                    for page in page_batch
+                ]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+
+                # Collect results
+                for result in results:
+                    if isinstance(result, Exception):
+                        stats["errors"] += 1
+                        consecutive_errors += 1
+                        logger.error(f"{LogEmoji.ERROR} [{config.site_name}] Error: {result}")
+
+                        # Too many errors? Stop crawling
+                        if consecutive_errors >= 5:
                             logger.warning(
-                                f"{LogEmoji.WARNING} [{config.site_name}] Rate limited, slowing down"
+                                f"{LogEmoji.WARNING} [{config.site_name}] "
+                                f"Too many consecutive errors, stopping"
                             )
-                            await asyncio.sleep(config.rate_limit_seconds * 2)
-                            consecutive_errors = 0
-
-                    page_num += batch_size
-                    stats["pages_crawled"] = page_num - 1
+                            await self._update_site_status(
+                                config.site_domain,
+                                SiteStatus.FAILED,
+                                str(result)
+                            )
+                            break
+                    elif isinstance(result, list):
+                        all_properties.extend(result)
+                        consecutive_errors = 0  # Reset on success
+                    elif result == "rate_limited":
+                        # The scheduler has already backed this domain off
+                        consecutive_errors = 0
 
-                    logger.info(
-                        f"{LogEmoji.CHART} [{config.site_name}] "
-                        f"Progress: {stats['pages_crawled']}/{pages_needed} pages, "
-                        f"{len(all_properties)} properties"
-                    )
+                page_num += batch_size
+                stats["pages_crawled"] = page_num - 1
 
-                # Save properties to database
-                saved_stats = await self._save_properties(
-                    config, all_properties, mode
+                logger.info(
+                    f"{LogEmoji.CHART} [{config.site_name}] "
+                    f"Progress: {stats['pages_crawled']}/{pages_needed} pages, "
+                    f"{len(all_properties)} properties"
                 )
-                stats.update(saved_stats)
 
-                # Update job as completed
-                duration = time.time() - start_time
-                await self._complete_job(job_id, stats, duration)
+            # Save properties to database
+            saved_stats = await self._save_properties(
+                config, all_properties, mode
+            )
+            stats.update(saved_stats)
 
-                # Update last crawl timestamp
-                await self._update_last_crawl(config.site_domain, mode)
+            # Update job as completed
+            duration = time.time() - start_time
+            await self._complete_job(job_id, stats, duration)
 
-                logger.info(
-                    f"{LogEmoji.SUCCESS} [{config.site_name}] Crawl completed: "
-                    f"{stats['properties_found']} total, "
-                    f"{stats['properties_new']} new, "
-                    f"{stats['properties_updated']} updated, "
-                    f"{duration:.1f}s"
-                )
+            # Update last crawl timestamp
+            await self._update_last_crawl(config.site_domain, mode)
 
-                return stats
+            logger.info(
+                f"{LogEmoji.SUCCESS} [{config.site_name}] Crawl completed: "
+                f"{stats['properties_found']} total, "
+                f"{stats['properties_new']} new, "
+                f"{stats['properties_updated']} updated, "
+                f"{duration:.1f}s"
+            )
 
-            except Exception as e:
-                logger.error(f"{LogEmoji.ERROR} [{config.site_name}] Fatal error: {e}")
-                stats["errors"] += 1
+            return stats
 
-                # Update job as failed
-                duration = time.time() - start_time
-                await self._fail_job(job_id, str(e), stats, duration)
+        except Exception as e:
+            logger.error(f"{LogEmoji.ERROR} [{config.site_name}] Fatal error: {e}")
+            stats["errors"] += 1
 
-                # Update site status
-                await self._update_site_status(config.site_domain, SiteStatus.FAILED, str(e))
+            # Update job as failed
+            duration = time.time() - start_time
+            await self._fail_job(job_id, str(e), stats, duration)
 
-                raise
+            # Update site status
+            await self._update_site_status(config.site_domain, SiteStatus.FAILED, str(e))
+
+            raise
 
     async def _crawl_page(
         self,
@@ -392,9 +396,6 @@ class MultiSiteOrchestrator:
         Returns:
             List of properties or "rate_limited" if rate limited
         """
-        # Apply rate limiting
-        await asyncio.sleep(config.rate_limit_seconds)
-
         # Build URL
         pattern = config.pagination['pattern']
         if '{page}' in pattern:
@@ -405,19 +406,21 @@ class MultiSiteOrchestrator:
         logger.debug(f"{LogEmoji.SEARCH} [{config.site_name}] Crawling page {page_num}: {url}")
 
         try:
-            # Crawl
-            result = self.crawler.run(url=url)
-
-            if not result.success:
-                logger.warning(f"{LogEmoji.WARNING} [{config.site_name}] Failed to crawl {url}")
-                return []
-
-            # Detect rate limiting
-            rate_limit_type = RateLimitDetector.detect(
-                result.status_code if hasattr(result, 'status_code') else 200,
-                result.html,
-                getattr(result, 'headers', {})
-            )
+            # Crawl (paced and bounded by the scheduler)
+            async with self.scheduler.request(config.site_domain) as ticket:
+                result = self.crawler.run(url=url)
+
+                if not result.success:
+                    ticket.fail()
+                    logger.warning(f"{LogEmoji.WARNING} [{config.site_name}] Failed to crawl {url}")
+                    return []
+
+                # Detect rate limiting (backs the domain off, honouring Retry-After)
+                rate_limit_type = ticket.record_response(
+                    result.status_code if hasattr(result, 'status_code') else 200,
+                    result.html,
+                    getattr(result, 'headers', None) or {}
+                )
 
             if rate_limit_type:
                 logger.warning(
@@ -514,110 +517,17 @@ class MultiSiteOrchestrator:
         """
         Save properties to database with incremental state tracking
 
+        Set-based: listings are COPYed into a staging table and classified
+        (new / changed / unchanged) and upserted in one statement per batch.
+
         Returns:
-            Statistics: new, updated counts
+            Statistics: new, updated, unchanged counts
         """
         if not properties:
-            return {"properties_new": 0, "properties_updated": 0}
-
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-
-        stats = {"properties_new": 0, "properties_updated": 0}
-
-        for prop in properties:
-            url = prop.get('url', '')
-            if not url:
-                continue
-
-            # Calculate content hash
-            content = f"{prop.get('title')}_{prop.get('price')}_{prop.get('location')}"
-            content_hash = hashlib.md5(content.encode()).hexdigest()
-            url_hash = hashlib.md5(url.encode()).hexdigest()
-
-            # Check if URL exists in crawl_state
-            cursor.execute(
-                "SELECT id, content_hash, property_id FROM crawl_state WHERE site_domain = %s AND url_hash = %s",
-                (config.site_domain, url_hash)
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                # URL exists
-                state_id, old_content_hash, property_id = existing
-
-                if content_hash != old_content_hash:
-                    # Content changed - update property
-                    if property_id:
-                        cursor.execute(
-                            """
-                            UPDATE properties
-                            SET title = %s, price = %s, location = %s, area = %s,
-                                description = %s, updated_at = CURRENT_TIMESTAMP
-                            WHERE id = %s
-                            """,
-                            (prop['title'], prop['price'], prop['location'],
-                             prop['area'], prop['description'], property_id)
-                        )
-
-                    # Update state
-                    cursor.execute(
-                        """
-                        UPDATE crawl_state
-                        SET content_hash = %s, last_seen = CURRENT_TIMESTAMP,
-                            last_updated = CURRENT_TIMESTAMP, status = 'updated'
-                        WHERE id = %s
-                        """,
-                        (content_hash, state_id)
-                    )
-                    stats['properties_updated'] += 1
-                else:
-                    # No change - just update last_seen
-                    cursor.execute(
-                        "UPDATE crawl_state SET last_seen = CURRENT_TIMESTAMP WHERE id = %s",
-                        (state_id,)
-                    )
-            else:
-                # New URL - insert property with ON CONFLICT handling
-                cursor.execute(
-                    """
-                    INSERT INTO properties
-                    (title, price, location, area, description, url, source)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (url) DO UPDATE SET
-                        title = EXCLUDED.title,
-                        price = EXCLUDED.price,
-                        location = EXCLUDED.location,
-                        area = EXCLUDED.area,
-                        description = EXCLUDED.description,
-                        updated_at = CURRENT_TIMESTAMP
-                    RETURNING id
-                    """,
-                    (prop['title'], prop['price'], prop['location'], prop['area'],
-                     prop['description'], url, config.site_domain)
-                )
-                property_id = cursor.fetchone()[0]
-
-                # Insert into crawl_state with ON CONFLICT handling
-                cursor.execute(
-                    """
-                    INSERT INTO crawl_state
-                    (site_domain, url, url_hash, content_hash, property_id, status)
-                    VALUES (%s, %s, %s, %s, %s, 'active')
-                    ON CONFLICT (site_domain, url_hash) DO UPDATE SET
-                        content_hash = EXCLUDED.content_hash,
-                        last_seen = CURRENT_TIMESTAMP,
-                        property_id = EXCLUDED.property_id
-                    """,
-                    (config.site_domain, url, url_hash, content_hash, property_id)
-                )
-                stats['properties_new'] += 1
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+            return {"properties_new": 0, "properties_updated": 0, "properties_unchanged": 0}
 
-        return stats
+        store = await self._get_property_store()
+        return await store.save(config.site_domain, properties)
 
     async def _create_job(self, site_domain: str, job_type: str) -> int:
         """Create crawl job record"""
@@ -765,7 +675,10 @@ async def main():
     orchestrator = MultiSiteOrchestrator(db_config)
 
     # Start incremental crawl for all enabled sites
-    await orchestrator.start_all(mode=CrawlMode.INCREMENTAL)
+    try:
+        await orchestrator.start_all(mode=CrawlMode.INCREMENTAL)
+    finally:
+        await orchestrator.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""
+Set-based property persistence for the crawlers
+
+Replaces the per-listing SELECT + UPDATE/INSERT loop with one COPY and one
+SQL statement per batch:
+
+1. COPY the batch into a temp staging table
+2. Classify each row as new / changed / unchanged by joining crawl_state
+   on (site_domain, url_hash) and comparing content_hash
+3. Apply all upserts (properties + crawl_state) in the same statement via
+   data-modifying CTEs
+
+Uses asyncpg, so the event loop keeps serving sibling sites while a batch
+is written.
+"""
+import hashlib
+from typing import List, Dict, Any, Tuple
+
+import asyncpg
+
+from shared.utils.logger import setup_logger, LogEmoji
+
+logger = setup_logger("property_store")
+
+# Listings per COPY + upsert round trip
+DEFAULT_BATCH_SIZE = 1000
+
+STAGING_COLUMNS = [
+    "url", "url_hash", "content_hash",
+    "title", "price", "location", "area", "description",
+]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS crawl_staging (
+        url TEXT NOT NULL,
+        url_hash VARCHAR(64) NOT NULL,
+        content_hash VARCHAR(64) NOT NULL,
+        title TEXT,
+        price TEXT,
+        location TEXT,
+        area TEXT,
+        description TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Every data-modifying CTE runs to completion whether or not the final
+# SELECT reads it; all of them see the same pre-statement snapshot, which
+# is why new crawl_state rows take their property ids from `inserted`.
+UPSERT_SQL = """
+    WITH classified AS (
+        SELECT
+            s.*,
+            cs.id AS state_id,
+            cs.property_id,
+            CASE
+                WHEN cs.id IS NULL THEN 'new'
+                WHEN cs.content_hash IS DISTINCT FROM s.content_hash THEN 'changed'
+                ELSE 'unchanged'
+            END AS change
+        FROM crawl_staging s
+        LEFT JOIN crawl_state cs
+            ON cs.site_domain = $1 AND cs.url_hash = s.url_hash
+    ),
+    inserted AS (
+        INSERT INTO properties (title, price, location, area, description, url, source)
+        SELECT title, price, location, area, description, url, $1
+        FROM classified
+        WHERE change = 'new'
+        ON CONFLICT (url) DO UPDATE SET
+            title = EXCLUDED.title,
+            price = EXCLUDED.price,
+            location = EXCLUDED.location,
+            area = EXCLUDED.area,
+            description = EXCLUDED.description,
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING id, url
+    ),
+    updated_properties AS (
+        UPDATE properties p
+        SET title = c.title, price = c.price, location = c.location, area = c.area,
+            description = c.description, updated_at = CURRENT_TIMESTAMP
+        FROM classified c
+        WHERE c.change = 'changed' AND c.property_id IS NOT NULL AND p.id = c.property_id
+        RETURNING p.id
+    ),
+    new_state AS (
+        INSERT INTO crawl_state (site_domain, url, url_hash, content_hash, property_id, status)
+        SELECT $1, c.url, c.url_hash, c.content_hash, i.id, 'active'
+        FROM classified c
+        JOIN inserted i ON i.url = c.url
+        WHERE c.change = 'new'
+        ON CONFLICT (site_domain, url_hash) DO UPDATE SET
+            content_hash = EXCLUDED.content_hash,
+            last_seen = CURRENT_TIMESTAMP,
+            property_id = EXCLUDED.property_id
+        RETURNING id
+    ),
+    seen_state AS (
+        UPDATE crawl_state cs
+        SET last_seen = CURRENT_TIMESTAMP,
+            content_hash = c.content_hash,
+            last_updated = CASE WHEN c.change = 'changed' THEN CURRENT_TIMESTAMP ELSE cs.last_updated END,
+            status = CASE WHEN c.change = 'changed' THEN 'updated' ELSE cs.status END
+        FROM classified c
+        WHERE c.state_id IS NOT NULL AND cs.id = c.state_id
+        RETURNING cs.id
+    )
+    SELECT
+        COUNT(*) FILTER (WHERE change = 'new') AS new_count,
+        COUNT(*) FILTER (WHERE change = 'changed') AS changed_count,
+        COUNT(*) FILTER (WHERE change = 'unchanged') AS unchanged_count
+    FROM classified
+"""
+
+
+def content_hash(prop: Dict[str, Any]) -> str:
+    """Change-detection hash (same inputs as the previous per-row code)"""
+    content = f"{prop.get('title')}_{prop.get('price')}_{prop.get('location')}"
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def url_hash(url: str) -> str:
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def _as_text(value: Any) -> Any:
+    return None if value is None else str(value)
+
+
+class PropertyStore:
+    """Bulk, set-based upserts of crawled listings into properties + crawl_state"""
+
+    def __init__(self, pool: asyncpg.Pool, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.pool = pool
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _stage_records(properties: List[Dict[str, Any]]) -> List[Tuple]:
+        """Hash and de-duplicate listings (last occurrence of a URL wins)"""
+        records: Dict[str, Tuple] = {}
+        for prop in properties:
+            url = prop.get('url', '')
+            if not url:
+                continue
+            key = url_hash(url)
+            records[key] = (
+                url, key, content_hash(prop),
+                _as_text(prop.get('title')), _as_text(prop.get('price')),
+                _as_text(prop.get('location')), _as_text(prop.get('area')),
+                _as_text(prop.get('description')),
+            )
+        return list(records.values())
+
+    async def save(self, site_domain: str, properties: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Persist listings for one site
+
+        Returns:
+            Statistics: new, updated and unchanged counts
+        """
+        stats = {"properties_new": 0, "properties_updated": 0, "properties_unchanged": 0}
+        records = self._stage_records(properties)
+        if not records:
+            return stats
+
+        async with self.pool.acquire() as conn:
+            await conn.execute(CREATE_STAGING_SQL)
+
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                async with conn.transaction():
+                    await conn.copy_records_to_table(
+                        "crawl_staging", records=batch, columns=STAGING_COLUMNS
+                    )
+                    row = await conn.fetchrow(UPSERT_SQL, site_domain)
+
+                stats["properties_new"] += row["new_count"]
+                stats["properties_updated"] += row["changed_count"]
+                stats["properties_unchanged"] += row["unchanged_count"]
+
+        logger.info(
+            f"{LogEmoji.DATABASE} [{site_domain}] Saved {len(records)} listings: "
+            f"{stats['properties_new']} new, {stats['properties_updated']} changed, "
+            f"{stats['properties_unchanged']} unchanged"
+        )
+        return stats
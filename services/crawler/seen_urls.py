@@ -0,0 +1,301 @@
+"""
+Persistent Seen-URL Set for the crawlers
+
+Exact membership over 64-bit URL keys (the first 8 bytes of md5(url), i.e.
+the leading 16 hex digits of crawl_state.url_hash), so it can be warmed
+from crawl_state without touching the URL text.
+
+On disk, for a set at `path`:
+- `path.u64`  sorted, de-duplicated uint64 keys (native byte order),
+              memory-mapped read-only
+- `path.log`  keys added since the last merge (append-only checkpoint)
+- `path.meta.json` warm cursors (last crawl_state id loaded per scope)
+
+Lookups bisect the mapped file, so resident memory is bounded by the OS
+page cache instead of growing with every URL ever crawled. New keys live in
+a small in-memory delta that is appended to the log on checkpoint() and
+streamed into a new sorted file once it grows past a fraction of the base.
+
+Single writer per path: share one instance per process via get_seen_url_set().
+"""
+import os
+import json
+import mmap
+import bisect
+import hashlib
+import heapq
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from shared.utils.logger import setup_logger, LogEmoji
+
+logger = setup_logger("seen_urls")
+
+# Merge the delta into the base once it holds max(MIN_MERGE_KEYS, base/8) keys
+MIN_MERGE_KEYS = 65536
+MERGE_FRACTION = 8
+
+# Keys written per chunk while streaming a merge
+WRITE_CHUNK = 65536
+
+
+def url_key(url: str) -> int:
+    """64-bit key for a URL (matches hash_key(md5(url).hexdigest()))"""
+    return int.from_bytes(hashlib.md5(url.encode()).digest()[:8], "big")
+
+
+def hash_key(url_hash: str) -> int:
+    """64-bit key from a crawl_state.url_hash (md5 hex digest)"""
+    return int(url_hash[:16], 16)
+
+
+class SeenUrlSet:
+    """Memory-mapped sorted set of URL keys with an in-memory delta"""
+
+    def __init__(self, path: Optional[str] = None, min_merge_keys: int = MIN_MERGE_KEYS):
+        """
+        Args:
+            path: File prefix; None keeps the set in memory only
+            min_merge_keys: Smallest delta that triggers a merge
+        """
+        self.path = path
+        self.min_merge_keys = min_merge_keys
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._base: Sequence[int] = ()
+        self._delta: set = set()
+        self._pending: List[int] = []
+        self.meta: Dict[str, Dict[str, int]] = {"warm_cursor": {}}
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._open_base()
+            self._load_log()
+            self._load_meta()
+
+    # ========================================================================
+    # Loading
+    # ========================================================================
+
+    @property
+    def _base_path(self) -> str:
+        return f"{self.path}.u64"
+
+    @property
+    def _log_path(self) -> str:
+        return f"{self.path}.log"
+
+    @property
+    def _meta_path(self) -> str:
+        return f"{self.path}.meta.json"
+
+    def _open_base(self):
+        self._close_base()
+        if not os.path.exists(self._base_path) or os.path.getsize(self._base_path) < 8:
+            return
+        with open(self._base_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        usable = len(self._mmap) - len(self._mmap) % 8
+        self._base = memoryview(self._mmap)[:usable].cast("Q")
+
+    def _close_base(self):
+        if isinstance(self._base, memoryview):
+            self._base.release()
+        self._base = ()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _load_log(self):
+        if not os.path.exists(self._log_path):
+            return
+        keys = array("Q")
+        with open(self._log_path, "rb") as f:
+            data = f.read()
+        # Ignore a torn trailing write
+        keys.frombytes(data[:len(data) - len(data) % 8])
+        self._delta = {key for key in keys if not self._in_base(key)}
+
+    def _load_meta(self):
+        if not os.path.exists(self._meta_path):
+            return
+        try:
+            with open(self._meta_path) as f:
+                self.meta.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"{LogEmoji.WARNING} Ignoring unreadable seen-set metadata: {e}")
+
+    # ========================================================================
+    # Membership
+    # ========================================================================
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._delta)
+
+    def _in_base(self, key: int) -> bool:
+        i = bisect.bisect_left(self._base, key)
+        return i < len(self._base) and self._base[i] == key
+
+    def contains_keys(self, keys: Sequence[int]) -> List[bool]:
+        """Batch membership; keys are probed in sorted order with a moving lower bound"""
+        found = [False] * len(keys)
+        lo = 0
+        size = len(self._base)
+        for idx in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[idx]
+            if key in self._delta:
+                found[idx] = True
+                continue
+            lo = bisect.bisect_left(self._base, key, lo, size)
+            found[idx] = lo < size and self._base[lo] == key
+        return found
+
+    def contains_many(self, urls: Sequence[str]) -> List[bool]:
+        """Batch membership for one page of URLs"""
+        return self.contains_keys([url_key(url) for url in urls])
+
+    def __contains__(self, url: str) -> bool:
+        key = url_key(url)
+        return key in self._delta or self._in_base(key)
+
+    # ========================================================================
+    # Updates
+    # ========================================================================
+
+    def add_keys(self, keys: Iterable[int]) -> int:
+        """Add keys; returns how many were new"""
+        keys = list(keys)
+        added = 0
+        for key, present in zip(keys, self.contains_keys(keys)):
+            if present or key in self._delta:
+                continue
+            self._delta.add(key)
+            self._pending.append(key)
+            added += 1
+        return added
+
+    def add_many(self, urls: Iterable[str]) -> int:
+        return self.add_keys(url_key(url) for url in urls)
+
+    def add(self, url: str) -> bool:
+        return self.add_keys([url_key(url)]) == 1
+
+    def checkpoint(self):
+        """Append keys added since the last checkpoint; merge if the delta is large"""
+        if not self.path:
+            return
+        if self._pending:
+            with open(self._log_path, "ab") as f:
+                f.write(array("Q", self._pending).tobytes())
+            self._pending = []
+        if len(self._delta) >= max(self.min_merge_keys, len(self._base) // MERGE_FRACTION):
+            self.merge()
+        self._save_meta()
+
+    def merge(self):
+        """Stream base + delta into a new sorted file and reset the log"""
+        if not self.path or not self._delta:
+            return
+
+        tmp_path = f"{self._base_path}.tmp"
+        chunk = array("Q")
+        with open(tmp_path, "wb") as f:
+            for key in heapq.merge(self._base, sorted(self._delta)):
+                chunk.append(key)
+                if len(chunk) >= WRITE_CHUNK:
+                    f.write(chunk.tobytes())
+                    chunk = array("Q")
+            f.write(chunk.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._close_base()
+        os.replace(tmp_path, self._base_path)
+        open(self._log_path, "wb").close()
+        self._delta.clear()
+        self._pending = []
+        self._open_base()
+
+        logger.info(f"{LogEmoji.DATABASE} Seen-URL set merged: {len(self._base)} keys ({self.path})")
+
+    def _save_meta(self):
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    # ========================================================================
+    # Warming
+    # ========================================================================
+
+    def warm_from_crawl_state(self, conn, site_domain: Optional[str] = None, batch_size: int = 50000) -> int:
+        """
+        Load crawl_state rows added since the last warm (psycopg2 connection)
+
+        Args:
+            conn: Open psycopg2 connection
+            site_domain: Restrict to one site (None = all sites)
+            batch_size: Rows fetched per round trip
+
+        Returns:
+            Number of keys added
+        """
+        scope = site_domain or "*"
+        last_id = self.meta["warm_cursor"].get(scope, 0)
+
+        sql = "SELECT id, url_hash FROM crawl_state WHERE id > %s"
+        params: list = [last_id]
+        if site_domain:
+            sql += " AND site_domain = %s"
+            params.append(site_domain)
+        sql += " ORDER BY id"
+
+        added = 0
+        cursor = conn.cursor(name=f"seen_urls_warm_{os.getpid()}")
+        cursor.itersize = batch_size
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                added += self.add_keys(hash_key(url_hash) for _, url_hash in rows if url_hash)
+                last_id = rows[-1][0]
+        finally:
+            cursor.close()
+            conn.commit()
+
+        self.meta["warm_cursor"][scope] = last_id
+        self.checkpoint()
+        logger.info(
+            f"{LogEmoji.DATABASE} Seen-URL set warmed from crawl_state ({scope}): "
+            f"+{added}, {len(self)} total"
+        )
+        return added
+
+    def close(self):
+        """Checkpoint and unmap (drops the shared instance)"""
+        self.checkpoint()
+        self._close_base()
+        if self.path:
+            _instances.pop(os.path.abspath(self.path), None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self),
+            "base_keys": len(self._base),
+            "delta_keys": len(self._delta),
+            "pending_keys": len(self._pending),
+        }
+
+
+# Process-wide instances, one per path (the set is single-writer)
+_instances: Dict[str, SeenUrlSet] = {}
+
+
+def get_seen_url_set(path: str) -> SeenUrlSet:
+    """Shared SeenUrlSet for a file prefix"""
+    path = os.path.abspath(path)
+    if path not in _instances:
+        _instances[path] = SeenUrlSet(path)
+    return _instances[path]
@@ -15,6 +15,8 @@ from psycopg2.extras import execute_values
 from crawl4ai import WebCrawler
 from bs4 import BeautifulSoup
 
+from services.crawler.seen_urls import get_seen_url_set
+
 
 class SmartCrawler:
     """Production crawler với auto-resume và state tracking"""
@@ -25,6 +27,11 @@ class SmartCrawler:
         self.config = self._load_config()
         self.crawler = None
 
+        # Seen-URL set (mmapped, incrementally warmed from crawl_state)
+        seen_dir = os.getenv('CRAWLER_SEEN_URLS_DIR', '/tmp/ree_ai/seen_urls')
+        self.seen_urls = get_seen_url_set(os.path.join(seen_dir, site_domain))
+        self.seen_urls.warm_from_crawl_state(self.conn, site_domain)
+
     def _get_db_connection(self):
         """Get PostgreSQL connection"""
         use_local = os.getenv('USE_LOCAL_POSTGRES', 'true').lower() == 'true'
@@ -105,28 +112,44 @@ class SmartCrawler:
 
     def is_url_crawled(self, url: str) -> bool:
         """Check if URL đã được crawl chưa"""
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT 1 FROM crawl_state
-            WHERE site_domain = %s AND url_hash = %s
-        """, (self.site_domain, url_hash))
-        exists = cursor.fetchone() is not None
-        cursor.close()
-        return exists
+        return url in self.seen_urls
+
+    def are_urls_crawled(self, urls: List[str]) -> List[bool]:
+        """Batch check cho cả page (không query database)"""
+        return self.seen_urls.contains_many(urls)
 
     def mark_url_crawled(self, url: str, property_id: Optional[int] = None):
         """Mark URL as crawled trong crawl_state"""
-        url_hash = hashlib.md5(url.encode()).hexdigest()
+        self.mark_urls_crawled([(url, property_id)])
+        self.conn.commit()
+
+    def mark_urls_crawled(self, rows: List[Tuple[str, Optional[int]]]):
+        """
+        Mark nhiều URL as crawled trong một lệnh (caller commits)
+
+        Args:
+            rows: (url, property_id) pairs
+        """
+        if not rows:
+            return
+
         cursor = self.conn.cursor()
-        cursor.execute("""
+        execute_values(
+            cursor,
+            """
             INSERT INTO crawl_state (site_domain, url, url_hash, property_id, status)
-            VALUES (%s, %s, %s, %s, 'active')
+            VALUES %s
             ON CONFLICT (site_domain, url_hash)
             DO UPDATE SET last_seen = CURRENT_TIMESTAMP
-        """, (self.site_domain, url, url_hash, property_id))
-        self.conn.commit()
+            """,
+            [
+                (self.site_domain, url, hashlib.md5(url.encode()).hexdigest(), property_id)
+                for url, property_id in rows
+            ],
+            template="(%s, %s, %s, %s, 'active')"
+        )
         cursor.close()
+        self.seen_urls.add_many(url for url, _ in rows)
 
     async def crawl_page(self, page_num: int) -> Tuple[List[Dict], int, int]:
         """
@@ -155,18 +178,21 @@ class SmartCrawler:
         new_count = 0
         duplicate_count = 0
 
+        # Extract URLs first so the whole page is checked in one batch
+        card_urls = []
         for card in cards:
-            try:
-                # Extract URL first to check duplicate
-                link_elem = card.select_one(selectors.get('link', 'a'))
-                url_path = link_elem.get('href', '') if link_elem else ""
-                full_url = f"https://{self.site_domain.split('.')[0]}.com.vn{url_path}" if url_path.startswith('/') else url_path
+            link_elem = card.select_one(selectors.get('link', 'a'))
+            url_path = link_elem.get('href', '') if link_elem else ""
+            full_url = f"https://{self.site_domain.split('.')[0]}.com.vn{url_path}" if url_path.startswith('/') else url_path
+            if full_url:
+                card_urls.append((card, full_url))
 
-                if not full_url:
-                    continue
+        crawled = self.are_urls_crawled([full_url for _, full_url in card_urls])
 
+        for (card, full_url), already_crawled in zip(card_urls, crawled):
+            try:
                 # Check if already crawled
-                if self.is_url_crawled(full_url):
+                if already_crawled:
                     duplicate_count += 1
                     continue
 
@@ -313,14 +339,15 @@ class SmartCrawler:
 
         # Get inserted IDs and mark as crawled
         inserted = cursor.fetchall()
-        for prop_id, url in inserted:
-            self.mark_url_crawled(url, prop_id)
+        cursor.close()
+        self.mark_urls_crawled([(url, prop_id) for prop_id, url in inserted])
 
         self.conn.commit()
-        cursor.close()
+        self.seen_urls.checkpoint()
 
     def close(self):
         """Close database connection"""
+        self.seen_urls.checkpoint()
         if self.conn:
             self.conn.close()
 
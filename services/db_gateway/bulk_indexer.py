@@ -0,0 +1,286 @@
+"""
+Streaming Bulk Indexer for DB Gateway
+
+Used by /bulk-insert and /bulk-insert/stream. Documents are serialized as
+they arrive and grouped into chunks bounded by both byte size and document
+count. Up to `concurrency` bulk requests are in flight at once; the producer
+waits for a free slot, so memory stays bounded no matter how large the
+backfill is. Items rejected with a retryable status (429 / 5xx) are resent
+with exponential backoff, and the index is refreshed once at the end
+(or not at all) instead of per request.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bulk item statuses worth retrying (rejected execution / overloaded / unavailable)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Keep at most this many per-item error messages per job
+MAX_REPORTED_ERRORS = 50
+
+
+def prepare_document(prop: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Turn a normalized property into (property_id, OpenSearch document)
+
+    Price and area are coerced to numbers; any extra fields are kept as-is
+    (flexible schema).
+    """
+    # Generate property_id if not provided
+    property_id = prop.get('property_id')
+    if not property_id:
+        # Use URL or fallback to hash
+        url = prop.get('url', '')
+        if url:
+            property_id = url.split('/')[-1] or f"prop_{hash(url)}"
+        else:
+            property_id = f"prop_{hash(str(prop))}"
+
+    # Ensure price and area are numeric
+    price = prop.get('price', 0)
+    if isinstance(price, str):
+        # Shouldn't happen if normalized, but fallback
+        try:
+            price = float(price.replace(',', '').replace(' ', ''))
+        except ValueError:
+            price = 0
+
+    area = prop.get('area', 0)
+    if isinstance(area, str):
+        try:
+            area = float(area.replace('m²', '').replace('m2', '').replace(' ', ''))
+        except ValueError:
+            area = 0
+
+    # Prepare document with NUMERIC types
+    doc = {
+        "property_id": property_id,
+        "title": prop.get('title', ''),
+        "description": prop.get('description', ''),
+
+        # NUMERIC fields for filtering/sorting
+        "price": float(price) if price else 0,
+        "area": float(area) if area else 0,
+        "bedrooms": int(prop.get('bedrooms', 0)),
+        "bathrooms": int(prop.get('bathrooms', 0)),
+
+        # Display fields (formatted text)
+        "price_display": prop.get('price_display', ''),
+        "area_display": prop.get('area_display', ''),
+
+        # Location fields
+        "location": prop.get('location', ''),
+        "district": prop.get('district', ''),
+        "city": prop.get('city', ''),
+
+        # Other fields
+        "property_type": prop.get('property_type', ''),
+        "url": prop.get('url', ''),
+        "source": prop.get('source', ''),
+
+        # Metadata
+        "created_at": prop.get('created_at', datetime.utcnow().isoformat()),
+        "indexed_at": datetime.utcnow().isoformat()
+    }
+
+    # Add any additional fields from the property (flexible schema)
+    for key, value in prop.items():
+        if key not in doc:
+            doc[key] = value
+
+    return property_id, doc
+
+
+class BulkIndexer:
+    """Chunked, concurrent, retrying bulk indexer for one ingest job"""
+
+    def __init__(
+        self,
+        opensearch_client,
+        index: str,
+        max_chunk_bytes: int = settings.BULK_CHUNK_BYTES,
+        max_chunk_docs: int = settings.BULK_CHUNK_DOCS,
+        concurrency: int = settings.BULK_CONCURRENCY,
+        max_retries: int = settings.BULK_MAX_RETRIES,
+        refresh: bool = True,
+        job_id: Optional[str] = None
+    ):
+        """
+        Args:
+            opensearch_client: AsyncOpenSearch client
+            index: Target index
+            max_chunk_bytes: Flush a chunk once its NDJSON payload reaches this size
+            max_chunk_docs: Flush a chunk once it holds this many documents
+            concurrency: Max bulk requests in flight
+            max_retries: Retries for retryable item failures
+            refresh: Refresh the index once after the last chunk
+            job_id: Identifier reported in progress
+        """
+        self.client = opensearch_client
+        self.index = index
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_chunk_docs = max_chunk_docs
+        self.max_retries = max_retries
+        self.refresh = refresh
+        self.job_id = job_id
+
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: List[asyncio.Task] = []
+        self._chunk: List[Tuple[str, bytes]] = []
+        self._chunk_bytes = 0
+        self._started = time.monotonic()
+
+        self.status = "running"
+        self.errors: List[str] = []
+        self.stats = {
+            "received": 0,
+            "indexed": 0,
+            "failed": 0,
+            "retried": 0,
+            "chunks_sent": 0,
+            "bytes_sent": 0,
+            "in_flight": 0,
+        }
+
+    # ========================================================================
+    # Producer side
+    # ========================================================================
+
+    async def add(self, prop: Dict[str, Any]):
+        """Queue one property; sends a chunk when a size/count limit is hit"""
+        self.stats["received"] += 1
+        try:
+            property_id, doc = prepare_document(prop)
+        except Exception as e:
+            self.record_failure(f"document {self.stats['received']}: {e}")
+            return
+
+        action = json.dumps({"index": {"_index": self.index, "_id": property_id}})
+        payload = f"{action}\n{json.dumps(doc, ensure_ascii=False, default=str)}\n".encode("utf-8")
+
+        self._chunk.append((property_id, payload))
+        self._chunk_bytes += len(payload)
+
+        if len(self._chunk) >= self.max_chunk_docs or self._chunk_bytes >= self.max_chunk_bytes:
+            await self._dispatch()
+
+    def record_failure(self, message: str):
+        """Count a document that never reached OpenSearch (e.g. bad NDJSON line)"""
+        self.stats["failed"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    async def finish(self) -> Dict[str, Any]:
+        """Send the last chunk, wait for in-flight requests, refresh once"""
+        try:
+            await self._dispatch()
+            if self._tasks:
+                await asyncio.gather(*self._tasks)
+
+            if self.refresh and self.stats["indexed"]:
+                await self.client.indices.refresh(index=self.index)
+
+            self.status = "completed"
+        except Exception:
+            self.status = "failed"
+            raise
+
+        return self.progress()
+
+    async def abort(self):
+        """Cancel in-flight requests (client disconnected / parse failure)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.status = "aborted"
+
+    async def _dispatch(self):
+        if not self._chunk:
+            return
+
+        chunk, self._chunk, self._chunk_bytes = self._chunk, [], 0
+
+        # Backpressure: wait for a free slot before accepting more input
+        await self._slots.acquire()
+        self.stats["in_flight"] += 1
+        self._tasks.append(asyncio.create_task(self._send_chunk(chunk)))
+
+    # ========================================================================
+    # Sending
+    # ========================================================================
+
+    async def _send_chunk(self, chunk: List[Tuple[str, bytes]]):
+        try:
+            pending = chunk
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self.stats["retried"] += len(pending)
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+                pending = await self._send_once(pending, final_attempt=attempt == self.max_retries)
+                if not pending:
+                    break
+        finally:
+            self.stats["in_flight"] -= 1
+            self._slots.release()
+
+    async def _send_once(
+        self,
+        items: List[Tuple[str, bytes]],
+        final_attempt: bool
+    ) -> List[Tuple[str, bytes]]:
+        """Send one bulk request; returns the items to retry"""
+        body = b"".join(payload for _, payload in items)
+
+        try:
+            response = await self.client.bulk(body=body)
+        except Exception as e:
+            if final_attempt:
+                for property_id, _ in items:
+                    self.record_failure(f"{property_id}: {e}")
+                logger.error(f"❌ Bulk chunk of {len(items)} failed: {e}")
+                return []
+            logger.warning(f"⚠️  Bulk chunk of {len(items)} failed, retrying: {e}")
+            return items
+
+        self.stats["chunks_sent"] += 1
+        self.stats["bytes_sent"] += len(body)
+
+        if not response.get('errors'):
+            self.stats["indexed"] += len(items)
+            return []
+
+        retry = []
+        for item, result in zip(items, response['items']):
+            index_result = result.get('index', {})
+            if 'error' not in index_result:
+                self.stats["indexed"] += 1
+            elif index_result.get('status') in RETRYABLE_STATUSES and not final_attempt:
+                retry.append(item)
+            else:
+                reason = index_result['error'].get('reason', 'Unknown error') \
+                    if isinstance(index_result['error'], dict) else index_result['error']
+                self.record_failure(f"{item[0]}: {reason}")
+        return retry
+
+    def progress(self) -> Dict[str, Any]:
+        """Snapshot for progress polling and the final response"""
+        elapsed = time.monotonic() - self._started
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "index": self.index,
+            **self.stats,
+            "elapsed_s": round(elapsed, 2),
+            "docs_per_s": round(self.stats["indexed"] / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors[:10] if self.errors else None,
+        }
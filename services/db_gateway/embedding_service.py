@@ -0,0 +1,459 @@
+"""
+Query Embedding Service for DB Gateway
+Shared by /vector-search and /hybrid-search
+
+- The sentence-transformers model is loaded in a background thread, so
+  startup is never blocked; searches fall back to BM25 until it is ready.
+- Concurrent queries are grouped by a micro-batcher into a single
+  `encode` call that runs in a worker thread, off the event loop.
+- Query vectors are cached in an in-process LRU backed by a memory-mapped
+  file, keyed by normalized query text, so hot queries survive restarts.
+"""
+
+import os
+import json
+import time
+import hashlib
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from shared.config import settings
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Cache key / model input: case-folded, whitespace-collapsed query"""
+    return " ".join((text or "").casefold().split())
+
+
+class _MmapVectorCache:
+    """
+    Fixed-capacity on-disk vector cache
+
+    Vectors live in a float32 memmap of shape (capacity, dim) used as a ring
+    buffer; a JSON sidecar maps key hashes to slots. Reads touch only the
+    pages they need, and the OS page cache keeps hot rows in memory.
+
+    The sidecar is only written periodically, so each row also carries a
+    64-bit tag of its key in a second memmap, written with the row. A slot
+    map restored after a crash can point at a row overwritten since; the
+    tag check turns that into a miss instead of a wrong vector.
+    """
+
+    def __init__(self, path: str, dim: int, capacity: int):
+        self.path = path
+        self.dim = dim
+        self.capacity = capacity
+        self.slots: Dict[str, int] = {}
+        self.slot_keys: List[Optional[str]] = [None] * capacity
+        self.next_slot = 0
+        self.dirty = False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = self._read_meta()
+        reuse = (
+            meta is not None
+            and meta.get("dim") == dim
+            and meta.get("capacity") == capacity
+            and os.path.exists(self._vectors_path)
+            and os.path.exists(self._tags_path)
+        )
+
+        self.vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="r+" if reuse else "w+",
+            shape=(capacity, dim)
+        )
+        self.tags = np.memmap(
+            self._tags_path,
+            dtype=np.uint64,
+            mode="r+" if reuse else "w+",
+            shape=(capacity,)
+        )
+
+        if reuse:
+            self.slots = meta.get("slots", {})
+            self.next_slot = meta.get("next_slot", 0)
+            for key_hash, slot in self.slots.items():
+                self.slot_keys[slot] = key_hash
+
+    @property
+    def _vectors_path(self) -> str:
+        return f"{self.path}.f32"
+
+    @property
+    def _tags_path(self) -> str:
+        return f"{self.path}.tags"
+
+    @property
+    def _meta_path(self) -> str:
+        return f"{self.path}.json"
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _tag(key_hash: str) -> int:
+        # 0 marks a row being (or never) written
+        return int(key_hash[:16], 16) or 1
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def get(self, key: str) -> Optional["np.ndarray"]:
+        key_hash = self._hash(key)
+        slot = self.slots.get(key_hash)
+        if slot is None:
+            return None
+        if int(self.tags[slot]) != self._tag(key_hash):
+            # Row reused for another key after the slot map was persisted
+            del self.slots[key_hash]
+            if self.slot_keys[slot] == key_hash:
+                self.slot_keys[slot] = None
+            self.dirty = True
+            return None
+        return np.array(self.vectors[slot])
+
+    def put(self, key: str, vector: "np.ndarray"):
+        key_hash = self._hash(key)
+        if key_hash in self.slots:
+            return
+
+        slot = self.next_slot % self.capacity
+        evicted = self.slot_keys[slot]
+        if evicted is not None:
+            self.slots.pop(evicted, None)
+
+        # Tag cleared first, so a crash mid-write leaves no row matching a key
+        self.tags[slot] = 0
+        self.vectors[slot] = vector
+        self.tags[slot] = self._tag(key_hash)
+        self.slots[key_hash] = slot
+        self.slot_keys[slot] = key_hash
+        self.next_slot = slot + 1
+        self.dirty = True
+
+    def flush(self):
+        """Persist vectors and the slot map (atomic rename for the sidecar)"""
+        if not self.dirty:
+            return
+        self.vectors.flush()
+        self.tags.flush()
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "next_slot": self.next_slot,
+                "slots": self.slots,
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+        self.dirty = False
+
+
+class EmbeddingService:
+    """Lazy-loaded, micro-batched, cached query encoder"""
+
+    def __init__(
+        self,
+        model_name: str = settings.EMBEDDING_MODEL,
+        max_batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+        max_wait_ms: float = settings.EMBEDDING_BATCH_WAIT_MS,
+        cache_size: int = settings.EMBEDDING_CACHE_SIZE,
+        disk_cache_dir: Optional[str] = settings.EMBEDDING_DISK_CACHE_DIR,
+        disk_cache_entries: int = settings.EMBEDDING_DISK_CACHE_ENTRIES,
+        disk_flush_interval: float = 30.0
+    ):
+        """
+        Args:
+            model_name: sentence-transformers model id
+            max_batch_size: Max queries per `encode` call
+            max_wait_ms: How long the batcher waits to fill a batch
+            cache_size: In-memory LRU entries
+            disk_cache_dir: Directory for the memory-mapped cache (None disables it)
+            disk_cache_entries: On-disk cache capacity
+            disk_flush_interval: Seconds between sidecar flushes
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self.disk_cache_dir = disk_cache_dir
+        self.disk_cache_entries = disk_cache_entries
+        self.disk_flush_interval = disk_flush_interval
+
+        self.model = None
+        self.dimension: Optional[int] = None
+        self.state = "not_loaded"  # not_loaded | loading | ready | failed | unavailable
+        self.error: Optional[str] = None
+        self.load_time_ms: Optional[float] = None
+
+        self._memory_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk_cache: Optional[_MmapVectorCache] = None
+        self._last_disk_flush = time.monotonic()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "requests": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "encoded": 0,
+            "batches": 0,
+            "max_batch": 0,
+            "not_ready": 0,
+            "errors": 0,
+            "last_batch_ms": 0.0,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    # ========================================================================
+    # Lifecycle
+    # ========================================================================
+
+    def start(self):
+        """Kick off the background model load (returns immediately)"""
+        if not HAS_SENTENCE_TRANSFORMERS:
+            self.state = "unavailable"
+            logger.warning("⚠️  sentence-transformers not installed, semantic search disabled")
+            return
+
+        if self._load_task is None:
+            self.state = "loading"
+            self._load_task = asyncio.create_task(self._load_model())
+
+    async def stop(self):
+        """Cancel background tasks and persist the disk cache"""
+        for task in (self._load_task, self._batch_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        if self._disk_cache is not None:
+            try:
+                await asyncio.to_thread(self._disk_cache.flush)
+            except Exception as e:
+                logger.error(f"❌ Failed to flush embedding disk cache: {e}")
+
+    async def _load_model(self):
+        start = time.perf_counter()
+        logger.info(f"📦 Loading embedding model '{self.model_name}' in background...")
+
+        try:
+            model = await asyncio.to_thread(SentenceTransformer, self.model_name)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"❌ Failed to load embedding model: {e}")
+            logger.warning("⚠️  Semantic search will not be available")
+            return
+
+        self.dimension = model.get_sentence_embedding_dimension()
+
+        if self.disk_cache_dir:
+            path = os.path.join(self.disk_cache_dir, self.model_name.replace("/", "__"))
+            try:
+                self._disk_cache = await asyncio.to_thread(
+                    _MmapVectorCache, path, self.dimension, self.disk_cache_entries
+                )
+                logger.info(f"✅ Embedding disk cache opened: {len(self._disk_cache)} vectors")
+            except Exception as e:
+                logger.warning(f"⚠️  Embedding disk cache disabled: {e}")
+
+        self.model = model
+        self._queue = asyncio.Queue()
+        self._batch_task = asyncio.create_task(self._batch_loop())
+        self.state = "ready"
+        self.load_time_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"✅ Embedding model ready (dim={self.dimension}) in {self.load_time_ms:.0f}ms")
+
+    # ========================================================================
+    # Encoding
+    # ========================================================================
+
+    async def encode(self, text: str) -> Optional[List[float]]:
+        """
+        Get the embedding for one query
+
+        Returns:
+            Vector as a list of floats, or None if the model is not ready
+            (callers fall back to BM25)
+        """
+        key = normalize_query(text)
+        if not key:
+            return None
+
+        self.stats["requests"] += 1
+        vector = self._cache_get(key)
+        if vector is not None:
+            return vector.tolist()
+
+        if not self.ready:
+            self.stats["not_ready"] += 1
+            return None
+
+        # Coalesce identical queries already waiting on the batcher
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return (await asyncio.shield(pending)).tolist()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            await self._queue.put((key, future))
+            # Shielded: cancelling this caller must not cancel the coalesced ones
+            return (await asyncio.shield(future)).tolist()
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _batch_loop(self):
+        """Collect queued queries for up to max_wait, then encode them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # One bad batch must not stop the loop (every later encode() would hang)
+            try:
+                await self._encode_batch(batch)
+                await self._maybe_flush_disk_cache()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Embedding batch loop error: {e}", exc_info=True)
+                self._fail_batch(batch, e)
+
+    @staticmethod
+    def _fail_batch(batch: List[Tuple[str, asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+                future.exception()  # Waiters re-raise it; don't warn when there are none
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [key for key, _ in batch]
+        start = time.perf_counter()
+
+        try:
+            vectors = await asyncio.to_thread(
+                self.model.encode,
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Embedding batch of {len(texts)} failed: {e}")
+            self._fail_batch(batch, e)
+            return
+
+        # Callers first: a cache write failure must not fail an encoded batch
+        vectors = [vector.astype(np.float32, copy=False) for vector in vectors]
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+        for (key, _), vector in zip(batch, vectors):
+            self._cache_put(key, vector)
+
+        self.stats["encoded"] += len(texts)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(texts))
+        self.stats["last_batch_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # ========================================================================
+    # Caching
+    # ========================================================================
+
+    def _cache_get(self, key: str) -> Optional["np.ndarray"]:
+        vector = self._memory_cache.get(key)
+        if vector is not None:
+            self._memory_cache.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return vector
+
+        if self._disk_cache is not None:
+            vector = self._disk_cache.get(key)
+            if vector is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, vector)
+                return vector
+
+        return None
+
+    def _cache_put(self, key: str, vector: "np.ndarray"):
+        self._remember(key, vector)
+        if self._disk_cache is not None:
+            self._disk_cache.put(key, vector)
+
+    def _remember(self, key: str, vector: "np.ndarray"):
+        self._memory_cache[key] = vector
+        self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.cache_size:
+            self._memory_cache.popitem(last=False)
+
+    async def _maybe_flush_disk_cache(self):
+        if self._disk_cache is None or not self._disk_cache.dirty:
+            return
+        if time.monotonic() - self._last_disk_flush < self.disk_flush_interval:
+            return
+        self._last_disk_flush = time.monotonic()
+        try:
+            await asyncio.to_thread(self._disk_cache.flush)
+        except Exception as e:
+            logger.warning(f"⚠️  Embedding disk cache flush failed: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Readiness and counters for /health"""
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "model": self.model_name,
+            "dimension": self.dimension,
+            "load_time_ms": self.load_time_ms,
+            "error": self.error,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "memory_cache_entries": len(self._memory_cache),
+            "disk_cache_entries": len(self._disk_cache) if self._disk_cache is not None else 0,
+            **self.stats,
+        }
@@ -4,13 +4,20 @@ Combines BM25 (keyword) + Vector (semantic) search with weighted ranking
 CTO Architecture Priority 3
 """
 
-import asyncio
+import heapq
 import time
 import logging
+from operator import itemgetter
 from typing import List, Dict, Any, Optional, Tuple
 
+from services.db_gateway import query_builder
+from services.db_gateway.index_state import index_state
+
 logger = logging.getLogger(__name__)
 
+BM25_INDEX = "properties"
+VECTOR_INDEX = "properties_vector"
+
 
 def normalize_scores(results: List[Dict]) -> List[Dict]:
     """
@@ -43,60 +50,143 @@ def normalize_scores(results: List[Dict]) -> List[Dict]:
     return results
 
 
+# Fusion strategies supported by combine_results()
+#   convex:       alpha * minmax(bm25) + (1-alpha) * minmax(vector)
+#   rrf:          1/(k + rank_bm25) + 1/(k + rank_vector)
+#   weighted_rrf: alpha/(k + rank_bm25) + (1-alpha)/(k + rank_vector)
+FUSION_STRATEGIES = ("convex", "rrf", "weighted_rrf")
+
+# RRF smoothing constant (60 is the value from the original RRF paper)
+DEFAULT_RRF_K = 60
+
+
+def _min_max_scores(results: List[Dict]) -> Dict[str, float]:
+    """Map property_id -> min-max normalized score without touching the hits"""
+    if not results:
+        return {}
+
+    scores = [r.get('score') or 0 for r in results]
+    min_score = min(scores)
+    score_range = max(scores) - min_score
+
+    if score_range == 0:
+        return {r['property_id']: 1.0 for r in results}
+    return {
+        r['property_id']: (score - min_score) / score_range
+        for r, score in zip(results, scores)
+    }
+
+
+def _reciprocal_rank_scores(results: List[Dict], rrf_k: int) -> Dict[str, float]:
+    """Map property_id -> 1 / (k + rank), rank starting at 1 (first occurrence wins)"""
+    scores = {}
+    for rank, r in enumerate(results, start=1):
+        scores.setdefault(r['property_id'], 1.0 / (rrf_k + rank))
+    return scores
+
+
 def combine_results(
     bm25_results: List[Dict],
     vector_results: List[Dict],
-    alpha: float
+    alpha: float,
+    strategy: str = "convex",
+    limit: Optional[int] = None,
+    rrf_k: int = DEFAULT_RRF_K
 ) -> List[Dict]:
     """
-    Merge BM25 and vector search results using weighted formula
+    Fuse BM25 and vector search results
 
-    Formula: hybrid_score = alpha * bm25_score + (1-alpha) * vector_score
+    Scores are accumulated per property_id in a plain dict and only the
+    top `limit` ids are selected with a heap; result dicts are built for
+    those hits alone.
 
     Args:
-        bm25_results: Results from BM25 search (normalized)
-        vector_results: Results from vector search (normalized)
-        alpha: Weight for BM25 score (0.0-1.0)
+        bm25_results: Results from BM25 search, best first
+        vector_results: Results from vector search, best first
+        alpha: Weight for BM25 (convex and weighted_rrf; ignored by rrf)
+        strategy: One of FUSION_STRATEGIES
+        limit: Number of fused results to return (None = all)
+        rrf_k: RRF smoothing constant
 
     Returns:
-        Merged and re-ranked results sorted by hybrid score
+        Fused results sorted by hybrid score, at most `limit` long
     """
-    # Build lookup maps by property_id
+    if strategy == "convex":
+        bm25_scores = _min_max_scores(bm25_results)
+        vector_scores = _min_max_scores(vector_results)
+        bm25_weight, vector_weight = alpha, 1 - alpha
+    elif strategy in ("rrf", "weighted_rrf"):
+        bm25_scores = _reciprocal_rank_scores(bm25_results, rrf_k)
+        vector_scores = _reciprocal_rank_scores(vector_results, rrf_k)
+        if strategy == "rrf":
+            bm25_weight, vector_weight = 1.0, 1.0
+        else:
+            bm25_weight, vector_weight = alpha, 1 - alpha
+    else:
+        raise ValueError(f"Unknown fusion strategy '{strategy}', expected one of {FUSION_STRATEGIES}")
+
+    fused: Dict[str, float] = {}
+    for prop_id, score in bm25_scores.items():
+        fused[prop_id] = bm25_weight * score
+    for prop_id, score in vector_scores.items():
+        fused[prop_id] = fused.get(prop_id, 0.0) + vector_weight * score
+
+    # Heap-based top-k (stable for ties: BM25 order first, then vector order)
+    top_k = heapq.nlargest(
+        len(fused) if limit is None else limit,
+        fused.items(),
+        key=itemgetter(1)
+    )
+
     bm25_map = {r['property_id']: r for r in bm25_results}
     vector_map = {r['property_id']: r for r in vector_results}
 
-    # Get all unique property IDs from both searches
-    all_property_ids = set(bm25_map.keys()) | set(vector_map.keys())
-
     merged_results = []
-    for prop_id in all_property_ids:
-        bm25_result = bm25_map.get(prop_id)
-        vector_result = vector_map.get(prop_id)
-
-        # Get normalized scores (0 if not in that search)
-        bm25_score = bm25_result['normalized_score'] if bm25_result else 0.0
-        vector_score = vector_result['normalized_score'] if vector_result else 0.0
+    for prop_id, hybrid_score in top_k:
+        # Use property data from whichever source has it (prefer BM25 if both)
+        result = dict(bm25_map.get(prop_id) or vector_map[prop_id])
+        result.update(
+            hybrid_score=hybrid_score,
+            bm25_score=bm25_scores.get(prop_id, 0.0),
+            vector_score=vector_scores.get(prop_id, 0.0),
+            score=hybrid_score,  # Final score for consistency
+            search_method='hybrid',
+            fusion=strategy
+        )
+        merged_results.append(result)
 
-        # Calculate hybrid score using weighted formula
-        hybrid_score = alpha * bm25_score + (1 - alpha) * vector_score
+    return merged_results
 
-        # Use property data from whichever source has it (prefer BM25 if both)
-        property_data = bm25_result or vector_result
-
-        # Build merged result
-        merged_results.append({
-            **property_data,
-            'hybrid_score': hybrid_score,
-            'bm25_score': bm25_score,
-            'vector_score': vector_score,
-            'score': hybrid_score,  # Final score for consistency
-            'search_method': 'hybrid'
-        })
 
-    # Sort by hybrid score descending
-    merged_results.sort(key=lambda x: x['hybrid_score'], reverse=True)
+def build_bm25_body(query: str, filters: Any, limit: int = 20) -> Optional[Dict[str, Any]]:
+    """
+    Build the BM25 full-text search body for the properties index
 
-    return merged_results
+    Returns:
+        Search body, or None if the query is blank after sanitizing
+    """
+    if query and not query_builder.sanitize_query(query):
+        return None
+    search_body, _ = query_builder.build_search_body(query, filters, limit)
+    return search_body
+
+
+def build_vector_body(query_embedding: List[float], filters: Any, limit: int = 20) -> Dict[str, Any]:
+    """Build the k-NN search body for the properties_vector index"""
+    return query_builder.build_knn_body(query_embedding, filters, limit)
+
+
+def parse_hits(response: Dict[str, Any]) -> List[Dict]:
+    """Flatten an OpenSearch search response into property results with scores"""
+    results = []
+    for hit in response.get('hits', {}).get('hits', []):
+        results.append({
+            'property_id': hit['_id'],
+            'score': hit['_score'],
+            **hit['_source'],
+            '_id': hit['_id']
+        })
+    return results
 
 
 async def execute_bm25_search(
@@ -118,99 +208,15 @@ async def execute_bm25_search(
         List of property results with scores
     """
     try:
-        # Build BM25 query
-        must_clauses = []
-        filter_clauses = []
-
-        if query:
-            # Sanitize and validate query
-            sanitized_query = query.strip()[:500]
-            if not sanitized_query:
-                return []
-
-            # Multi-match query across text fields
-            must_clauses.append({
-                "multi_match": {
-                    "query": sanitized_query,
-                    "fields": ["title^3", "description", "location^2"],
-                    "type": "best_fields",
-                    "operator": "or"
-                }
-            })
-
-        # Apply filters if provided
-        if filters:
-            # City filter (exact match)
-            if getattr(filters, 'city', None):
-                filter_clauses.append({
-                    "term": {
-                        "city.keyword": filters.city.title()
-                    }
-                })
-
-            # District filter (exact match)
-            if getattr(filters, 'district', None):
-                filter_clauses.append({
-                    "term": {
-                        "district.keyword": filters.district.title()
-                    }
-                })
-
-            # Price range filter
-            if getattr(filters, 'min_price', None) or getattr(filters, 'max_price', None):
-                price_range = {}
-                if getattr(filters, 'min_price', None):
-                    price_range["gte"] = filters.min_price
-                if getattr(filters, 'max_price', None):
-                    price_range["lte"] = filters.max_price
-                filter_clauses.append({
-                    "range": {
-                        "price_normalized": price_range
-                    }
-                })
-
-            # Area range filter
-            if getattr(filters, 'min_area', None) or getattr(filters, 'max_area', None):
-                area_range = {}
-                if getattr(filters, 'min_area', None):
-                    area_range["gte"] = filters.min_area
-                if getattr(filters, 'max_area', None):
-                    area_range["lte"] = filters.max_area
-                filter_clauses.append({
-                    "range": {
-                        "area": area_range
-                    }
-                })
-
-        # Build complete search body
-        search_body = {
-            "size": limit,
-            "query": {
-                "bool": {
-                    "must": must_clauses if must_clauses else [{"match_all": {}}],
-                    "filter": filter_clauses
-                }
-            }
-        }
-
-        # Execute search
+        search_body = build_bm25_body(query, filters, limit)
+        if search_body is None:
+            return []
+
         response = await opensearch_client.search(
-            index="properties",
+            index=BM25_INDEX,
             body=search_body
         )
-
-        # Parse results
-        hits = response.get('hits', {}).get('hits', [])
-        results = []
-        for hit in hits:
-            source = hit['_source']
-            results.append({
-                'property_id': hit['_id'],
-                'score': hit['_score'],
-                **source
-            })
-
-        return results
+        return parse_hits(response)
 
     except Exception as e:
         logger.error(f"BM25 search error: {e}", exc_info=True)
@@ -219,7 +225,7 @@ async def execute_bm25_search(
 
 async def execute_vector_search(
     opensearch_client,
-    embedding_model,
+    embedding_service,
     query: str,
     filters: Any,
     limit: int = 20
@@ -229,7 +235,7 @@ async def execute_vector_search(
 
     Args:
         opensearch_client: OpenSearch client instance
-        embedding_model: Sentence transformer model
+        embedding_service: Shared EmbeddingService
         query: Search query text
         filters: Search filters object
         limit: Maximum results to return
@@ -238,93 +244,21 @@ async def execute_vector_search(
         List of property results with scores
     """
     try:
-        # Check if vector index exists
-        try:
-            exists = await opensearch_client.indices.exists(index="properties_vector")
-            if not exists:
-                logger.warning("Vector index 'properties_vector' does not exist")
-                return []
-        except:
-            logger.warning("Failed to check vector index existence")
+        if not await index_state.exists(opensearch_client, VECTOR_INDEX):
+            logger.warning(f"Vector index '{VECTOR_INDEX}' does not exist")
             return []
 
-        # Check if embedding model is available
-        if not embedding_model:
-            logger.warning("Embedding model not available")
+        # Generate query embedding (None until the model has loaded)
+        query_embedding = await embedding_service.encode(query) if embedding_service else None
+        if query_embedding is None:
+            logger.warning(f"Embedding model not ready ({embedding_service.state if embedding_service else 'missing'})")
             return []
 
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query, convert_to_numpy=True)
-
-        # Build k-NN search query
-        search_body = {
-            "size": limit,
-            "query": {
-                "knn": {
-                    "embedding": {
-                        "vector": query_embedding.tolist(),
-                        "k": limit * 2  # Retrieve more candidates
-                    }
-                }
-            }
-        }
-
-        # Add filters if provided
-        if filters:
-            filter_clauses = []
-
-            # District filter
-            if getattr(filters, 'district', None):
-                filter_clauses.append({
-                    "term": {
-                        "district.keyword": filters.district.title()
-                    }
-                })
-
-            # City filter
-            if getattr(filters, 'city', None):
-                filter_clauses.append({
-                    "term": {
-                        "city.keyword": filters.city.title()
-                    }
-                })
-
-            # Combine filters with k-NN
-            if filter_clauses:
-                search_body["query"] = {
-                    "bool": {
-                        "must": [
-                            {
-                                "knn": {
-                                    "embedding": {
-                                        "vector": query_embedding.tolist(),
-                                        "k": limit * 2
-                                    }
-                                }
-                            }
-                        ],
-                        "filter": filter_clauses
-                    }
-                }
-
-        # Execute search
         response = await opensearch_client.search(
-            index="properties_vector",
-            body=search_body
+            index=VECTOR_INDEX,
+            body=build_vector_body(query_embedding, filters, limit)
         )
-
-        # Parse results
-        hits = response.get('hits', {}).get('hits', [])
-        results = []
-        for hit in hits:
-            source = hit['_source']
-            results.append({
-                'property_id': hit['_id'],
-                'score': hit['_score'],
-                **source
-            })
-
-        return results
+        return parse_hits(response)
 
     except Exception as e:
         logger.error(f"Vector search error: {e}", exc_info=True)
@@ -333,61 +267,98 @@ async def execute_vector_search(
 
 async def execute_hybrid_search(
     opensearch_client,
-    embedding_model,
+    embedding_service,
     query: str,
     filters: Any,
     alpha: float = 0.3,
-    limit: int = 20
+    limit: int = 20,
+    fusion: str = "convex",
+    rrf_k: int = DEFAULT_RRF_K
 ) -> Tuple[List[Dict], Dict[str, Any]]:
     """
     Execute hybrid search combining BM25 and vector search
 
+    Both searches go to OpenSearch in a single `_msearch` request; vector
+    index existence comes from the cached index state, so a hybrid search
+    costs one HTTP round trip.
+
     Args:
         opensearch_client: OpenSearch client instance
-        embedding_model: Sentence transformer model
+        embedding_service: Shared EmbeddingService
         query: Search query text
         filters: Search filters object
         alpha: Weight for BM25 score (default: 0.3)
         limit: Maximum results to return
+        fusion: Fusion strategy (see FUSION_STRATEGIES)
+        rrf_k: RRF smoothing constant
 
     Returns:
         Tuple of (merged_results, metadata)
     """
     start_time = time.time()
 
-    logger.info(f"🔍 Hybrid Search: query='{query}', alpha={alpha}")
-
-    # Execute both searches in parallel
-    bm25_task = execute_bm25_search(opensearch_client, query, filters, limit)
-    vector_task = execute_vector_search(opensearch_client, embedding_model, query, filters, limit)
+    logger.info(f"🔍 Hybrid Search: query='{query}', alpha={alpha}, fusion={fusion}")
 
-    # Gather results with exception handling
-    results = await asyncio.gather(
-        bm25_task,
-        vector_task,
-        return_exceptions=True
-    )
-
-    bm25_results = results[0]
-    vector_results = results[1]
-
-    # Handle exceptions gracefully
-    if isinstance(bm25_results, Exception):
-        logger.warning(f"BM25 search failed: {bm25_results}")
-        bm25_results = []
+    bm25_body = build_bm25_body(query, filters, limit)
 
-    if isinstance(vector_results, Exception):
-        logger.warning(f"Vector search failed: {vector_results}")
-        vector_results = []
+    # Vector half only if the index exists and the query can be embedded
+    vector_body = None
+    failed_legs: List[str] = []
+    if query and await index_state.exists(opensearch_client, VECTOR_INDEX):
+        try:
+            query_embedding = await embedding_service.encode(query) if embedding_service else None
+        except Exception as e:
+            logger.warning(f"Query embedding failed: {e}")
+            failed_legs.append("vector")
+            query_embedding = None
+        if query_embedding is not None:
+            vector_body = build_vector_body(query_embedding, filters, limit)
+
+    # One _msearch round trip for both halves
+    searches = []
+    if bm25_body is not None:
+        searches.append(("bm25", BM25_INDEX, bm25_body))
+    if vector_body is not None:
+        searches.append(("vector", VECTOR_INDEX, vector_body))
+
+    hits: Dict[str, List[Dict]] = {"bm25": [], "vector": []}
+    if searches:
+        msearch_body = []
+        for name, index, body in searches:
+            header = {"index": index}
+            if name == "bm25" and not query_builder.sanitize_query(query):
+                # Filter-only: let the shard request cache serve it
+                header["request_cache"] = True
+            msearch_body.append(header)
+            msearch_body.append(body)
+
+        # Transport / cluster errors propagate: the endpoint answers 5xx and
+        # nothing is cached. Only a failed leg inside a successful _msearch
+        # falls back to the other leg.
+        response = await opensearch_client.msearch(body=msearch_body)
+        for (name, _, _), item in zip(searches, response.get('responses', [])):
+            if 'error' in item:
+                logger.warning(f"{name} search failed: {item['error']}")
+                failed_legs.append(name)
+                continue
+            hits[name] = parse_hits(item)
+
+    bm25_results = hits["bm25"]
+    vector_results = hits["vector"]
 
     # Metadata for debugging
     metadata = {
         "bm25_count": len(bm25_results),
         "vector_count": len(vector_results),
         "alpha": alpha,
+        "fusion": fusion,
         "bm25_weight": alpha,
-        "vector_weight": 1 - alpha
+        "vector_weight": 1 - alpha,
+        "round_trips": 1 if searches else 0
     }
+    if failed_legs:
+        # Partial result: served, but never cached (see result_cache)
+        metadata["degraded"] = failed_legs
 
     # Fallback if one search fails
     if not bm25_results and not vector_results:
@@ -402,12 +373,11 @@ async def execute_hybrid_search(
         metadata["fallback"] = "bm25_only"
         return bm25_results[:limit], metadata
 
-    # Normalize scores
-    bm25_results = normalize_scores(bm25_results)
-    vector_results = normalize_scores(vector_results)
-
-    # Combine results using weighted formula
-    merged_results = combine_results(bm25_results, vector_results, alpha)
+    # Fuse both lists, keeping only the top `limit`
+    merged_results = combine_results(
+        bm25_results, vector_results, alpha,
+        strategy=fusion, limit=limit, rrf_k=rrf_k
+    )
 
     # Add execution time to metadata
     execution_time = (time.time() - start_time) * 1000
@@ -420,4 +390,4 @@ async def execute_hybrid_search(
         f"in {execution_time:.2f}ms"
     )
 
-    return merged_results[:limit], metadata
+    return merged_results, metadata
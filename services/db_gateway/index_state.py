@@ -0,0 +1,92 @@
+"""
+Cached OpenSearch index existence for DB Gateway
+
+Search paths used to call `indices.exists` on every request (one extra
+HTTP round trip each). Existence is now kept in memory and refreshed by a
+background timer; callers read the cached value and only hit OpenSearch
+when an index has never been checked or its entry has gone stale.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndexStateCache:
+    """Timer-refreshed `indices.exists` cache"""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        """
+        Args:
+            refresh_interval: Seconds between background refreshes. Entries
+                older than twice this (e.g. refresher not running) are
+                re-checked on read.
+        """
+        self.refresh_interval = refresh_interval
+        self._state: Dict[str, Tuple[bool, float]] = {}
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, client, indices: Iterable[str]):
+        """Check `indices` now and keep refreshing them in the background"""
+        self._client = client
+        for index in indices:
+            await self._check(client, index)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def exists(self, client, index: str) -> bool:
+        """Cached existence of `index` (checked on demand if unknown or stale)"""
+        cached = self._state.get(index)
+        if cached is not None and time.monotonic() - cached[1] < self.refresh_interval * 2:
+            return cached[0]
+        return await self._check(client, index)
+
+    def mark_exists(self, index: str, exists: bool = True):
+        """Record a known change (e.g. an index auto-created by a bulk insert)"""
+        self._state[index] = (exists, time.monotonic())
+
+    async def _check(self, client, index: str) -> bool:
+        try:
+            exists = bool(await client.indices.exists(index=index))
+        except Exception as e:
+            # Cache the failure too, so an outage doesn't add a round trip per request
+            logger.warning(f"⚠️  indices.exists({index}) failed: {e}")
+            exists = False
+
+        previous = self._state.get(index)
+        if previous is not None and previous[0] != exists:
+            logger.info(f"Index '{index}' existence changed: {previous[0]} -> {exists}")
+        self._state[index] = (exists, time.monotonic())
+        return exists
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            for index in list(self._state):
+                await self._check(self._client, index)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for /health"""
+        now = time.monotonic()
+        return {
+            index: {"exists": exists, "age_s": round(now - checked_at, 1)}
+            for index, (exists, checked_at) in self._state.items()
+        }
+
+
+# Shared instance for the gateway process
+index_state = IndexStateCache()
@@ -2,17 +2,19 @@
 DB Gateway Service - OpenSearch Integration
 Central gateway for all database operations using OpenSearch for flexible property data
 """
-from fastapi import FastAPI, HTTPException, Header, Query, File, UploadFile
+from fastapi import FastAPI, HTTPException, Header, Query, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import time
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import json
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Literal
 from opensearchpy import AsyncOpenSearch
 import asyncpg
 # from sentence_transformers import SentenceTransformer  # Commented out - not needed, using OpenAI embeddings instead
 
-from shared.models.db_gateway import SearchRequest, SearchResponse, PropertyResult, SearchFilters
+from shared.models.db_gateway import SearchRequest, SearchResponse, PropertyResult, SearchFilters, MarketStatsRequest
 from shared.models.properties import (
     PropertyCreate, PropertyUpdate, PropertyStatusUpdate, ImageUploadRequest
 )
@@ -21,6 +23,10 @@ from shared.models.saved_searches import SavedSearchCreate, SavedSearchUpdate
 from shared.models.inquiries import InquiryCreate, InquiryResponse, InquiryStatusUpdate
 from shared.config import settings
 from shared.utils.logger import setup_logger
+from shared.utils.redis_cache import cleanup_all_caches
+from core.service_registry import (
+    ServiceInfo, ServiceRegistryClient, InstanceRegistration, LoadTracker, advertise_host
+)
 
 # Import all modules
 from services.db_gateway import property_management
@@ -28,11 +34,20 @@ from services.db_gateway import favorites_module
 from services.db_gateway import saved_searches_module
 from services.db_gateway import inquiries_module
 from services.db_gateway import hybrid_search
+from services.db_gateway import query_builder
+from services.db_gateway.embedding_service import EmbeddingService
+from services.db_gateway.index_state import index_state
+from services.db_gateway.bulk_indexer import BulkIndexer
+from services.db_gateway.result_cache import SearchResultCache
+from services.db_gateway.market_stats import market_stats, make_segment, empty_stats
 
 logger = setup_logger(__name__)
 
-# Global embedding model for semantic search
-embedding_model: Optional[Any] = None  # Changed from SentenceTransformer to Any since import is disabled
+# Shared query embedding service (lazy model load, micro-batched, cached)
+embedding_service = EmbeddingService()
+
+# Response-level search result cache (invalidated on property writes)
+result_cache = SearchResultCache()
 
 # Global OpenSearch client
 opensearch_client: Optional[AsyncOpenSearch] = None
@@ -40,29 +55,24 @@ opensearch_client: Optional[AsyncOpenSearch] = None
 # Global PostgreSQL connection pool
 db_pool: Optional[asyncpg.Pool] = None
 
+# Load reported to the service registry (callers balance across replicas on it)
+load_tracker = LoadTracker()
+registration: Optional[InstanceRegistration] = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
-    global opensearch_client, db_pool
+    global opensearch_client, db_pool, registration
 
     logger.info("🚀 DB Gateway starting up (OpenSearch + PostgreSQL Mode)...")
     logger.info(f"OpenSearch: {settings.OPENSEARCH_HOST}:{settings.OPENSEARCH_PORT}")
     logger.info(f"Properties Index: {settings.OPENSEARCH_PROPERTIES_INDEX}")
     logger.info(f"PostgreSQL: {settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}")
 
-    # Load embedding model for semantic search
-    global embedding_model
-    # TEMPORARY: Disabled to speed up startup for testing city filtering
-    logger.warning("⚠️  Semantic search temporarily disabled for testing")
-    embedding_model = None
-    # try:
-    #     logger.info("📦 Loading sentence-transformers model for semantic search...")
-    #     embedding_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-    #     logger.info("✅ Embedding model loaded successfully!")
-    # except Exception as e:
-    #     logger.error(f"❌ Failed to load embedding model: {e}")
-    #     logger.warning("⚠️  Semantic search will not be available")
+    # Load embedding model for semantic search in the background so startup
+    # is not blocked; vector search falls back to BM25 until it is ready
+    embedding_service.start()
 
     # Initialize OpenSearch client
     try:
@@ -91,6 +101,15 @@ async def lifespan(app: FastAPI):
             logger.warning(f"⚠️  Properties index '{settings.OPENSEARCH_PROPERTIES_INDEX}' does not exist yet")
             logger.info("   Index will be created when first property is added")
 
+        # Keep index existence cached so search paths skip indices.exists round trips
+        await index_state.start(
+            opensearch_client,
+            [settings.OPENSEARCH_PROPERTIES_INDEX, hybrid_search.VECTOR_INDEX]
+        )
+
+        # Re-aggregate recently requested market segments in the background
+        await market_stats.start(opensearch_client)
+
     except Exception as e:
         logger.error(f"❌ Failed to connect to OpenSearch: {e}")
         logger.warning("⚠️  Continuing with limited functionality")
@@ -116,10 +135,33 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
         logger.warning("⚠️  User features (favorites, inquiries) will not be available")
 
+    # Register this replica with the service registry (heartbeats keep it registered)
+    registration = InstanceRegistration(
+        ServiceRegistryClient(settings.SERVICE_REGISTRY_URL),
+        ServiceInfo(
+            name="db_gateway",
+            version="3.0.0",
+            host=advertise_host("ree-ai-db-gateway"),
+            port=8080,
+            capabilities=["search", "properties", "market_stats"]
+        ),
+        load=load_tracker
+    )
+    if await registration.start():
+        logger.info(f"✅ Registered with Service Registry as {registration.service_info.instance_id}")
+    else:
+        logger.warning("⚠️  Failed to register with Service Registry (will retry)")
+
     yield
 
     # Cleanup
     logger.info("👋 DB Gateway shutting down...")
+    await registration.stop()
+    await registration.client.close()
+    await embedding_service.stop()
+    await index_state.stop()
+    await market_stats.stop()
+    await cleanup_all_caches()
     if opensearch_client:
         await opensearch_client.close()
         logger.info("Closed OpenSearch connection")
@@ -146,6 +188,7 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
+app.middleware("http")(load_tracker.middleware)
 
 
 @app.get("/")
@@ -187,10 +230,30 @@ async def health():
         "properties_index_exists": index_exists,
         "property_count": property_count,
         "index_name": settings.OPENSEARCH_PROPERTIES_INDEX,
+        "semantic_search_ready": embedding_service.ready,
+        "index_state": index_state.snapshot(),
+        "filter_cache": query_builder.cache_info(),
+        "result_cache": result_cache.get_stats(),
+        "market_stats": market_stats.get_stats(),
+        "embedding": embedding_service.get_status(),
         "mode": "OPENSEARCH_FLEXIBLE_JSON"
     }
 
 
+def _flatten_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenSearch hit -> source fields plus _id and score (result cache format)"""
+    return {**hit['_source'], '_id': hit['_id'], 'score': float(hit.get('_score') or 0.0)}
+
+
+async def _fetch_documents(doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Hydrate cached result ids from the properties index (one mget)"""
+    response = await opensearch_client.mget(
+        index=settings.OPENSEARCH_PROPERTIES_INDEX,
+        body={"ids": doc_ids}
+    )
+    return {doc['_id']: doc['_source'] for doc in response['docs'] if doc.get('found')}
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search_properties(request: SearchRequest):
     """
@@ -205,208 +268,47 @@ async def search_properties(request: SearchRequest):
     try:
         logger.info(f"🔍 Search Request: query='{request.query}', filters={request.filters}")
 
-        # Build OpenSearch query using BM25
-        must_clauses = []
-        filter_clauses = []
-
-        # BM25 full-text search across title and description
+        # CRITICAL FIX: Validate and sanitize user input to prevent injection
+        # Limit query length and reject queries with only special characters
         if request.query:
-            # CRITICAL FIX: Validate and sanitize user input to prevent injection
-            # Limit query length and remove potentially dangerous characters
-            sanitized_query = request.query.strip()[:500]  # Max 500 chars
+            sanitized_query = query_builder.sanitize_query(request.query)
             if not sanitized_query:
                 raise HTTPException(status_code=400, detail="Query cannot be empty")
-
-            # Basic validation: reject queries with only special characters
             if not any(c.isalnum() or c.isspace() for c in sanitized_query):
                 raise HTTPException(status_code=400, detail="Query must contain alphanumeric characters")
 
-            must_clauses.append({
-                "multi_match": {
-                    "query": sanitized_query,  # Use sanitized query
-                    "fields": ["title^3", "description", "location^2"],  # Boost title and location
-                    "type": "best_fields",
-                    "operator": "or"
-                }
-            })
-
-        # Apply filters
-        # MVP STRATEGY: Use "should" clauses instead of hard "filter" to boost relevance
-        # but not strictly require them (since property_type/price/area have data quality issues)
-        should_clauses = []
-
-        if request.filters:
-            # MEDIUM FIX Bug#11: Validate range filters to prevent logical errors
-            if request.filters.min_price and request.filters.max_price:
-                if request.filters.min_price > request.filters.max_price:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"min_price ({request.filters.min_price}) cannot exceed max_price ({request.filters.max_price})"
-                    )
-
-            if request.filters.min_area and request.filters.max_area:
-                if request.filters.min_area > request.filters.max_area:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"min_area ({request.filters.min_area}) cannot exceed max_area ({request.filters.max_area})"
-                    )
-
-            # City filter - HARD FILTER (exact match required!)
-            if request.filters.city:
-                # Normalize to title case for case-insensitive matching
-                # "hồ chí minh" → "Hồ Chí Minh", "HỒ CHÍ MINH" → "Hồ Chí Minh"
-                normalized_city = request.filters.city.title()
-
-                filter_clauses.append({
-                    "term": {
-                        "city.keyword": normalized_city  # FIX: Use .keyword sub-field for exact match
-                    }
-                })
-                logger.info(f"✅ Applied city filter: {normalized_city} (input: {request.filters.city})")
-
-            # District filter - HARD FILTER (exact match)
-            if request.filters.district:
-                # Normalize to title case for case-insensitive matching
-                normalized_district = request.filters.district.title()
-
-                filter_clauses.append({
-                    "term": {
-                        "district.keyword": normalized_district  # FIX: Use .keyword sub-field for exact match
-                    }
-                })
-                logger.info(f"✅ Applied district filter: {normalized_district} (input: {request.filters.district})")
-
-            # Region/location filter - FALLBACK (for backward compatibility)
-            if request.filters.region:
-                # Enhance the query text with region info for better BM25 matching
-                must_clauses.append({
-                    "multi_match": {
-                        "query": request.filters.region,
-                        "fields": ["district^2", "location", "title", "description"],
-                        "type": "best_fields",
-                        "operator": "or"
-                    }
-                })
-
-            # Property type filter - SUPPORT BOTH SINGLE AND MULTIPLE TYPES (synonyms)
-            # When searching for "house", we may want to match: house, nhà, townhouse, villa, etc.
-            if request.filters.property_types and len(request.filters.property_types) > 0:
-                # Multiple property types (synonyms) - use "terms" filter (OR)
-                lowercase_types = [pt.lower() for pt in request.filters.property_types]
-                filter_clauses.append({
-                    "terms": {
-                        "property_type.keyword": lowercase_types
-                    }
-                })
-                # Boost text matching for any of the property types
-                for pt in request.filters.property_types[:3]:  # Limit boost to first 3
-                    should_clauses.append({
-                        "multi_match": {
-                            "query": pt,
-                            "fields": ["title^3", "description"],
-                            "type": "best_fields",
-                            "operator": "or"
-                        }
-                    })
-                logger.info(f"✅ Applied property_types filter (synonyms): {lowercase_types[:5]}...")
-            elif request.filters.property_type:
-                # Single property type - use "term" filter (exact match)
-                filter_clauses.append({
-                    "term": {
-                        "property_type.keyword": request.filters.property_type.lower()
-                    }
-                })
-                # Secondary: Boost text matching in title/description (soft match)
-                should_clauses.append({
-                    "multi_match": {
-                        "query": request.filters.property_type,
-                        "fields": ["title^3", "description"],
-                        "type": "best_fields",
-                        "operator": "or"
-                    }
-                })
-
-            # Price range filter - USE price_normalized (numeric field)
-            if request.filters.min_price or request.filters.max_price:
-                price_range = {}
-                if request.filters.min_price:
-                    price_range["gte"] = request.filters.min_price
-                if request.filters.max_price:
-                    price_range["lte"] = request.filters.max_price
-                filter_clauses.append({
-                    "range": {
-                        "price_normalized": price_range  # Changed from "price" to "price_normalized"
-                    }
-                })
-                logger.info(f"✅ Applied price filter: {request.filters.min_price or 0:,.0f} - {request.filters.max_price or 0:,.0f} VND")
-
-            # Bedrooms filter - SOFT FILTER (use "should" to boost, not require)
-            if request.filters.min_bedrooms:
-                should_clauses.append({
-                    "range": {
-                        "bedrooms": {"gte": request.filters.min_bedrooms}
-                    }
-                })
-
-            # Area filter - NOW ENABLED (area is numeric after normalization!)
-            if request.filters.min_area or request.filters.max_area:
-                area_range = {}
-                if request.filters.min_area:
-                    area_range["gte"] = request.filters.min_area
-                if request.filters.max_area:
-                    area_range["lte"] = request.filters.max_area
-                filter_clauses.append({
-                    "range": {
-                        "area": area_range
-                    }
-                })
-
-        # Build the complete query
-        # FIX: When filters are provided, use "should" for text matching to allow
-        # multilingual search (Vietnamese query text won't block English filter results)
-        has_filters = bool(filter_clauses)
-
-        if has_filters:
-            # When we have hard filters (term filters), user query text becomes optional boost
-            all_should_clauses = must_clauses + should_clauses  # Combine for relevance boosting
-            search_body = {
-                "query": {
-                    "bool": {
-                        "should": all_should_clauses if all_should_clauses else [],
-                        "filter": filter_clauses,
-                        "minimum_should_match": 0  # Allow results even if no text match
-                    }
-                },
-            }
-        else:
-            # No hard filters - require text match
-            search_body = {
-                "query": {
-                    "bool": {
-                        "must": must_clauses if must_clauses else [{"match_all": {}}],
-                        "should": should_clauses,
-                        "filter": filter_clauses
-                    }
-                },
-            }
+        # MEDIUM FIX Bug#11: Validate range filters to prevent logical errors
+        try:
+            query_builder.validate_filters(request.filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        # Add pagination and sorting
-        search_body["size"] = request.limit
-        search_body["sort"] = [
-            {"_score": {"order": "desc"}},  # Sort by relevance score
-            {"created_at": {"order": "desc"}}  # Then by recency
-        ]
+        # Build OpenSearch BM25 query (filter fragments are compiled once per signature)
+        search_body, cacheable = query_builder.build_search_body(
+            request.query, request.filters, request.limit
+        )
 
-        # Execute search
-        response = await opensearch_client.search(
-            index=settings.OPENSEARCH_PROPERTIES_INDEX,
-            body=search_body
+        async def run_search():
+            # Execute search (filter-only requests go through the shard request cache)
+            response = await opensearch_client.search(
+                index=settings.OPENSEARCH_PROPERTIES_INDEX,
+                body=search_body,
+                request_cache=cacheable
+            )
+            total = response['hits']['total']['value'] if isinstance(response['hits']['total'], dict) else response['hits']['total']
+            return [_flatten_hit(hit) for hit in response['hits']['hits']], total, {}
+
+        # Popular query/filter combinations are served from the result cache
+        hits, total_hits, _, cache_status = await result_cache.get_or_compute(
+            result_cache.make_key("search", request.query, request.filters, limit=request.limit),
+            run_search,
+            _fetch_documents
         )
 
         # Convert results to PropertyResult objects
         results = []
-        for hit in response['hits']['hits']:
-            source = hit['_source']
+        for hit in hits:
+            source = hit
 
             # HIGH PRIORITY FIX: Proper type coercion with logging
             bedrooms = source.get('bedrooms', 0)
@@ -437,13 +339,12 @@ async def search_properties(request: SearchRequest):
                 district=source.get('district', ''),
                 city=source.get('city', ''),
                 images=source.get('images', []),  # Include property images
-                score=float(hit['_score'])
+                score=float(hit['score'])
             ))
 
         execution_time = (time.time() - start_time) * 1000
-        total_hits = response['hits']['total']['value'] if isinstance(response['hits']['total'], dict) else response['hits']['total']
 
-        logger.info(f"✅ Search completed: {len(results)} results (total: {total_hits}) in {execution_time:.2f}ms")
+        logger.info(f"✅ Search completed: {len(results)} results (total: {total_hits}, cache: {cache_status}) in {execution_time:.2f}ms")
 
         return SearchResponse(
             results=results,
@@ -480,150 +381,36 @@ async def vector_search_properties(request: SearchRequest):
     try:
         logger.info(f"🔍 Vector Search Request: query='{request.query}'")
 
-        # Check if properties_vector index exists
-        try:
-            await opensearch_client.indices.exists(index="properties_vector")
-            vector_index_exists = True
-        except:
-            vector_index_exists = False
-
-        # FALLBACK: Use BM25 text search if vector index doesn't exist or embedding model not loaded
-        if not vector_index_exists or not embedding_model:
-            logger.warning(f"⚠️ Vector index not available, falling back to BM25 text search on 'properties' index")
-
-            # Build BM25 text search query
-            search_body = {
-                "size": request.limit,
-                "query": {
-                    "bool": {
-                        "should": [
-                            {"multi_match": {"query": request.query, "fields": ["title^3", "description^2", "district", "city"], "type": "best_fields"}},
-                        ],
-                        "minimum_should_match": 0  # Allow match_all if query is empty
-                    }
-                }
-            }
+        # Check if properties_vector index exists (cached, refreshed in background)
+        vector_index_exists = await index_state.exists(opensearch_client, hybrid_search.VECTOR_INDEX)
+
+        # Embed the query (None while the model is still loading)
+        query_embedding = None
+        if vector_index_exists and request.query:
+            query_embedding = await embedding_service.encode(request.query)
 
-            # Add filters if provided
-            filter_clauses = []
-
-            if request.filters:
-                # Property type filter
-                if request.filters.property_type:
-                    filter_clauses.append({
-                        "term": {"property_type.keyword": request.filters.property_type}
-                    })
-
-                # Listing type filter
-                if request.filters.listing_type:
-                    filter_clauses.append({
-                        "term": {"listing_type.keyword": request.filters.listing_type}
-                    })
-
-                # District filter
-                if request.filters.district:
-                    filter_clauses.append({
-                        "term": {"district.keyword": request.filters.district.title()}
-                    })
-
-                # City filter
-                if request.filters.city:
-                    filter_clauses.append({
-                        "term": {"city.keyword": request.filters.city.title()}
-                    })
-
-                # Bedrooms filter
-                if request.filters.bedrooms:
-                    filter_clauses.append({
-                        "term": {"bedrooms": request.filters.bedrooms}
-                    })
-
-                # Price range filters
-                if request.filters.min_price or request.filters.max_price:
-                    price_range = {}
-                    if request.filters.min_price:
-                        price_range["gte"] = request.filters.min_price
-                    if request.filters.max_price:
-                        price_range["lte"] = request.filters.max_price
-                    filter_clauses.append({
-                        "range": {"price": price_range}
-                    })
-
-            # Apply filters if any
-            if filter_clauses:
-                search_body["query"]["bool"]["filter"] = filter_clauses
-
-            # If query is empty and no filters, use match_all
-            if not request.query and not filter_clauses:
-                search_body["query"] = {"match_all": {}}
+        # FALLBACK: Use BM25 text search if vector index doesn't exist or embedding model not ready
+        if query_embedding is None:
+            logger.warning(f"⚠️ Vector search not available (index={vector_index_exists}, model={embedding_service.state}), falling back to BM25 text search on 'properties' index")
+
+            # Build BM25 text search query with the shared filter fragment
+            search_body, cacheable = query_builder.build_search_body(
+                request.query, request.filters, request.limit,
+                text_fields=["title^3", "description^2", "district", "city"]
+            )
 
             # Execute BM25 search on properties index
             response = await opensearch_client.search(
-                index="properties",
-                body=search_body
+                index=hybrid_search.BM25_INDEX,
+                body=search_body,
+                request_cache=cacheable
             )
 
         else:
-            # VECTOR SEARCH PATH (original k-NN logic)
-            # Generate embedding for query
-            query_embedding = embedding_model.encode(request.query, convert_to_numpy=True)
-
-            # Build k-NN search query
-            search_body = {
-                "size": request.limit,
-                "query": {
-                    "knn": {
-                        "embedding": {
-                            "vector": query_embedding.tolist(),
-                            "k": request.limit * 2  # Retrieve more candidates for better results
-                        }
-                    }
-                }
-            }
-
-            # Add filters if provided (combine with k-NN using bool query)
-            if request.filters:
-                filter_clauses = []
-
-                # District filter
-                if request.filters.region:
-                    filter_clauses.append({
-                        "multi_match": {
-                            "query": request.filters.region,
-                            "fields": ["district", "location"]
-                        }
-                    })
-
-                # Property type filter
-                if request.filters.property_type:
-                    filter_clauses.append({
-                        "multi_match": {
-                            "query": request.filters.property_type,
-                            "fields": ["title", "description"]
-                        }
-                    })
-
-                # Bedrooms filter
-                if request.filters.min_bedrooms:
-                    filter_clauses.append({
-                        "range": {
-                            "bedrooms": {"gte": request.filters.min_bedrooms}
-                        }
-                    })
-
-                # If we have filters, combine with k-NN using bool query
-                if filter_clauses:
-                    search_body["query"] = {
-                        "bool": {
-                            "must": [search_body["query"]],  # k-NN as must clause
-                            "filter": filter_clauses
-                        }
-                    }
-
-            # Execute vector search on properties_vector index
+            # VECTOR SEARCH PATH - k-NN with the same hard filters as BM25
             response = await opensearch_client.search(
-                index="properties_vector",  # Use vector index with embeddings
-                body=search_body
+                index=hybrid_search.VECTOR_INDEX,  # Use vector index with embeddings
+                body=query_builder.build_knn_body(query_embedding, request.filters, request.limit)
             )
 
         # Convert results to PropertyResult objects
@@ -689,12 +476,17 @@ async def vector_search_properties(request: SearchRequest):
 @app.post("/hybrid-search", response_model=SearchResponse)
 async def hybrid_search_properties(
     request: SearchRequest,
-    alpha: float = Query(0.3, ge=0.0, le=1.0, description="BM25 weight (0.0-1.0, default: 0.3)")
+    alpha: float = Query(0.3, ge=0.0, le=1.0, description="BM25 weight (0.0-1.0, default: 0.3)"),
+    fusion: Literal["convex", "rrf", "weighted_rrf"] = Query("convex", description="Fusion strategy"),
+    rrf_k: int = Query(hybrid_search.DEFAULT_RRF_K, ge=1, le=1000, description="RRF smoothing constant")
 ):
     """
     Hybrid search combining BM25 (keyword) + Vector (semantic) with weighted ranking.
 
-    Formula: final_score = alpha * bm25_score + (1-alpha) * vector_score
+    Fusion strategies:
+        convex:       alpha * bm25_score + (1-alpha) * vector_score (min-max normalized)
+        rrf:          1/(k + rank_bm25) + 1/(k + rank_vector)
+        weighted_rrf: alpha/(k + rank_bm25) + (1-alpha)/(k + rank_vector)
 
     Args:
         request: Search request with query and filters
@@ -702,6 +494,8 @@ async def hybrid_search_properties(
                - alpha=1.0: Pure BM25 (keyword matching)
                - alpha=0.0: Pure vector (semantic)
                - alpha=0.3: Balanced (recommended for real estate)
+        fusion: Fusion strategy (default: convex)
+        rrf_k: RRF smoothing constant (default: 60)
 
     Returns:
         Merged and re-ranked search results
@@ -715,19 +509,36 @@ async def hybrid_search_properties(
         start_time = time.time()
 
         logger.info(
-            f"🔍 Hybrid Search Request: query='{request.query}', alpha={alpha}, "
+            f"🔍 Hybrid Search Request: query='{request.query}', alpha={alpha}, fusion={fusion}, "
             f"filters={request.filters}"
         )
 
         # Execute hybrid search with graceful fallbacks
-        merged_results, metadata = await hybrid_search.execute_hybrid_search(
-            opensearch_client=opensearch_client,
-            embedding_model=embedding_model,
-            query=request.query,
-            filters=request.filters,
-            alpha=alpha,
-            limit=request.limit
+        async def run_hybrid_search():
+            merged, meta = await hybrid_search.execute_hybrid_search(
+                opensearch_client=opensearch_client,
+                embedding_service=embedding_service,
+                query=request.query,
+                filters=request.filters,
+                alpha=alpha,
+                limit=request.limit,
+                fusion=fusion,
+                rrf_k=rrf_k
+            )
+            return merged, len(merged), meta
+
+        # Semantic readiness is part of the key so BM25-only fallbacks
+        # cached during model load are not served once vectors are available
+        merged_results, _, metadata, cache_status = await result_cache.get_or_compute(
+            result_cache.make_key(
+                "hybrid", request.query, request.filters,
+                limit=request.limit, alpha=alpha, fusion=fusion, rrf_k=rrf_k,
+                semantic=embedding_service.ready
+            ),
+            run_hybrid_search,
+            _fetch_documents
         )
+        metadata = {**metadata, "cache": cache_status}
 
         # Convert to PropertyResult models
         results = []
@@ -763,7 +574,7 @@ async def hybrid_search_properties(
                 district=source.get('district', ''),
                 city=source.get('city', ''),
                 images=source.get('images', []),  # Include property images
-                score=float(hit.get('hybrid_score', hit.get('score', 0)))
+                score=float(hit.get('score', 0))  # Fused score (leg score on fallbacks)
             ))
 
         execution_time = (time.time() - start_time) * 1000
@@ -800,6 +611,62 @@ async def hybrid_search_properties(
         )
 
 
+@app.post("/count")
+async def count_properties(filters: Optional[SearchFilters] = None):
+    """
+    Count properties matching filters (no text query)
+
+    Sent as size=0 with request_cache=true, so repeated filter combinations
+    are answered from OpenSearch's shard request cache.
+    """
+    if not opensearch_client:
+        raise HTTPException(status_code=503, detail="OpenSearch not available")
+
+    try:
+        query_builder.validate_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        response = await opensearch_client.search(
+            index=settings.OPENSEARCH_PROPERTIES_INDEX,
+            body=query_builder.build_count_body(filters),
+            request_cache=True
+        )
+        total = response['hits']['total']['value'] if isinstance(response['hits']['total'], dict) else response['hits']['total']
+        return {"count": total, "took_ms": response.get("took")}
+
+    except Exception as e:
+        logger.error(f"❌ Count failed: filters={filters}, error={e}")
+        raise HTTPException(status_code=500, detail="Count operation failed. Please try again later.")
+
+
+@app.post("/market-stats")
+async def get_market_stats(request: MarketStatsRequest):
+    """
+    Price statistics of a market segment (percentiles, price per m², counts)
+
+    One size=0 aggregation per (city, district, property type, listing type,
+    bedroom bucket), kept in memory and refreshed in the background.
+    """
+    if not opensearch_client:
+        raise HTTPException(status_code=503, detail="OpenSearch not available")
+
+    segment = make_segment(
+        request.city, request.district, request.property_type, request.listing_type, request.bedrooms
+    )
+    try:
+        if not await index_state.exists(opensearch_client, settings.OPENSEARCH_PROPERTIES_INDEX):
+            return {**empty_stats(segment), "cache": "bypass"}
+
+        stats, cache_status = await market_stats.get(opensearch_client, segment)
+        return {**stats, "cache": cache_status}
+
+    except Exception as e:
+        logger.error(f"❌ Market stats failed: segment={segment}, error={e}")
+        raise HTTPException(status_code=500, detail="Market stats operation failed. Please try again later.")
+
+
 @app.get("/properties/{property_id}")
 async def get_property(property_id: str):
     """Get a single property by ID from OpenSearch"""
@@ -891,106 +758,25 @@ async def bulk_insert_properties(properties: List[Dict[str, Any]]):
     try:
         logger.info(f"📥 Bulk insert request: {len(properties)} properties")
 
-        # Prepare bulk data for OpenSearch
-        bulk_data = []
-
+        indexer = BulkIndexer(opensearch_client, settings.OPENSEARCH_PROPERTIES_INDEX)
         for prop in properties:
-            # Generate property_id if not provided
-            property_id = prop.get('property_id')
-            if not property_id:
-                # Use URL or fallback to hash
-                url = prop.get('url', '')
-                if url:
-                    property_id = url.split('/')[-1] or f"prop_{hash(url)}"
-                else:
-                    property_id = f"prop_{hash(str(prop))}"
-
-            # Ensure price and area are numeric
-            price = prop.get('price', 0)
-            if isinstance(price, str):
-                # Shouldn't happen if normalized, but fallback
-                try:
-                    price = float(price.replace(',', '').replace(' ', ''))
-                except:
-                    price = 0
+            await indexer.add(prop)
+        result = await indexer.finish()
 
-            area = prop.get('area', 0)
-            if isinstance(area, str):
-                try:
-                    area = float(area.replace('m²', '').replace('m2', '').replace(' ', ''))
-                except:
-                    area = 0
-
-            # Prepare document with NUMERIC types
-            doc = {
-                "property_id": property_id,
-                "title": prop.get('title', ''),
-                "description": prop.get('description', ''),
-
-                # NUMERIC fields for filtering/sorting
-                "price": float(price) if price else 0,
-                "area": float(area) if area else 0,
-                "bedrooms": int(prop.get('bedrooms', 0)),
-                "bathrooms": int(prop.get('bathrooms', 0)),
-
-                # Display fields (formatted text)
-                "price_display": prop.get('price_display', ''),
-                "area_display": prop.get('area_display', ''),
-
-                # Location fields
-                "location": prop.get('location', ''),
-                "district": prop.get('district', ''),
-                "city": prop.get('city', ''),
-
-                # Other fields
-                "property_type": prop.get('property_type', ''),
-                "url": prop.get('url', ''),
-                "source": prop.get('source', ''),
-
-                # Metadata
-                "created_at": prop.get('created_at', datetime.utcnow().isoformat()),
-                "indexed_at": datetime.utcnow().isoformat()
-            }
+        logger.info(f"✅ Bulk insert complete: {result['indexed']} indexed, {result['failed']} failed")
 
-            # Add any additional fields from the property (flexible schema)
-            for key, value in prop.items():
-                if key not in doc:
-                    doc[key] = value
-
-            # Add to bulk request (index action + document)
-            bulk_data.append({"index": {"_index": settings.OPENSEARCH_PROPERTIES_INDEX, "_id": property_id}})
-            bulk_data.append(doc)
-
-        logger.info(f"📤 Sending bulk insert: {len(bulk_data) // 2} documents")
-
-        # Execute bulk insert
-        response = await opensearch_client.bulk(body=bulk_data, refresh=True)
-
-        # Count successes and failures
-        indexed_count = 0
-        failed_count = 0
-        errors = []
-
-        if response.get('errors'):
-            for item in response['items']:
-                index_result = item.get('index', {})
-                if 'error' in index_result:
-                    failed_count += 1
-                    errors.append(f"{index_result.get('_id')}: {index_result['error'].get('reason', 'Unknown error')}")
-                else:
-                    indexed_count += 1
-        else:
-            indexed_count = len(bulk_data) // 2
-
-        logger.info(f"✅ Bulk insert complete: {indexed_count} indexed, {failed_count} failed")
+        if result["errors"] and len(result["errors"]) <= 5:
+            logger.warning(f"⚠️  Errors: {result['errors']}")
 
-        if errors and len(errors) <= 5:
-            logger.warning(f"⚠️  Errors: {errors}")
+        if result["indexed"]:
+            # Bulk indexing auto-creates the index
+            index_state.mark_exists(settings.OPENSEARCH_PROPERTIES_INDEX)
+            await result_cache.invalidate("bulk_insert")
 
         return {
-            "indexed_count": indexed_count,
-            "failed_count": failed_count,
-            "errors": errors[:10] if errors else None  # Return first 10 errors
+            "indexed_count": result["indexed"],
+            "failed_count": result["failed"],
+            "errors": result["errors"]  # First 10 errors
         }
 
     except Exception as e:
@@ -998,6 +784,114 @@ async def bulk_insert_properties(properties: List[Dict[str, Any]]):
         raise HTTPException(status_code=500, detail=f"Bulk insert failed: {str(e)}")
 
 
+# In-progress and recently finished streaming ingest jobs (for progress polling)
+bulk_jobs: "OrderedDict[str, BulkIndexer]" = OrderedDict()
+MAX_TRACKED_BULK_JOBS = 20
+
+
+@app.post("/bulk-insert/stream")
+async def bulk_insert_stream(
+    request: Request,
+    job_id: Optional[str] = Query(None, description="Caller-chosen id for progress polling"),
+    refresh: bool = Query(True, description="Refresh the index once after the last chunk"),
+    chunk_docs: int = Query(settings.BULK_CHUNK_DOCS, ge=1, le=10000),
+    chunk_bytes: int = Query(settings.BULK_CHUNK_BYTES, ge=64 * 1024, le=100 * 1024 * 1024),
+    concurrency: int = Query(settings.BULK_CONCURRENCY, ge=1, le=16)
+):
+    """
+    Streaming bulk insert for large backfills
+
+    Body is NDJSON (one normalized property per line, same shape as
+    /bulk-insert). Lines are parsed as they arrive and indexed in chunks
+    bounded by `chunk_docs` / `chunk_bytes` with up to `concurrency` bulk
+    requests in flight. Progress can be polled at /bulk-insert/jobs/{job_id}.
+    """
+    if not opensearch_client:
+        raise HTTPException(status_code=503, detail="OpenSearch not available")
+
+    job_id = job_id or uuid.uuid4().hex
+    if job_id in bulk_jobs and bulk_jobs[job_id].status == "running":
+        raise HTTPException(status_code=409, detail=f"Bulk job '{job_id}' is already running")
+
+    indexer = BulkIndexer(
+        opensearch_client,
+        settings.OPENSEARCH_PROPERTIES_INDEX,
+        max_chunk_bytes=chunk_bytes,
+        max_chunk_docs=chunk_docs,
+        concurrency=concurrency,
+        refresh=refresh,
+        job_id=job_id
+    )
+    bulk_jobs[job_id] = indexer
+    bulk_jobs.move_to_end(job_id)
+    while len(bulk_jobs) > MAX_TRACKED_BULK_JOBS:
+        bulk_jobs.popitem(last=False)
+
+    logger.info(f"📥 Streaming bulk insert started: job={job_id}")
+
+    buffer = b""
+    line_number = 0
+    last_report = time.monotonic()
+
+    async def handle_line(line: bytes):
+        nonlocal line_number
+        line_number += 1
+        line = line.strip()
+        if not line:
+            return
+        try:
+            prop = json.loads(line)
+        except ValueError as e:
+            indexer.record_failure(f"line {line_number}: invalid JSON ({e})")
+            return
+        if not isinstance(prop, dict):
+            indexer.record_failure(f"line {line_number}: expected a JSON object")
+            return
+        await indexer.add(prop)
+
+    try:
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                await handle_line(line)
+
+            if time.monotonic() - last_report >= 10:
+                last_report = time.monotonic()
+                progress = indexer.progress()
+                logger.info(
+                    f"📤 Bulk job {job_id}: {progress['indexed']}/{progress['received']} indexed, "
+                    f"{progress['failed']} failed, {progress['docs_per_s']} docs/s"
+                )
+
+        await handle_line(buffer)
+        result = await indexer.finish()
+
+    except Exception as e:
+        await indexer.abort()
+        logger.error(f"❌ Streaming bulk insert failed: job={job_id}, error={e}")
+        raise HTTPException(status_code=500, detail=f"Bulk insert failed: {str(e)}")
+
+    if result["indexed"]:
+        index_state.mark_exists(settings.OPENSEARCH_PROPERTIES_INDEX)
+        await result_cache.invalidate("bulk_insert_stream")
+
+    logger.info(
+        f"✅ Bulk job {job_id} complete: {result['indexed']} indexed, {result['failed']} failed "
+        f"in {result['elapsed_s']}s ({result['docs_per_s']} docs/s)"
+    )
+    return result
+
+
+@app.get("/bulk-insert/jobs/{job_id}")
+async def bulk_insert_progress(job_id: str):
+    """Progress of a streaming bulk insert job"""
+    indexer = bulk_jobs.get(job_id)
+    if not indexer:
+        raise HTTPException(status_code=404, detail=f"Bulk job '{job_id}' not found")
+    return indexer.progress()
+
+
 @app.get("/stats")
 async def get_stats():
     """Get database statistics using OpenSearch aggregations"""
@@ -1006,7 +900,7 @@ async def get_stats():
 
     try:
         # Check if index exists
-        index_exists = await opensearch_client.indices.exists(index=settings.OPENSEARCH_PROPERTIES_INDEX)
+        index_exists = await index_state.exists(opensearch_client, settings.OPENSEARCH_PROPERTIES_INDEX)
         if not index_exists:
             return {
                 "total_properties": 0,
@@ -1074,12 +968,14 @@ async def create_property(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.create_property(
+    result = await property_management.create_property(
         property_data,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("create_property")
+    return result
 
 
 @app.get("/properties/my-listings")
@@ -1113,13 +1009,15 @@ async def update_property(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.update_property(
+    result = await property_management.update_property(
         property_id,
         update_data,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("update_property")
+    return result
 
 
 @app.put("/properties/{property_id}/status")
@@ -1132,13 +1030,15 @@ async def update_property_status(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.update_property_status(
+    result = await property_management.update_property_status(
         property_id,
         status_update,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("update_property_status")
+    return result
 
 
 @app.delete("/properties/{property_id}")
@@ -1150,12 +1050,14 @@ async def delete_property(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.delete_property(
+    result = await property_management.delete_property(
         property_id,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("delete_property")
+    return result
 
 
 @app.post("/properties/{property_id}/images")
@@ -1167,12 +1069,14 @@ async def upload_images(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.upload_images(
+    result = await property_management.upload_images(
         upload_request,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("upload_images")
+    return result
 
 
 @app.post("/properties/{property_id}/images/upload")
@@ -1192,13 +1096,15 @@ async def upload_image_files(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.upload_image_files(
+    result = await property_management.upload_image_files(
         property_id,
         files,
         authorization,
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("upload_image_files")
+    return result
 
 
 @app.put("/properties/{property_id}/coordinates")
@@ -1216,7 +1122,7 @@ async def update_property_coordinates(
     if not opensearch_client:
         raise HTTPException(status_code=503, detail="OpenSearch not available")
 
-    return await property_management.update_property_coordinates(
+    result = await property_management.update_property_coordinates(
         property_id,
         latitude,
         longitude,
@@ -1224,6 +1130,8 @@ async def update_property_coordinates(
         opensearch_client,
         settings.OPENSEARCH_PROPERTIES_INDEX
     )
+    await result_cache.invalidate("update_property_coordinates")
+    return result
 
 
 # ============================================================================
@@ -0,0 +1,346 @@
+"""
+Market Price Statistics for DB Gateway
+
+Price consultation used to pull 50 full listings over /search and compute
+statistics in the orchestrator. /market-stats answers with one size=0
+aggregation per market segment (city, district, property type, listing
+type, bedroom bucket):
+- `percentiles` + `stats` on price
+- `percentiles` + `stats` on price per m² (listings with an area only)
+- `filters` counts for the segment, its district and its city
+
+Results are kept in memory per segment. A background timer re-aggregates
+every segment read since the last MARKET_STATS_IDLE_TTL seconds (all of
+them in one msearch), so hot segments are always served from memory;
+segments idle longer are dropped. Listings change slowly, so stats may lag
+writes by up to one refresh interval.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.config import settings
+from shared.models.db_gateway import SearchFilters
+from services.db_gateway.query_builder import compile_filters
+
+logger = logging.getLogger(__name__)
+
+PERCENTS = [5, 25, 50, 75, 95]
+
+# Bedroom bucket -> range on `bedrooms` (None = any)
+BEDROOM_BUCKETS: Dict[str, Optional[Dict[str, int]]] = {
+    "any": None,
+    "1": {"lte": 1},
+    "2": {"gte": 2, "lte": 2},
+    "3": {"gte": 3, "lte": 3},
+    "4+": {"gte": 4},
+}
+
+PRICE_PER_SQM_SCRIPT = "doc['price'].value / doc['area'].value"
+
+# (city, district, property_type, listing_type, bedroom_bucket)
+Segment = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], str]
+
+
+def bedroom_bucket(bedrooms: Optional[int]) -> str:
+    """Bucket for an exact bedroom count ("any" when unknown)"""
+    if bedrooms is None or bedrooms < 0:
+        return "any"
+    if bedrooms <= 1:
+        return "1"
+    if bedrooms >= 4:
+        return "4+"
+    return str(bedrooms)
+
+
+def make_segment(
+    city: Optional[str] = None,
+    district: Optional[str] = None,
+    property_type: Optional[str] = None,
+    listing_type: Optional[str] = None,
+    bedrooms: Optional[int] = None
+) -> Segment:
+    """Normalized segment key (same casing rules as the search filters)"""
+    return (
+        city.strip().title() if city else None,
+        district.strip().title() if district else None,
+        property_type.strip().lower() if property_type else None,
+        listing_type.strip().lower() if listing_type else None,
+        bedroom_bucket(bedrooms),
+    )
+
+
+def build_aggregation_body(segment: Segment) -> Dict[str, Any]:
+    """
+    size=0 body answering one segment
+
+    The top-level query only applies type filters, so the `counts` filters
+    can report city and district totals alongside the segment's.
+    """
+    city, district, property_type, listing_type, bucket = segment
+
+    scope = compile_filters(SearchFilters(property_type=property_type, listing_type=listing_type)).filter
+    location = compile_filters(SearchFilters(city=city, district=district)).filter
+    segment_clauses = list(location)
+    if BEDROOM_BUCKETS[bucket]:
+        segment_clauses.append({"range": {"bedrooms": BEDROOM_BUCKETS[bucket]}})
+
+    counts = {"segment": {"bool": {"filter": segment_clauses}}}
+    if city:
+        counts["city"] = {"bool": {"filter": compile_filters(SearchFilters(city=city)).filter}}
+    if district:
+        counts["district"] = {"bool": {"filter": compile_filters(SearchFilters(district=district)).filter}}
+
+    return {
+        "size": 0,
+        "track_total_hits": True,
+        "query": {"bool": {"filter": list(scope)}} if scope else {"match_all": {}},
+        "aggs": {
+            "counts": {"filters": {"filters": counts}},
+            "priced": {
+                "filter": {"bool": {"filter": segment_clauses + [{"range": {"price": {"gt": 0}}}]}},
+                "aggs": {
+                    "price_percentiles": {"percentiles": {"field": "price", "percents": PERCENTS}},
+                    "price_stats": {"stats": {"field": "price"}},
+                    "with_area": {
+                        "filter": {"range": {"area": {"gt": 0}}},
+                        "aggs": {
+                            "ppsqm_percentiles": {
+                                "percentiles": {"script": {"source": PRICE_PER_SQM_SCRIPT}, "percents": PERCENTS}
+                            },
+                            "ppsqm_stats": {"stats": {"script": {"source": PRICE_PER_SQM_SCRIPT}}}
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+def _distribution(stats: Dict[str, Any], percentiles: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not stats.get("count"):
+        return None
+    values = percentiles.get("values", {})
+    distribution = {
+        "count": stats["count"],
+        "min": stats["min"],
+        "max": stats["max"],
+        "avg": stats["avg"],
+    }
+    for percent in PERCENTS:
+        distribution[f"p{percent}"] = values.get(f"{float(percent)}")
+    return distribution
+
+
+def parse_aggregations(segment: Segment, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Segment statistics from an aggregation response"""
+    aggs = response["aggregations"]
+    buckets = aggs["counts"]["buckets"]
+    priced = aggs["priced"]
+    with_area = priced["with_area"]
+    city, district, property_type, listing_type, bucket = segment
+
+    return {
+        "segment": {
+            "city": city,
+            "district": district,
+            "property_type": property_type,
+            "listing_type": listing_type,
+            "bedroom_bucket": bucket,
+        },
+        "counts": {
+            "segment": buckets["segment"]["doc_count"],
+            "city": buckets["city"]["doc_count"] if "city" in buckets else None,
+            "district": buckets["district"]["doc_count"] if "district" in buckets else None,
+            "priced": priced["doc_count"],
+        },
+        "price": _distribution(priced["price_stats"], priced["price_percentiles"]),
+        "price_per_sqm": _distribution(with_area["ppsqm_stats"], with_area["ppsqm_percentiles"]),
+        "computed_at": datetime.utcnow().isoformat(),
+    }
+
+
+def empty_stats(segment: Segment) -> Dict[str, Any]:
+    """Statistics of a segment with no listings (e.g. index not created yet)"""
+    counts = {name: {"doc_count": 0} for name, value in (("city", segment[0]), ("district", segment[1])) if value}
+    return parse_aggregations(segment, {
+        "aggregations": {
+            "counts": {"buckets": {"segment": {"doc_count": 0}, **counts}},
+            "priced": {
+                "doc_count": 0,
+                "price_stats": {"count": 0},
+                "price_percentiles": {},
+                "with_area": {"ppsqm_stats": {"count": 0}, "ppsqm_percentiles": {}}
+            }
+        }
+    })
+
+
+class _Entry:
+    __slots__ = ("stats", "computed_at", "last_read")
+
+    def __init__(self, stats: Dict[str, Any]):
+        self.stats = stats
+        self.computed_at = time.monotonic()
+        self.last_read = self.computed_at
+
+
+class MarketStatsCache:
+    """Per-segment aggregation results, refreshed on a timer"""
+
+    def __init__(
+        self,
+        refresh_interval: float = settings.MARKET_STATS_REFRESH_INTERVAL,
+        idle_ttl: float = settings.MARKET_STATS_IDLE_TTL,
+        max_segments: int = settings.MARKET_STATS_MAX_SEGMENTS,
+        index: str = settings.OPENSEARCH_PROPERTIES_INDEX
+    ):
+        """
+        Args:
+            refresh_interval: Seconds between background refreshes. Entries
+                older than twice this (refresher not running or failing)
+                are re-aggregated on read.
+            idle_ttl: Segments not read for this long are dropped, not refreshed
+            max_segments: Segments kept (least recently read dropped first)
+            index: Properties index
+        """
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self.max_segments = max_segments
+        self.index = index
+
+        self._entries: "OrderedDict[Segment, _Entry]" = OrderedDict()
+        self._inflight: Dict[Segment, asyncio.Future] = {}
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    async def start(self, client):
+        """Keep segments read by get() refreshed in the background"""
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _aggregate(self, client, segment: Segment) -> Dict[str, Any]:
+        response = await client.search(
+            index=self.index,
+            body=build_aggregation_body(segment),
+            request_cache=True
+        )
+        return parse_aggregations(segment, response)
+
+    def _store(self, segment: Segment, stats: Dict[str, Any]):
+        entry = self._entries.get(segment)
+        if entry is None:
+            self._entries[segment] = _Entry(stats)
+            while len(self._entries) > self.max_segments:
+                self._entries.popitem(last=False)
+        else:
+            entry.stats = stats
+            entry.computed_at = time.monotonic()
+
+    async def get(self, client, segment: Segment) -> Tuple[Dict[str, Any], str]:
+        """
+        Statistics of a segment
+
+        Returns:
+            (stats, cache_status) with cache_status "hit", "miss" or "coalesced"
+        """
+        now = time.monotonic()
+        entry = self._entries.get(segment)
+        if entry is not None and now - entry.computed_at < self.refresh_interval * 2:
+            entry.last_read = now
+            self._entries.move_to_end(segment)
+            self.stats["hits"] += 1
+            return entry.stats, "hit"
+
+        pending = self._inflight.get(segment)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending), "coalesced"
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[segment] = future
+        try:
+            stats = await self._aggregate(client, segment)
+        except asyncio.CancelledError:
+            # Owner went away: release the waiters instead of leaving them hanging
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved by waiters if any
+            raise
+        finally:
+            self._inflight.pop(segment, None)
+
+        future.set_result(stats)
+        self._store(segment, stats)
+        return stats, "miss"
+
+    async def refresh(self):
+        """Drop idle segments and re-aggregate the rest in one msearch"""
+        now = time.monotonic()
+        for segment in [s for s, e in self._entries.items() if now - e.last_read > self.idle_ttl]:
+            del self._entries[segment]
+
+        segments = list(self._entries)
+        if not segments or self._client is None:
+            return
+
+        lines: List[Dict[str, Any]] = []
+        for segment in segments:
+            lines.append({"index": self.index, "request_cache": True})
+            lines.append(build_aggregation_body(segment))
+        response = await self._client.msearch(body=lines)
+
+        for segment, result in zip(segments, response["responses"]):
+            if "error" in result:
+                self.stats["refresh_errors"] += 1
+                continue
+            if segment in self._entries:
+                self._store(segment, parse_aggregations(segment, result))
+        self.stats["refreshes"] += 1
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Entries stay servable until they are twice the interval old
+                self.stats["refresh_errors"] += 1
+                logger.warning(f"⚠️  Market stats refresh failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for /health"""
+        return {
+            **self.stats,
+            "segments": len(self._entries),
+            "refresh_interval_s": self.refresh_interval,
+        }
+
+
+# Shared instance for the gateway process
+market_stats = MarketStatsCache()
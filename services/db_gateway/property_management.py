@@ -27,6 +27,7 @@ from shared.models.properties import (
     PropertyDocument
 )
 from shared.utils.logger import setup_logger
+from shared.utils.auth import authenticator
 
 logger = setup_logger(__name__)
 
@@ -583,17 +584,6 @@ def _extract_user_id_from_token(authorization: Optional[str]) -> Optional[str]:
     Extract user_id from JWT token.
 
     TODO: Verify token with User Management Service.
-    For now, extracting from Bearer token.
+    For now, verifying the Bearer token locally (shared verified-token cache).
     """
-    if not authorization:
-        return None
-
-    try:
-        import jwt
-        from shared.config import settings
-
-        token = authorization.replace("Bearer ", "")
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload.get("sub")  # user_id
-    except:
-        return None
+    return authenticator.user_id(authorization)
@@ -0,0 +1,270 @@
+"""
+Query DSL Builder for DB Gateway
+
+One place that turns SearchFilters into OpenSearch DSL, shared by /search,
+/vector-search, /count and hybrid search. Filter fragments are compiled once
+per filter signature and memoized; filter-only requests are flagged for the
+shard request cache, so the very common "same city + type + price band"
+combinations are served from OpenSearch's cache.
+
+Canonical field choices (previously inconsistent between endpoints):
+- price range on `price` (the numeric field written by /bulk-insert and the
+  index mapping; `price_normalized` was never populated)
+- region as a non-scoring multi_match in filter context
+- city/district as exact `.keyword` terms, title-cased
+- property types as lower-cased `.keyword` terms plus soft text boosts
+- bedroom/bathroom minimums as soft boosts (listing data is incomplete)
+"""
+
+import json
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
+
+# Text fields for the free-text part of a query
+TEXT_FIELDS = ["title^3", "description", "location^2"]
+REGION_FIELDS = ["district", "location", "title", "description"]
+PROPERTY_TYPE_BOOST_FIELDS = ["title^3", "description"]
+
+# Max query text length accepted by search endpoints
+MAX_QUERY_LENGTH = 500
+
+# Filter signatures memoized by compile_filters()
+FILTER_CACHE_SIZE = 2048
+
+
+class FilterFragment:
+    """
+    Compiled filters: hard `filter` clauses and soft `should` boosts
+
+    Instances are memoized and shared between requests; treat the clause
+    lists as read-only (search bodies copy the outer lists).
+    """
+
+    __slots__ = ("filter", "should", "signature")
+
+    def __init__(self, filter_clauses: List[Dict], should_clauses: List[Dict], signature: str):
+        self.filter = filter_clauses
+        self.should = should_clauses
+        self.signature = signature
+
+    def __bool__(self) -> bool:
+        return bool(self.filter or self.should)
+
+
+def validate_filters(filters: Any):
+    """Raise ValueError for logically impossible range filters"""
+    if not filters:
+        return
+    if filters.min_price and filters.max_price and filters.min_price > filters.max_price:
+        raise ValueError(f"min_price ({filters.min_price}) cannot exceed max_price ({filters.max_price})")
+    if filters.min_area and filters.max_area and filters.min_area > filters.max_area:
+        raise ValueError(f"min_area ({filters.min_area}) cannot exceed max_area ({filters.max_area})")
+
+
+def filter_signature(filters: Any) -> str:
+    """
+    Canonical, order-independent signature of the filter values that
+    affect the compiled DSL (case and list order normalized)
+    """
+    if not filters:
+        return ""
+
+    values: Dict[str, Any] = {}
+    for field, value in filters.model_dump(exclude_none=True).items():
+        # Zero/empty values never produced a clause
+        if not value:
+            continue
+        if field in ("city", "district"):
+            value = value.title()
+        elif field == "property_type":
+            value = value.strip().lower()
+        elif field == "region":
+            value = value.strip()
+        elif field == "property_types":
+            # Keep the first three (they drive the text boosts) in order, the rest as a set
+            value = [pt.lower() for pt in value[:3]] + sorted({pt.lower() for pt in value[3:]})
+        values[field] = value
+
+    return json.dumps(values, sort_keys=True, ensure_ascii=False)
+
+
+def compile_filters(filters: Any) -> FilterFragment:
+    """Compile SearchFilters into a (memoized) FilterFragment"""
+    return _compile_signature(filter_signature(filters))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def _compile_signature(signature: str) -> FilterFragment:
+    values = json.loads(signature) if signature else {}
+    filter_clauses: List[Dict] = []
+    should_clauses: List[Dict] = []
+
+    # City / district - HARD FILTER (exact match on keyword sub-field)
+    if values.get("city"):
+        filter_clauses.append({"term": {"city.keyword": values["city"]}})
+    if values.get("district"):
+        filter_clauses.append({"term": {"district.keyword": values["district"]}})
+
+    # Region - free-text location, non-scoring (cacheable) filter
+    if values.get("region"):
+        filter_clauses.append({
+            "multi_match": {
+                "query": values["region"],
+                "fields": REGION_FIELDS,
+                "type": "best_fields",
+                "operator": "or"
+            }
+        })
+
+    # Property type(s) - HARD FILTER plus soft text boost
+    property_types = values.get("property_types") or (
+        [values["property_type"]] if values.get("property_type") else []
+    )
+    if property_types:
+        if len(property_types) > 1:
+            filter_clauses.append({"terms": {"property_type.keyword": property_types}})
+        else:
+            filter_clauses.append({"term": {"property_type.keyword": property_types[0]}})
+        for pt in property_types[:3]:  # Limit boost to first 3
+            should_clauses.append({
+                "multi_match": {
+                    "query": pt,
+                    "fields": PROPERTY_TYPE_BOOST_FIELDS,
+                    "type": "best_fields",
+                    "operator": "or"
+                }
+            })
+
+    if values.get("listing_type"):
+        filter_clauses.append({"term": {"listing_type.keyword": values["listing_type"]}})
+
+    # Price / area ranges - HARD FILTER on numeric fields
+    price_range = _range(values.get("min_price"), values.get("max_price"))
+    if price_range:
+        filter_clauses.append({"range": {"price": price_range}})
+
+    area_range = _range(values.get("min_area"), values.get("max_area"))
+    if area_range:
+        filter_clauses.append({"range": {"area": area_range}})
+
+    # Exact bedrooms - HARD FILTER
+    if values.get("bedrooms"):
+        filter_clauses.append({"term": {"bedrooms": values["bedrooms"]}})
+
+    # Bedroom/bathroom bounds - SOFT FILTER (boost, don't require)
+    bedroom_range = _range(values.get("min_bedrooms"), values.get("max_bedrooms"))
+    if bedroom_range:
+        should_clauses.append({"range": {"bedrooms": bedroom_range}})
+    if values.get("min_bathrooms"):
+        should_clauses.append({"range": {"bathrooms": {"gte": values["min_bathrooms"]}}})
+
+    return FilterFragment(filter_clauses, should_clauses, signature)
+
+
+def _range(low: Optional[float], high: Optional[float]) -> Dict[str, float]:
+    bounds = {}
+    if low:
+        bounds["gte"] = low
+    if high:
+        bounds["lte"] = high
+    return bounds
+
+
+def sanitize_query(query: Optional[str]) -> str:
+    """Trim and cap query text (empty string if nothing usable)"""
+    return (query or "").strip()[:MAX_QUERY_LENGTH]
+
+
+def text_clause(query: str, fields: List[str] = TEXT_FIELDS) -> Dict[str, Any]:
+    return {
+        "multi_match": {
+            "query": query,
+            "fields": fields,
+            "type": "best_fields",
+            "operator": "or"
+        }
+    }
+
+
+def build_search_body(
+    query: str,
+    filters: Any,
+    limit: int,
+    text_fields: List[str] = TEXT_FIELDS
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    BM25 search body for /search and hybrid search
+
+    With hard filters the query text only boosts (multilingual queries must
+    not block filtered results); without them the text is required.
+
+    Returns:
+        (search_body, cacheable) - cacheable is True for filter-only requests
+    """
+    fragment = compile_filters(filters)
+    query = sanitize_query(query)
+    text_clauses = [text_clause(query, text_fields)] if query else []
+
+    if fragment.filter:
+        bool_query = {
+            "should": text_clauses + fragment.should,
+            "filter": list(fragment.filter),
+            "minimum_should_match": 0  # Allow results even if no text match
+        }
+    else:
+        bool_query = {
+            "must": text_clauses or [{"match_all": {}}],
+            "should": list(fragment.should),
+            "filter": []
+        }
+
+    body = {
+        "size": limit,
+        "query": {"bool": bool_query},
+        "sort": [
+            {"_score": {"order": "desc"}},  # Sort by relevance score
+            {"created_at": {"order": "desc"}}  # Then by recency
+        ]
+    }
+    return body, not query
+
+
+def build_knn_body(query_embedding: List[float], filters: Any, limit: int) -> Dict[str, Any]:
+    """k-NN body for the vector index, hard filters applied alongside the kNN clause"""
+    knn_query = {
+        "knn": {
+            "embedding": {
+                "vector": query_embedding,
+                "k": limit * 2  # Retrieve more candidates for better results
+            }
+        }
+    }
+
+    fragment = compile_filters(filters)
+    if fragment.filter:
+        return {
+            "size": limit,
+            "query": {"bool": {"must": [knn_query], "filter": list(fragment.filter)}}
+        }
+    return {"size": limit, "query": knn_query}
+
+
+def build_count_body(filters: Any) -> Dict[str, Any]:
+    """size=0 body for filter-only counts (served from the shard request cache)"""
+    fragment = compile_filters(filters)
+    return {
+        "size": 0,
+        "track_total_hits": True,
+        "query": {"bool": {"filter": list(fragment.filter)}} if fragment.filter else {"match_all": {}}
+    }
+
+
+def cache_info() -> Dict[str, Any]:
+    """Memoization counters for /health"""
+    info = _compile_signature.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
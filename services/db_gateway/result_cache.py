@@ -0,0 +1,294 @@
+"""
+Search Result Cache for DB Gateway
+
+Caches /search and /hybrid-search results in Redis, keyed by normalized
+query text, filter signature, limit and ranking parameters. Entries hold
+only compact (doc id, score) pairs; documents are hydrated from a small
+in-process LRU (filled when results are computed) or one `mget`.
+
+- Stale-while-revalidate: entries younger than `fresh_ttl` are served as
+  is; entries up to `stale_ttl` old are served immediately while a single
+  background task recomputes them.
+- Single-flight: concurrent misses for the same key share one computation.
+- Degraded results (metadata["degraded"], a search leg failed) are
+  returned but never stored.
+- Invalidation: writes to the properties index bump a generation counter
+  stored in Redis (so every gateway replica sees it). The generation is part
+  of each key, so old entries are simply never read again and expire.
+"""
+
+import time
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
+
+from shared.config import settings
+from shared.utils.redis_cache import get_cache
+from services.db_gateway.query_builder import filter_signature
+
+logger = logging.getLogger(__name__)
+
+# (hits, total, metadata) as produced by an endpoint's search function.
+# Each hit is a document source plus "_id" and "score".
+SearchOutcome = Tuple[List[Dict[str, Any]], int, Dict[str, Any]]
+
+# Fields that belong to one query's ranking, not to the document. They are
+# never kept in the shared document LRU; cached pages carry only "score".
+PER_QUERY_FIELDS = frozenset(
+    ("_id", "score", "hybrid_score", "bm25_score", "vector_score", "fusion", "search_method")
+)
+
+
+class SearchResultCache:
+    """Redis-backed, generation-invalidated search result cache"""
+
+    def __init__(
+        self,
+        namespace: str = "db_gateway_search",
+        fresh_ttl: int = settings.SEARCH_CACHE_FRESH_TTL,
+        stale_ttl: int = settings.SEARCH_CACHE_STALE_TTL,
+        doc_cache_size: int = 5000,
+        generation_check_interval: float = 1.0,
+        enabled: bool = settings.SEARCH_CACHE_ENABLED
+    ):
+        """
+        Args:
+            namespace: RedisCache namespace
+            fresh_ttl: Seconds an entry is served without revalidation
+            stale_ttl: Seconds an entry may be served while revalidating (Redis TTL)
+            doc_cache_size: In-process LRU of document sources used for hydration
+            generation_check_interval: How often to re-read the shared generation
+            enabled: Master switch (SEARCH_CACHE_ENABLED)
+        """
+        self.cache = get_cache(namespace)
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        self.doc_cache_size = doc_cache_size
+        self.generation_check_interval = generation_check_interval
+        self.enabled = enabled
+
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self._docs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: set = set()
+
+        self.stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "revalidations": 0,
+            "hydration_misses": 0,
+            "invalidations": 0,
+            "degraded_skipped": 0,
+            "errors": 0,
+        }
+
+    # ========================================================================
+    # Keys and generations
+    # ========================================================================
+
+    @staticmethod
+    def make_key(endpoint: str, query: Optional[str], filters: Any, **params) -> str:
+        """Stable key from normalized query, filter signature and ranking params"""
+        normalized_query = " ".join((query or "").casefold().split())
+        raw = json.dumps(
+            [normalized_query, filter_signature(filters), params],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return f"{endpoint}:{hashlib.sha256(raw.encode()).hexdigest()[:24]}"
+
+    async def _current_generation(self) -> int:
+        now = time.monotonic()
+        if now - self._generation_checked_at >= self.generation_check_interval:
+            self._generation_checked_at = now
+            generation = await self.cache.get("generation")
+            if generation is not None and int(generation) != self._generation:
+                # Another replica invalidated: local documents may be outdated too
+                self._generation = int(generation)
+                self._docs.clear()
+        return self._generation
+
+    async def invalidate(self, reason: str):
+        """Drop every cached result (all replicas) after an index write"""
+        self.stats["invalidations"] += 1
+        self._docs.clear()
+        generation = await self.cache.incr("generation")
+        self._generation = generation if generation is not None else self._generation + 1
+        self._generation_checked_at = time.monotonic()
+        logger.info(f"🧹 Search cache invalidated ({reason}), generation={self._generation}")
+
+    # ========================================================================
+    # Lookup
+    # ========================================================================
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[SearchOutcome]],
+        hydrate: Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+    ) -> Tuple[List[Dict[str, Any]], int, Dict[str, Any], str]:
+        """
+        Serve a search from cache or compute it
+
+        Args:
+            key: From make_key()
+            compute: Runs the real search
+            hydrate: Fetches document sources by id (mget)
+
+        Returns:
+            (hits, total, metadata, cache_status) with cache_status one of
+            "fresh", "stale", "miss", "coalesced", "bypass"
+        """
+        if not self.enabled:
+            hits, total, metadata = await compute()
+            return hits, total, metadata, "bypass"
+
+        generation = await self._current_generation()
+        full_key = f"{generation}:{key}"
+
+        entry = await self.cache.get(full_key)
+        if entry is not None:
+            hits = await self._hydrate(entry["hits"], hydrate)
+            if hits is not None:
+                age = time.time() - entry["created_at"]
+                if age < self.fresh_ttl:
+                    self.stats["fresh_hits"] += 1
+                    return hits, entry["total"], entry["metadata"], "fresh"
+
+                self.stats["stale_hits"] += 1
+                if full_key not in self._inflight:
+                    self.stats["revalidations"] += 1
+                    future = self._begin(full_key)
+                    task = asyncio.create_task(self._revalidate(full_key, compute, future))
+                    self._background.add(task)
+                    task.add_done_callback(self._background.discard)
+                return hits, entry["total"], entry["metadata"], "stale"
+
+            self.stats["hydration_misses"] += 1
+
+        # Single-flight: join an identical computation already running
+        pending = self._inflight.get(full_key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            hits, total, metadata = await asyncio.shield(pending)
+            return hits, total, metadata, "coalesced"
+
+        self.stats["misses"] += 1
+        hits, total, metadata = await self._compute_and_store(full_key, compute, self._begin(full_key))
+        return hits, total, metadata, "miss"
+
+    def _begin(self, full_key: str) -> asyncio.Future:
+        """Register an in-flight computation (synchronously, so it is never started twice)"""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        return future
+
+    async def _revalidate(
+        self,
+        full_key: str,
+        compute: Callable[[], Awaitable[SearchOutcome]],
+        future: asyncio.Future
+    ):
+        try:
+            await self._compute_and_store(full_key, compute, future)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️  Search cache revalidation failed: {e}")
+
+    async def _compute_and_store(
+        self,
+        full_key: str,
+        compute: Callable[[], Awaitable[SearchOutcome]],
+        future: asyncio.Future
+    ) -> SearchOutcome:
+        try:
+            outcome = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Waiters get the same error; mark it retrieved in case there are none
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(full_key, None)
+
+        future.set_result(outcome)
+        hits, total, metadata = outcome
+
+        if metadata.get("degraded"):
+            # Partial result (a search leg failed): serve it once, don't keep it
+            self.stats["degraded_skipped"] += 1
+            return outcome
+
+        for hit in hits:
+            self._remember_doc(hit)
+
+        try:
+            await self.cache.set(full_key, {
+                "created_at": time.time(),
+                "hits": [[hit["_id"], hit["score"]] for hit in hits],
+                "total": total,
+                "metadata": metadata,
+            }, ttl=self.stale_ttl)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️  Search cache store failed: {e}")
+
+        return outcome
+
+    # ========================================================================
+    # Hydration
+    # ========================================================================
+
+    def _remember_doc(self, hit: Dict[str, Any]):
+        doc_id = hit["_id"]
+        self._docs[doc_id] = {k: v for k, v in hit.items() if k not in PER_QUERY_FIELDS}
+        self._docs.move_to_end(doc_id)
+        while len(self._docs) > self.doc_cache_size:
+            self._docs.popitem(last=False)
+
+    async def _hydrate(
+        self,
+        compact_hits: List[List[Any]],
+        hydrate: Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Rebuild hits from (id, score) pairs; None if any document is gone"""
+        missing = [doc_id for doc_id, _ in compact_hits if doc_id not in self._docs]
+        if missing:
+            try:
+                fetched = await hydrate(missing)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️  Search cache hydration failed: {e}")
+                return None
+            if len(fetched) < len(set(missing)):
+                return None
+            for doc_id, source in fetched.items():
+                self._remember_doc({**source, "_id": doc_id, "score": 0.0})
+
+        hits = []
+        for doc_id, score in compact_hits:
+            source = self._docs[doc_id]
+            self._docs.move_to_end(doc_id)
+            hits.append({**source, "_id": doc_id, "score": score})
+        return hits
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for /health"""
+        return {
+            "enabled": self.enabled,
+            "generation": self._generation,
+            "fresh_ttl": self.fresh_ttl,
+            "stale_ttl": self.stale_ttl,
+            "cached_docs": len(self._docs),
+            "inflight": len(self._inflight),
+            **self.stats,
+        }
@@ -0,0 +1,387 @@
+"""
+Write-behind Conversation Log for the orchestrator
+
+Replaces the per-message "upsert user, upsert chat, insert message" round
+trips with:
+- An in-process cache of user and chat ids already written: their upserts
+  are skipped, apart from a periodic touch that keeps last_active_at /
+  updated_at roughly current
+- A queue of messages flushed in the background with executemany (one
+  transaction per batch, across requests), with bounded retry and a final
+  drain on shutdown
+- A per-conversation ring buffer of recent messages, so history reads only
+  hit Postgres on a cold (or expired) conversation
+
+Messages are visible to get_history() as soon as they are appended, before
+they reach Postgres.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import asyncpg
+
+from shared.config import settings
+from shared.utils.logger import LogEmoji
+
+USER_UPSERT_SQL = """
+    INSERT INTO "user" (id, name, email, role, profile_image_url, created_at, updated_at, last_active_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (id) DO UPDATE SET last_active_at = $8
+"""
+
+CHAT_UPSERT_SQL = """
+    INSERT INTO chat (id, user_id, title, archived, created_at, updated_at, meta)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (id) DO UPDATE SET updated_at = $6
+"""
+
+# Idempotent, so a retried batch can't duplicate messages
+MESSAGE_INSERT_SQL = """
+    INSERT INTO message (id, user_id, channel_id, content, data, meta, created_at, updated_at)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (id) DO NOTHING
+"""
+
+HISTORY_SQL = """
+    SELECT id, data->>'role' as role, content, created_at
+    FROM message
+    WHERE channel_id = $1
+    ORDER BY created_at DESC
+    LIMIT $2
+"""
+
+# Seconds before the first retry of a failed batch (doubles per attempt)
+RETRY_BACKOFF = 0.5
+
+
+class _History:
+    """Recent messages of one conversation"""
+
+    __slots__ = ("messages", "loaded_at")
+
+    def __init__(self, messages: List[Dict[str, Any]], size: int):
+        self.messages: Deque[Dict[str, Any]] = deque(messages, maxlen=size)
+        self.loaded_at = time.monotonic()
+
+
+class ConversationLog:
+    """Cached, batched conversation persistence (single instance per process)"""
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        to_uuid: Callable[[str], str],
+        logger,
+        batch_size: int = settings.CONVERSATION_LOG_BATCH_SIZE,
+        flush_interval: float = settings.CONVERSATION_LOG_FLUSH_INTERVAL,
+        max_retries: int = settings.CONVERSATION_LOG_MAX_RETRIES,
+        max_pending: int = settings.CONVERSATION_LOG_MAX_PENDING,
+        history_size: int = settings.CONVERSATION_HISTORY_BUFFER_SIZE,
+        history_ttl: float = settings.CONVERSATION_HISTORY_TTL,
+        touch_interval: float = settings.CONVERSATION_ID_TOUCH_INTERVAL,
+        max_conversations: int = 10000,
+        max_known_ids: int = 100000
+    ):
+        """
+        Args:
+            pool: asyncpg pool of the conversation database
+            to_uuid: Maps user / conversation ids to their deterministic UUIDs
+            logger: Structured logger
+            batch_size: Messages per flush transaction
+            flush_interval: Max seconds a message waits before being flushed
+            max_retries: Attempts per batch before it is dropped
+            max_pending: Queue bound; the oldest messages are dropped beyond it
+            history_size: Messages kept per conversation ring buffer
+            history_ttl: Seconds before a buffer is reloaded (other replicas may write too)
+            touch_interval: Seconds between upserts of an already written user / chat
+            max_conversations: Ring buffers kept (LRU)
+            max_known_ids: User / chat ids remembered (LRU)
+        """
+        self.pool = pool
+        self.to_uuid = to_uuid
+        self.logger = logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self.history_ttl = history_ttl
+        self.touch_interval = touch_interval
+        self.max_conversations = max_conversations
+        self.max_known_ids = max_known_ids
+
+        self._pending: List[Dict[str, Any]] = []
+        self._inflight: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+        # uuid -> monotonic time of the last successful upsert
+        self._users: "OrderedDict[str, float]" = OrderedDict()
+        self._chats: "OrderedDict[str, float]" = OrderedDict()
+        self._histories: "OrderedDict[str, _History]" = OrderedDict()
+
+        self.stats = {
+            "appended": 0,
+            "flushed": 0,
+            "batches": 0,
+            "retries": 0,
+            "dropped": 0,
+            "user_upserts": 0,
+            "chat_upserts": 0,
+            "history_hits": 0,
+            "history_misses": 0,
+        }
+
+    # ========================================================================
+    # Lifecycle
+    # ========================================================================
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the background flusher and drain everything still queued"""
+        if self._flusher is not None:
+            # Let the loop finish its current batch instead of cancelling it mid-write
+            self._stopping.set()
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        self.logger.info(
+            f"{LogEmoji.SUCCESS} Conversation log drained "
+            f"(flushed={self.stats['flushed']}, dropped={self.stats['dropped']})"
+        )
+
+    async def _flush_loop(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"{LogEmoji.ERROR} Conversation log flush error: {e}")
+
+    # ========================================================================
+    # Writes
+    # ========================================================================
+
+    def append(self, user_id: str, conversation_id: str, role: str, content: str, metadata: Dict = None):
+        """Queue a message; visible to get_history() immediately"""
+        now_ms = int(time.time() * 1000)
+        record = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "user_uuid": str(self.to_uuid(user_id)),
+            "channel_id": str(self.to_uuid(conversation_id)),
+            "role": role,
+            "content": content,
+            "metadata": metadata or {},
+            "created_at": now_ms,
+        }
+        self._pending.append(record)
+        self.stats["appended"] += 1
+
+        if len(self._pending) > self.max_pending:
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self.stats["dropped"] += overflow
+            self.logger.warning(f"{LogEmoji.WARNING} Conversation log queue full, dropped {overflow} oldest messages")
+
+        history = self._histories.get(record["channel_id"])
+        if history is not None:
+            history.messages.append(self._history_entry(record))
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write every queued message (batch by batch)"""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                self._inflight = batch
+                try:
+                    await self._write_batch(batch)
+                except asyncio.CancelledError:
+                    # Not written: back to the head of the queue for the next flush
+                    self._pending[:0] = batch
+                    raise
+                finally:
+                    self._inflight = []
+
+    def _needs_upsert(self, known: "OrderedDict[str, float]", key: str, now: float) -> bool:
+        touched = known.get(key)
+        return touched is None or now - touched >= self.touch_interval
+
+    @staticmethod
+    def _remember(known: "OrderedDict[str, float]", key: str, now: float, limit: int):
+        known[key] = now
+        known.move_to_end(key)
+        while len(known) > limit:
+            known.popitem(last=False)
+
+    def _parent_rows(self, batch: List[Dict[str, Any]], now: float):
+        """Latest row per user / chat of the batch that isn't known (or is due for a touch)"""
+        users: Dict[str, tuple] = {}
+        chats: Dict[str, tuple] = {}
+        for record in batch:
+            ts = record["created_at"]
+            if self._needs_upsert(self._users, record["user_uuid"], now):
+                users[record["user_uuid"]] = (
+                    record["user_uuid"],
+                    record["user_id"],  # name
+                    f"{record['user_id']}@system.local",  # email
+                    "user",  # role
+                    "",  # profile_image_url
+                    ts, ts, ts
+                )
+            if self._needs_upsert(self._chats, record["channel_id"], now):
+                chats[record["channel_id"]] = (
+                    record["channel_id"],
+                    record["user_uuid"],
+                    "Property Posting",  # Default title
+                    False,  # archived
+                    ts, ts,
+                    json.dumps({})
+                )
+        return users, chats
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        now = time.monotonic()
+        messages = [
+            (
+                record["id"],
+                record["user_uuid"],
+                record["channel_id"],  # channel_id links to chat.id
+                record["content"],
+                json.dumps({"role": record["role"]}),  # Store role in data field
+                json.dumps(record["metadata"]),
+                record["created_at"],
+                record["created_at"]
+            )
+            for record in batch
+        ]
+
+        for attempt in range(1, self.max_retries + 1):
+            # Recomputed per attempt: a failure forgets the batch's ids below
+            users, chats = self._parent_rows(batch, now)
+            try:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        # Parents first (foreign keys)
+                        if users:
+                            await conn.executemany(USER_UPSERT_SQL, list(users.values()))
+                        if chats:
+                            await conn.executemany(CHAT_UPSERT_SQL, list(chats.values()))
+                        await conn.executemany(MESSAGE_INSERT_SQL, messages)
+            except Exception as e:
+                # A cached id may be stale (row deleted): upsert every parent on retry
+                for record in batch:
+                    self._users.pop(record["user_uuid"], None)
+                    self._chats.pop(record["channel_id"], None)
+                if attempt == self.max_retries:
+                    self.stats["dropped"] += len(batch)
+                    self.logger.error(
+                        f"{LogEmoji.ERROR} Dropping {len(batch)} conversation messages after "
+                        f"{attempt} attempts: {e}"
+                    )
+                    return False
+                self.stats["retries"] += 1
+                self.logger.warning(f"{LogEmoji.WARNING} Conversation log flush failed (attempt {attempt}): {e}")
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+                continue
+
+            for key in users:
+                self._remember(self._users, key, now, self.max_known_ids)
+            for key in chats:
+                self._remember(self._chats, key, now, self.max_known_ids)
+            self.stats["batches"] += 1
+            self.stats["flushed"] += len(batch)
+            self.stats["user_upserts"] += len(users)
+            self.stats["chat_upserts"] += len(chats)
+            self.logger.debug(
+                f"{LogEmoji.SUCCESS} [Save] Flushed {len(batch)} messages "
+                f"({len(users)} user / {len(chats)} chat upserts)"
+            )
+            return True
+
+        return False
+
+    # ========================================================================
+    # Reads
+    # ========================================================================
+
+    @staticmethod
+    def _history_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": record["id"],
+            "created_at": record["created_at"],
+            "role": record["role"],
+            "content": record["content"],
+        }
+
+    async def get_history(self, conversation_id: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Last `limit` messages (chronological) as {"role", "content"}"""
+        channel_id = str(self.to_uuid(conversation_id))
+
+        history = self._histories.get(channel_id)
+        if (
+            history is not None
+            and limit <= self.history_size
+            and time.monotonic() - history.loaded_at < self.history_ttl
+        ):
+            self.stats["history_hits"] += 1
+            self._histories.move_to_end(channel_id)
+            entries = list(history.messages)[-limit:] if limit > 0 else []
+        else:
+            self.stats["history_misses"] += 1
+            entries = await self._load_history(channel_id, max(limit, self.history_size))
+            entries = entries[-limit:] if limit > 0 else []
+
+        return [{"role": entry["role"], "content": entry["content"]} for entry in entries]
+
+    async def _load_history(self, channel_id: str, fetch: int) -> List[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(HISTORY_SQL, channel_id, fetch)
+
+        entries = [
+            {"id": str(row["id"]), "created_at": row["created_at"], "role": row["role"], "content": row["content"]}
+            for row in reversed(rows)
+        ]
+
+        # Messages not flushed yet (or committed after the SELECT snapshot)
+        stored = {entry["id"] for entry in entries}
+        entries.extend(
+            self._history_entry(record)
+            for record in self._inflight + self._pending
+            if record["channel_id"] == channel_id and record["id"] not in stored
+        )
+        entries.sort(key=lambda entry: entry["created_at"] or 0)
+
+        self._histories[channel_id] = _History(entries[-self.history_size:], self.history_size)
+        self._histories.move_to_end(channel_id)
+        while len(self._histories) > self.max_conversations:
+            self._histories.popitem(last=False)
+
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "buffered_conversations": len(self._histories),
+            "known_users": len(self._users),
+            "known_chats": len(self._chats),
+        }
@@ -0,0 +1,121 @@
+"""
+Persistent memo of LLM geo answers for the orchestrator
+
+The gazetteer (shared/master_data/gazetteer.py) answers known places
+locally; this memo covers the rest. Each LLM answer (including "unknown")
+is stored under a (kind, place) key in a JSON file, so a place is asked
+about once per deployment rather than once per request. Concurrent misses
+for the same key share one LLM call; failed calls are not memoized.
+"""
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from shared.config import settings
+from shared.master_data.gazetteer import fold
+from shared.utils.logger import LogEmoji
+
+# Fetchers return (answer, memoize); memoize=False for transport errors
+Fetcher = Callable[[], Awaitable[Tuple[Any, bool]]]
+
+
+class GeoMemo:
+    """Memoized geo answers, persisted as JSON (single instance per process)"""
+
+    def __init__(
+        self,
+        logger,
+        path: str = settings.GEO_MEMO_PATH,
+        max_entries: int = settings.GEO_MEMO_MAX_ENTRIES
+    ):
+        """
+        Args:
+            logger: Structured logger
+            path: JSON file; empty string keeps the memo in process only
+            max_entries: Entries kept (oldest dropped first)
+        """
+        self.logger = logger
+        self.path = path
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._save_lock = asyncio.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    @staticmethod
+    def key(kind: str, *parts: Optional[str]) -> str:
+        """Memo key, insensitive to case and diacritics"""
+        return "|".join([kind, *(fold(p) if p else "" for p in parts)])
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries.update(json.load(f))
+            self.logger.info(f"{LogEmoji.SUCCESS} Loaded {len(self._entries)} memoized geo answers")
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"{LogEmoji.WARNING} Ignoring unreadable geo memo {self.path}: {e}")
+
+    def _write(self, snapshot: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    async def _save(self):
+        if not self.path:
+            return
+        async with self._save_lock:
+            try:
+                await asyncio.to_thread(self._write, dict(self._entries))
+            except OSError as e:
+                self.logger.warning(f"{LogEmoji.WARNING} Failed to persist geo memo: {e}")
+
+    async def get_or_fetch(self, key: str, fetch: Fetcher) -> Any:
+        """
+        Memoized answer for key, calling fetch on a miss
+
+        Args:
+            key: From GeoMemo.key()
+            fetch: Coroutine function returning (answer, memoize)
+
+        Returns:
+            The answer (None when the place is unknown)
+        """
+        if key in self._entries:
+            self.stats["hits"] += 1
+            return self._entries[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            answer, memoize = await fetch()
+        except asyncio.CancelledError:
+            # Owner went away: release the waiters instead of leaving them hanging
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(answer)
+        if memoize:
+            self._entries[key] = answer
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            await self._save()
+        return answer
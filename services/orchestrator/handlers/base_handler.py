@@ -5,9 +5,10 @@ Provides common functionality for all intent handlers
 """
 import time
 import httpx
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 from shared.utils.logger import LogEmoji
 from shared.utils.retry import retry_on_http_error
+from shared.utils.sse import iter_sse_events
 from shared.exceptions import ServiceUnavailableError
 
 
@@ -85,6 +86,42 @@ class BaseHandler:
             self.logger.error(f"{LogEmoji.ERROR} Network error calling {service_name}: {e}")
             raise ServiceUnavailableError(service_name, {"endpoint": endpoint, "error": str(e)})
 
+    async def stream_service(
+        self,
+        service_name: str,
+        endpoint: str,
+        json_data: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Call a streaming (SSE) service endpoint and yield its events
+
+        Not retried: events may already have been forwarded when it fails.
+
+        Args:
+            service_name: Service key in service_urls
+            endpoint: API endpoint path
+            json_data: Request payload
+            timeout: Timeout in seconds (per read, not for the whole stream)
+
+        Yields:
+            Decoded event payloads
+
+        Raises:
+            ServiceUnavailableError: If service is unavailable
+        """
+        url = f"{self.service_urls[service_name]}{endpoint}"
+
+        try:
+            async with self.http_client.stream("POST", url, json=json_data, timeout=timeout) as response:
+                response.raise_for_status()
+                async for event in iter_sse_events(response):
+                    yield event
+
+        except httpx.RequestError as e:
+            self.logger.error(f"{LogEmoji.ERROR} Network error streaming from {service_name}: {e}")
+            raise ServiceUnavailableError(service_name, {"endpoint": endpoint, "error": str(e)})
+
     def log_handler_start(self, request_id: str, handler_name: str, query: str):
         """Log handler execution start"""
         self.logger.info(f"{LogEmoji.TARGET} [{request_id}] {handler_name} handling: '{query}'")
@@ -5,9 +5,12 @@ Handles SEARCH intent:
 1. Extract attributes from query
 2. Call RAG Service for property search
 3. Return structured response with PropertyListComponent
+
+handle_stream() is the streaming variant: property cards are emitted as
+soon as retrieval finishes, then the response text token by token.
 """
 import time
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Awaitable, Dict, Any, List, Optional
 from services.orchestrator.handlers.base_handler import BaseHandler
 from services.orchestrator.utils.extraction_helpers import (
     build_filters_from_extraction_response,
@@ -36,7 +39,8 @@ class SearchHandler(BaseHandler):
         query: str,
         history: Optional[List[Dict[str, Any]]] = None,
         files: Optional[List] = None,
-        language: str = "vi"
+        language: str = "vi",
+        prefetched_filters: Optional[Awaitable[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
         Execute search flow
@@ -47,6 +51,7 @@ class SearchHandler(BaseHandler):
             history: Conversation history (optional)
             files: Attached files (optional)
             language: User's preferred language (vi, en, th, ja)
+            prefetched_filters: Result of extract_filters() already in flight (optional)
 
         Returns:
             Dict with 'message' (str) and 'components' (List[UIComponent])
@@ -54,47 +59,11 @@ class SearchHandler(BaseHandler):
         start_time = time.time()
         self.log_handler_start(request_id, "SearchHandler", query)
 
-        # STEP 1: Extract attributes from query using enhanced pipeline
-        self.logger.info(f"{LogEmoji.AI} [{request_id}] Extracting search attributes with master data...")
-
-        try:
-            extraction_result = await self.call_service(
-                "attribute_extraction",
-                "/extract-query-enhanced",
-                json_data={
-                    "query": query,
-                    "intent": "SEARCH"
-                }
-            )
-
-            # NEW: Extract from 3-tier response structure (raw/mapped/new)
-            raw_attrs = extraction_result.get("raw", {})
-            mapped_attrs = extraction_result.get("mapped", [])
-            new_attrs = extraction_result.get("new", [])
-            confidence = extraction_result.get("confidence", 0.0)
-
-            self.logger.info(
-                f"{LogEmoji.SUCCESS} [{request_id}] Extraction complete: "
-                f"{len(mapped_attrs)} mapped, {len(new_attrs)} new, confidence: {confidence:.2f}"
-            )
-
-            # Build filters using helper function (handles both legacy and new formats)
-            extracted_attrs = build_filters_from_extraction_response(extraction_result)
-
-            # Log in human-readable format
-            entities_log = extract_entities_for_logging(extraction_result)
-            self.logger.info(
-                f"{LogEmoji.INFO} [{request_id}] Extracted entities: {entities_log}"
-            )
-            self.logger.info(
-                f"{LogEmoji.INFO} [{request_id}] Built filters: {extracted_attrs}"
-            )
-
-        except Exception as e:
-            self.logger.warning(
-                f"{LogEmoji.WARNING} [{request_id}] Attribute extraction failed: {e}, proceeding without filters"
-            )
-            extracted_attrs = {}
+        # STEP 1: Extract attributes (may already be running, started speculatively by the orchestrator)
+        if prefetched_filters is not None:
+            extracted_attrs = await prefetched_filters
+        else:
+            extracted_attrs = await self.extract_filters(request_id, query)
 
         # STEP 2: Query RAG Service with extracted attributes
         self.logger.info(f"{LogEmoji.SEARCH} [{request_id}] Querying RAG Service...")
@@ -129,33 +98,11 @@ class SearchHandler(BaseHandler):
             )
 
             # STEP 3: Create UI components from properties data
-            components = []
-            if properties:
-                property_list_component = PropertyListComponent.create(
-                    properties=self._format_properties_for_frontend(properties),
-                    total=retrieved_count
-                )
-                components.append(property_list_component.dict())
-                self.logger.info(f"{LogEmoji.SUCCESS} [{request_id}] Created PropertyListComponent with {len(properties)} items")
-            else:
+            components = self._build_components(request_id, properties, retrieved_count)
+            if not properties:
                 # No results found - provide helpful suggestions
-                suggestions = get_search_suggestions(language)
                 self.logger.info(f"{LogEmoji.INFO} [{request_id}] No results found, adding suggestions")
-
-                # Build suggestion message using i18n
-                property_types_str = ", ".join(suggestions.get("property_types", []))
-                actions = suggestions.get("actions", [])
-
-                # Use translated messages from i18n system
-                suggestion_message = t('search.suggestions_header', language=language)
-                suggestion_message += f"\n• {t('search.try_other_property_types', language=language, types=property_types_str)}"
-
-                if actions:
-                    suggestion_message += f"\n• {actions[1] if len(actions) > 1 else actions[0]}"
-                    if len(actions) > 2 and actions[2]:
-                        suggestion_message += f"\n• {actions[2]}"
-
-                response_text = response_text + suggestion_message
+                response_text = response_text + self._suggestion_message(language)
 
             duration_ms = (time.time() - start_time) * 1000
             self.log_handler_complete(request_id, "SearchHandler", duration_ms)
@@ -178,6 +125,162 @@ class SearchHandler(BaseHandler):
                 "components": []
             }
 
+    async def handle_stream(
+        self,
+        request_id: str,
+        query: str,
+        history: Optional[List[Dict[str, Any]]] = None,
+        language: str = "vi",
+        prefetched_filters: Optional[Awaitable[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute search flow, streaming
+
+        Yields:
+            {"type": "components", "components"} once retrieval is done (first),
+            then {"type": "token", "content"} as the RAG Service generates text
+        """
+        start_time = time.time()
+        self.log_handler_start(request_id, "SearchHandler(stream)", query)
+
+        # STEP 1: Extract attributes
+        if prefetched_filters is not None:
+            extracted_attrs = await prefetched_filters
+        else:
+            extracted_attrs = await self.extract_filters(request_id, query)
+
+        # STEP 2: Stream from RAG Service
+        self.logger.info(f"{LogEmoji.SEARCH} [{request_id}] Streaming from RAG Service...")
+
+        properties_seen = False
+        try:
+            async for event in self.stream_service(
+                "rag_service",
+                "/query/stream",
+                json_data={
+                    "query": query,
+                    "filters": extracted_attrs,
+                    "limit": 5,
+                    "language": language,
+                    "use_advanced_rag": True,
+                    "response_format": "components"
+                },
+                timeout=90.0  # RAG can be slow
+            ):
+                event_type = event.get("type")
+
+                if event_type == "properties":
+                    # STEP 3: Property cards before any text
+                    properties = event.get("properties") or []
+                    properties_seen = bool(properties)
+                    self.logger.info(
+                        f"{LogEmoji.SUCCESS} [{request_id}] RAG returned {event.get('retrieved_count', 0)} properties "
+                        f"(pipeline: {event.get('pipeline_used', 'unknown')})"
+                    )
+                    yield {
+                        "type": "components",
+                        "components": self._build_components(request_id, properties, event.get("retrieved_count", 0))
+                    }
+                elif event_type == "token":
+                    yield {"type": "token", "content": event.get("content", "")}
+                elif event_type == "error":
+                    raise RuntimeError(event.get("message", "RAG stream failed"))
+
+            if not properties_seen:
+                self.logger.info(f"{LogEmoji.INFO} [{request_id}] No results found, adding suggestions")
+                yield {"type": "token", "content": self._suggestion_message(language)}
+
+        except Exception as e:
+            self.logger.error(f"{LogEmoji.ERROR} [{request_id}] RAG Service stream failed: {e}")
+            yield {"type": "token", "content": t('search.service_unavailable', language=language)}
+
+        duration_ms = (time.time() - start_time) * 1000
+        self.log_handler_complete(request_id, "SearchHandler(stream)", duration_ms)
+
+    def _build_components(self, request_id: str, properties: List[Dict[str, Any]], total: int) -> List[Dict[str, Any]]:
+        """PropertyListComponent for the retrieved properties ([] if none)"""
+        if not properties:
+            return []
+
+        property_list_component = PropertyListComponent.create(
+            properties=self._format_properties_for_frontend(properties),
+            total=total
+        )
+        self.logger.info(f"{LogEmoji.SUCCESS} [{request_id}] Created PropertyListComponent with {len(properties)} items")
+        return [property_list_component.dict()]
+
+    def _suggestion_message(self, language: str) -> str:
+        """Helpful suggestions appended when a search finds nothing"""
+        suggestions = get_search_suggestions(language)
+
+        # Build suggestion message using i18n
+        property_types_str = ", ".join(suggestions.get("property_types", []))
+        actions = suggestions.get("actions", [])
+
+        # Use translated messages from i18n system
+        suggestion_message = t('search.suggestions_header', language=language)
+        suggestion_message += f"\n• {t('search.try_other_property_types', language=language, types=property_types_str)}"
+
+        if actions:
+            suggestion_message += f"\n• {actions[1] if len(actions) > 1 else actions[0]}"
+            if len(actions) > 2 and actions[2]:
+                suggestion_message += f"\n• {actions[2]}"
+
+        return suggestion_message
+
+    async def extract_filters(self, request_id: str, query: str) -> Dict[str, Any]:
+        """
+        Extract search filters from the query (STEP 1)
+
+        Independent of history and language, so the orchestrator can start it
+        while classification is still running.
+
+        Returns:
+            Filters for the RAG Service ({} if extraction fails)
+        """
+        self.logger.info(f"{LogEmoji.AI} [{request_id}] Extracting search attributes with master data...")
+
+        try:
+            extraction_result = await self.call_service(
+                "attribute_extraction",
+                "/extract-query-enhanced",
+                json_data={
+                    "query": query,
+                    "intent": "SEARCH"
+                }
+            )
+
+            # NEW: Extract from 3-tier response structure (raw/mapped/new)
+            raw_attrs = extraction_result.get("raw", {})
+            mapped_attrs = extraction_result.get("mapped", [])
+            new_attrs = extraction_result.get("new", [])
+            confidence = extraction_result.get("confidence", 0.0)
+
+            self.logger.info(
+                f"{LogEmoji.SUCCESS} [{request_id}] Extraction complete: "
+                f"{len(mapped_attrs)} mapped, {len(new_attrs)} new, confidence: {confidence:.2f}"
+            )
+
+            # Build filters using helper function (handles both legacy and new formats)
+            extracted_attrs = build_filters_from_extraction_response(extraction_result)
+
+            # Log in human-readable format
+            entities_log = extract_entities_for_logging(extraction_result)
+            self.logger.info(
+                f"{LogEmoji.INFO} [{request_id}] Extracted entities: {entities_log}"
+            )
+            self.logger.info(
+                f"{LogEmoji.INFO} [{request_id}] Built filters: {extracted_attrs}"
+            )
+
+        except Exception as e:
+            self.logger.warning(
+                f"{LogEmoji.WARNING} [{request_id}] Attribute extraction failed: {e}, proceeding without filters"
+            )
+            extracted_attrs = {}
+
+        return extracted_attrs
+
     def _format_properties_for_frontend(self, properties: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Format property data for frontend PropertyCard component
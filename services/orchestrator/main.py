@@ -8,7 +8,7 @@ import json
 import uuid
 import os  # MEDIUM FIX Bug#25: Needed for environment variable access
 import asyncio  # CRITICAL FIX: Missing import for asyncio.sleep in retry logic
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import httpx
 import asyncpg
 from datetime import datetime
@@ -20,6 +20,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 from pybreaker import CircuitBreaker, CircuitBreakerError
 
 from core.base_service import BaseService
+from core.service_registry import ServiceBalancer, BalancedTransport
 from shared.models.orchestrator import (
     OrchestrationRequest, OrchestrationResponse, IntentType,
     IntentDetectionResult, RoutingDecision
@@ -28,6 +29,7 @@ from shared.models.core_gateway import LLMRequest, Message, ModelType, FileAttac
 from shared.utils.logger import LogEmoji
 from shared.config import settings
 from shared.utils.i18n_loader import get_i18n_loader
+from shared.utils.sse import SSE_HEADERS, sse_event, iter_sse_events
 
 
 
@@ -62,6 +64,14 @@ from shared.utils.query_normalizer import QueryNormalizer
 from services.orchestrator.handlers.search_handler import SearchHandler
 from services.orchestrator.handlers.property_detail_handler import PropertyDetailHandler
 
+# Concurrent, dependency-aware pipeline stages
+from services.orchestrator.stage_executor import StageExecutor
+from services.orchestrator.conversation_log import ConversationLog
+
+# Local place lookups + memoized LLM answers for unknown places
+from shared.master_data.gazetteer import get_gazetteer
+from services.orchestrator.geo_memo import GeoMemo
+
 
 class Orchestrator(BaseService):
     """
@@ -77,13 +87,30 @@ class Orchestrator(BaseService):
             port=8080
         )
 
+        # Client-side load balancing: requests to these hosts go to a live
+        # replica picked from the service registry (URL unchanged otherwise)
+        self.balancers = {
+            host: ServiceBalancer(service, self.registry_client, logger=self.logger)
+            for host, service in {
+                "ree-ai-db-gateway": "db_gateway",
+                "ree-ai-attribute-extraction": "attribute_extraction",
+                "ree-ai-classification": "classification_service",
+                "ree-ai-completeness": "completeness_service",
+            }.items()
+        }
+
         # HIGH PRIORITY FIX: Configure HTTP client with connection pooling
         self.http_client = httpx.AsyncClient(
             timeout=60.0,
-            limits=httpx.Limits(
-                max_keepalive_connections=20,  # Reuse connections
-                max_connections=100,  # Total connection pool size
-                keepalive_expiry=30.0  # Keep connections alive for 30s
+            transport=BalancedTransport(
+                self.balancers,
+                httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=20,  # Reuse connections
+                        max_connections=100,  # Total connection pool size
+                        keepalive_expiry=30.0  # Keep connections alive for 30s
+                    )
+                )
             )
         )
 
@@ -105,10 +132,16 @@ class Orchestrator(BaseService):
 
         # PostgreSQL connection pool for conversation memory
         self.db_pool = None
+        # Write-behind message queue + history ring buffers (needs db_pool)
+        self.conversation_log: Optional[ConversationLog] = None
 
         # i18n Master Data Loader - CRITICAL for multilingual compliance
         self.i18n_loader = get_i18n_loader()
 
+        # Geo lookups: gazetteer first, LLM (memoized) only for unknown places
+        self.gazetteer = get_gazetteer()
+        self.geo_memo = GeoMemo(self.logger)
+
         self.logger.info(f"{LogEmoji.INFO} CTO Architecture Mode Enabled")
         self.logger.info(f"{LogEmoji.INFO} Conversation Memory: PostgreSQL")
         self.logger.info(f"{LogEmoji.INFO} Connection Pooling: Enabled (max=100, keepalive=20)")
@@ -210,7 +243,11 @@ class Orchestrator(BaseService):
     async def on_startup(self):
         """Initialize resources on startup"""
         await super().on_startup()
+        await asyncio.gather(*(balancer.start() for balancer in self.balancers.values()))
         await self._init_db_pool()
+        if self.db_pool:
+            self.conversation_log = ConversationLog(self.db_pool, self._string_to_uuid, self.logger)
+            self.conversation_log.start()
 
     def setup_routes(self):
         """Setup Orchestrator API routes."""
@@ -218,12 +255,14 @@ class Orchestrator(BaseService):
         @self.app.post("/orchestrate", response_model=OrchestrationResponse)
         async def orchestrate(request: OrchestrationRequest):
             """Main orchestration with Classification routing + Conversation Memory + Multimodal support"""
+            history = []
+            # MEDIUM FIX Bug#1: Generate request ID for distributed tracing
+            request_id = str(uuid.uuid4())[:8]  # Short ID for readability
+            # Independent stages (history, language, classification, speculative extraction) run concurrently
+            stages = StageExecutor(request_id, self.logger)
             try:
                 start_time = time.time()
 
-                # MEDIUM FIX Bug#1: Generate request ID for distributed tracing
-                request_id = str(uuid.uuid4())[:8]  # Short ID for readability
-
                 # Log multimodal request with request ID
                 if request.has_files():
                     self.logger.info(
@@ -234,55 +273,71 @@ class Orchestrator(BaseService):
                         f"{LogEmoji.TARGET} [{request_id}] Query: '{request.query}', user={request.user_id}"
                     )
 
+                # FIX BUG: Define conversation_id before conditional blocks
+                conversation_id = request.conversation_id or request.user_id
+
+                # Build query context that mentions images if present
+                query_with_context = request.query
+                if request.has_files():
+                    query_with_context = f"{request.query} [User uploaded {len(request.files)} image(s)]"
+                    self.logger.info(f"{LogEmoji.AI} [{request_id}] Multimodal query with {len(request.files)} image(s)")
+
                 # Step 0: Auto-detect language if not specified
-                if not request.language or request.language in ["vi", "auto"]:
-                    # Try to detect language from query using langdetect
+                async def detect_language() -> str:
+                    if request.language and request.language not in ["vi", "auto"]:
+                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Using specified language: {request.language}")
+                        return request.language
+                    # Try to detect language from query using langdetect (off the event loop)
                     try:
-                        detected_lang = self._detect_language(
+                        detected_lang = await asyncio.to_thread(
+                            self._detect_language,
                             history=[],  # No history available yet
                             entities=None,
                             current_query=request.query
                         )
-                        request.language = detected_lang
-                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Auto-detected language: {request.language}")
+                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Auto-detected language: {detected_lang}")
+                        return detected_lang
                     except Exception as e:
                         self.logger.warning(f"{LogEmoji.WARNING} [{request_id}] Language detection failed: {e}")
-                        request.language = "vi"
-                else:
-                    self.logger.info(f"{LogEmoji.INFO} [{request_id}] Using specified language: {request.language}")
+                        return "vi"
 
                 # Step 1: Get conversation history (MEMORY CONTEXT)
-                # FIX BUG: Define conversation_id before conditional blocks
-                conversation_id = request.conversation_id or request.user_id
-
-                # If request is from Open WebUI, use history from request metadata
-                # Open WebUI already sends full conversation history in messages
-                if request.metadata and request.metadata.get("from_open_webui"):
-                    history = request.metadata.get("conversation_history", [])
-                    if history:
-                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Using {len(history)} messages from Open WebUI request")
-                else:
+                async def fetch_history() -> List[Dict]:
+                    # If request is from Open WebUI, use history from request metadata
+                    # Open WebUI already sends full conversation history in messages
+                    if request.metadata and request.metadata.get("from_open_webui"):
+                        webui_history = request.metadata.get("conversation_history", [])
+                        if webui_history:
+                            self.logger.info(f"{LogEmoji.INFO} [{request_id}] Using {len(webui_history)} messages from Open WebUI request")
+                        return webui_history
                     # For direct API calls, fetch from PostgreSQL
-                    history = await self._get_conversation_history(request.user_id, conversation_id, limit=10)
-                    if history:
-                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Retrieved {len(history)} messages from PostgreSQL")
+                    db_history = await self._get_conversation_history(request.user_id, conversation_id, limit=10)
+                    if db_history:
+                        self.logger.info(f"{LogEmoji.INFO} [{request_id}] Retrieved {len(db_history)} messages from PostgreSQL")
+                    return db_history
 
                 # Step 1: Enhanced intent detection using classification service
                 # CRITICAL FIX: Always classify intent, even with files!
                 # Images can be for POST (property photos), SEARCH (reverse image search), or CHAT (analysis)
+                async def classify(history: List[Dict], language: str) -> Dict:
+                    return await self._classify_query(query_with_context, history=history, language=language)
+
+                # History and language run side by side; classification needs both.
+                # Search filter extraction only needs the query, so it starts
+                # speculatively next to them and is cancelled if routing goes elsewhere.
+                stages.start("history", fetch_history)
+                stages.start("language", detect_language)
+                stages.start("classification", classify, after=["history", "language"])
+                if self._should_prefetch_search_filters(request):
+                    stages.start(
+                        "search_extraction",
+                        lambda: self.search_handler.extract_filters(request_id, request.query),
+                        speculative=True
+                    )
 
-                # Build query context that mentions images if present
-                query_with_context = request.query
-                if request.has_files():
-                    query_with_context = f"{request.query} [User uploaded {len(request.files)} image(s)]"
-                    self.logger.info(f"{LogEmoji.AI} [{request_id}] Multimodal query with {len(request.files)} image(s)")
-
-                # Use classification service for intelligent intent detection
-                classification_result = await self._classify_query(
-                    query_with_context,
-                    history=history,
-                    language=request.language
-                )
+                history = await stages.result("history")
+                request.language = await stages.result("language")
+                classification_result = await stages.result("classification")
                 primary_intent = classification_result.get("primary_intent", "SEARCH_BUY")
                 all_intents = classification_result.get("intents", [primary_intent])
 
@@ -304,6 +359,7 @@ class Orchestrator(BaseService):
 
                     # Return clarification question immediately
                     # Don't route to any handler yet - wait for user response
+                    stages.cancel_speculative()
                     await self._save_message(request.user_id, conversation_id, "user", request.query)
                     await self._save_message(
                         request.user_id,
@@ -328,7 +384,8 @@ class Orchestrator(BaseService):
                             "flow": "clarification",
                             "clarification_needed": True,
                             "possible_intents": possible_intents,
-                            "request_id": request_id
+                            "request_id": request_id,
+                            "timeline": stages.timeline()
                         }
                     )
 
@@ -344,6 +401,9 @@ class Orchestrator(BaseService):
                 else:
                     intent = "chat"
 
+                # Speculative filter extraction is only useful to the search handler
+                stages.cancel_speculative(keep=["search_extraction"] if intent == "search" else [])
+
                 # Step 2: Route based on intent (with history context + files)
                 # Initialize response_data to hold structured response
                 response_data = {"message": "", "components": []}
@@ -365,7 +425,8 @@ class Orchestrator(BaseService):
                         request_id=request_id,
                         query=request.query,
                         history=history,
-                        language=request.language
+                        language=request.language,
+                        prefetched_filters=stages.task("search_extraction")
                     )
                 elif intent == "price_consultation":
                     # Case 3: Handle price consultation with reasoning loop
@@ -428,7 +489,8 @@ class Orchestrator(BaseService):
                         "files_count": len(request.files) if request.files else 0,
                         "request_id": request_id,  # MEDIUM FIX Bug#1: Include request ID for tracing
                         "reasoning_loops": 1,  # All cases use reasoning loops now
-                        "has_components": len(components) > 0 if components else False
+                        "has_components": len(components) > 0 if components else False,
+                        "timeline": stages.timeline()
                     }
                 )
 
@@ -466,6 +528,9 @@ class Orchestrator(BaseService):
                     service_used="none",
                     execution_time_ms=0.0
                 )
+            finally:
+                stages.cancel_pending()
+                stages.log_timeline()
 
         @self.app.post("/orchestrate/v2", response_model=OrchestrationResponse)
         async def orchestrate_v2(request: OrchestrationRequest):
@@ -586,8 +651,14 @@ class Orchestrator(BaseService):
         @self.app.post("/orchestrate/v2/stream")
         async def orchestrate_v2_stream(request: OrchestrationRequest):
             """
-            NEW: Streaming version of ReAct reasoning
-            Returns Server-Sent Events (SSE) for real-time reasoning transparency
+            Streaming answers (Server-Sent Events)
+
+            Default: search and chat answers are streamed token by token from
+            Core Gateway (via the RAG Service for search), with property cards
+            ("components" event) sent before the text.
+
+            With metadata.show_reasoning: the ReAct reasoning loop, streamed
+            step by step for reasoning transparency.
             """
             async def event_generator():
                 try:
@@ -607,6 +678,39 @@ class Orchestrator(BaseService):
                     intent = "chat" if request.has_files() else self._detect_intent_simple(request.query)
                     yield f"data: {json.dumps({'type': 'intent', 'intent': intent})}\n\n"
 
+                    if not (request.metadata or {}).get("show_reasoning"):
+                        # Fast path: forward tokens as they are generated
+                        language = request.language or 'vi'
+                        if intent == "search":
+                            events = self.search_handler.handle_stream(
+                                request_id=request_id,
+                                query=request.query,
+                                history=history,
+                                language=language
+                            )
+                        else:
+                            events = self._stream_chat(
+                                request.query,
+                                history=history,
+                                files=request.files,
+                                language=language
+                            )
+
+                        parts = []
+                        async for event in events:
+                            if event["type"] == "token":
+                                parts.append(event["content"])
+                            yield sse_event(event)
+
+                        response_text = "".join(parts)
+                        yield sse_event({'type': 'response', 'content': response_text})
+                        yield sse_event({'type': 'complete', 'intent': intent})
+
+                        # Save to memory
+                        await self._save_message(request.user_id, conversation_id, "user", request.query)
+                        await self._save_message(request.user_id, conversation_id, "assistant", response_text)
+                        return
+
                     # Knowledge expansion - REMOVED
                     # REMOVED: Switched to master data approach
                     # yield f"data: {json.dumps({'type': 'thinking', 'stage': 'knowledge_expansion', 'message': 'Expanding query with domain knowledge...'})}\n\n"
@@ -686,10 +790,7 @@ class Orchestrator(BaseService):
             return StreamingResponse(
                 event_generator(),
                 media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "X-Accel-Buffering": "no"
-                }
+                headers=SSE_HEADERS
             )
 
         @self.app.get("/v1/models")
@@ -853,6 +954,17 @@ class Orchestrator(BaseService):
                     "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
                 }
 
+    def _should_prefetch_search_filters(self, request: OrchestrationRequest) -> bool:
+        """
+        Whether to start search filter extraction before classification returns
+
+        Only for text queries the keyword heuristic already reads as a search,
+        so chat turns don't pay for an extraction LLM call they never use.
+        """
+        if not settings.ORCHESTRATOR_SPECULATIVE_EXTRACTION or request.has_files():
+            return False
+        return self._detect_intent_simple(request.query) == "search"
+
     def _detect_intent_simple(self, query: str) -> str:
         """
         Improved intent detection - distinguishes advisory from search
@@ -1299,6 +1411,7 @@ Standalone query:"""
         Returns:
             List of re-ranked property results with final scores
         """
+        stages = StageExecutor("Hybrid+Rerank", self.logger)
         try:
             self.logger.info(f"{LogEmoji.AI} [Hybrid+Rerank] Starting integrated search pipeline")
 
@@ -1308,52 +1421,63 @@ Standalone query:"""
                 self.logger.info(f"{LogEmoji.INFO} [Hybrid+Rerank] Normalized: '{query}' → '{normalized_query}'")
 
             # Step 1: Extract attributes for filters
-            extraction_response = await self.http_client.post(
-                f"{self.extraction_url}/extract-query",
-                json={"query": normalized_query, "intent": "SEARCH"},
-                timeout=settings.EXTRACTION_TIMEOUT
-            )
-
-            filters = {}
-            if extraction_response.status_code == 200:
-                extraction = extraction_response.json()
-                entities = extraction.get("entities", {})
-
-                # Build filters for hybrid search
-                if "district" in entities and entities["district"]:
-                    filters["district"] = entities["district"]
-                if "city" in entities and entities["city"]:
-                    filters["city"] = entities["city"]
-                if "property_type" in entities and entities["property_type"]:
-                    # Remove vague terms
-                    vague_terms = self.i18n_loader.get_vague_property_terms('all')
-                    prop_type = entities["property_type"].lower().strip()
-                    if prop_type not in vague_terms and prop_type:
-                        filters["property_type"] = entities["property_type"]
-                if "listing_type" in entities and entities["listing_type"]:
-                    filters["listing_type"] = entities["listing_type"]
-                if "min_price" in entities:
-                    filters["min_price"] = entities["min_price"]
-                if "max_price" in entities:
-                    filters["max_price"] = entities["max_price"]
-                if "min_area" in entities:
-                    filters["min_area"] = entities["min_area"]
-                if "max_area" in entities:
-                    filters["max_area"] = entities["max_area"]
+            async def extract_filters() -> Dict:
+                extraction_response = await self.http_client.post(
+                    f"{self.extraction_url}/extract-query",
+                    json={"query": normalized_query, "intent": "SEARCH"},
+                    timeout=settings.EXTRACTION_TIMEOUT
+                )
 
-                self.logger.info(f"{LogEmoji.INFO} [Hybrid Search] Extracted filters: {filters}")
+                filters = {}
+                if extraction_response.status_code == 200:
+                    extraction = extraction_response.json()
+                    entities = extraction.get("entities", {})
+
+                    # Build filters for hybrid search
+                    if "district" in entities and entities["district"]:
+                        filters["district"] = entities["district"]
+                    if "city" in entities and entities["city"]:
+                        filters["city"] = entities["city"]
+                    if "property_type" in entities and entities["property_type"]:
+                        # Remove vague terms
+                        vague_terms = self.i18n_loader.get_vague_property_terms('all')
+                        prop_type = entities["property_type"].lower().strip()
+                        if prop_type not in vague_terms and prop_type:
+                            filters["property_type"] = entities["property_type"]
+                    if "listing_type" in entities and entities["listing_type"]:
+                        filters["listing_type"] = entities["listing_type"]
+                    if "min_price" in entities:
+                        filters["min_price"] = entities["min_price"]
+                    if "max_price" in entities:
+                        filters["max_price"] = entities["max_price"]
+                    if "min_area" in entities:
+                        filters["min_area"] = entities["min_area"]
+                    if "max_area" in entities:
+                        filters["max_area"] = entities["max_area"]
+
+                    self.logger.info(f"{LogEmoji.INFO} [Hybrid Search] Extracted filters: {filters}")
+                return filters
 
             # Step 2: Execute hybrid search (BM25 + Vector)
-            hybrid_response = await self.http_client.post(
-                f"{self.db_gateway_url}/hybrid-search",
-                json={
-                    "query": query,
-                    "filters": filters,
-                    "limit": 10  # Get more candidates for reranking
-                },
-                params={"alpha": alpha},
-                timeout=30.0
-            )
+            async def hybrid_search(filters: Dict) -> httpx.Response:
+                return await self.http_client.post(
+                    f"{self.db_gateway_url}/hybrid-search",
+                    json={
+                        "query": query,
+                        "filters": filters,
+                        "limit": 10  # Get more candidates for reranking
+                    },
+                    params={"alpha": alpha},
+                    timeout=30.0
+                )
+
+            # Hybrid search needs the extracted filters, so nothing is
+            # speculated here: a prefetched BM25-only result would drop the
+            # vector leg and the intent-specific alpha
+            stages.start("extraction", extract_filters)
+            filters = await stages.result("extraction")
+            stages.start("hybrid_search", lambda: hybrid_search(filters))
+            hybrid_response = await stages.result("hybrid_search")
 
             if hybrid_response.status_code != 200:
                 self.logger.warning(f"{LogEmoji.WARNING} Hybrid search failed: {hybrid_response.status_code}")
@@ -1374,7 +1498,7 @@ Standalone query:"""
             )
 
             # Step 3: Re-rank with ML-based scoring
-            rerank_response = await self.http_client.post(
+            stages.start("rerank", lambda: self.http_client.post(
                 f"{self.reranking_url}/rerank",
                 json={
                     "query": query,
@@ -1382,7 +1506,8 @@ Standalone query:"""
                     "user_id": user_id or "anonymous"
                 },
                 timeout=30.0
-            )
+            ))
+            rerank_response = await stages.result("rerank")
 
             if rerank_response.status_code != 200:
                 self.logger.warning(f"{LogEmoji.WARNING} Re-ranking failed, using hybrid results")
@@ -1417,6 +1542,9 @@ Standalone query:"""
             self.logger.error(f"{LogEmoji.ERROR} Hybrid+Rerank pipeline failed: {e}", exc_info=True)
             # Fallback to filter search
             return await self._execute_filter_search(query)
+        finally:
+            stages.cancel_pending()
+            stages.log_timeline()
 
     async def _track_property_views(self, property_ids: List[str]) -> None:
         """
@@ -1434,17 +1562,18 @@ Standalone query:"""
 
             self.logger.info(f"{LogEmoji.INFO} [Analytics] Tracking {len(property_ids)} property views")
 
-            # Track each property view asynchronously (fire and forget)
-            for prop_id in property_ids:
-                try:
-                    # Fire and forget - don't await to avoid blocking response
-                    await self.http_client.post(
-                        f"{self.reranking_url}/analytics/view/{prop_id}",
-                        timeout=5.0
-                    )
-                except Exception as e:
-                    # Log error but don't fail the request
-                    self.logger.warning(f"{LogEmoji.WARNING} Failed to track view for {prop_id}: {e}")
+            # Send all views in one bulk request; the reranking service buffers
+            # them and flushes to property_stats in the background
+            await self.http_client.post(
+                f"{self.reranking_url}/analytics/events",
+                json={
+                    "events": [
+                        {"event": "view", "property_id": prop_id}
+                        for prop_id in property_ids
+                    ]
+                },
+                timeout=5.0
+            )
 
             self.logger.info(f"{LogEmoji.SUCCESS} [Analytics] View tracking completed")
 
@@ -1750,75 +1879,7 @@ Bạn quan tâm căn nào? Hoặc muốn tìm với tiêu chí cụ thể hơn?"
             language: User's preferred language (vi, en, th, ja)
         """
         try:
-            # Build messages with history context
-            if files and len(files) > 0:
-                # Load vision analysis prompt
-                system_prompt = load_prompt('vision_analysis_en.txt')
-                if not system_prompt:
-                    # Fallback to inline English prompt
-                    system_prompt = """You are a professional real estate assistant with image analysis capabilities.
-
-**CRITICAL - LANGUAGE:**
-Respond in the SAME language the user uses (Vietnamese→Vietnamese, English→English)
-
-Analyze real estate images and provide detailed descriptions of property type, design style, amenities, and value estimates."""
-            else:
-                # Load language-agnostic English prompt
-                system_prompt = load_prompt('chat_handler_prompt_en.txt')
-                if not system_prompt:
-                    # Fallback to inline English prompt
-                    system_prompt = """You are a friendly, enthusiastic AI assistant with expertise in real estate.
-
-IMPORTANT - RESPOND NATURALLY AND FLEXIBLY:
-
-**CRITICAL - LANGUAGE:**
-Respond in the SAME language the user uses:
-- If user writes in Vietnamese → Respond in Vietnamese
-- If user writes in English → Respond in English
-Auto-detect the user's language and match it
-
-1. **For greetings/emotions:**
-   - Show empathy, comfort naturally like a friend
-   - Greet warmly, ask how they're doing
-   - Respond politely, ask if you can help with anything else
-
-2. **For general questions:**
-   - Be honest about limitations (e.g., real-time info)
-   - Introduce yourself naturally and friendly
-   - Give helpful advice about real estate processes
-
-3. **For real estate questions:**
-   - Answer specifically, in detail, helpfully
-   - Encourage them to provide criteria for property search
-   - Give professional recommendations
-
-GUIDING PRINCIPLES:
-- EMPATHETIC and care about user emotions
-- NATURAL like chatting with friends
-- HELPFUL and professional when discussing real estate
-- FLEXIBLE, not rigid templates
-
-Respond like a real person, not a mechanical chatbot!"""
-
-            messages_data = [
-                {"role": "system", "content": system_prompt}
-            ]
-
-            # Add history for context (text-only)
-            if history:
-                messages_data.extend(history)
-
-            # Add current query with files if present
-            if files:
-                # Multimodal message
-                messages_data.append({
-                    "role": "user",
-                    "content": query,
-                    "files": [f.dict() for f in files]
-                })
-            else:
-                # Text-only message
-                messages_data.append({"role": "user", "content": query})
+            messages_data = self._build_chat_messages(query, history, files)
 
             # Choose model based on multimodal
             model = "gpt-4o" if files else "gpt-4o-mini"
@@ -1875,6 +1936,144 @@ Respond like a real person, not a mechanical chatbot!"""
             traceback.print_exc()
             return t('errors.retry_error', language=language)
 
+    async def _stream_chat(
+        self,
+        query: str,
+        history: List[Dict] = None,
+        files: Optional[List[FileAttachment]] = None,
+        language: str = "vi"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of _handle_chat
+
+        Yields {"type": "token", "content"} events as Core Gateway produces
+        them; an error before the first token yields the usual retry message.
+        """
+        started = False
+        try:
+            model = "gpt-4o" if files else "gpt-4o-mini"
+            async for token in self._stream_llm(
+                self._build_chat_messages(query, history, files),
+                model=model,
+                max_tokens=1000 if files else 500,
+                temperature=0.7,
+                timeout=60.0 if files else 30.0  # More time for vision
+            ):
+                started = True
+                yield {"type": "token", "content": token}
+
+        except Exception as e:
+            self.logger.error(f"{LogEmoji.ERROR} Chat stream failed: {e}")
+
+        if not started:
+            yield {"type": "token", "content": t('errors.retry_error', language=language)}
+
+    async def _stream_llm(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = "gpt-4o-mini",
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        timeout: float = 30.0
+    ) -> AsyncIterator[str]:
+        """Text chunks from Core Gateway's streaming endpoint, as they arrive"""
+        async with self.http_client.stream(
+            "POST",
+            f"{self.core_gateway_url}/chat/completions/stream",
+            json={
+                "model": model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            },
+            timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            async for event in iter_sse_events(response):
+                if event.get("type") == "token" and event.get("content"):
+                    yield event["content"]
+                elif event.get("type") == "error":
+                    raise RuntimeError(event.get("message", "LLM stream failed"))
+
+    def _build_chat_messages(
+        self,
+        query: str,
+        history: List[Dict] = None,
+        files: Optional[List[FileAttachment]] = None
+    ) -> List[Dict[str, Any]]:
+        """System prompt + history + current query (with files) for the chat LLM call"""
+        # Build messages with history context
+        if files and len(files) > 0:
+            # Load vision analysis prompt
+            system_prompt = load_prompt('vision_analysis_en.txt')
+            if not system_prompt:
+                # Fallback to inline English prompt
+                system_prompt = """You are a professional real estate assistant with image analysis capabilities.
+
+**CRITICAL - LANGUAGE:**
+Respond in the SAME language the user uses (Vietnamese→Vietnamese, English→English)
+
+Analyze real estate images and provide detailed descriptions of property type, design style, amenities, and value estimates."""
+        else:
+            # Load language-agnostic English prompt
+            system_prompt = load_prompt('chat_handler_prompt_en.txt')
+            if not system_prompt:
+                # Fallback to inline English prompt
+                system_prompt = """You are a friendly, enthusiastic AI assistant with expertise in real estate.
+
+IMPORTANT - RESPOND NATURALLY AND FLEXIBLY:
+
+**CRITICAL - LANGUAGE:**
+Respond in the SAME language the user uses:
+- If user writes in Vietnamese → Respond in Vietnamese
+- If user writes in English → Respond in English
+Auto-detect the user's language and match it
+
+1. **For greetings/emotions:**
+   - Show empathy, comfort naturally like a friend
+   - Greet warmly, ask how they're doing
+   - Respond politely, ask if you can help with anything else
+
+2. **For general questions:**
+   - Be honest about limitations (e.g., real-time info)
+   - Introduce yourself naturally and friendly
+   - Give helpful advice about real estate processes
+
+3. **For real estate questions:**
+   - Answer specifically, in detail, helpfully
+   - Encourage them to provide criteria for property search
+   - Give professional recommendations
+
+GUIDING PRINCIPLES:
+- EMPATHETIC and care about user emotions
+- NATURAL like chatting with friends
+- HELPFUL and professional when discussing real estate
+- FLEXIBLE, not rigid templates
+
+Respond like a real person, not a mechanical chatbot!"""
+
+        messages_data = [
+            {"role": "system", "content": system_prompt}
+        ]
+
+        # Add history for context (text-only)
+        if history:
+            messages_data.extend(history)
+
+        # Add current query with files if present
+        if files:
+            # Multimodal message
+            messages_data.append({
+                "role": "user",
+                "content": query,
+                "files": [f.dict() for f in files]
+            })
+        else:
+            # Text-only message
+            messages_data.append({"role": "user", "content": query})
+
+        return messages_data
+
     # ========================================
     # Classification & Property Posting Methods
     # ========================================
@@ -2293,7 +2492,8 @@ Re-extract property attributes with improved understanding. Focus on filling mis
 
             # Initialize loop variables
             property_info = {}
-            market_data = []
+            market_stats = None
+            sample_count = 0
             confidence = 0.0
             previous_confidence = 0.0
 
@@ -2323,7 +2523,7 @@ Original query: {query}
 Previous extraction (iteration {iteration-1}):
 {json.dumps(property_info, ensure_ascii=False, indent=2)}
 
-Previous market data: {len(market_data)} similar properties found
+Previous market data: {sample_count} similar properties found
 Previous confidence: {previous_confidence:.1%}
 
 Re-extract property info with improved understanding. Be more specific about location, property type, and features."""
@@ -2350,19 +2550,20 @@ Re-extract property info with improved understanding. Be more specific about loc
 
                 self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] Step 1: Extracted info: {list(property_info.keys())}")
 
-                # STEP 2: Market Analysis - Query similar properties
+                # STEP 2: Market Analysis - Aggregated prices of similar properties
                 self.logger.info(f"{LogEmoji.AI} [Loop {iteration}] Step 2: Analyzing market data...")
 
-                market_data = await self._query_similar_properties(property_info)
-
-                self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] Step 2: Found {len(market_data)} similar properties")
+                market_stats = await self._query_market_stats(property_info)
 
                 # STEP 3: Compare & Validate - Calculate confidence
                 self.logger.info(f"{LogEmoji.AI} [Loop {iteration}] Step 3: Validating data quality...")
 
-                validation = self._validate_market_data(property_info, market_data)
+                validation = self._validate_market_data(property_info, market_stats)
                 confidence = validation["confidence"]
                 data_quality = validation["data_quality"]
+                sample_count = validation["sample_count"]
+
+                self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] Step 2: Found {sample_count} similar properties")
 
                 self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] Step 3: Confidence: {confidence:.1%}, Quality: {data_quality}")
 
@@ -2374,8 +2575,8 @@ Re-extract property info with improved understanding. Be more specific about loc
                     break
 
                 # Exit condition 2: Sufficient market samples
-                if len(market_data) >= MIN_MARKET_SAMPLES and confidence >= 0.6:
-                    self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] ✅ SUFFICIENT DATA ({len(market_data)} samples, confidence {confidence:.1%})")
+                if sample_count >= MIN_MARKET_SAMPLES and confidence >= 0.6:
+                    self.logger.info(f"{LogEmoji.SUCCESS} [Loop {iteration}] ✅ SUFFICIENT DATA ({sample_count} samples, confidence {confidence:.1%})")
                     self.logger.info(f"{LogEmoji.SUCCESS} [Price Consultation Loop] Exiting loop after {iteration} iteration(s)")
                     break
 
@@ -2404,7 +2605,7 @@ Re-extract property info with improved understanding. Be more specific about loc
 
             return await self._generate_price_consultation_response(
                 property_info=property_info,
-                market_data=market_data,
+                market_stats=market_stats,
                 confidence=confidence,
                 iterations=iteration,
                 language=language
@@ -2980,19 +3181,36 @@ JSON:"""
 
     async def _infer_city_from_district(self, district: Optional[str]) -> Optional[str]:
         """
-        INTELLIGENT city inference using LLM geographic knowledge
+        City of a district / area / street
 
-        NO HARDCODING! Works for ANY location globally:
+        Known places are answered by the local gazetteer (no network):
         - "Quận 2" → "Hồ Chí Minh"
         - "Cầu Giấy" → "Hà Nội"
         - "Sukhumvit" → "Bangkok"
         - "Orchard Road" → "Singapore"
 
-        Uses LLM's built-in geographic knowledge + web search fallback
+        Anything else is asked to the LLM once and memoized in self.geo_memo.
         """
         if not district:
             return None
 
+        city = self.gazetteer.city_of(district)
+        if city:
+            self.logger.info(f"{LogEmoji.SUCCESS} [Geo Inference] '{district}' → '{city}' (gazetteer)")
+            return city
+
+        return await self.geo_memo.get_or_fetch(
+            GeoMemo.key("city", district),
+            lambda: self._llm_infer_city(district)
+        )
+
+    async def _llm_infer_city(self, district: str) -> Tuple[Optional[str], bool]:
+        """
+        Ask the LLM which city a place is in (works for ANY location globally)
+
+        Returns:
+            (city or None, whether the answer may be memoized)
+        """
         try:
             # Use LLM to infer city from district (works globally!)
             geo_prompt = f"""What city is "{district}" located in?
@@ -3026,16 +3244,16 @@ City name:"""
 
                 if city and city != "UNKNOWN":
                     self.logger.info(f"{LogEmoji.SUCCESS} [Geo Inference] '{district}' → '{city}'")
-                    return city
+                    return city, True
                 else:
                     self.logger.warning(f"{LogEmoji.WARNING} [Geo Inference] Could not infer city for '{district}'")
-                    return None
+                    return None, True
             else:
-                return None
+                return None, False
 
         except Exception as e:
             self.logger.error(f"{LogEmoji.ERROR} City inference failed: {e}")
-            return None
+            return None, False
 
     async def _evaluate_results(self, results: List[Dict], requirements: Dict) -> Dict:
         """
@@ -3615,48 +3833,26 @@ Query mới:"""
         - total_in_district: Total properties in the district (if specified)
         """
         try:
-            # FIX: Get REAL statistics from DB Gateway instead of mock data
-            property_type = requirements.get("property_type")
+            # City and district totals come from one size=0 aggregation
             city = requirements.get("city")
             district = requirements.get("district")
-
-            # Query 1: Total in city (if city is specified)
             total_in_city = 0
-            if city:
-                city_response = await self.http_client.post(
-                    f"{self.db_gateway_url}/search",
-                    json={
-                        "query": "",
-                        "filters": {
-                            "city": city,
-                            "property_type": property_type if property_type else None
-                        },
-                        "limit": 1  # We only need the total count
-                    },
-                    timeout=10.0
-                )
-                if city_response.status_code == 200:
-                    city_results = city_response.json()
-                    total_in_city = city_results.get("total", 0)
-
-            # Query 2: Total in district (if district is specified)
             total_in_district = 0
-            if district:
-                district_response = await self.http_client.post(
-                    f"{self.db_gateway_url}/search",
+
+            if city or district:
+                response = await self.http_client.post(
+                    f"{self.db_gateway_url}/market-stats",
                     json={
-                        "query": "",
-                        "filters": {
-                            "district": district,
-                            "property_type": property_type if property_type else None
-                        },
-                        "limit": 1  # We only need the total count
+                        "city": city,
+                        "district": district,
+                        "property_type": requirements.get("property_type")
                     },
                     timeout=10.0
                 )
-                if district_response.status_code == 200:
-                    district_results = district_response.json()
-                    total_in_district = district_results.get("total", 0)
+                if response.status_code == 200:
+                    counts = response.json()["counts"]
+                    total_in_city = counts.get("city") or 0
+                    total_in_district = counts.get("district") or 0
 
             self.logger.info(f"{LogEmoji.INFO} [Statistics] City: {total_in_city}, District: {total_in_district}")
 
@@ -3673,14 +3869,31 @@ Query mới:"""
 
     async def _get_nearby_districts(self, district: str, city: Optional[str] = None) -> List[str]:
         """
-        INTELLIGENT nearby districts using LLM geographic knowledge
+        Nearby districts, closest first
 
-        NO HARDCODING! Works globally:
-        - "Quận 2" (HCM) → ["Quận 9", "Thủ Đức", "Bình Thạnh"]
-        - "Brooklyn" (NYC) → ["Queens", "Manhattan"]
-        - "Shibuya" (Tokyo) → ["Shinjuku", "Minato"]
+        Districts with a centroid in the gazetteer use its precomputed
+        adjacency (no network):
+        - "Quận 2" (HCM) → ["Quận Bình Thạnh", "Quận 1", "Quận 4"]
+        - "Cầu Giấy" (Hà Nội) → ["Quận Ba Đình", "Quận Đống Đa", "Quận Thanh Xuân"]
 
-        Uses LLM's built-in geographic intelligence
+        Anything else ("Brooklyn", "Shibuya") is asked to the LLM once and
+        memoized in self.geo_memo.
+        """
+        nearby = self.gazetteer.nearby(district, city)
+        if nearby is not None:
+            return nearby
+
+        return await self.geo_memo.get_or_fetch(
+            GeoMemo.key("nearby", district, city),
+            lambda: self._llm_nearby_districts(district, city)
+        )
+
+    async def _llm_nearby_districts(self, district: str, city: Optional[str]) -> Tuple[List[str], bool]:
+        """
+        Ask the LLM for the neighbours of a place (works globally)
+
+        Returns:
+            (up to 3 district names, whether the answer may be memoized)
         """
         try:
             location = f"{district}, {city}" if city else district
@@ -3718,15 +3931,15 @@ Nearby districts:"""
                     # Parse comma-separated list
                     nearby_list = [d.strip() for d in nearby_str.split(",") if d.strip()]
                     self.logger.info(f"{LogEmoji.SUCCESS} [Nearby Districts] '{district}' → {nearby_list[:3]}")
-                    return nearby_list[:3]  # Top 3
+                    return nearby_list[:3], True  # Top 3
                 else:
-                    return []
+                    return [], True
             else:
-                return []
+                return [], False
 
         except Exception as e:
             self.logger.error(f"{LogEmoji.ERROR} Nearby districts inference failed: {e}")
-            return []
+            return [], False
 
     # ========================================
     # Property Posting Helper Methods
@@ -3857,46 +4070,15 @@ Nearby districts:"""
 
     def _get_district_center_coordinates(self, district: str) -> Optional[Dict[str, float]]:
         """
-        Get approximate center coordinates for HCMC districts.
+        Get approximate center coordinates of a district (gazetteer centroids).
 
         Args:
-            district: District name (e.g., "Quận 1", "Quận 7")
+            district: District name in any spelling (e.g., "Quận 1", "q7", "Bình Thạnh")
 
         Returns:
             Dict with lat/lng or None
         """
-        # Mapping of HCMC districts to approximate center coordinates
-        DISTRICT_COORDINATES = {
-            "Quận 1": {"lat": 10.7756, "lng": 106.7019},
-            "Quận 2": {"lat": 10.7860, "lng": 106.7431},
-            "Quận 3": {"lat": 10.7846, "lng": 106.6878},
-            "Quận 4": {"lat": 10.7574, "lng": 106.7028},
-            "Quận 5": {"lat": 10.7538, "lng": 106.6639},
-            "Quận 6": {"lat": 10.7470, "lng": 106.6345},
-            "Quận 7": {"lat": 10.7316, "lng": 106.7196},
-            "Quận 8": {"lat": 10.7356, "lng": 106.6758},
-            "Quận 9": {"lat": 10.8503, "lng": 106.7896},
-            "Quận 10": {"lat": 10.7722, "lng": 106.6681},
-            "Quận 11": {"lat": 10.7626, "lng": 106.6504},
-            "Quận 12": {"lat": 10.8634, "lng": 106.6711},
-            "Quận Bình Thạnh": {"lat": 10.8099, "lng": 106.7103},
-            "Quận Gò Vấp": {"lat": 10.8368, "lng": 106.6706},
-            "Quận Phú Nhuận": {"lat": 10.7981, "lng": 106.6811},
-            "Quận Tân Bình": {"lat": 10.7991, "lng": 106.6527},
-            "Quận Tân Phú": {"lat": 10.7875, "lng": 106.6281},
-            "Quận Thủ Đức": {"lat": 10.8521, "lng": 106.7644},
-            "Quận Bình Tân": {"lat": 10.7407, "lng": 106.6067},
-            "Huyện Bình Chánh": {"lat": 10.6834, "lng": 106.5942},
-            "Huyện Cần Giờ": {"lat": 10.4090, "lng": 106.9502},
-            "Huyện Củ Chi": {"lat": 11.0091, "lng": 106.4922},
-            "Huyện Hóc Môn": {"lat": 10.8804, "lng": 106.5926},
-            "Huyện Nhà Bè": {"lat": 10.6904, "lng": 106.7285},
-        }
-
-        # Normalize district name
-        normalized = district.strip()
-
-        return DISTRICT_COORDINATES.get(normalized)
+        return self.gazetteer.coordinates(district)
 
     def _add_map_suggestion_to_feedback(
         self,
@@ -4689,83 +4871,62 @@ Generate a detailed review response in **{language} language**:
     # Price Consultation Helper Methods
     # ========================================
 
-    async def _query_similar_properties(self, property_info: Dict) -> List[Dict]:
+    async def _query_market_stats(self, property_info: Dict) -> Optional[Dict]:
         """
-        Query database for similar properties to analyze market prices.
+        Query aggregated market prices of similar properties.
+
+        DB Gateway answers with one cached aggregation per segment (district,
+        property type, bedroom bucket) instead of shipping listing documents.
 
         Args:
-            property_info: Property attributes (district, property_type, bedrooms, area)
+            property_info: Property attributes (district, property_type, bedrooms)
 
         Returns:
-            List of similar properties with prices
+            /market-stats response (price and price-per-m² percentiles, counts), or None
         """
         try:
-            # Build search filters from property info
-            filters = {}
-
             # Required: Location
-            if property_info.get("district"):
-                filters["district"] = property_info["district"]
-            else:
+            if not property_info.get("district"):
                 # Cannot analyze without location
                 self.logger.warning(f"{LogEmoji.WARNING} No district specified, cannot query market data")
-                return []
-
-            # Optional: Property type
-            if property_info.get("property_type"):
-                filters["property_type"] = property_info["property_type"]
-
-            # Optional: Bedrooms (with ±1 tolerance)
-            if property_info.get("bedrooms"):
-                bedrooms = property_info["bedrooms"]
-                filters["bedrooms_min"] = max(1, bedrooms - 1)
-                filters["bedrooms_max"] = bedrooms + 1
+                return None
 
-            # Optional: Area (with ±20% tolerance)
-            if property_info.get("area"):
-                area = property_info["area"]
-                filters["area_min"] = area * 0.8
-                filters["area_max"] = area * 1.2
+            segment = {
+                "district": property_info["district"],
+                "property_type": property_info.get("property_type"),
+                "bedrooms": self._parse_int(property_info.get("bedrooms"))
+            }
 
-            self.logger.info(f"{LogEmoji.INFO} Querying market data with filters: {filters}")
+            self.logger.info(f"{LogEmoji.INFO} Querying market stats for segment: {segment}")
 
-            # Query DB Gateway for similar properties
             response = await self.http_client.post(
-                f"{self.db_gateway_url}/search",
-                json={
-                    "filters": filters,
-                    "limit": 50,  # Get more samples for better analysis
-                    "sort_by": "created_at",
-                    "sort_order": "desc"
-                },
-                timeout=30.0
+                f"{self.db_gateway_url}/market-stats",
+                json=segment,
+                timeout=10.0
             )
 
             if response.status_code != 200:
-                self.logger.warning(f"{LogEmoji.WARNING} Market data query failed: {response.status_code}")
-                return []
-
-            data = response.json()
-            properties = data.get("results", [])
-
-            # Filter out properties without price
-            properties_with_price = [p for p in properties if p.get("price") and p["price"] > 0]
-
-            self.logger.info(f"{LogEmoji.SUCCESS} Found {len(properties_with_price)} properties with prices")
+                self.logger.warning(f"{LogEmoji.WARNING} Market stats query failed: {response.status_code}")
+                return None
 
-            return properties_with_price
+            stats = response.json()
+            self.logger.info(
+                f"{LogEmoji.SUCCESS} Market stats: {stats['counts']['priced']} priced properties "
+                f"(cache: {stats.get('cache')})"
+            )
+            return stats
 
         except Exception as e:
-            self.logger.error(f"{LogEmoji.ERROR} Failed to query similar properties: {e}")
-            return []
+            self.logger.error(f"{LogEmoji.ERROR} Failed to query market stats: {e}")
+            return None
 
-    def _validate_market_data(self, property_info: Dict, market_data: List[Dict]) -> Dict:
+    def _validate_market_data(self, property_info: Dict, market_stats: Optional[Dict]) -> Dict:
         """
         Validate market data quality and calculate confidence score.
 
         Args:
             property_info: Target property attributes
-            market_data: List of similar properties
+            market_stats: Aggregated segment statistics from _query_market_stats
 
         Returns:
             Validation result with confidence score and quality metrics
@@ -4776,7 +4937,8 @@ Generate a detailed review response in **{language} language**:
             quality_factors = []
 
             # Factor 1: Sample size (0-40 points)
-            sample_count = len(market_data)
+            price_stats = (market_stats or {}).get("price")
+            sample_count = price_stats["count"] if price_stats else 0
             if sample_count >= 20:
                 sample_score = 0.4
                 quality_factors.append("Excellent sample size (20+)")
@@ -4792,33 +4954,22 @@ Generate a detailed review response in **{language} language**:
 
             confidence += sample_score
 
-            # Factor 2: Location match (0-30 points)
-            if property_info.get("district"):
-                district_matches = sum(1 for p in market_data if p.get("district") == property_info["district"])
-                location_score = min(0.3, district_matches / max(sample_count, 1) * 0.3)
-                confidence += location_score
-
-                if location_score >= 0.25:
+            # Factors 2-4: every sample is in the requested segment, so each
+            # attribute used to select it counts fully once there is data
+            if sample_count:
+                # Factor 2: Location match (0-30 points)
+                if property_info.get("district"):
+                    confidence += 0.3
                     quality_factors.append("Excellent location match")
-                elif location_score >= 0.15:
-                    quality_factors.append("Good location match")
-
-            # Factor 3: Property type match (0-20 points)
-            if property_info.get("property_type"):
-                type_matches = sum(1 for p in market_data if p.get("property_type") == property_info["property_type"])
-                type_score = min(0.2, type_matches / max(sample_count, 1) * 0.2)
-                confidence += type_score
 
-                if type_score >= 0.15:
+                # Factor 3: Property type match (0-20 points)
+                if property_info.get("property_type"):
+                    confidence += 0.2
                     quality_factors.append("Good property type match")
 
-            # Factor 4: Bedrooms match (0-10 points)
-            if property_info.get("bedrooms"):
-                target_bedrooms = property_info["bedrooms"]
-                bedroom_matches = sum(1 for p in market_data
-                                     if p.get("bedrooms") and abs(p["bedrooms"] - target_bedrooms) <= 1)
-                bedroom_score = min(0.1, bedroom_matches / max(sample_count, 1) * 0.1)
-                confidence += bedroom_score
+                # Factor 4: Bedrooms match (0-10 points)
+                if self._parse_int(property_info.get("bedrooms")) is not None:
+                    confidence += 0.1
 
             # Quality assessment
             if confidence >= 0.8:
@@ -4849,7 +5000,7 @@ Generate a detailed review response in **{language} language**:
     async def _generate_price_consultation_response(
         self,
         property_info: Dict,
-        market_data: List[Dict],
+        market_stats: Optional[Dict],
         confidence: float,
         iterations: int,
         language: str = "vi"
@@ -4859,7 +5010,7 @@ Generate a detailed review response in **{language} language**:
 
         Args:
             property_info: Target property attributes
-            market_data: Similar properties data
+            market_stats: Aggregated segment statistics (may be None)
             confidence: Confidence score
             iterations: Number of reasoning iterations
             language: User's preferred language
@@ -4868,27 +5019,33 @@ Generate a detailed review response in **{language} language**:
             Formatted consultation response
         """
         try:
-            # Calculate statistics
-            has_data = bool(market_data)
+            # Summarize pre-aggregated statistics
+            price = (market_stats or {}).get("price")
+            price_per_sqm = (market_stats or {}).get("price_per_sqm")
+            has_data = bool(price)
             stats_summary = ""
 
-            if market_data:
-                prices = [p["price"] for p in market_data if p.get("price")]
-                if prices:
-                    avg_price = sum(prices) / len(prices)
-                    min_price = min(prices)
-                    max_price = max(prices)
-                    median_price = sorted(prices)[len(prices) // 2]
-                    price_per_sqm = avg_price / property_info["area"] if property_info.get("area") else None
-
-                    stats_summary = f"""
-Sample Size: {len(prices)} similar properties
-Average Price: {avg_price:,.0f} VND ({avg_price/1_000_000_000:.2f} billion)
-Price Range: {min_price:,.0f} - {max_price:,.0f} VND
-Median Price: {median_price:,.0f} VND ({median_price/1_000_000_000:.2f} billion)
-Price per sqm: {price_per_sqm:,.0f} VND/m² (if area provided)
-Confidence Level: {confidence:.0%}
-"""
+            if price:
+                lines = [
+                    f"Sample Size: {price['count']} similar properties",
+                    f"Average Price: {price['avg']:,.0f} VND ({price['avg']/1_000_000_000:.2f} billion)",
+                    f"Price Range: {price['min']:,.0f} - {price['max']:,.0f} VND",
+                    f"Median Price: {price['p50']:,.0f} VND ({price['p50']/1_000_000_000:.2f} billion)",
+                    f"Typical Price (25th-75th percentile): {price['p25']:,.0f} - {price['p75']:,.0f} VND",
+                ]
+                if price_per_sqm:
+                    lines.append(
+                        f"Price per sqm: median {price_per_sqm['p50']:,.0f} VND/m² "
+                        f"(25th-75th percentile: {price_per_sqm['p25']:,.0f} - {price_per_sqm['p75']:,.0f})"
+                    )
+                    area = self._parse_price(property_info.get("area"))
+                    if area:
+                        lines.append(
+                            f"Estimated Price for {area:g} m²: "
+                            f"{price_per_sqm['p25'] * area:,.0f} - {price_per_sqm['p75'] * area:,.0f} VND"
+                        )
+                lines.append(f"Confidence Level: {confidence:.0%}")
+                stats_summary = "\n" + "\n".join(lines) + "\n"
 
             # Build LLM prompt
             property_summary = f"""
@@ -5066,8 +5223,8 @@ Generate a professional price consultation report in **{language} language** tha
                     self.db_pool = None
 
     async def _get_conversation_history(self, user_id: str, conversation_id: Optional[str] = None, limit: int = 10) -> List[Dict]:
-        """Retrieve conversation history from PostgreSQL"""
-        if not self.db_pool:
+        """Retrieve conversation history (ring buffer, PostgreSQL on a cold miss)"""
+        if not self.conversation_log:
             return []
 
         try:
@@ -5075,42 +5232,14 @@ Generate a professional price consultation report in **{language} language** tha
             if not conversation_id:
                 conversation_id = user_id  # Use user_id as conversation_id for simplicity
 
-            # Convert string IDs to deterministic UUIDs
-            conv_uuid = self._string_to_uuid(conversation_id)
-
-            self.logger.debug(f"{LogEmoji.INFO} [History] Querying messages for conversation_id={conversation_id}, uuid={conv_uuid}")
-
-            async with self.db_pool.acquire() as conn:
-                # Get last N messages from conversation
-                # Note: message.data is JSON containing role info
-                rows = await conn.fetch(
-                    """
-                    SELECT data->>'role' as role, content, created_at
-                    FROM message
-                    WHERE channel_id = $1
-                    ORDER BY created_at DESC
-                    LIMIT $2
-                    """,
-                    str(conv_uuid),
-                    limit
-                )
-
-                self.logger.debug(f"{LogEmoji.INFO} [History] Found {len(rows)} messages for conversation {conversation_id}")
-
-                # Reverse to chronological order
-                messages = []
-                for row in reversed(rows):
-                    messages.append({
-                        "role": row['role'],
-                        "content": row['content']
-                    })
+            messages = await self.conversation_log.get_history(conversation_id, limit)
 
-                if messages:
-                    self.logger.info(f"{LogEmoji.INFO} [History] Retrieved {len(messages)} messages from conversation {conversation_id}")
-                else:
-                    self.logger.debug(f"{LogEmoji.INFO} [History] No messages found for conversation {conversation_id}")
+            if messages:
+                self.logger.info(f"{LogEmoji.INFO} [History] Retrieved {len(messages)} messages from conversation {conversation_id}")
+            else:
+                self.logger.debug(f"{LogEmoji.INFO} [History] No messages found for conversation {conversation_id}")
 
-                return messages
+            return messages
 
         except Exception as e:
             self.logger.warning(f"{LogEmoji.WARNING} Failed to retrieve conversation history: {e}")
@@ -5119,84 +5248,27 @@ Generate a professional price consultation report in **{language} language** tha
             return []
 
     async def _save_message(self, user_id: str, conversation_id: str, role: str, content: str, metadata: Dict = None):
-        """Save message to PostgreSQL conversation history"""
-        if not self.db_pool:
+        """Queue message for PostgreSQL conversation history (written behind in batches)"""
+        if not self.conversation_log:
             self.logger.debug(f"{LogEmoji.WARNING} [Save] No DB pool available, skipping message save")
             return
 
         try:
-            # Convert string IDs to deterministic UUIDs
-            user_uuid = self._string_to_uuid(user_id)
-            conv_uuid = self._string_to_uuid(conversation_id)
-
-            self.logger.debug(f"{LogEmoji.INFO} [Save] Saving {role} message to conversation_id={conversation_id}, uuid={conv_uuid}")
-
-            # Using current Unix timestamp in milliseconds
-            current_time = int(time.time() * 1000)
-
-            async with self.db_pool.acquire() as conn:
-                # Ensure user exists first (required for foreign key constraint)
-                await conn.execute(
-                    """
-                    INSERT INTO "user" (id, name, email, role, profile_image_url, created_at, updated_at, last_active_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                    ON CONFLICT (id) DO UPDATE SET last_active_at = $8
-                    """,
-                    str(user_uuid),
-                    user_id,  # name
-                    f"{user_id}@system.local",  # email
-                    "user",  # role
-                    "",  # profile_image_url
-                    current_time,
-                    current_time,
-                    current_time
-                )
-
-                # Ensure chat exists (idempotent)
-                await conn.execute(
-                    """
-                    INSERT INTO chat (id, user_id, title, archived, created_at, updated_at, meta)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    ON CONFLICT (id) DO UPDATE SET updated_at = $6
-                    """,
-                    str(conv_uuid),
-                    str(user_uuid),
-                    "Property Posting",  # Default title
-                    False,  # archived
-                    current_time,
-                    current_time,
-                    json.dumps({})
-                )
-
-                # Insert message with proper schema
-                # Generate unique message ID
-                msg_id = str(uuid.uuid4())
-
-                await conn.execute(
-                    """
-                    INSERT INTO message (id, user_id, channel_id, content, data, meta, created_at, updated_at)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                    """,
-                    msg_id,
-                    str(user_uuid),
-                    str(conv_uuid),  # channel_id links to chat.id
-                    content,
-                    json.dumps({"role": role}),  # Store role in data field
-                    json.dumps(metadata or {}),
-                    current_time,
-                    current_time
-                )
-
-                self.logger.debug(f"{LogEmoji.SUCCESS} [Save] Message saved successfully: role={role}, msg_id={msg_id}, channel_id={conv_uuid}")
-
+            self.conversation_log.append(user_id, conversation_id, role, content, metadata)
+            self.logger.debug(f"{LogEmoji.INFO} [Save] Queued {role} message for conversation_id={conversation_id}")
         except Exception as e:
             self.logger.warning(f"{LogEmoji.WARNING} Failed to save message: {e}")
-            import traceback
-            self.logger.debug(f"{LogEmoji.WARNING} Save traceback: {traceback.format_exc()}")
 
     async def on_shutdown(self):
         """Cleanup resources on shutdown"""
         # CRITICAL FIX: Ensure all resources are properly closed even on errors
+        try:
+            # Drain queued messages while the pool is still open
+            if self.conversation_log:
+                await self.conversation_log.close()
+        except Exception as e:
+            self.logger.error(f"{LogEmoji.ERROR} Failed to drain conversation log: {e}")
+
         try:
             if self.db_pool:
                 await self.db_pool.close()
@@ -5204,6 +5276,9 @@ Generate a professional price consultation report in **{language} language** tha
         except Exception as e:
             self.logger.error(f"{LogEmoji.ERROR} Failed to close database pool: {e}")
 
+        for balancer in self.balancers.values():
+            await balancer.stop()
+
         try:
             await self.http_client.aclose()
             self.logger.info(f"{LogEmoji.SUCCESS} HTTP client closed")
@@ -0,0 +1,173 @@
+"""
+Stage Executor for the orchestrator pipeline
+
+Runs a request's pipeline as a small dependency graph instead of a fixed
+sequence: each stage starts as soon as the stages it depends on have
+finished, so independent hops (history fetch, language detection,
+classification, speculative extraction) overlap instead of adding up.
+
+- Stages are coroutine functions that receive their dependencies' results
+  as keyword arguments (named after the stages)
+- Speculative stages start before it is known whether they are needed and
+  are cancelled once the request is routed elsewhere
+- Every stage is recorded in a timeline (ms offsets from executor creation)
+  that is returned in the response metadata
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from shared.utils.logger import LogEmoji
+
+StageFn = Callable[..., Awaitable[Any]]
+
+
+class StageExecutor:
+    """Dependency-aware concurrent stages for one request"""
+
+    def __init__(self, request_id: str = "", logger=None):
+        """
+        Args:
+            request_id: Request ID for tracing
+            logger: Structured logger (optional)
+        """
+        self.request_id = request_id
+        self.logger = logger
+        self._started_at = time.perf_counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._speculative: set = set()
+        self._timeline: Dict[str, Dict[str, Any]] = {}
+
+    def _offset_ms(self) -> float:
+        return round((time.perf_counter() - self._started_at) * 1000, 1)
+
+    # ========================================================================
+    # Scheduling
+    # ========================================================================
+
+    def start(
+        self,
+        name: str,
+        fn: StageFn,
+        after: Iterable[str] = (),
+        speculative: bool = False
+    ) -> asyncio.Task:
+        """
+        Schedule a stage; it runs once every stage in `after` has finished
+
+        Args:
+            name: Unique stage name (also the keyword its result is passed as)
+            fn: Coroutine function called with the dependencies' results
+            after: Names of already scheduled stages this one needs
+            speculative: Cancelled by cancel_speculative()
+
+        Returns:
+            The stage task
+        """
+        if name in self._tasks:
+            raise ValueError(f"Stage '{name}' already scheduled")
+        after = list(after)
+        unknown = [dep for dep in after if dep not in self._tasks]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unscheduled stages: {unknown}")
+
+        self._timeline[name] = {
+            "stage": name,
+            "after": after,
+            "speculative": speculative,
+            "status": "waiting",
+            "queued_ms": self._offset_ms(),
+        }
+        task = asyncio.create_task(self._run(name, fn, {dep: self._tasks[dep] for dep in after}))
+        # Stages nobody awaits (cancelled speculation) must not log "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._tasks[name] = task
+        if speculative:
+            self._speculative.add(name)
+        return task
+
+    async def _run(self, name: str, fn: StageFn, deps: Dict[str, asyncio.Task]) -> Any:
+        entry = self._timeline[name]
+        try:
+            kwargs = {}
+            for dep, task in deps.items():
+                try:
+                    # Shielded: cancelling this stage must not cancel a shared dependency
+                    kwargs[dep] = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    entry["status"] = "skipped"
+                    entry["error"] = f"dependency '{dep}' failed"
+                    raise
+
+            entry["start_ms"] = self._offset_ms()
+            entry["status"] = "running"
+            result = await fn(**kwargs)
+            entry["status"] = "done"
+            return result
+
+        except asyncio.CancelledError:
+            entry["status"] = "cancelled"
+            raise
+        except Exception as e:
+            if entry["status"] != "skipped":
+                entry["status"] = "failed"
+                entry["error"] = str(e)[:200]
+            raise
+        finally:
+            entry["end_ms"] = self._offset_ms()
+            if "start_ms" in entry:
+                entry["duration_ms"] = round(entry["end_ms"] - entry["start_ms"], 1)
+
+    # ========================================================================
+    # Results and cancellation
+    # ========================================================================
+
+    def task(self, name: str) -> Optional[asyncio.Task]:
+        """Stage task, or None if the stage was never scheduled"""
+        return self._tasks.get(name)
+
+    async def result(self, name: str) -> Any:
+        """Wait for a stage (re-raises its exception)"""
+        return await self._tasks[name]
+
+    def cancel(self, name: str) -> bool:
+        """Cancel a stage that hasn't finished; returns True if it was cancelled"""
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        self._timeline[name]["status"] = "cancelled"
+        self._timeline[name]["end_ms"] = self._offset_ms()
+        return True
+
+    def cancel_speculative(self, keep: Iterable[str] = ()) -> List[str]:
+        """Cancel unfinished speculative stages except `keep`; returns their names"""
+        keep = set(keep)
+        cancelled = [name for name in sorted(self._speculative - keep) if self.cancel(name)]
+        if cancelled and self.logger:
+            self.logger.info(
+                f"{LogEmoji.INFO} [{self.request_id}] Cancelled speculative stages: {cancelled}"
+            )
+        return cancelled
+
+    def cancel_pending(self):
+        """Cancel every unfinished stage (request is done or failed)"""
+        for name in self._tasks:
+            self.cancel(name)
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        """Per-stage timeline, in scheduling order"""
+        return [dict(entry) for entry in self._timeline.values()]
+
+    def log_timeline(self):
+        if not self.logger:
+            return
+        parts = []
+        for entry in self._timeline.values():
+            if "duration_ms" in entry:
+                parts.append(f"{entry['stage']}={entry['start_ms']:.0f}+{entry['duration_ms']:.0f}ms")
+            else:
+                parts.append(f"{entry['stage']}={entry['status']}")
+        self.logger.info(f"{LogEmoji.INFO} [{self.request_id}] Stage timeline: {', '.join(parts)}")
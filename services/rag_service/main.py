@@ -13,8 +13,9 @@ import uuid
 import time
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from core.base_service import BaseService
@@ -25,6 +26,7 @@ from shared.utils.retry import retry_on_http_error
 from shared.exceptions import ServiceUnavailableError, RAGPipelineError
 from shared.utils.i18n_loader import get_i18n_loader
 from shared.utils.i18n import t  # For loading messages from JSON
+from shared.utils.sse import SSE_HEADERS, sse_event, iter_sse_events
 
 # Load master data using i18n_loader - NEVER hardcode display names or field labels!
 i18n_loader = get_i18n_loader()
@@ -49,7 +51,7 @@ try:
     from shared.rag_operators.operators.hyde import HyDEOperator
     from shared.rag_operators.operators.query_decomposition import QueryDecompositionOperator
     from shared.rag_operators.operators.reflection import ReflectionOperator
-    from shared.memory import MemoryManager
+    from shared.memory import MemoryManager, create_memory_backend
     from shared.agents import SupervisorAgent
     ADVANCED_FEATURES_AVAILABLE = True
 except ImportError as e:
@@ -149,8 +151,11 @@ class RAGService(BaseService):
     def _init_advanced_components(self):
         """Initialize advanced RAG components (modular operators, memory, agents)"""
         try:
-            # Memory system
-            self.memory_manager = MemoryManager()
+            # Memory system (persisted per MEMORY_BACKEND, embedding-indexed via Core Gateway)
+            self.memory_manager = MemoryManager(
+                backend=create_memory_backend(),
+                embed_fn=self._embed_for_memory
+            )
             self.logger.info(f"{LogEmoji.SUCCESS} Memory system initialized")
 
             # Multi-agent system
@@ -174,6 +179,16 @@ class RAGService(BaseService):
             self.memory_manager = None
             self.supervisor = None
 
+    async def _embed_for_memory(self, texts: List[str]) -> List[List[float]]:
+        """Embedding function used by the memory stores (Core Gateway /embeddings)"""
+        response = await self.http_client.post(
+            f"{self.core_gateway_url}/embeddings",
+            json={"model": settings.MEMORY_EMBEDDING_MODEL, "input": texts},
+            timeout=10.0
+        )
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
     def setup_routes(self):
         """Setup RAG API routes"""
 
@@ -203,6 +218,24 @@ class RAGService(BaseService):
                 self.logger.error(f"{LogEmoji.ERROR} RAG query failed: {e}")
                 raise HTTPException(status_code=500, detail=f"RAG query failed: {str(e)}")
 
+        @self.app.post("/query/stream")
+        async def rag_query_stream(request: RAGQueryRequest):
+            """
+            Streaming RAG endpoint (Server-Sent Events)
+
+            Property data is sent as soon as retrieval finishes, before any
+            text is generated, so the UI can render cards while the answer
+            is still streaming:
+            - {"type": "properties", "properties", "retrieved_count", "pipeline_used"}
+            - {"type": "token", "content"} (LLM tokens in advanced mode, template text in basic mode)
+            - {"type": "done"} or {"type": "error", "message"}
+            """
+            return StreamingResponse(
+                self._stream_pipeline(request),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
+
         @self.app.get("/stats")
         async def get_stats():
             """Get RAG service statistics"""
@@ -410,6 +443,80 @@ class RAGService(BaseService):
             properties=retrieved_properties  # Full property data for frontend
         )
 
+    # ==================== STREAMING PIPELINE ====================
+
+    async def _stream_pipeline(self, request: RAGQueryRequest) -> AsyncIterator[str]:
+        """
+        Retrieve → emit properties → stream generated text
+
+        Advanced mode uses the multi-agent search and streams LLM generation;
+        query decomposition and reflection are skipped (they would delay the
+        first token). Basic mode keeps the template response.
+        """
+        try:
+            self.logger.info(f"{LogEmoji.TARGET} RAG Stream Query: '{request.query}'")
+
+            use_advanced = self.advanced_enabled and request.use_advanced_rag
+            retrieved_properties = None
+            pipeline_used = "basic"
+
+            # STEP 1: RETRIEVE
+            if use_advanced:
+                supervisor_result = await self.supervisor.execute({
+                    "query": request.query,
+                    "filters": request.filters or {},
+                    "limit": request.limit
+                })
+                if supervisor_result.success and supervisor_result.data:
+                    retrieved_properties = supervisor_result.data
+                    pipeline_used = "advanced"
+                else:
+                    self.logger.warning(f"{LogEmoji.WARNING} Multi-agent search failed, falling back to basic")
+
+            if retrieved_properties is None:
+                retrieved_properties = await self._retrieve(request.query, request.filters, request.limit)
+
+            # Property cards first
+            yield sse_event({
+                "type": "properties",
+                "properties": retrieved_properties,
+                "retrieved_count": len(retrieved_properties),
+                "pipeline_used": pipeline_used
+            })
+
+            # STEP 2 + 3: AUGMENT + GENERATE
+            if not retrieved_properties:
+                yield sse_event({"type": "token", "content": i18n_loader.get_ui_message('no_results', request.language)})
+            elif pipeline_used == "advanced":
+                context = self._build_context(retrieved_properties, request.query, request.language)
+                async for token in self._generate_stream(request.query, context, retrieved_properties, request.language):
+                    yield sse_event({"type": "token", "content": token})
+
+                if request.user_id and self.memory_manager:
+                    await self.memory_manager.record_interaction(
+                        user_id=request.user_id,
+                        query=request.query,
+                        results=retrieved_properties,
+                        success=True,
+                        applied_skills=[],
+                        metadata={"streamed": True}
+                    )
+            else:
+                yield sse_event({
+                    "type": "token",
+                    "content": self._format_simple_response(
+                        retrieved_properties,
+                        request.language,
+                        request.response_format
+                    )
+                })
+
+            yield sse_event({"type": "done"})
+
+        except Exception as e:
+            self.logger.error(f"{LogEmoji.ERROR} RAG stream failed: {e}")
+            yield sse_event({"type": "error", "message": f"RAG query failed: {str(e)}"})
+
     # ==================== SHARED UTILITIES ====================
 
     @retry_on_http_error  # REFACTORED: Automatic retry on network errors
@@ -552,19 +659,7 @@ class RAGService(BaseService):
             language: User's preferred language (vi, en, th, ja)
         """
         try:
-            # Load system prompt based on language
-            system_prompt = self._get_system_prompt(language)
-            user_prompt = self._get_user_prompt(query, context, language)
-
-            llm_request = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "max_tokens": 500,
-                "temperature": 0.3  # Reduced from 0.7 to prevent hallucination
-            }
+            llm_request = self._generation_request(query, context, language)
 
             self.logger.info(f"{LogEmoji.AI} Calling Core Gateway for generation...")
 
@@ -587,6 +682,59 @@ class RAGService(BaseService):
             self.logger.error(f"{LogEmoji.ERROR} Generation failed: {e}")
             return self._format_simple_response(retrieved_properties, language)
 
+    async def _generate_stream(
+        self,
+        query: str,
+        context: str,
+        retrieved_properties: List[Dict[str, Any]],
+        language: str = "vi"
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of _generate: yields text as Core Gateway produces it
+
+        Falls back to the template response if generation fails before the
+        first token.
+        """
+        started = False
+        try:
+            self.logger.info(f"{LogEmoji.AI} Streaming generation from Core Gateway...")
+
+            async with self.http_client.stream(
+                "POST",
+                f"{self.core_gateway_url}/chat/completions/stream",
+                json=self._generation_request(query, context, language),
+                timeout=30.0
+            ) as response:
+                response.raise_for_status()
+                async for event in iter_sse_events(response):
+                    if event.get("type") == "token" and event.get("content"):
+                        started = True
+                        yield event["content"]
+                    elif event.get("type") == "error":
+                        raise RuntimeError(event.get("message", "generation failed"))
+
+        except Exception as e:
+            self.logger.error(f"{LogEmoji.ERROR} Streaming generation failed: {e}")
+
+        if not started:
+            yield self._format_simple_response(retrieved_properties, language)
+
+    def _generation_request(self, query: str, context: str, language: str = "vi") -> Dict[str, Any]:
+        """Core Gateway request for the GENERATE step"""
+        # Load system prompt based on language
+        system_prompt = self._get_system_prompt(language)
+        user_prompt = self._get_user_prompt(query, context, language)
+
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": 500,
+            "temperature": 0.3  # Reduced from 0.7 to prevent hallucination
+        }
+
     def _format_simple_response(
         self,
         properties: List[Dict[str, Any]],
@@ -863,6 +1011,10 @@ Create a natural, helpful response based EXACTLY on the data above.""",
 
     async def on_shutdown(self):
         """Cleanup on shutdown"""
+        # Persist pending memory updates before the HTTP client goes away
+        if getattr(self, "memory_manager", None):
+            await self.memory_manager.close()
+
         await self.http_client.aclose()
 
         # Cleanup advanced operators if initialized
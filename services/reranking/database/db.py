@@ -4,6 +4,8 @@ CTO Priority 4 - Phase 2
 """
 
 import os
+import time
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 import asyncpg
@@ -78,6 +80,39 @@ class RerankingDB:
             logger.error(f"Error getting seller stats for {seller_id}: {e}")
             return None
 
+    async def get_seller_stats_batch(
+        self,
+        seller_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get performance statistics for many sellers in one round trip"""
+        if not self.pool or not seller_ids:
+            return {}
+
+        try:
+            rows = await self.pool.fetch(
+                """
+                SELECT
+                    seller_id,
+                    total_listings,
+                    active_listings,
+                    closed_deals,
+                    total_inquiries,
+                    total_responses,
+                    avg_response_time_hours,
+                    response_rate,
+                    closure_rate,
+                    account_created_at
+                FROM seller_stats
+                WHERE seller_id = ANY($1::VARCHAR[])
+                """,
+                list(seller_ids)
+            )
+            return {row['seller_id']: dict(row) for row in rows}
+
+        except Exception as e:
+            logger.error(f"Error getting batched seller stats: {e}")
+            return {}
+
     # ========================================================================
     # Property Stats Queries
     # ========================================================================
@@ -130,6 +165,41 @@ class RerankingDB:
             logger.error(f"Error getting property stats for {property_id}: {e}")
             return None
 
+    async def get_property_stats_batch(
+        self,
+        property_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get engagement statistics for many properties in one round trip
+
+        Returns every time window so callers can pick 7d/30d/total
+        without another query.
+        """
+        if not self.pool or not property_ids:
+            return {}
+
+        try:
+            rows = await self.pool.fetch(
+                """
+                SELECT
+                    property_id,
+                    views_7d, inquiries_7d, favorites_7d,
+                    views_30d, inquiries_30d, favorites_30d,
+                    views_total, inquiries_total, favorites_total,
+                    search_impressions,
+                    search_clicks,
+                    ctr
+                FROM property_stats
+                WHERE property_id = ANY($1::VARCHAR[])
+                """,
+                list(property_ids)
+            )
+            return {row['property_id']: dict(row) for row in rows}
+
+        except Exception as e:
+            logger.error(f"Error getting batched property stats: {e}")
+            return {}
+
     async def increment_property_view(self, property_id: str):
         """Increment property view counters"""
         if not self.pool:
@@ -340,6 +410,140 @@ class RerankingDB:
             logger.error(f"Error logging search interaction: {e}")
             return None
 
+    async def get_interaction_history(
+        self,
+        user_id: str,
+        property_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get a user's previous click/favorite/inquiry flags for one property"""
+        history = await self.get_interaction_history_batch(user_id, [property_id])
+        return history.get(property_id)
+
+    async def get_interaction_history_batch(
+        self,
+        user_id: str,
+        property_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get a user's interaction flags for many properties in one round trip"""
+        if not self.pool or not user_id or not property_ids:
+            return {}
+
+        try:
+            rows = await self.pool.fetch(
+                """
+                SELECT
+                    property_id,
+                    MAX(CASE WHEN clicked THEN 1 ELSE 0 END) as has_clicked,
+                    MAX(CASE WHEN favorited THEN 1 ELSE 0 END) as has_favorited,
+                    MAX(CASE WHEN inquiry_sent THEN 1 ELSE 0 END) as has_inquired
+                FROM search_interactions
+                WHERE user_id = $1 AND property_id = ANY($2::VARCHAR[])
+                GROUP BY property_id
+                """,
+                user_id,
+                list(property_ids)
+            )
+            return {row['property_id']: dict(row) for row in rows}
+
+        except Exception as e:
+            logger.error(f"Error getting interaction history for {user_id}: {e}")
+            return {}
+
+    async def log_search_interactions_bulk(
+        self,
+        interactions: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Insert many search interactions with a single COPY
+
+        Args:
+            interactions: Dicts with the same keys as log_search_interaction
+
+        Returns:
+            Number of rows written
+        """
+        if not self.pool or not interactions:
+            return 0
+
+        columns = [
+            'user_id', 'query', 'property_id', 'rank_position',
+            'hybrid_score', 'rerank_score', 'final_score'
+        ]
+        records = [tuple(item.get(col) for col in columns) for item in interactions]
+
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                'search_interactions',
+                records=records,
+                columns=columns
+            )
+        return len(records)
+
+    async def apply_property_stat_deltas(
+        self,
+        deltas: Dict[str, Dict[str, int]]
+    ) -> int:
+        """
+        Upsert aggregated view/inquiry/favorite counters for many properties
+
+        Args:
+            deltas: property_id -> {"view": n, "inquiry": n, "favorite": n}
+
+        Returns:
+            Number of properties updated
+        """
+        if not self.pool or not deltas:
+            return 0
+
+        now = datetime.utcnow()
+        records = [
+            (
+                property_id,
+                counts.get('view', 0),
+                counts.get('inquiry', 0),
+                counts.get('favorite', 0),
+                now
+            )
+            for property_id, counts in deltas.items()
+        ]
+
+        await self.pool.executemany(
+            """
+            INSERT INTO property_stats (
+                property_id,
+                views_total, views_7d, views_30d,
+                inquiries_total, inquiries_7d, inquiries_30d,
+                favorites_total, favorites_7d, favorites_30d,
+                last_viewed_at, last_inquiry_at, last_favorited_at
+            )
+            VALUES (
+                $1,
+                $2, $2, $2,
+                $3, $3, $3,
+                $4, $4, $4,
+                CASE WHEN $2 > 0 THEN $5::TIMESTAMP END,
+                CASE WHEN $3 > 0 THEN $5::TIMESTAMP END,
+                CASE WHEN $4 > 0 THEN $5::TIMESTAMP END
+            )
+            ON CONFLICT (property_id) DO UPDATE SET
+                views_total = property_stats.views_total + $2,
+                views_7d = property_stats.views_7d + $2,
+                views_30d = property_stats.views_30d + $2,
+                inquiries_total = property_stats.inquiries_total + $3,
+                inquiries_7d = property_stats.inquiries_7d + $3,
+                inquiries_30d = property_stats.inquiries_30d + $3,
+                favorites_total = property_stats.favorites_total + $4,
+                favorites_7d = property_stats.favorites_7d + $4,
+                favorites_30d = property_stats.favorites_30d + $4,
+                last_viewed_at = CASE WHEN $2 > 0 THEN $5::TIMESTAMP ELSE property_stats.last_viewed_at END,
+                last_inquiry_at = CASE WHEN $3 > 0 THEN $5::TIMESTAMP ELSE property_stats.last_inquiry_at END,
+                last_favorited_at = CASE WHEN $4 > 0 THEN $5::TIMESTAMP ELSE property_stats.last_favorited_at END,
+                updated_at = $5
+            """,
+            records
+        )
+        return len(records)
+
     async def update_search_interaction(
         self,
         interaction_id: str,
@@ -386,5 +590,144 @@ class RerankingDB:
             logger.error(f"Error updating search interaction {interaction_id}: {e}")
 
 
+class FeatureSnapshot:
+    """
+    Request-scoped view of reranking features, prefetched in bulk
+
+    Exposes the same lookup methods as RerankingDB, so feature calculators
+    can take it as their ``db`` argument unchanged. Every lookup is served
+    from memory; the database sees one query per table per /rerank call
+    instead of one per candidate.
+    """
+
+    def __init__(
+        self,
+        seller_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+        property_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+        user_preferences: Optional[Dict[str, Any]] = None,
+        interaction_history: Optional[Dict[str, Dict[str, Any]]] = None,
+        user_id: Optional[str] = None,
+        connected: bool = True
+    ):
+        self.seller_stats = seller_stats or {}
+        self.property_stats = property_stats or {}
+        self.user_preferences = user_preferences
+        self.interaction_history = interaction_history or {}
+        self.user_id = user_id
+        # Mirrors RerankingDB.pool truthiness for calculators that check it
+        self.pool = connected or None
+
+    @classmethod
+    async def load(
+        cls,
+        database: RerankingDB,
+        properties: List[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> "FeatureSnapshot":
+        """
+        Fetch seller stats, property stats, user preferences and interaction
+        history for a whole candidate batch concurrently
+
+        Args:
+            database: Connected RerankingDB
+            properties: Candidate property dicts
+            user_id: Requesting user (None for anonymous)
+            timings: Optional dict that receives per-query timings (ms)
+        """
+        if not database.pool:
+            return cls(user_id=user_id, connected=False)
+
+        property_ids = list(dict.fromkeys(
+            p.get('property_id') for p in properties if p.get('property_id')
+        ))
+        seller_ids = list(dict.fromkeys(
+            p.get('owner_id') or 'unknown' for p in properties
+        ))
+
+        async def timed(name: str, coro):
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                if timings is not None:
+                    timings[name] = (time.perf_counter() - start) * 1000
+
+        async def no_user():
+            return None
+
+        async def no_history():
+            return {}
+
+        seller_stats, property_stats, user_prefs, history = await asyncio.gather(
+            timed("fetch_seller_stats", database.get_seller_stats_batch(seller_ids)),
+            timed("fetch_property_stats", database.get_property_stats_batch(property_ids)),
+            timed(
+                "fetch_user_preferences",
+                database.get_user_preferences(user_id) if user_id else no_user()
+            ),
+            timed(
+                "fetch_interaction_history",
+                database.get_interaction_history_batch(user_id, property_ids)
+                if user_id else no_history()
+            )
+        )
+
+        return cls(
+            seller_stats=seller_stats,
+            property_stats=property_stats,
+            user_preferences=user_prefs,
+            interaction_history=history,
+            user_id=user_id
+        )
+
+    async def get_seller_stats(self, seller_id: str) -> Optional[Dict[str, Any]]:
+        """Get prefetched seller statistics"""
+        return self.seller_stats.get(seller_id)
+
+    async def get_property_stats(
+        self,
+        property_id: str,
+        time_window_days: int = 7
+    ) -> Optional[Dict[str, Any]]:
+        """Get prefetched property statistics for the requested time window"""
+        row = self.property_stats.get(property_id)
+        if not row:
+            return None
+
+        if time_window_days == 7:
+            suffix = "7d"
+        elif time_window_days == 30:
+            suffix = "30d"
+        else:
+            suffix = "total"
+
+        return {
+            'property_id': property_id,
+            'views': row.get(f'views_{suffix}'),
+            'inquiries': row.get(f'inquiries_{suffix}'),
+            'favorites': row.get(f'favorites_{suffix}'),
+            'search_impressions': row.get('search_impressions'),
+            'search_clicks': row.get('search_clicks'),
+            'ctr': row.get('ctr')
+        }
+
+    async def get_user_preferences(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get prefetched preferences of the requesting user"""
+        if user_id != self.user_id:
+            return None
+        return self.user_preferences
+
+    async def get_interaction_history(
+        self,
+        user_id: str,
+        property_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get prefetched interaction flags of the requesting user"""
+        if user_id != self.user_id:
+            return None
+        return self.interaction_history.get(property_id)
+
+
 # Global database instance
 db = RerankingDB()
@@ -0,0 +1,222 @@
+"""
+Write-behind analytics writer for Re-ranking Service
+CTO Priority 4 - Phase 2
+
+Search interactions and view/inquiry/favorite events are pushed onto a
+bounded in-process queue and flushed in bulk (COPY for search_interactions,
+one executemany upsert for property_stats) when either the batch size or
+the flush interval is reached. Request handlers never wait on Postgres.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Optional, Dict, Any, List
+
+from database.db import RerankingDB
+
+logger = logging.getLogger(__name__)
+
+
+# Event types that map onto property_stats counters
+STAT_EVENTS = ("view", "inquiry", "favorite")
+
+
+class AnalyticsEventWriter:
+    """Buffered, bulk-flushing writer for search interactions and property stats"""
+
+    def __init__(
+        self,
+        database: RerankingDB,
+        max_queue_size: int = int(os.getenv("ANALYTICS_QUEUE_SIZE", 10000)),
+        batch_size: int = int(os.getenv("ANALYTICS_BATCH_SIZE", 500)),
+        flush_interval: float = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", 2.0)),
+        enqueue_timeout: float = float(os.getenv("ANALYTICS_ENQUEUE_TIMEOUT", 0.5))
+    ):
+        """
+        Args:
+            database: RerankingDB used for flushing
+            max_queue_size: Queue bound; producers wait when it is full
+            batch_size: Flush as soon as this many events are buffered
+            flush_interval: Flush at least this often (seconds)
+            enqueue_timeout: Max time a producer waits on a full queue
+                before the event is dropped
+        """
+        self.db = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._flush_requested = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "interactions_written": 0,
+            "stat_events_written": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ========================================================================
+    # Lifecycle
+    # ========================================================================
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Analytics writer started (batch={self.batch_size}, "
+                f"interval={self.flush_interval}s, queue={self.queue.maxsize})"
+            )
+
+    async def stop(self):
+        """Stop the flush loop and drain everything still buffered"""
+        if self._task is not None:
+            # Let the loop finish the batch it is writing instead of cancelling it
+            self._stopping.set()
+            self._flush_requested.set()
+            await self._task
+            self._task = None
+
+        while not self.queue.empty():
+            await self.flush()
+        logger.info(f"Analytics writer stopped: {self.stats}")
+
+    # ========================================================================
+    # Producers
+    # ========================================================================
+
+    async def enqueue(self, event: Dict[str, Any]) -> bool:
+        """
+        Buffer one event, waiting briefly when the queue is full
+
+        Returns:
+            False if the event was dropped (no database, or sustained backpressure)
+        """
+        if self.db.pool is None:
+            # Nothing could ever write it
+            self.stats["dropped"] += 1
+            return False
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Backpressure: wake the flusher and wait for room
+            self._flush_requested.set()
+            try:
+                await asyncio.wait_for(self.queue.put(event), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["dropped"] += 1
+                logger.warning(f"Analytics queue full, dropped {event.get('event')} event")
+                return False
+
+        self.stats["enqueued"] += 1
+        if self.queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def log_search_interaction(
+        self,
+        user_id: Optional[str],
+        query: str,
+        property_id: str,
+        rank_position: int,
+        hybrid_score: Optional[float] = None,
+        rerank_score: Optional[float] = None,
+        final_score: Optional[float] = None
+    ) -> bool:
+        """Buffer a search interaction (same signature as RerankingDB)"""
+        return await self.enqueue({
+            "event": "interaction",
+            "user_id": user_id,
+            "query": query,
+            "property_id": property_id,
+            "rank_position": rank_position,
+            "hybrid_score": hybrid_score,
+            "rerank_score": rerank_score,
+            "final_score": final_score,
+        })
+
+    async def track(self, event: str, property_id: str) -> bool:
+        """Buffer a view/inquiry/favorite counter increment"""
+        if event not in STAT_EVENTS:
+            raise ValueError(f"Unsupported analytics event: {event}")
+        return await self.enqueue({"event": event, "property_id": property_id})
+
+    # ========================================================================
+    # Flushing
+    # ========================================================================
+
+    async def _run(self):
+        """Flush on size threshold or interval, whichever comes first"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            while not self.queue.empty():
+                await self.flush()
+
+    async def flush(self, max_retries: int = 3):
+        """Write up to one batch of buffered events"""
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        if not batch:
+            return
+
+        if self.db.pool is None:
+            self.stats["dropped"] += len(batch)
+            logger.error(f"Analytics database unavailable, dropped {len(batch)} events")
+            return
+
+        interactions = [e for e in batch if e["event"] == "interaction"]
+        deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        stat_events = 0
+        for e in batch:
+            if e["event"] in STAT_EVENTS:
+                deltas[e["property_id"]][e["event"]] += 1
+                stat_events += 1
+
+        start = time.perf_counter()
+        for attempt in range(1, max_retries + 1):
+            try:
+                if interactions:
+                    await self.db.log_search_interactions_bulk(interactions)
+                    self.stats["interactions_written"] += len(interactions)
+                    interactions = []
+                if deltas:
+                    await self.db.apply_property_stat_deltas(deltas)
+                    self.stats["stat_events_written"] += stat_events
+                    deltas = {}
+                break
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                if attempt == max_retries:
+                    logger.error(
+                        f"Analytics flush failed after {attempt} attempts, "
+                        f"dropping {len(interactions)} interactions and {len(deltas)} stat rows: {e}"
+                    )
+                    break
+                logger.warning(f"Analytics flush attempt {attempt} failed: {e}")
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer counters for /health"""
+        return {**self.stats, "queued": self.queue.qsize()}
@@ -9,6 +9,38 @@ Feature Category: Property Quality (10% of 40%)
 from typing import Dict, List, Any
 
 
+# Required fields (70% weight)
+REQUIRED_FIELDS = [
+    'title',
+    'description',
+    'price',
+    'area',
+    'district',
+    'property_type',
+    'listing_type'
+]
+
+# Optional/recommended fields (30% weight)
+OPTIONAL_FIELDS = [
+    'images',
+    'videos',
+    'virtual_tour_url',
+    'contact_phone',
+    'contact_email',
+    'bedrooms',
+    'bathrooms',
+    'ward',
+    'street_address',
+    'amenities'
+]
+
+# Keywords of an informative description
+DESCRIPTION_KEYWORDS = [
+    'giá', 'diện tích', 'phòng', 'vị trí', 'tiện ích',
+    'gần', 'view', 'mặt tiền', 'hẻm', 'đường'
+]
+
+
 def calculate_completeness(property_data: Dict[str, Any]) -> float:
     """
     Calculate completeness score based on information richness
@@ -19,48 +51,23 @@ def calculate_completeness(property_data: Dict[str, Any]) -> float:
     Returns:
         float: Completeness score [0.0, 1.0]
     """
-    # Required fields (70% weight)
-    required_fields = [
-        'title',
-        'description',
-        'price',
-        'area',
-        'district',
-        'property_type',
-        'listing_type'
-    ]
-
-    # Optional/recommended fields (30% weight)
-    optional_fields = [
-        'images',
-        'videos',
-        'virtual_tour_url',
-        'contact_phone',
-        'contact_email',
-        'bedrooms',
-        'bathrooms',
-        'ward',
-        'street_address',
-        'amenities'
-    ]
-
     # Check required fields
     required_count = 0
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         value = property_data.get(field)
         if value is not None and value != "" and value != []:
             required_count += 1
 
-    required_score = required_count / len(required_fields)
+    required_score = required_count / len(REQUIRED_FIELDS)
 
     # Check optional fields
     optional_count = 0
-    for field in optional_fields:
+    for field in OPTIONAL_FIELDS:
         value = property_data.get(field)
         if value is not None and value != "" and value != []:
             optional_count += 1
 
-    optional_score = optional_count / len(optional_fields)
+    optional_score = optional_count / len(OPTIONAL_FIELDS)
 
     # Weighted combination (70% required, 30% optional)
     completeness_score = 0.7 * required_score + 0.3 * optional_score
@@ -124,12 +131,7 @@ def calculate_description_quality(property_data: Dict[str, Any]) -> float:
         length_score = max(1.0 - (desc_len - 500) / 500.0, 0.5)
 
     # Keywords presence (simple check)
-    keywords = [
-        'giá', 'diện tích', 'phòng', 'vị trí', 'tiện ích',
-        'gần', 'view', 'mặt tiền', 'hẻm', 'đường'
-    ]
-
-    keyword_count = sum(1 for kw in keywords if kw in description.lower())
+    keyword_count = sum(1 for kw in DESCRIPTION_KEYWORDS if kw in description.lower())
     keyword_score = min(keyword_count / 5.0, 1.0)  # At least 5 keywords = 1.0
 
     # Professional language check (no excessive caps/emojis)
@@ -124,18 +124,7 @@ async def calculate_interaction_history(
 
     try:
         # Query search_interactions for this user + property
-        row = await db.pool.fetchrow(
-            """
-            SELECT
-                MAX(CASE WHEN clicked THEN 1 ELSE 0 END) as has_clicked,
-                MAX(CASE WHEN favorited THEN 1 ELSE 0 END) as has_favorited,
-                MAX(CASE WHEN inquiry_sent THEN 1 ELSE 0 END) as has_inquired
-            FROM search_interactions
-            WHERE user_id = $1 AND property_id = $2
-            """,
-            user_id,
-            property_id
-        )
+        row = await db.get_interaction_history(user_id, property_id)
 
         if not row:
             # No previous interaction: neutral score
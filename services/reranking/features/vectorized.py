@@ -0,0 +1,411 @@
+"""
+Vectorized Feature Scoring
+Columnar version of the per-property feature calculators
+
+CTO Priority 4: Re-ranking Service
+
+The candidate batch is turned into NumPy columns once (timestamps, media
+counts, description statistics, prefetched seller/property/user data), and
+every feature is then computed for the whole batch as array expressions.
+The rules (and fallback scores for missing or unusable data) are the same
+as in completeness.py, seller_reputation.py, freshness.py, engagement.py and
+personalization.py, so scores match the per-dict functions.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from features.completeness import REQUIRED_FIELDS, OPTIONAL_FIELDS, DESCRIPTION_KEYWORDS
+
+
+# Column order of the feature matrix (keys of FEATURE_WEIGHTS)
+FEATURE_NAMES = (
+    "property_quality",
+    "seller_reputation",
+    "freshness",
+    "engagement",
+    "personalization"
+)
+
+SECONDS_PER_DAY = 86400.0
+
+_EMPTY_VALUES = (None, "", [])
+
+
+def _epoch_seconds(value: Any) -> float:
+    """
+    Timestamp of an ISO string, NaN when missing or unusable
+
+    Naive timestamps count as unusable: the per-dict calculators fail on
+    them when subtracting from an aware "now" and fall back to defaults.
+    """
+    if not value:
+        return np.nan
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return np.nan
+    if parsed.tzinfo is None:
+        return np.nan
+    return parsed.timestamp()
+
+
+def _float_or_nan(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _list_length(value: Any) -> int:
+    return len(value) if isinstance(value, list) else 0
+
+
+def _whole_days(seconds: np.ndarray) -> np.ndarray:
+    """timedelta.days of durations in seconds (floors, like timedelta)"""
+    return np.floor(seconds / SECONDS_PER_DAY)
+
+
+# ============================================================================
+# Property Quality (completeness.py)
+# ============================================================================
+
+def _property_quality(properties: Sequence[Dict[str, Any]]) -> np.ndarray:
+    n = len(properties)
+
+    present = np.array(
+        [[p.get(field) not in _EMPTY_VALUES for field in REQUIRED_FIELDS + OPTIONAL_FIELDS] for p in properties],
+        dtype=bool
+    ).reshape(n, len(REQUIRED_FIELDS) + len(OPTIONAL_FIELDS))
+    required_score = present[:, :len(REQUIRED_FIELDS)].sum(axis=1) / len(REQUIRED_FIELDS)
+    optional_score = present[:, len(REQUIRED_FIELDS):].sum(axis=1) / len(OPTIONAL_FIELDS)
+    completeness = np.clip(0.7 * required_score + 0.3 * optional_score, 0.0, 1.0)
+
+    # Images / videos / virtual tour
+    num_images = np.fromiter(
+        (_list_length(p.get('images', [])) for p in properties),
+        dtype=float,
+        count=n
+    )
+    has_videos = np.fromiter((bool(p.get('videos')) for p in properties), dtype=bool, count=n)
+    has_tour = np.fromiter((bool(p.get('virtual_tour_url')) for p in properties), dtype=bool, count=n)
+    image_quality = np.minimum(
+        np.minimum(num_images / 10.0, 1.0) + np.where(has_videos, 0.1, 0.0) + np.where(has_tour, 0.2, 0.0),
+        1.0
+    )
+
+    # Description: length, keyword count, uppercase count
+    desc_len = np.zeros(n)
+    keyword_count = np.zeros(n)
+    upper_count = np.zeros(n)
+    for i, p in enumerate(properties):
+        description = p.get('description', '')
+        if description:
+            lowered = description.lower()
+            desc_len[i] = len(description)
+            keyword_count[i] = sum(1 for kw in DESCRIPTION_KEYWORDS if kw in lowered)
+            upper_count[i] = sum(map(str.isupper, description))
+
+    has_description = desc_len > 0
+    safe_len = np.where(has_description, desc_len, 1.0)
+    length_score = np.where(
+        desc_len < 50,
+        desc_len / 50.0,
+        np.where(desc_len <= 500, 1.0, np.maximum(1.0 - (desc_len - 500) / 500.0, 0.5))
+    )
+    keyword_score = np.minimum(keyword_count / 5.0, 1.0)
+    professional_score = np.where(upper_count / safe_len < 0.1, 1.0, 0.7)
+    description_quality = np.where(
+        has_description,
+        np.clip(0.4 * length_score + 0.4 * keyword_score + 0.2 * professional_score, 0.0, 1.0),
+        0.0
+    )
+
+    verified = np.fromiter((bool(p.get('verified', False)) for p in properties), dtype=bool, count=n)
+    verification = np.where(verified, 1.0, 0.5)
+
+    return (
+        0.25 * completeness +
+        0.25 * image_quality +
+        0.25 * description_quality +
+        0.25 * verification
+    )
+
+
+# ============================================================================
+# Freshness + Account Age (freshness.py, seller_reputation.py)
+# ============================================================================
+
+def _freshness_and_account_age(properties: Sequence[Dict[str, Any]], now: float):
+    n = len(properties)
+    created = np.fromiter((_epoch_seconds(p.get('created_at')) for p in properties), dtype=float, count=n)
+    updated = np.fromiter((_epoch_seconds(p.get('updated_at')) for p in properties), dtype=float, count=n)
+
+    has_created = ~np.isnan(created)
+    age_days = _whole_days(now - np.where(has_created, created, now))
+
+    # Listing age decay (365 days assumed when unknown)
+    days_since_posted = np.where(has_created, np.maximum(age_days, 0), 365)
+    age_decay = np.clip(np.power(2.0, -days_since_posted / 30.0), 0.0, 1.0)
+
+    # Recent update bonus
+    has_both = has_created & ~np.isnan(updated)
+    safe_updated = np.where(has_both, updated, now)
+    was_updated = has_both & (_whole_days(safe_updated - np.where(has_both, created, now)) > 0)
+    days_since_update = _whole_days(now - safe_updated)
+    update_bonus = np.where(
+        was_updated & (days_since_update <= 7),
+        0.2,
+        np.where(was_updated & (days_since_update <= 30), 0.1, 0.0)
+    )
+
+    freshness = np.minimum(0.667 * age_decay + 0.333 * update_bonus, 1.0)
+
+    account_age = np.where(
+        ~has_created | (age_days < 30),
+        0.5,
+        np.where(age_days < 180, 0.75, 1.0)
+    )
+
+    return freshness, account_age
+
+
+# ============================================================================
+# Seller Reputation (seller_reputation.py)
+# ============================================================================
+
+def _seller_performance(properties: Sequence[Dict[str, Any]], snapshot) -> np.ndarray:
+    n = len(properties)
+    columns = np.full((n, 3), np.nan)
+    has_stats = np.zeros(n, dtype=bool)
+
+    for i, p in enumerate(properties):
+        stats = snapshot.seller_stats.get(p.get('owner_id', 'unknown'))
+        if stats:
+            has_stats[i] = True
+            columns[i] = (
+                _float_or_nan(stats.get('response_rate', 0.0)),
+                _float_or_nan(stats.get('avg_response_time_hours', 24.0)),
+                _float_or_nan(stats.get('closure_rate', 0.0))
+            )
+
+    response_rate, response_hours, closure_rate = columns.T
+    response_time_score = 1.0 / (1.0 + response_hours / 24.0)
+    performance = np.clip(0.4 * response_rate + 0.3 * response_time_score + 0.3 * closure_rate, 0.0, 1.0)
+
+    # No stats: new seller (0.5); unusable stats: error default (0.7)
+    return np.where(
+        ~has_stats,
+        0.5,
+        np.where(np.isnan(columns).any(axis=1), 0.7, performance)
+    )
+
+
+# ============================================================================
+# Engagement (engagement.py)
+# ============================================================================
+
+def _engagement(properties: Sequence[Dict[str, Any]], snapshot) -> np.ndarray:
+    n = len(properties)
+    columns = np.full((n, 4), np.nan)
+    has_stats = np.zeros(n, dtype=bool)
+
+    for i, p in enumerate(properties):
+        row = snapshot.property_stats.get(p.get('property_id', ''))
+        if row:
+            has_stats[i] = True
+            columns[i] = (
+                _float_or_nan(row.get('views_7d')),
+                _float_or_nan(row.get('inquiries_7d')),
+                _float_or_nan(row.get('favorites_7d')),
+                _float_or_nan(row.get('ctr'))
+            )
+
+    views, inquiries, favorites, ctr = columns.T
+    window = 7
+    behavior = np.clip(
+        0.3 * np.minimum(views / window / 10.0, 1.0) +
+        0.4 * np.minimum(inquiries / window / 2.0, 1.0) +
+        0.3 * np.minimum(favorites / window / 1.0, 1.0),
+        0.0,
+        1.0
+    )
+    user_behavior = np.where(
+        ~has_stats,
+        0.3,
+        np.where(np.isnan(columns[:, :3]).any(axis=1), 0.6, behavior)
+    )
+
+    # Scale so 0.1 CTR = 1.0 score
+    ctr_score = np.where(has_stats & ~np.isnan(ctr), np.minimum(ctr / 0.1, 1.0), 0.5)
+
+    return 0.667 * user_behavior + 0.333 * ctr_score
+
+
+# ============================================================================
+# Personalization (personalization.py)
+# ============================================================================
+
+def _preference_match(properties: Sequence[Dict[str, Any]], snapshot, user_id: Optional[str]) -> np.ndarray:
+    n = len(properties)
+    if not user_id:
+        return np.full(n, 0.5)
+
+    user_prefs = snapshot.user_preferences if user_id == snapshot.user_id else None
+    if not user_prefs:
+        return np.full(n, 0.5)
+
+    # Price range affinity
+    min_price = user_prefs.get('min_price')
+    max_price = user_prefs.get('max_price')
+    invalid = np.zeros(n, dtype=bool)
+
+    if min_price and max_price:
+        price = np.fromiter((_float_or_nan(p.get('price', 0)) for p in properties), dtype=float, count=n)
+        invalid = np.isnan(price)
+        price = np.where(invalid, 0.0, price)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            below_ratio = price / min_price if min_price > 0 else np.zeros(n)
+            above_ratio = np.where(price > 0, max_price / np.where(price > 0, price, 1.0), 0.0)
+        ratio = np.where(price < min_price, below_ratio, above_ratio)
+        in_range = (min_price <= price) & (price <= max_price)
+        price_match = np.where(in_range, 1.0, np.maximum(ratio, 0.3))
+    else:
+        price_match = np.full(n, 0.7)
+
+    # District preference
+    preferred_districts = user_prefs.get('preferred_districts', [])
+    if preferred_districts:
+        district_match = np.fromiter(
+            (1.0 if p.get('district', '') in preferred_districts else 0.5 for p in properties),
+            dtype=float,
+            count=n
+        )
+    else:
+        district_match = np.full(n, 0.7)
+
+    # Property type preference
+    preferred_types = user_prefs.get('preferred_property_types', [])
+    if preferred_types:
+        type_match = np.fromiter(
+            (1.0 if p.get('property_type', '') in preferred_types else 0.6 for p in properties),
+            dtype=float,
+            count=n
+        )
+    else:
+        type_match = np.full(n, 0.7)
+
+    preference = np.clip(0.4 * price_match + 0.3 * district_match + 0.3 * type_match, 0.0, 1.0)
+    return np.where(invalid, 0.7, preference)
+
+
+def _interaction_history(properties: Sequence[Dict[str, Any]], snapshot, user_id: Optional[str]) -> np.ndarray:
+    n = len(properties)
+    if not user_id or not snapshot.pool or user_id != snapshot.user_id:
+        return np.full(n, 0.5)
+
+    scores = np.full(n, 0.5)
+    for i, p in enumerate(properties):
+        row = snapshot.interaction_history.get(p.get('property_id', ''))
+        if not row:
+            continue
+        if row['has_inquired']:
+            scores[i] = 0.0  # Already contacted seller: avoid duplicates
+        elif row['has_favorited']:
+            scores[i] = 1.0
+        elif row['has_clicked']:
+            scores[i] = 0.7
+    return scores
+
+
+# ============================================================================
+# Batch scoring
+# ============================================================================
+
+def score_features(
+    properties: Sequence[Dict[str, Any]],
+    snapshot,
+    user_id: Optional[str] = None,
+    now: Optional[float] = None
+) -> np.ndarray:
+    """
+    Feature totals for a candidate batch
+
+    Args:
+        properties: Candidate property dicts
+        snapshot: FeatureSnapshot prefetched for the batch
+        user_id: Requesting user (None for anonymous)
+        now: Reference time (epoch seconds, default: current time)
+
+    Returns:
+        np.ndarray: (N, 5) matrix, columns in FEATURE_NAMES order
+    """
+    n = len(properties)
+    if n == 0:
+        return np.zeros((0, len(FEATURE_NAMES)))
+    if now is None:
+        now = datetime.now(timezone.utc).timestamp()
+
+    freshness, account_age = _freshness_and_account_age(properties, now)
+    seller_reputation = 0.75 * _seller_performance(properties, snapshot) + 0.25 * account_age
+    personalization = (
+        0.7 * _preference_match(properties, snapshot, user_id) +
+        0.3 * _interaction_history(properties, snapshot, user_id)
+    )
+
+    return np.column_stack((
+        _property_quality(properties),
+        seller_reputation,
+        freshness,
+        _engagement(properties, snapshot),
+        personalization
+    ))
+
+
+def weight_vector(feature_weights: Dict[str, float]) -> np.ndarray:
+    """FEATURE_WEIGHTS as a vector in FEATURE_NAMES order"""
+    return np.array([feature_weights[name] for name in FEATURE_NAMES])
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+
+    argpartition selects the top k in O(N); only those k are sorted. Ties
+    keep input order, like a stable descending sort.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        candidates = np.arange(n)
+    elif k <= 0:
+        return np.arange(0)
+    else:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # Scores equal to the k-th best may have been cut arbitrarily: keep the earliest ones
+        threshold = scores[candidates].min()
+        candidates = np.concatenate((
+            np.flatnonzero(scores > threshold),
+            np.flatnonzero(scores == threshold)
+        ))[:k]
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def feature_rows(features: np.ndarray, weighted: np.ndarray, indices: Sequence[int]) -> List[Dict[str, float]]:
+    """FeatureScores-shaped dicts for the selected rows"""
+    return [
+        {
+            "completeness": float(features[i, 0]),
+            "seller_reputation": float(features[i, 1]),
+            "freshness": float(features[i, 2]),
+            "engagement": float(features[i, 3]),
+            "personalization": float(features[i, 4]),
+            "weighted_rerank_score": float(weighted[i])
+        }
+        for i in indices
+    ]
@@ -11,6 +11,7 @@ import os
 import time
 import logging
 from typing import List, Dict, Any
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -20,16 +21,12 @@ from shared.utils.i18n import t
 from models.rerank import (
     RerankRequest,
     RerankResponse,
-    RankedPropertyResult,
-    FeatureScores,
-    RerankMetadata
+    RerankMetadata,
+    AnalyticsEventBatch
 )
-from features.completeness import calculate_property_quality_score
-from features.seller_reputation import calculate_seller_reputation_score
-from features.freshness import calculate_freshness_score
-from features.engagement import calculate_engagement_score
-from features.personalization import calculate_personalization_score
-from database.db import db
+from features.vectorized import score_features, weight_vector, top_k_indices, feature_rows
+from database.db import db, FeatureSnapshot
+from database.event_writer import AnalyticsEventWriter
 
 
 # Configure logging
@@ -40,6 +37,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Write-behind analytics pipeline (search interactions + property stats)
+event_writer = AnalyticsEventWriter(db)
+
+
 # Lifespan context manager for startup/shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -47,9 +48,11 @@ async def lifespan(app: FastAPI):
     logger.info("Starting reranking service...")
     await db.connect()
     logger.info("Database connection established")
+    event_writer.start()
     yield
-    # Shutdown: Close database
+    # Shutdown: Drain buffered analytics, then close database
     logger.info("Shutting down reranking service...")
+    await event_writer.stop()
     await db.close()
     logger.info("Database connection closed")
 
@@ -94,7 +97,8 @@ async def health_check():
         "version": "1.0.0-phase2",
         "phase": "Phase 2: Real Data Integration",
         "database_connected": db_connected,
-        "feature_weights": FEATURE_WEIGHTS
+        "feature_weights": FEATURE_WEIGHTS,
+        "analytics_writer": event_writer.get_stats()
     }
 
 
@@ -116,86 +120,66 @@ async def rerank_search_results(request: RerankRequest):
         RerankResponse: Re-ranked results with feature scores
     """
     start_time = time.time()
+    stage_timings: Dict[str, float] = {}
 
     try:
         logger.info(f"Re-ranking {len(request.results)} results for query: '{request.query}'")
 
-        # Process each property
-        ranked_results = []
-
-        for property_result in request.results:
-            # Convert to dict for feature calculators
-            property_data = property_result.model_dump()
-
-            # Calculate all feature scores (Phase 2: with database queries)
-            property_quality = calculate_property_quality_score(property_data)
-            seller_reputation = await calculate_seller_reputation_score(property_data, db)
-            freshness = calculate_freshness_score(property_data)
-            engagement = await calculate_engagement_score(property_data, db)
-            personalization = await calculate_personalization_score(
-                property_data,
-                user_id=request.user_id,
-                db=db
-            )
-
-            # Extract total scores from each category
-            quality_score = property_quality['property_quality_total']
-            seller_score = seller_reputation['seller_reputation_total']
-            fresh_score = freshness['freshness_total']
-            engage_score = engagement['engagement_total']
-            person_score = personalization['personalization_total']
-
-            # Calculate weighted rerank score
-            weighted_rerank_score = (
-                FEATURE_WEIGHTS['property_quality'] * quality_score +
-                FEATURE_WEIGHTS['seller_reputation'] * seller_score +
-                FEATURE_WEIGHTS['freshness'] * fresh_score +
-                FEATURE_WEIGHTS['engagement'] * engage_score +
-                FEATURE_WEIGHTS['personalization'] * person_score
-            )
-
-            # Blend with original hybrid search score
-            original_score = property_result.score
-            final_score = (
-                BLEND_ALPHA * original_score +
-                (1 - BLEND_ALPHA) * weighted_rerank_score
-            )
-
-            # Create feature scores object
-            feature_scores = FeatureScores(
-                completeness=quality_score,
-                seller_reputation=seller_score,
-                freshness=fresh_score,
-                engagement=engage_score,
-                personalization=person_score,
-                weighted_rerank_score=weighted_rerank_score
-            )
-
-            # Create ranked result
-            ranked_result = RankedPropertyResult(
-                **property_data,
-                final_score=final_score,
-                original_score=original_score,
-                rerank_features=feature_scores
-            )
-
-            ranked_results.append(ranked_result)
-
-        # Sort by final score (descending)
-        ranked_results.sort(key=lambda x: x.final_score, reverse=True)
+        # Convert to dicts for feature calculators
+        properties = [property_result.model_dump() for property_result in request.results]
+
+        # Stage 1: Prefetch all database-backed features for the whole batch
+        # (one query per table instead of 3×N sequential round trips)
+        stage_start = time.perf_counter()
+        features_db = await FeatureSnapshot.load(
+            db,
+            properties,
+            user_id=request.user_id,
+            timings=stage_timings
+        )
+        stage_timings["feature_fetch"] = (time.perf_counter() - stage_start) * 1000
+
+        # Stage 2: Score the whole batch as feature columns (N x 5), then one dot product
+        stage_start = time.perf_counter()
+        features = score_features(properties, features_db, user_id=request.user_id)
+        weighted_rerank_scores = features @ weight_vector(FEATURE_WEIGHTS)
+
+        # Blend with original hybrid search score
+        original_scores = np.array([p['score'] for p in properties], dtype=float)
+        final_scores = BLEND_ALPHA * original_scores + (1 - BLEND_ALPHA) * weighted_rerank_scores
+        stage_timings["scoring"] = (time.perf_counter() - stage_start) * 1000
+
+        # Select top-k by final score (descending)
+        stage_start = time.perf_counter()
+        order = top_k_indices(final_scores, request.top_k)
+        stage_timings["sort"] = (time.perf_counter() - stage_start) * 1000
+
+        # Plain dicts in RankedPropertyResult shape, validated once by response_model
+        ranked_results = [
+            {
+                **properties[i],
+                "final_score": float(final_scores[i]),
+                "original_score": float(original_scores[i]),
+                "rerank_features": scores
+            }
+            for i, scores in zip(order, feature_rows(features, weighted_rerank_scores, order))
+        ]
 
         # Log search interactions for ML training (Phase 2)
+        # Buffered by the write-behind writer; flushed in bulk off the request path
+        stage_start = time.perf_counter()
         if db.pool:
             for i, result in enumerate(ranked_results, 1):
-                await db.log_search_interaction(
+                await event_writer.log_search_interaction(
                     user_id=request.user_id,
                     query=request.query,
-                    property_id=result.property_id,
+                    property_id=result["property_id"],
                     rank_position=i,
-                    hybrid_score=result.original_score,
-                    rerank_score=result.rerank_features.weighted_rerank_score,
-                    final_score=result.final_score
+                    hybrid_score=result["original_score"],
+                    rerank_score=result["rerank_features"]["weighted_rerank_score"],
+                    final_score=result["final_score"]
                 )
+        stage_timings["interaction_logging"] = (time.perf_counter() - stage_start) * 1000
 
         # Calculate processing time
         processing_time_ms = (time.time() - start_time) * 1000
@@ -205,16 +189,14 @@ async def rerank_search_results(request: RerankRequest):
             model_version="1.0.0-phase2",
             feature_weights=FEATURE_WEIGHTS,
             processing_time_ms=processing_time_ms,
-            properties_reranked=len(ranked_results)
+            properties_reranked=len(ranked_results),
+            properties_scored=len(properties),
+            stage_timings_ms={k: round(v, 2) for k, v in stage_timings.items()}
         )
 
         logger.info(f"Re-ranking completed in {processing_time_ms:.2f}ms")
 
-        # Return response
-        return RerankResponse(
-            results=ranked_results,
-            rerank_metadata=metadata
-        )
+        return RerankResponse(results=ranked_results, rerank_metadata=metadata)
 
     except Exception as e:
         logger.error(f"Error in re-ranking: {str(e)}", exc_info=True)
@@ -247,40 +229,68 @@ async def get_feature_weights():
 # Analytics Tracking Endpoints (Phase 2)
 # ============================================================================
 
+def _tracked(event: str, property_id: str, accepted: bool) -> Dict[str, Any]:
+    """Response of a single-event endpoint; 503 when the writer dropped the event"""
+    if not accepted:
+        error_msg = t("reranking.analytics_error", language='vi', error="event dropped")
+        raise HTTPException(status_code=503, detail=error_msg, headers={"Retry-After": "1"})
+    return {"status": "success", "event": event, "property_id": property_id}
+
+
 @app.post("/analytics/view/{property_id}")
 async def track_property_view(property_id: str):
     """Track property view event"""
     try:
-        await db.increment_property_view(property_id)
-        return {"status": "success", "event": "view", "property_id": property_id}
+        accepted = await event_writer.track("view", property_id)
     except Exception as e:
         logger.error(f"Error tracking view for {property_id}: {e}")
         error_msg = t("reranking.analytics_error", language='vi', error=str(e))
         raise HTTPException(status_code=500, detail=error_msg)
+    return _tracked("view", property_id, accepted)
 
 
 @app.post("/analytics/inquiry/{property_id}")
 async def track_property_inquiry(property_id: str):
     """Track property inquiry event"""
     try:
-        await db.increment_property_inquiry(property_id)
-        return {"status": "success", "event": "inquiry", "property_id": property_id}
+        accepted = await event_writer.track("inquiry", property_id)
     except Exception as e:
         logger.error(f"Error tracking inquiry for {property_id}: {e}")
         error_msg = t("reranking.analytics_error", language='vi', error=str(e))
         raise HTTPException(status_code=500, detail=error_msg)
+    return _tracked("inquiry", property_id, accepted)
 
 
 @app.post("/analytics/favorite/{property_id}")
 async def track_property_favorite(property_id: str):
     """Track property favorite event"""
     try:
-        await db.increment_property_favorite(property_id)
-        return {"status": "success", "event": "favorite", "property_id": property_id}
+        accepted = await event_writer.track("favorite", property_id)
     except Exception as e:
         logger.error(f"Error tracking favorite for {property_id}: {e}")
         error_msg = t("reranking.analytics_error", language='vi', error=str(e))
         raise HTTPException(status_code=500, detail=error_msg)
+    return _tracked("favorite", property_id, accepted)
+
+
+@app.post("/analytics/events")
+async def track_events_bulk(batch: AnalyticsEventBatch):
+    """
+    Track many view/inquiry/favorite events in one request
+
+    Events are buffered and flushed to property_stats in bulk, so callers
+    should send one request per response instead of one per property.
+    """
+    accepted = 0
+    for item in batch.events:
+        if await event_writer.track(item.event, item.property_id):
+            accepted += 1
+
+    return {
+        "status": "success",
+        "accepted": accepted,
+        "dropped": len(batch.events) - accepted
+    }
 
 
 @app.post("/analytics/click")
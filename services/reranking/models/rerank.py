@@ -4,7 +4,7 @@ CTO Priority 4: Re-ranking Service
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 
@@ -60,6 +60,7 @@ class RerankRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="User ID for personalization")
     language: str = Field("vi", description="User's preferred language (vi, en, th, ja)")
     context: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context")
+    top_k: Optional[int] = Field(None, ge=1, description="Return only the k best results (default: all)")
 
 
 class FeatureScores(BaseModel):
@@ -86,11 +87,27 @@ class RerankMetadata(BaseModel):
     model_version: str = "1.0.0-rule-based"
     feature_weights: Dict[str, float]
     processing_time_ms: float
-    properties_reranked: int
+    properties_reranked: int = Field(..., description="Results returned (after top_k)")
+    properties_scored: int = Field(..., description="Results received and scored")
     phase: str = "Phase 1: Rule-based"
+    stage_timings_ms: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Per-stage latency breakdown (feature fetch, scoring, sort, logging)"
+    )
 
 
 class RerankResponse(BaseModel):
     """Re-ranked results with explanations"""
     results: List[RankedPropertyResult]
     rerank_metadata: RerankMetadata
+
+
+class AnalyticsEvent(BaseModel):
+    """Single engagement event for property_stats"""
+    event: Literal["view", "inquiry", "favorite"] = Field(..., description="Event type")
+    property_id: str
+
+
+class AnalyticsEventBatch(BaseModel):
+    """Bulk engagement events, sent once per orchestrator response"""
+    events: List[AnalyticsEvent] = Field(..., description="Events to record")
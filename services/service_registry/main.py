@@ -1,31 +1,54 @@
 """Service Registry - Central service discovery and registration."""
-from typing import Dict, List
-from datetime import datetime
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from core.service_registry import ServiceInfo
+from core.service_registry import ServiceInfo, InstanceHeartbeat
 from shared.utils.logger import setup_logger, LogEmoji
 from shared.config import settings
 
 
 class ServiceRegistry:
-    """Service Registry for dynamic service discovery."""
+    """
+    Service Registry for dynamic service discovery.
+
+    Each service may run several instances (replicas), keyed by instance_id.
+    Instances that miss heartbeats for SERVICE_HEARTBEAT_TTL seconds are
+    dropped. Every membership change bumps `index`; clients watch a service
+    by long-polling /services/{name}/instances with the last index seen.
+    """
 
     def __init__(self):
         self.name = "service_registry"
-        self.version = "1.0.0"
+        self.version = "1.1.0"
         self.logger = setup_logger(self.name, level=settings.LOG_LEVEL)
 
-        # In-memory service storage (use Redis in production)
-        self.services: Dict[str, ServiceInfo] = {}
+        # In-memory storage: service name -> instance_id -> info (use Redis in production)
+        self.services: Dict[str, Dict[str, ServiceInfo]] = {}
+        self.ttl = timedelta(seconds=settings.SERVICE_HEARTBEAT_TTL)
+
+        # Membership version for watches
+        self.index = 0
+        self._changed: Optional[asyncio.Condition] = None
+        self._expiry_task: Optional[asyncio.Task] = None
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            self._changed = asyncio.Condition()
+            self._expiry_task = asyncio.create_task(self._expiry_loop())
+            yield
+            self._expiry_task.cancel()
 
         # FastAPI app
         self.app = FastAPI(
             title="Service Registry",
             version=self.version,
-            description="Central service discovery and registration"
+            description="Central service discovery and registration",
+            lifespan=lifespan
         )
 
         # Add CORS
@@ -39,6 +62,41 @@ class ServiceRegistry:
 
         self.setup_routes()
 
+    def _instances(self, service_name: str) -> List[ServiceInfo]:
+        return list(self.services.get(service_name, {}).values())
+
+    def _all_instances(self) -> List[ServiceInfo]:
+        return [info for instances in self.services.values() for info in instances.values()]
+
+    async def _bump(self):
+        """Record a membership change and wake up watchers."""
+        self.index += 1
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def _remove(self, service_name: str, instance_id: str) -> bool:
+        instances = self.services.get(service_name, {})
+        if instances.pop(instance_id, None) is None:
+            return False
+        if not instances:
+            self.services.pop(service_name, None)
+        await self._bump()
+        return True
+
+    async def _expiry_loop(self):
+        """Drop instances whose heartbeats stopped."""
+        while True:
+            await asyncio.sleep(max(1.0, self.ttl.total_seconds() / 3))
+            cutoff = datetime.now() - self.ttl
+            for info in self._all_instances():
+                if info.last_heartbeat and info.last_heartbeat < cutoff:
+                    await self._remove(info.name, info.instance_id)
+                    self.logger.warning(
+                        f"{LogEmoji.WARNING} Expired {info.name} instance {info.instance_id} "
+                        f"(no heartbeat since {info.last_heartbeat.isoformat()})"
+                    )
+
     def setup_routes(self):
         """Setup API routes."""
 
@@ -47,7 +105,8 @@ class ServiceRegistry:
             return {
                 "service": self.name,
                 "version": self.version,
-                "registered_services": len(self.services)
+                "registered_services": len(self.services),
+                "registered_instances": len(self._all_instances())
             }
 
         @self.app.get("/health")
@@ -56,68 +115,128 @@ class ServiceRegistry:
                 "status": "healthy",
                 "service": self.name,
                 "version": self.version,
-                "registered_services": len(self.services)
+                "registered_services": len(self.services),
+                "registered_instances": len(self._all_instances()),
+                "index": self.index
             }
 
         @self.app.post("/register")
         async def register_service(service_info: ServiceInfo):
-            """Register a new service."""
+            """Register a service instance (re-registering updates it in place)."""
+            if not service_info.instance_id:
+                service_info.instance_id = f"{service_info.host}:{service_info.port}"
             service_info.registered_at = datetime.now()
             service_info.last_heartbeat = datetime.now()
 
-            self.services[service_info.name] = service_info
-            self.logger.info(
-                f"{LogEmoji.SUCCESS} Registered service: {service_info.name} "
-                f"at {service_info.host}:{service_info.port}"
-            )
+            instances = self.services.setdefault(service_info.name, {})
+            is_new = service_info.instance_id not in instances
+            instances[service_info.instance_id] = service_info
+            if is_new:
+                await self._bump()
+                self.logger.info(
+                    f"{LogEmoji.SUCCESS} Registered service: {service_info.name} "
+                    f"at {service_info.host}:{service_info.port} ({len(instances)} instance(s))"
+                )
 
             return {
                 "status": "registered",
                 "service": service_info.name,
+                "instance_id": service_info.instance_id,
                 "capabilities": service_info.capabilities
             }
 
         @self.app.delete("/services/{service_name}")
         async def deregister_service(service_name: str):
-            """Deregister a service."""
+            """Deregister every instance of a service."""
             if service_name in self.services:
                 del self.services[service_name]
+                await self._bump()
                 self.logger.info(f"{LogEmoji.INFO} Deregistered service: {service_name}")
                 return {"status": "deregistered", "service": service_name}
 
             raise HTTPException(status_code=404, detail="Service not found")
 
+        @self.app.delete("/services/{service_name}/instances/{instance_id}")
+        async def deregister_instance(service_name: str, instance_id: str):
+            """Deregister one instance of a service."""
+            if await self._remove(service_name, instance_id):
+                self.logger.info(f"{LogEmoji.INFO} Deregistered {service_name} instance {instance_id}")
+                return {"status": "deregistered", "service": service_name, "instance_id": instance_id}
+
+            raise HTTPException(status_code=404, detail="Instance not found")
+
         @self.app.get("/services")
         async def get_all_services():
-            """Get all registered services."""
-            return list(self.services.values())
+            """Get all registered service instances."""
+            return self._all_instances()
 
         @self.app.get("/services/{service_name}")
         async def get_service(service_name: str):
-            """Get information about a specific service."""
-            if service_name in self.services:
-                return self.services[service_name]
+            """Get the least loaded instance of a service."""
+            instances = self._instances(service_name)
+            if instances:
+                return min(instances, key=lambda i: (i.inflight, i.latency_ms or 0.0))
 
             raise HTTPException(status_code=404, detail="Service not found")
 
+        @self.app.get("/services/{service_name}/instances")
+        async def get_instances(
+            service_name: str,
+            index: Optional[int] = Query(None, description="Last index seen; with wait, block until it changes"),
+            wait: float = Query(0, ge=0, le=60, description="Max seconds to block")
+        ):
+            """List the instances of a service (long-poll watch with index + wait)."""
+            if index is not None and wait > 0 and index == self.index:
+                try:
+                    async with self._changed:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self.index != index), timeout=wait
+                        )
+                except asyncio.TimeoutError:
+                    pass
+
+            return {
+                "service": service_name,
+                "index": self.index,
+                "instances": self._instances(service_name)
+            }
+
         @self.app.get("/services/capability/{capability}")
         async def find_by_capability(capability: str):
-            """Find services by capability."""
+            """Find service instances by capability."""
             matching_services = [
-                service for service in self.services.values()
+                service for service in self._all_instances()
                 if capability in service.capabilities
             ]
             return matching_services
 
         @self.app.post("/heartbeat/{service_name}")
         async def heartbeat(service_name: str):
-            """Update service heartbeat."""
+            """Update heartbeat of every instance of a service."""
             if service_name in self.services:
-                self.services[service_name].last_heartbeat = datetime.now()
+                for info in self._instances(service_name):
+                    info.last_heartbeat = datetime.now()
                 return {"status": "ok", "service": service_name}
 
             raise HTTPException(status_code=404, detail="Service not found")
 
+        @self.app.post("/heartbeat/{service_name}/{instance_id}")
+        async def instance_heartbeat(
+            service_name: str,
+            instance_id: str,
+            load: Optional[InstanceHeartbeat] = None
+        ):
+            """Update heartbeat and load of one instance (404 = register again)."""
+            info = self.services.get(service_name, {}).get(instance_id)
+            if info is None:
+                raise HTTPException(status_code=404, detail="Instance not found")
+
+            info.last_heartbeat = datetime.now()
+            if load is not None:
+                info.inflight = load.inflight
+                info.latency_ms = load.latency_ms
+            return {"status": "ok", "service": service_name, "instance_id": instance_id}
+
     def run(self):
         """Run the service registry."""
         self.logger.info(f"{LogEmoji.STARTUP} Starting Service Registry v{self.version}")
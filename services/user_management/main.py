@@ -6,10 +6,9 @@ for both sellers and buyers.
 """
 
 import jwt
-import bcrypt
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 import asyncpg
 import os
@@ -28,6 +27,8 @@ from shared.models.users import (
 )
 from shared.config import settings
 from shared.utils.logger import LogEmoji
+from shared.utils.password_hasher import PasswordHasher, HasherOverloaded
+from shared.utils.auth import ProfileCache
 
 
 class UserManagementService(BaseService):
@@ -38,13 +39,20 @@ class UserManagementService(BaseService):
             name="user_management",
             version="1.0.0",
             capabilities=["user_auth", "user_crud", "seller_verification"],
-            port=8080
+            port=8080,
+            auth=True
         )
 
         self.db_pool: Optional[asyncpg.Pool] = None
         self.jwt_secret = settings.JWT_SECRET_KEY
         self.jwt_algorithm = settings.JWT_ALGORITHM
 
+        # bcrypt runs in a process pool so hashing never blocks the event loop
+        self.hasher = PasswordHasher(self.name)
+
+        # /users/me responses by user_id (invalidated on profile update and login)
+        self.profiles = ProfileCache()
+
     async def startup(self):
         """Initialize database connection pool"""
         try:
@@ -63,8 +71,11 @@ class UserManagementService(BaseService):
             self.logger.error(f"{LogEmoji.ERROR} Failed to connect to database: {e}")
             raise
 
+        self.hasher.start()
+
     async def shutdown(self):
-        """Close database connection pool"""
+        """Close database connection pool and hashing pool"""
+        await self.hasher.stop()
         if self.db_pool:
             await self.db_pool.close()
             self.logger.info(f"{LogEmoji.INFO} Database pool closed")
@@ -72,6 +83,17 @@ class UserManagementService(BaseService):
     def setup_routes(self):
         """Setup API routes"""
 
+        @self.app.get("/health")
+        async def health():
+            return {
+                "status": "healthy",
+                "service": self.name,
+                "version": self.version,
+                "password_hasher": self.hasher.get_stats(),
+                "token_cache": self.authenticator.tokens.get_stats(),
+                "profile_cache": self.profiles.get_stats()
+            }
+
         @self.app.post("/register", response_model=AuthTokens)
         async def register(user_data: UserRegistration):
             """
@@ -89,15 +111,13 @@ class UserManagementService(BaseService):
                         user_data.email
                     )
 
-                    if existing:
-                        raise HTTPException(status_code=400, detail="Email already registered")
+                if existing:
+                    raise HTTPException(status_code=400, detail="Email already registered")
 
-                    # Hash password
-                    password_hash = bcrypt.hashpw(
-                        user_data.password.encode('utf-8'),
-                        bcrypt.gensalt()
-                    ).decode('utf-8')
+                # Hash password (off the event loop, without holding a connection)
+                password_hash = await self.hasher.hash(user_data.password)
 
+                async with self.db_pool.acquire() as conn:
                     # Generate user ID
                     import uuid
                     user_id = str(uuid.uuid4())
@@ -126,8 +146,8 @@ class UserManagementService(BaseService):
                         now, now, now
                     )
 
-                    # TODO: Store password hash in separate table
-                    # For now, using Open WebUI's auth table if it exists
+                    # Password hash lives in Open WebUI's auth table (if it exists)
+                    await self._store_password_hash(conn, user_id, user_data.email, password_hash)
 
                     self.logger.info(f"{LogEmoji.SUCCESS} User registered: {user_id}")
 
@@ -157,6 +177,8 @@ class UserManagementService(BaseService):
 
             except HTTPException:
                 raise
+            except HasherOverloaded:
+                raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
             except Exception as e:
                 self.logger.error(f"{LogEmoji.ERROR} Registration failed: {e}")
                 raise HTTPException(status_code=500, detail="Registration failed")
@@ -182,15 +204,27 @@ class UserManagementService(BaseService):
                     if not user:
                         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-                    # TODO: Verify password hash
-                    # For MVP, accepting any password for testing
+                    stored_hash = await self._get_password_hash(conn, user['id'])
 
+                # Verify password (off the event loop, without holding a connection)
+                if stored_hash:
+                    if not await self.hasher.verify(credentials.password, stored_hash):
+                        raise HTTPException(status_code=401, detail="Invalid credentials")
+                    if self.hasher.needs_rehash(stored_hash):
+                        await self._rehash_password(user, credentials.password)
+                else:
+                    # No stored hash (accounts created before hashes were stored):
+                    # MVP behaviour, any password is accepted
+                    self.logger.warning(f"{LogEmoji.WARNING} No password hash stored for {user['id']}")
+
+                async with self.db_pool.acquire() as conn:
                     # Update last active
                     now = int(datetime.utcnow().timestamp())
                     await conn.execute(
                         'UPDATE "user" SET last_active_at = $1 WHERE id = $2',
                         now, user['id']
                     )
+                    self.profiles.invalidate(user['id'])
 
                     self.logger.info(f"{LogEmoji.SUCCESS} User logged in: {user['id']}")
 
@@ -224,14 +258,18 @@ class UserManagementService(BaseService):
 
             except HTTPException:
                 raise
+            except HasherOverloaded:
+                raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
             except Exception as e:
                 self.logger.error(f"{LogEmoji.ERROR} Login failed: {e}")
                 raise HTTPException(status_code=500, detail="Login failed")
 
         @self.app.get("/users/me", response_model=UserResponse)
-        async def get_current_user(authorization: str = Header(None)):
+        async def get_current_user(user_id: str = Depends(self.authenticator.require_user)):
             """Get current user from JWT token"""
-            user_id = await self._verify_token(authorization)
+            cached = self.profiles.get(user_id)
+            if cached is not None:
+                return cached
 
             async with self.db_pool.acquire() as conn:
                 user = await conn.fetchrow(
@@ -248,7 +286,7 @@ class UserManagementService(BaseService):
                 if not user:
                     raise HTTPException(status_code=404, detail="User not found")
 
-                return UserResponse(
+                profile = UserResponse(
                     id=user['id'],
                     email=user['email'],
                     user_type=UserType(user['user_type']),
@@ -260,14 +298,15 @@ class UserManagementService(BaseService):
                     created_at=datetime.utcfromtimestamp(user['created_at']),
                     last_active_at=datetime.utcfromtimestamp(user['last_active_at'])
                 )
+                self.profiles.set(user_id, profile)
+                return profile
 
         @self.app.put("/users/me", response_model=UserResponse)
         async def update_profile(
             update_data: UserUpdate,
-            authorization: str = Header(None)
+            user_id: str = Depends(self.authenticator.require_user)
         ):
             """Update user profile"""
-            user_id = await self._verify_token(authorization)
 
             async with self.db_pool.acquire() as conn:
                 # Build update query dynamically
@@ -317,6 +356,7 @@ class UserManagementService(BaseService):
                 '''
 
                 user = await conn.fetchrow(query, *values)
+                self.profiles.invalidate(user_id)
 
                 return UserResponse(
                     id=user['id'],
@@ -331,6 +371,38 @@ class UserManagementService(BaseService):
                     last_active_at=datetime.utcfromtimestamp(user['last_active_at'])
                 )
 
+    async def _get_password_hash(self, conn, user_id: str) -> Optional[str]:
+        """Stored bcrypt hash of a user (Open WebUI's auth table), None if there is none"""
+        try:
+            return await conn.fetchval('SELECT password FROM auth WHERE id = $1', user_id)
+        except asyncpg.UndefinedTableError:
+            return None
+
+    async def _store_password_hash(self, conn, user_id: str, email: str, password_hash: str):
+        """Insert or replace a user's bcrypt hash"""
+        try:
+            await conn.execute(
+                '''
+                INSERT INTO auth (id, email, password, active)
+                VALUES ($1, $2, $3, TRUE)
+                ON CONFLICT (id) DO UPDATE SET password = EXCLUDED.password
+                ''',
+                user_id, email, password_hash
+            )
+        except asyncpg.UndefinedTableError:
+            self.logger.warning(f"{LogEmoji.WARNING} No auth table, password hash not stored for {user_id}")
+
+    async def _rehash_password(self, user, password: str):
+        """Re-hash at the configured cost after a successful login (failures only logged)"""
+        try:
+            password_hash = await self.hasher.hash(password)
+            async with self.db_pool.acquire() as conn:
+                await self._store_password_hash(conn, user['id'], user['email'], password_hash)
+            self.hasher.stats["rehashes"] += 1
+            self.logger.info(f"{LogEmoji.SUCCESS} Re-hashed password of {user['id']} at cost {self.hasher.rounds}")
+        except Exception as e:
+            self.logger.warning(f"{LogEmoji.WARNING} Password re-hash failed for {user['id']}: {e}")
+
     def _generate_token(self, user_id: str, email: str, user_type: UserType) -> str:
         """Generate JWT token"""
         payload = {
@@ -341,21 +413,6 @@ class UserManagementService(BaseService):
         }
         return jwt.encode(payload, self.jwt_secret, algorithm=self.jwt_algorithm)
 
-    async def _verify_token(self, authorization: Optional[str]) -> str:
-        """Verify JWT token and return user_id"""
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Authorization header missing")
-
-        try:
-            # Extract token from "Bearer <token>"
-            token = authorization.replace("Bearer ", "")
-            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
-            return payload["sub"]  # user_id
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="Token expired")
-        except jwt.InvalidTokenError:
-            raise HTTPException(status_code=401, detail="Invalid token")
-
 
 # Create service instance
 service = UserManagementService()
@@ -70,6 +70,84 @@ class Settings(BaseSettings):
     # MEDIUM FIX Bug#13: Configurable Embedding Model
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
 
+    # Query embedding service (services/db_gateway/embedding_service.py)
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_DISK_CACHE_DIR: str = os.getenv("EMBEDDING_DISK_CACHE_DIR", "/tmp/ree_ai/embedding_cache")
+    EMBEDDING_DISK_CACHE_ENTRIES: int = int(os.getenv("EMBEDDING_DISK_CACHE_ENTRIES", "100000"))
+
+    # Streaming bulk indexing (services/db_gateway/bulk_indexer.py)
+    BULK_CHUNK_BYTES: int = int(os.getenv("BULK_CHUNK_BYTES", str(5 * 1024 * 1024)))
+    BULK_CHUNK_DOCS: int = int(os.getenv("BULK_CHUNK_DOCS", "1000"))
+    BULK_CONCURRENCY: int = int(os.getenv("BULK_CONCURRENCY", "4"))
+    BULK_MAX_RETRIES: int = int(os.getenv("BULK_MAX_RETRIES", "3"))
+
+    # Crawler listing metadata extraction (services/crawler/metadata_extractor.py)
+    CRAWLER_METADATA_CACHE_PATH: str = os.getenv("CRAWLER_METADATA_CACHE_PATH", "/tmp/ree_ai/crawler/metadata_cache.jsonl")
+    CRAWLER_LLM_BATCH_SIZE: int = int(os.getenv("CRAWLER_LLM_BATCH_SIZE", "20"))
+    CRAWLER_LLM_CONCURRENCY: int = int(os.getenv("CRAWLER_LLM_CONCURRENCY", "4"))
+
+    # Search result cache (services/db_gateway/result_cache.py)
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_FRESH_TTL: int = int(os.getenv("SEARCH_CACHE_FRESH_TTL", "60"))
+    SEARCH_CACHE_STALE_TTL: int = int(os.getenv("SEARCH_CACHE_STALE_TTL", "600"))
+
+    # Market price statistics (services/db_gateway/market_stats.py)
+    MARKET_STATS_REFRESH_INTERVAL: float = float(os.getenv("MARKET_STATS_REFRESH_INTERVAL", "300"))
+    MARKET_STATS_IDLE_TTL: float = float(os.getenv("MARKET_STATS_IDLE_TTL", "3600"))
+    MARKET_STATS_MAX_SEGMENTS: int = int(os.getenv("MARKET_STATS_MAX_SEGMENTS", "5000"))
+
+    # Semantic LLM response cache (shared/utils/redis_cache.py)
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+
+    # Orchestrator pipeline stages (services/orchestrator/stage_executor.py)
+    ORCHESTRATOR_SPECULATIVE_EXTRACTION: bool = os.getenv("ORCHESTRATOR_SPECULATIVE_EXTRACTION", "true").lower() == "true"
+
+    # Write-behind conversation persistence (services/orchestrator/conversation_log.py)
+    CONVERSATION_LOG_BATCH_SIZE: int = int(os.getenv("CONVERSATION_LOG_BATCH_SIZE", "200"))
+    CONVERSATION_LOG_FLUSH_INTERVAL: float = float(os.getenv("CONVERSATION_LOG_FLUSH_INTERVAL", "0.5"))
+    CONVERSATION_LOG_MAX_RETRIES: int = int(os.getenv("CONVERSATION_LOG_MAX_RETRIES", "3"))
+    CONVERSATION_LOG_MAX_PENDING: int = int(os.getenv("CONVERSATION_LOG_MAX_PENDING", "20000"))
+    CONVERSATION_HISTORY_BUFFER_SIZE: int = int(os.getenv("CONVERSATION_HISTORY_BUFFER_SIZE", "20"))
+    CONVERSATION_HISTORY_TTL: float = float(os.getenv("CONVERSATION_HISTORY_TTL", "300"))
+    CONVERSATION_ID_TOUCH_INTERVAL: float = float(os.getenv("CONVERSATION_ID_TOUCH_INTERVAL", "60"))
+
+    # Agent memory persistence (shared/memory/backends.py, shared/memory/persistent_store.py)
+    MEMORY_BACKEND: str = os.getenv("MEMORY_BACKEND", "file")  # memory | file | postgres
+    MEMORY_FILE_DIR: str = os.getenv("MEMORY_FILE_DIR", "/tmp/ree_ai/memory")
+    MEMORY_MAX_PER_USER: int = int(os.getenv("MEMORY_MAX_PER_USER", "500"))
+    MEMORY_MAX_LOADED_PARTITIONS: int = int(os.getenv("MEMORY_MAX_LOADED_PARTITIONS", "10000"))
+    MEMORY_EMBEDDING_MODEL: str = os.getenv("MEMORY_EMBEDDING_MODEL", "text-embedding-3-small")
+    MEMORY_SEMANTIC_MIN_SIMILARITY: float = float(os.getenv("MEMORY_SEMANTIC_MIN_SIMILARITY", "0.3"))
+
+    # Geo lookups (shared/master_data/gazetteer.py, services/orchestrator/geo_memo.py)
+    GEO_MEMO_PATH: str = os.getenv("GEO_MEMO_PATH", "/tmp/ree_ai/geo_memo.json")  # "" = in process only
+    GEO_MEMO_MAX_ENTRIES: int = int(os.getenv("GEO_MEMO_MAX_ENTRIES", "10000"))
+
+    # Service discovery (services/service_registry/main.py, core/service_registry.py)
+    SERVICE_HEARTBEAT_INTERVAL: int = int(os.getenv("SERVICE_HEARTBEAT_INTERVAL", "10"))
+    SERVICE_HEARTBEAT_TTL: int = int(os.getenv("SERVICE_HEARTBEAT_TTL", "30"))  # Instances silent this long are dropped
+    SERVICE_ADVERTISE_HOST: str = os.getenv("SERVICE_ADVERTISE_HOST", "")  # "" = container IP
+    SERVICE_DISCOVERY_MODE: str = os.getenv("SERVICE_DISCOVERY_MODE", "watch")  # watch | poll | off
+    SERVICE_DISCOVERY_POLL_INTERVAL: int = int(os.getenv("SERVICE_DISCOVERY_POLL_INTERVAL", "10"))
+    SERVICE_LB_STRATEGY: str = os.getenv("SERVICE_LB_STRATEGY", "p2c")  # p2c | least_outstanding
+    SERVICE_OUTLIER_CONSECUTIVE_FAILURES: int = int(os.getenv("SERVICE_OUTLIER_CONSECUTIVE_FAILURES", "5"))
+    SERVICE_OUTLIER_EJECTION_TIME: int = int(os.getenv("SERVICE_OUTLIER_EJECTION_TIME", "30"))
+    SERVICE_OUTLIER_MAX_EJECTION_PERCENT: int = int(os.getenv("SERVICE_OUTLIER_MAX_EJECTION_PERCENT", "50"))
+
+    # Password hashing (shared/utils/password_hasher.py)
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))  # bcrypt cost; changing it re-hashes on login
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+    # Auth caches (shared/utils/auth.py)
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_PROFILE_CACHE_TTL: int = int(os.getenv("AUTH_PROFILE_CACHE_TTL", "30"))  # Seconds other replicas may serve a stale profile
+    AUTH_PROFILE_CACHE_SIZE: int = int(os.getenv("AUTH_PROFILE_CACHE_SIZE", "10000"))
+
     # MEDIUM FIX Bug#14: Configurable Timeout Values (in seconds)
     CLASSIFICATION_TIMEOUT: int = int(os.getenv("CLASSIFICATION_TIMEOUT", "30"))
     EXTRACTION_TIMEOUT: int = int(os.getenv("EXTRACTION_TIMEOUT", "30"))
@@ -1,4 +1,5 @@
 """Database utilities and repositories"""
 from shared.database.master_data_repository import MasterDataRepository, get_master_data_repository
+from shared.database.master_data_index import MasterDataIndex, get_master_data_index
 
-__all__ = ["MasterDataRepository", "get_master_data_repository"]
+__all__ = ["MasterDataRepository", "get_master_data_repository", "MasterDataIndex", "get_master_data_index"]
@@ -0,0 +1,486 @@
+"""
+Master Data Index
+Warm in-memory index over PostgreSQL master data for entity normalization
+
+Loads every master table once (code, aliases and all translations) into hash
+maps plus a RapidFuzz choice list, so normalization on the search/posting hot
+path is a dictionary lookup or a single `process.extractOne` call instead of
+several SQL round trips. The index is refreshed on `master_data_changed`
+LISTEN/NOTIFY events (see database/migrations/009_master_data_notify.sql)
+with a periodic version check as fallback.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Tuple
+
+import asyncpg
+
+from shared.utils.logger import setup_logger, LogEmoji
+
+try:
+    from rapidfuzz import process, fuzz
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    from fuzzywuzzy import process, fuzz
+    HAS_RAPIDFUZZ = False
+
+
+NOTIFY_CHANNEL = "master_data_changed"
+
+
+@dataclass
+class EntityRecord:
+    """One master data row with every known spelling of its name"""
+    id: int
+    code: str
+    name_en: str
+    name_vi: Optional[str] = None
+    translations: Dict[str, str] = field(default_factory=dict)  # lang_code -> name
+    aliases: List[str] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def name_in(self, language: str) -> Optional[str]:
+        """Get name in a language (falls back to None if untranslated)"""
+        if language in self.translations:
+            return self.translations[language]
+        if language == "vi":
+            return self.name_vi
+        if language == "en":
+            return self.name_en
+        return None
+
+
+@dataclass
+class EntityMatch:
+    """Result of an index lookup"""
+    record: EntityRecord
+    confidence: float
+    match_type: str  # exact | alias | translation | substring | fuzzy
+
+
+def _norm(text: Optional[str]) -> str:
+    """Lowercase + collapse whitespace"""
+    return " ".join(text.lower().split()) if text else ""
+
+
+class EntityIndex:
+    """
+    Lookup structures for one master table
+
+    - by_code: code -> record
+    - by_alias: alias -> record
+    - by_name: lang -> {name -> record}, plus "*" for any language
+    - fuzzy choices: flat list of every name/alias for extractOne
+    """
+
+    def __init__(self, records: List[EntityRecord]):
+        self.records = records
+        self.by_code: Dict[str, EntityRecord] = {}
+        self.by_alias: Dict[str, EntityRecord] = {}
+        self.by_name: Dict[str, Dict[str, EntityRecord]] = {"*": {}}
+        self._choices: List[str] = []
+        self._choice_records: List[EntityRecord] = []
+        self._choices_by_lang: Dict[str, Tuple[List[str], List[EntityRecord]]] = {}
+        self._choice_maps: Dict[Optional[Tuple[str, ...]], Tuple[Dict[int, str], List[EntityRecord]]] = {}
+
+        for record in records:
+            self.by_code.setdefault(_norm(record.code), record)
+            for alias in record.aliases:
+                self.by_alias.setdefault(_norm(alias), record)
+
+            names = {"en": record.name_en}
+            if record.name_vi:
+                names["vi"] = record.name_vi
+            names.update(record.translations)
+
+            for lang, name in names.items():
+                key = _norm(name)
+                if not key:
+                    continue
+                self.by_name.setdefault(lang, {}).setdefault(key, record)
+                self.by_name["*"].setdefault(key, record)
+                self._add_choice(lang, key, record)
+
+            for alias in record.aliases:
+                self._add_choice("*", _norm(alias), record)
+
+    def _add_choice(self, lang: str, text: str, record: EntityRecord):
+        self._choices.append(text)
+        self._choice_records.append(record)
+        choices, owners = self._choices_by_lang.setdefault(lang, ([], []))
+        choices.append(text)
+        owners.append(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _choice_map(
+        self,
+        languages: Optional[Tuple[str, ...]]
+    ) -> Tuple[Dict[int, str], List[EntityRecord]]:
+        """Position -> name map for extractOne, memoized per language set"""
+        cached = self._choice_maps.get(languages)
+        if cached is not None:
+            return cached
+
+        if languages is None:
+            choices, owners = self._choices, self._choice_records
+        else:
+            choices, owners = [], []
+            for lang in languages:
+                lang_choices, lang_owners = self._choices_by_lang.get(lang, ([], []))
+                choices.extend(lang_choices)
+                owners.extend(lang_owners)
+
+        result = (dict(enumerate(choices)), owners)
+        self._choice_maps[languages] = result
+        return result
+
+    def lookup_exact(self, value: str, language: Optional[str] = None) -> Optional[EntityMatch]:
+        """Code, alias or name (in `language` first, then any language)"""
+        key = _norm(value)
+        if not key:
+            return None
+
+        record = self.by_code.get(key)
+        if record:
+            return EntityMatch(record, 1.0, "exact")
+
+        if language and key in self.by_name.get(language, {}):
+            return EntityMatch(self.by_name[language][key], 1.0, "exact")
+
+        record = self.by_alias.get(key)
+        if record:
+            return EntityMatch(record, 0.95, "alias")
+
+        record = self.by_name["*"].get(key)
+        if record:
+            return EntityMatch(record, 1.0, "translation")
+
+        return None
+
+    def lookup_substring(self, value: str, language: str = "vi") -> Optional[EntityMatch]:
+        """First name in `language` containing the input (SQL LIKE '%x%' equivalent)"""
+        key = _norm(value)
+        if not key:
+            return None
+        for name, record in self.by_name.get(language, {}).items():
+            if key in name:
+                return EntityMatch(record, 0.85, "substring")
+        return None
+
+    def lookup_fuzzy(
+        self,
+        value: str,
+        threshold: float = 0.7,
+        languages: Optional[List[str]] = None
+    ) -> Optional[EntityMatch]:
+        """
+        Best fuzz.ratio match over names in the given languages
+        (all names and aliases when languages is None)
+        """
+        key = _norm(value)
+        if not key:
+            return None
+
+        choices, owners = self._choice_map(tuple(languages) if languages else None)
+        if not choices:
+            return None
+
+        # Same (choice, score, key) result shape in rapidfuzz and fuzzywuzzy
+        best = process.extractOne(
+            key, choices, processor=None, scorer=fuzz.ratio, score_cutoff=threshold * 100
+        )
+        if not best:
+            return None
+        _, score, position = best
+
+        return EntityMatch(owners[position], score / 100.0, "fuzzy")
+
+    def match(
+        self,
+        value: str,
+        language: Optional[str] = None,
+        threshold: float = 0.7
+    ) -> Optional[EntityMatch]:
+        """Exact/alias/translation lookup, then fuzzy"""
+        languages = list(dict.fromkeys([language, "en"])) if language else None
+        return self.lookup_exact(value, language) or self.lookup_fuzzy(
+            value, threshold, languages
+        )
+
+
+class MasterDataIndex:
+    """
+    Process-wide index over all master data tables
+
+    Two schemas are indexed side by side:
+    - i18n schema (districts/property_types/... + *_translations), used by FuzzyMatcher
+    - master_* schema (code/name_vi/name_en/aliases), used by MasterDataRepository
+    Tables missing from the database are skipped.
+    """
+
+    # table -> (translation table, fk column, extra columns)
+    I18N_TABLES: Dict[str, Tuple[str, str, List[str]]] = {
+        "districts": ("districts_translations", "district_id", ["city_id"]),
+        "property_types": ("property_types_translations", "property_type_id", ["category"]),
+        "amenities": ("amenities_translations", "amenity_id", ["category"]),
+        "directions": ("directions_translations", "direction_id", []),
+        "furniture_types": ("furniture_types_translations", "furniture_type_id", []),
+        "legal_statuses": ("legal_statuses_translations", "legal_status_id", []),
+        "view_types": ("view_types_translations", "view_type_id", []),
+    }
+
+    MASTER_TABLES: List[str] = [
+        "master_districts",
+        "master_property_types",
+        "master_amenities",
+        "master_furniture_types",
+        "master_directions",
+        "master_legal_status",
+        "master_countries",
+        "master_currencies",
+    ]
+
+    def __init__(self, poll_interval: float = 300.0):
+        """
+        Args:
+            poll_interval: Seconds between version checks when no NOTIFY arrives
+        """
+        self.logger = setup_logger("master_data_index")
+        self.poll_interval = poll_interval
+        self.tables: Dict[str, EntityIndex] = {}
+        self.version: Optional[str] = None
+        self.hcmc_city_id: Optional[int] = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_event = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.tables)
+
+    def get(self, table: str) -> Optional[EntityIndex]:
+        """Get index for a table (None if not loaded)"""
+        return self.tables.get(table)
+
+    # ============================================================
+    # LOADING
+    # ============================================================
+
+    async def load(self, pool: asyncpg.Pool):
+        """Build all table indexes and swap them in atomically"""
+        async with self._lock:
+            tables: Dict[str, EntityIndex] = {}
+            async with pool.acquire() as conn:
+                for table, spec in self.I18N_TABLES.items():
+                    records = await self._load_i18n_table(conn, table, *spec)
+                    if records is not None:
+                        tables[table] = EntityIndex(records)
+
+                for table in self.MASTER_TABLES:
+                    records = await self._load_master_table(conn, table)
+                    if records is not None:
+                        tables[table] = EntityIndex(records)
+
+                try:
+                    self.hcmc_city_id = await conn.fetchval("SELECT id FROM cities WHERE code = 'hcmc'")
+                except asyncpg.UndefinedTableError:
+                    self.hcmc_city_id = None
+
+                self.version = await self._fetch_version(conn)
+
+            # FuzzyMatcher only matches districts of Ho Chi Minh City
+            if self.hcmc_city_id is not None and "districts" in tables:
+                tables["districts:hcmc"] = EntityIndex([
+                    r for r in tables["districts"].records
+                    if r.extra.get("city_id") == self.hcmc_city_id
+                ])
+
+            self.tables = tables
+            self.logger.info(
+                f"{LogEmoji.SUCCESS} Master data index loaded: "
+                + ", ".join(f"{name}={len(idx)}" for name, idx in tables.items())
+            )
+
+    async def _load_i18n_table(
+        self,
+        conn: asyncpg.Connection,
+        table: str,
+        translation_table: str,
+        fk_field: str,
+        extra_columns: List[str]
+    ) -> Optional[List[EntityRecord]]:
+        extra_select = "".join(f", m.{col}" for col in extra_columns)
+        query = f"""
+            SELECT
+                m.id,
+                m.code,
+                m.name as name_en{extra_select},
+                t.lang_code,
+                t.translated_text
+            FROM {table} m
+            LEFT JOIN {translation_table} t ON m.id = t.{fk_field}
+            ORDER BY m.id
+        """
+        try:
+            rows = await conn.fetch(query)
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError) as e:
+            self.logger.debug(f"{LogEmoji.INFO} Skipping {table}: {e}")
+            return None
+
+        records: Dict[int, EntityRecord] = {}
+        for row in rows:
+            record = records.get(row['id'])
+            if record is None:
+                record = EntityRecord(
+                    id=row['id'],
+                    code=row['code'],
+                    name_en=row['name_en'],
+                    extra={col: row[col] for col in extra_columns}
+                )
+                records[row['id']] = record
+            if row['lang_code'] and row['translated_text']:
+                record.translations[row['lang_code']] = row['translated_text']
+                if row['lang_code'] == 'vi':
+                    record.name_vi = row['translated_text']
+        return list(records.values())
+
+    async def _load_master_table(
+        self,
+        conn: asyncpg.Connection,
+        table: str
+    ) -> Optional[List[EntityRecord]]:
+        try:
+            rows = await conn.fetch(f"SELECT * FROM {table} WHERE active = TRUE ORDER BY sort_order, id")
+        except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+            try:
+                rows = await conn.fetch(f"SELECT * FROM {table} WHERE active = TRUE")
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError) as e:
+                self.logger.debug(f"{LogEmoji.INFO} Skipping {table}: {e}")
+                return None
+
+        records = []
+        for row in rows:
+            data = dict(row)
+            aliases = list(data.get('aliases') or [])
+            if data.get('code_2'):
+                aliases.append(data['code_2'])
+            records.append(EntityRecord(
+                id=data['id'],
+                code=data['code'],
+                name_en=data.get('name_en') or data['code'],
+                name_vi=data.get('name_vi'),
+                aliases=aliases,
+                extra={k: v for k, v in data.items() if k in ('city', 'category')}
+            ))
+        return records
+
+    async def _fetch_version(self, conn: asyncpg.Connection) -> str:
+        """Cheap change signature: row count + last update per indexed table"""
+        parts = []
+        for table in list(self.I18N_TABLES) + self.MASTER_TABLES:
+            try:
+                row = await conn.fetchrow(f"SELECT COUNT(*) AS n, MAX(updated_at) AS ts FROM {table}")
+                parts.append(f"{table}:{row['n']}:{row['ts']}")
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+                continue
+        for translation_table, _, _ in self.I18N_TABLES.values():
+            try:
+                count = await conn.fetchval(f"SELECT COUNT(*) FROM {translation_table}")
+                parts.append(f"{translation_table}:{count}")
+            except asyncpg.UndefinedTableError:
+                continue
+        return "|".join(parts)
+
+    # ============================================================
+    # REFRESH
+    # ============================================================
+
+    async def start(self, pool: asyncpg.Pool):
+        """Load the index and keep it fresh via LISTEN/NOTIFY + version polling"""
+        if self._pool is not None:
+            return  # Already started by another component in this process
+        self._pool = pool
+        await self.load(pool)
+
+        try:
+            self._listen_conn = await pool.acquire()
+            await self._listen_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            self.logger.info(f"{LogEmoji.SUCCESS} Listening for {NOTIFY_CHANNEL} notifications")
+        except Exception as e:
+            self.logger.warning(f"{LogEmoji.WARNING} LISTEN unavailable, polling only: {e}")
+            self._listen_conn = None
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self, pool: Optional[asyncpg.Pool] = None):
+        """
+        Stop refresh loop and release the listener connection
+
+        Args:
+            pool: Only stop if the index was started with this pool
+        """
+        if pool is not None and pool is not self._pool:
+            return
+
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+        if self._listen_conn is not None and self._pool is not None:
+            try:
+                await self._listen_conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+                await self._pool.release(self._listen_conn)
+            except Exception:
+                pass
+            self._listen_conn = None
+        self._pool = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.logger.info(f"{LogEmoji.INFO} Master data changed ({payload}), scheduling index refresh")
+        self._refresh_event.set()
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._refresh_event.wait(), timeout=self.poll_interval)
+                notified = True
+            except asyncio.TimeoutError:
+                notified = False
+            self._refresh_event.clear()
+
+            try:
+                if notified:
+                    # Coalesce bursts of NOTIFY from bulk edits
+                    await asyncio.sleep(1.0)
+                    self._refresh_event.clear()
+                    await self.load(self._pool)
+                else:
+                    async with self._pool.acquire() as conn:
+                        version = await self._fetch_version(conn)
+                    if version != self.version:
+                        await self.load(self._pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"{LogEmoji.ERROR} Master data index refresh failed: {e}")
+
+
+# Singleton instance
+_master_data_index: Optional[MasterDataIndex] = None
+
+
+def get_master_data_index() -> MasterDataIndex:
+    """Get process-wide master data index (load with `await index.start(pool)`)"""
+    global _master_data_index
+    if _master_data_index is None:
+        _master_data_index = MasterDataIndex()
+    return _master_data_index
@@ -17,14 +17,25 @@ from shared.models.master_data import (
 )
 from shared.config import settings
 from shared.utils.logger import setup_logger, LogEmoji
+from shared.database.master_data_index import get_master_data_index
+
+
+# Sentinel: index not loaded, fall back to SQL
+_NOT_INDEXED = object()
 
 
 class MasterDataRepository:
-    """Repository for master data operations"""
+    """
+    Repository for master data operations
+
+    normalize_* lookups are served from the warm in-memory MasterDataIndex
+    (loaded in connect()); SQL queries are only used when it is unavailable.
+    """
 
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
         self.logger = setup_logger("master_data_repository")
+        self.index = get_master_data_index()
 
     async def connect(self):
         """Create database connection pool"""
@@ -43,12 +54,52 @@ class MasterDataRepository:
             self.logger.error(f"{LogEmoji.ERROR} Failed to connect to PostgreSQL: {e}")
             raise
 
+        try:
+            await self.index.start(self.pool)
+        except Exception as e:
+            self.logger.warning(f"{LogEmoji.WARNING} Master data index unavailable, using SQL lookups: {e}")
+
     async def disconnect(self):
         """Close database connection pool"""
+        await self.index.stop(self.pool)
         if self.pool:
             await self.pool.close()
             self.logger.info(f"{LogEmoji.INFO} Disconnected from PostgreSQL")
 
+    def _normalize_from_index(
+        self,
+        table: str,
+        input_text: str,
+        substring_fallback: bool = False
+    ) -> Any:
+        """
+        Normalize via the in-memory index (same matches as the SQL path:
+        code / name, alias, then optionally name substring)
+
+        Returns:
+            NormalizedEntity, None if no match, or _NOT_INDEXED if the table is not loaded
+        """
+        entity_index = self.index.get(table)
+        if entity_index is None:
+            return _NOT_INDEXED
+
+        match = entity_index.lookup_exact(input_text, "vi")
+        if not match and substring_fallback:
+            match = entity_index.lookup_substring(input_text, "vi")
+        if not match:
+            return None
+
+        return NormalizedEntity(
+            original_value=input_text,
+            normalized_code=match.record.code,
+            normalized_name_vi=match.record.name_vi or match.record.name_en,
+            normalized_name_en=match.record.name_en,
+            confidence=match.confidence,
+            match_type="alias" if match.match_type == "alias"
+            else "fuzzy" if match.match_type == "substring"  # SQL path labels LIKE matches "fuzzy"
+            else "exact"
+        )
+
     # ============================================================
     # DISTRICT OPERATIONS
     # ============================================================
@@ -71,6 +122,12 @@ class MasterDataRepository:
         """
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index(
+            "master_districts", input_text, substring_fallback=True
+        )
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try exact match on code
         query = """
         SELECT code, name_vi, name_en
@@ -147,6 +204,10 @@ class MasterDataRepository:
         """Normalize property type using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_property_types", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try exact match on code
         query = """
         SELECT code, name_vi, name_en
@@ -211,6 +272,10 @@ class MasterDataRepository:
         """Normalize amenity using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_amenities", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try exact match on code
         query = """
         SELECT code, name_vi, name_en
@@ -257,6 +322,10 @@ class MasterDataRepository:
         """Normalize furniture type using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_furniture_types", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try alias match
         query = """
         SELECT code, name_vi, name_en
@@ -285,6 +354,10 @@ class MasterDataRepository:
         """Normalize direction using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_directions", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try alias match
         query = """
         SELECT code, name_vi, name_en
@@ -313,6 +386,10 @@ class MasterDataRepository:
         """Normalize legal status using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_legal_status", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try alias match
         query = """
         SELECT code, name_vi, name_en
@@ -551,6 +628,10 @@ class MasterDataRepository:
         """Normalize country name using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_countries", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try exact match on code or code_2
         query = """
         SELECT code, name_vi, name_en
@@ -620,6 +701,10 @@ class MasterDataRepository:
         """Normalize currency using aliases"""
         input_text = input_text.strip().lower()
 
+        normalized = self._normalize_from_index("master_currencies", input_text)
+        if normalized is not _NOT_INDEXED:
+            return normalized
+
         # Try exact match on code
         query = """
         SELECT code, name_vi, name_en
@@ -4,6 +4,7 @@ Master Data Module for Real Estate Domain
 This module provides centralized, standardized master data for:
 - Cities and provinces (Vietnam's administrative divisions)
 - Districts and locations (HCMC + other cities)
+- Gazetteer for place -> city and nearby-district lookups
 - Property types with their specific attributes
 - Amenities and features
 - Price ranges and validation rules
@@ -15,6 +16,7 @@ All extraction services should use this master data instead of hard-coding value
 from .cities import CityMaster, get_city_master
 from .provinces import ProvinceMaster, get_province_master
 from .districts import DistrictMaster, get_district_master
+from .gazetteer import Gazetteer, get_gazetteer
 from .property_types import PropertyTypeMaster, get_property_type_master
 from .amenities import AmenityMaster, get_amenity_master
 from .price_ranges import PriceRangeMaster, get_price_range_master
@@ -26,6 +28,7 @@ __all__ = [
     "CityMaster",
     "ProvinceMaster",
     "DistrictMaster",
+    "Gazetteer",
     "PropertyTypeMaster",
     "AmenityMaster",
     "PriceRangeMaster",
@@ -35,6 +38,7 @@ __all__ = [
     "get_city_master",
     "get_province_master",
     "get_district_master",
+    "get_gazetteer",
     "get_property_type_master",
     "get_amenity_master",
     "get_price_range_master",
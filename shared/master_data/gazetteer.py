@@ -0,0 +1,368 @@
+"""
+Gazetteer: local place → city and nearby-district lookups
+
+Answers "which city is X in?" and "which districts are near X?" from
+master data instead of an LLM round trip:
+- Districts, wards and cities from DistrictMaster / CityMaster
+- Districts, areas and streets from the administrative-division seeds
+  (scripts/seed_master_data.sql, scripts/seed_global_administrative_divisions.sql,
+  scripts/seed_full_global_divisions_part2_other_countries.sql)
+- Approximate district centroids, from which the k nearest districts of
+  every district are precomputed (haversine, same city only)
+
+Lookups are case- and diacritic-insensitive ("Bình Thạnh", "binh thanh",
+"Q. Bình Thạnh" and "quận bình thạnh" all resolve to the same place).
+Unknown places return None so callers can fall back to other sources.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .cities import get_city_master
+from .districts import get_district_master
+
+
+@dataclass
+class Place:
+    """A district, area or street with its city"""
+    name: str  # Display name (e.g., "Quận 7", "Sukhumvit Road")
+    city: str  # City (e.g., "Hồ Chí Minh", "Bangkok")
+    kind: str = "district"  # district | area | street
+    aliases: List[str] = field(default_factory=list)
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+
+# Approximate district centers (lat, lng). Nearby lookups only use these.
+DISTRICT_CENTROIDS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "Hồ Chí Minh": {
+        "Quận 1": (10.7756, 106.7019),
+        "Quận 2": (10.7860, 106.7431),
+        "Quận 3": (10.7846, 106.6878),
+        "Quận 4": (10.7574, 106.7028),
+        "Quận 5": (10.7538, 106.6639),
+        "Quận 6": (10.7470, 106.6345),
+        "Quận 7": (10.7316, 106.7196),
+        "Quận 8": (10.7356, 106.6758),
+        "Quận 9": (10.8503, 106.7896),
+        "Quận 10": (10.7722, 106.6681),
+        "Quận 11": (10.7626, 106.6504),
+        "Quận 12": (10.8634, 106.6711),
+        "Quận Bình Thạnh": (10.8099, 106.7103),
+        "Quận Gò Vấp": (10.8368, 106.6706),
+        "Quận Phú Nhuận": (10.7981, 106.6811),
+        "Quận Tân Bình": (10.7991, 106.6527),
+        "Quận Tân Phú": (10.7875, 106.6281),
+        "Quận Thủ Đức": (10.8521, 106.7644),
+        "Quận Bình Tân": (10.7407, 106.6067),
+        "Huyện Bình Chánh": (10.6834, 106.5942),
+        "Huyện Cần Giờ": (10.4090, 106.9502),
+        "Huyện Củ Chi": (11.0091, 106.4922),
+        "Huyện Hóc Môn": (10.8804, 106.5926),
+        "Huyện Nhà Bè": (10.6904, 106.7285),
+    },
+    "Hà Nội": {
+        "Quận Hoàn Kiếm": (21.0288, 105.8525),
+        "Quận Ba Đình": (21.0340, 105.8140),
+        "Quận Đống Đa": (21.0135, 105.8270),
+        "Quận Hai Bà Trưng": (21.0060, 105.8570),
+        "Quận Tây Hồ": (21.0700, 105.8190),
+        "Quận Cầu Giấy": (21.0330, 105.7940),
+        "Quận Thanh Xuân": (20.9940, 105.8110),
+        "Quận Long Biên": (21.0480, 105.8880),
+    },
+    "Đà Nẵng": {
+        "Quận Hải Châu": (16.0600, 108.2150),
+        "Quận Thanh Khê": (16.0650, 108.1880),
+        "Quận Sơn Trà": (16.0880, 108.2450),
+        "Quận Ngũ Hành Sơn": (16.0000, 108.2550),
+        "Quận Liên Chiểu": (16.0870, 108.1350),
+        "Quận Cẩm Lệ": (16.0150, 108.1950),
+    },
+}
+
+# Seeded aliases not already in DistrictMaster (scripts/seed_master_data.sql)
+HCMC_SEED_ALIASES: Dict[str, List[str]] = {
+    "Quận Bình Thạnh": ["q. bình thạnh"],
+    "Quận Tân Bình": ["q. tân bình"],
+    "Quận Tân Phú": ["q. tân phú"],
+    "Quận Phú Nhuận": ["q. phú nhuận"],
+    "Quận Gò Vấp": ["q. gò vấp"],
+    "Quận Bình Tân": ["q. bình tân"],
+    "Huyện Hóc Môn": ["h. hóc môn"],
+    "Huyện Củ Chi": ["h. củ chi"],
+    "Huyện Nhà Bè": ["h. nhà bè"],
+    "Huyện Cần Giờ": ["h. cần giờ"],
+    "Huyện Bình Chánh": ["h. bình chánh"],
+}
+
+# Areas and streets outside Vietnam's district lists
+# (scripts/seed_global_administrative_divisions.sql, ..._part2_other_countries.sql)
+SEED_PLACES: List[Place] = [
+    Place("Đường Nguyễn Huệ", "Hồ Chí Minh", "street", ["nguyen hue", "phố đi bộ nguyễn huệ"]),
+    Place("Đường Lê Lợi", "Hồ Chí Minh", "street", ["le loi"]),
+    Place("Đường Đồng Khởi", "Hồ Chí Minh", "street", ["dong khoi"]),
+    Place("Đại Lộ Nguyễn Văn Linh", "Hồ Chí Minh", "street", ["nguyen van linh", "nvl"]),
+    Place("Sunset Boulevard", "Los Angeles", "street", ["sunset blvd"]),
+    Place("Hollywood Boulevard", "Los Angeles", "street", ["hollywood blvd", "hollywood"]),
+    Place("Fifth Avenue", "New York", "street", ["5th avenue", "5th ave"]),
+    Place("Broadway", "New York", "street"),
+    Place("Sukhumvit Road", "Bangkok", "street", ["sukhumvit"]),
+    Place("Silom Road", "Bangkok", "street", ["silom"]),
+    Place("Orchard Road", "Singapore", "street"),
+    Place("Orchard", "Singapore", "area"),
+    Place("Downtown Core", "Singapore", "area"),
+    Place("Marina Bay", "Singapore", "area"),
+    Place("Shibuya", "Tokyo", "area", ["shibuya crossing"]),
+    Place("Shinjuku", "Tokyo", "area"),
+]
+
+# Cities outside CityMaster that the seeded places belong to
+SEED_CITIES: Dict[str, List[str]] = {
+    "Los Angeles": [],
+    "New York": ["nyc", "new york city"],
+    "Bangkok": ["krung thep"],
+    "Singapore": [],
+    "Tokyo": [],
+}
+
+# Administrative prefixes dropped when a lookup misses ("quận bình thạnh" -> "bình thạnh")
+_ADMIN_PREFIX = re.compile(
+    r"^(?:quan|q|huyen|h|phuong|p|xa|thi xa|thanh pho|tp|district|ward)\s+(?=\D)"
+)
+# Numbered districts in any spelling ("q7", "q.7", "quận 7", "district 7", "d7")
+_NUMBERED_DISTRICT = re.compile(r"^(?:quan|q|district|d)\s*(\d{1,2})$")
+# Ward names shared by many districts ("Phường 1") are not indexed
+_GENERIC_WARD = re.compile(r"^phuong\s*\d+$")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip Vietnamese diacritics and punctuation, collapse spaces"""
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d").replace("Đ", "d"))
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (lat, lng) points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class Gazetteer:
+    """
+    In-memory place index with precomputed district adjacency.
+
+    Usage:
+        gazetteer = Gazetteer()
+        gazetteer.city_of("Cầu Giấy")  # Returns "Hà Nội"
+        gazetteer.nearby("q2")  # Returns ["Quận Bình Thạnh", "Quận 1", "Quận 4"]
+    """
+
+    def __init__(self, max_neighbors: int = 5):
+        """
+        Args:
+            max_neighbors: Nearest districts precomputed per district
+        """
+        self.places: List[Place] = []
+        self.by_name: Dict[Tuple[str, str], Place] = {}
+        # Folded alias -> candidate places (several when an alias exists in more than one city)
+        self.index: Dict[str, List[Place]] = {}
+        # Folded city alias -> standard city name
+        self.cities: Dict[str, str] = {}
+        # (city, name) -> nearest districts, closest first
+        self.neighbors: Dict[Tuple[str, str], List[str]] = {}
+
+        self._load_cities()
+        self._load_places()
+        self._build_neighbors(max_neighbors)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_cities(self):
+        city_master = get_city_master()
+        for city in city_master.cities:
+            for alias in [city.standard_name, city.full_name, city.english_name, *city.aliases]:
+                self.cities.setdefault(fold(alias), city.standard_name)
+        for name, aliases in SEED_CITIES.items():
+            for alias in [name, *aliases]:
+                self.cities.setdefault(fold(alias), name)
+
+    def _add(self, place: Place) -> Place:
+        existing = self.by_name.get((place.city, place.name))
+        if existing is None:
+            self.places.append(place)
+            self.by_name[(place.city, place.name)] = place
+            existing = place
+        else:
+            existing.aliases.extend(place.aliases)
+            if existing.lat is None:
+                existing.lat, existing.lng = place.lat, place.lng
+
+        for alias in [place.name, *place.aliases]:
+            self._index_alias(alias, existing)
+        return existing
+
+    def _index_alias(self, alias: str, place: Place):
+        key = fold(alias)
+        if not key or _GENERIC_WARD.match(key):
+            return
+        candidates = self.index.setdefault(key, [])
+        if place not in candidates:
+            candidates.append(place)
+
+    def _load_places(self):
+        # Centroid table first: its names are the canonical district names
+        for city, districts in DISTRICT_CENTROIDS.items():
+            for name, (lat, lng) in districts.items():
+                self._add(Place(name, city, "district", list(HCMC_SEED_ALIASES.get(name, [])), lat, lng))
+
+        district_master = get_district_master()
+        for district in district_master.districts:
+            place = self._add(Place(district.standard_name, district.city, "district", list(district.aliases)))
+            for area in district.popular_areas:
+                self._index_alias(area, place)
+
+        for city in get_city_master().cities:
+            for name in city.major_districts:
+                if _GENERIC_WARD.match(fold(name)):
+                    continue
+                self._add(Place(name, city.standard_name, "district"))
+
+        for place in SEED_PLACES:
+            self._add(Place(place.name, place.city, place.kind, list(place.aliases), place.lat, place.lng))
+
+        # "Quận Bình Thạnh" is also reachable as "Bình Thạnh"
+        for place in self.places:
+            stripped = _ADMIN_PREFIX.sub("", fold(place.name))
+            if stripped != fold(place.name):
+                self._index_alias(stripped, place)
+
+    def _build_neighbors(self, max_neighbors: int):
+        by_city: Dict[str, List[Place]] = {}
+        for place in self.places:
+            if place.lat is not None and place.kind == "district":
+                by_city.setdefault(place.city, []).append(place)
+
+        for places in by_city.values():
+            for place in places:
+                origin = (place.lat, place.lng)
+                nearest = heapq.nsmallest(
+                    max_neighbors,
+                    (p for p in places if p is not place),
+                    key=lambda p: haversine_km(origin, (p.lat, p.lng))
+                )
+                self.neighbors[(place.city, place.name)] = [p.name for p in nearest]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def normalize_city(self, city: Optional[str]) -> Optional[str]:
+        """Standard city name for any alias ("sài gòn" -> "Hồ Chí Minh"), or None"""
+        if not city:
+            return None
+        key = fold(city)
+        return self.cities.get(key) or self.cities.get(_ADMIN_PREFIX.sub("", key))
+
+    def _candidates(self, key: str) -> List[Place]:
+        if key in self.index:
+            return self.index[key]
+        match = _NUMBERED_DISTRICT.match(key)
+        if match:
+            return self.index.get(f"quan {int(match.group(1))}", [])
+        stripped = _ADMIN_PREFIX.sub("", key)
+        if stripped != key:
+            return self.index.get(stripped, [])
+        return []
+
+    def matches(self, name: Optional[str], city: Optional[str] = None) -> List[Place]:
+        """
+        Places a name may refer to, best match first.
+
+        Args:
+            name: Place name in any spelling; a trailing ", <city>" is allowed
+            city: Optional city used to disambiguate
+
+        Returns:
+            Places (empty if unknown)
+        """
+        if not name:
+            return []
+
+        head, _, tail = name.partition(",")
+        city = self.normalize_city(city) or self.normalize_city(tail)
+
+        candidates = self._candidates(fold(head))
+        if city:
+            candidates = [p for p in candidates if p.city == city]
+        return candidates
+
+    def resolve(self, name: Optional[str], city: Optional[str] = None) -> Optional[Place]:
+        """Best matching place, or None if unknown or present in several cities"""
+        candidates = self.matches(name, city)
+        if not candidates or len({p.city for p in candidates}) > 1:
+            return None
+        return candidates[0]
+
+    def city_of(self, name: Optional[str]) -> Optional[str]:
+        """
+        City of a place, or None if unknown.
+
+        Examples:
+            "Quận 2" -> "Hồ Chí Minh"
+            "cau giay" -> "Hà Nội"
+            "Sukhumvit" -> "Bangkok"
+            "Sài Gòn" -> "Hồ Chí Minh" (a city resolves to itself)
+        """
+        place = self.resolve(name)
+        if place:
+            return place.city
+        return self.normalize_city(name)
+
+    def nearby(self, name: str, city: Optional[str] = None, limit: int = 3) -> Optional[List[str]]:
+        """
+        Nearest districts of a place, closest first.
+
+        Returns:
+            District names, or None if the place is unknown or has no centroid
+            (callers should then fall back to another source)
+        """
+        candidates = self.matches(name, city)
+        if len({p.city for p in candidates}) != 1:
+            return None
+        for place in candidates:
+            neighbors = self.neighbors.get((place.city, place.name))
+            if neighbors is not None:
+                return neighbors[:limit]
+        return None
+
+    def coordinates(self, name: str, city: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """Approximate center as {"lat", "lng"}, or None"""
+        candidates = self.matches(name, city)
+        if len({p.city for p in candidates}) != 1:
+            return None
+        for place in candidates:
+            if place.lat is not None:
+                return {"lat": place.lat, "lng": place.lng}
+        return None
+
+
+# Singleton instance
+_instance: Optional[Gazetteer] = None
+
+def get_gazetteer() -> Gazetteer:
+    """Get singleton instance of Gazetteer"""
+    global _instance
+    if _instance is None:
+        _instance = Gazetteer()
+    return _instance
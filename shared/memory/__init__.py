@@ -9,6 +9,8 @@ Memory Types:
 - Procedural: Learned skills and strategies
 """
 from .base import MemoryStore, MemoryEntry, MemoryType, MemoryQuery
+from .backends import MemoryBackend, FileMemoryBackend, PostgresMemoryBackend, create_memory_backend
+from .persistent_store import PersistentMemoryStore
 from .episodic_memory import EpisodicMemory
 from .semantic_memory import SemanticMemory
 from .procedural_memory import ProceduralMemory
@@ -19,6 +21,11 @@ __all__ = [
     'MemoryEntry',
     'MemoryType',
     'MemoryQuery',
+    'MemoryBackend',
+    'FileMemoryBackend',
+    'PostgresMemoryBackend',
+    'create_memory_backend',
+    'PersistentMemoryStore',
     'EpisodicMemory',
     'SemanticMemory',
     'ProceduralMemory',
@@ -0,0 +1,365 @@
+"""
+Memory Backends
+Durable storage for memory entries (local file or Postgres)
+
+Entries are stored per (memory_type, partition): episodic memories are
+partitioned by user, semantic facts and procedural skills share the
+global partition. Backends only move plain records; indexing and
+retrieval happen in PersistentMemoryStore.
+"""
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from shared.config import settings
+from .base import MemoryEntry
+
+try:
+    import asyncpg
+    HAS_ASYNCPG = True
+except ImportError:
+    HAS_ASYNCPG = False
+
+
+GLOBAL_PARTITION = "global"
+
+logger = logging.getLogger("MemoryBackend")
+
+
+def entry_to_record(
+    entry: MemoryEntry,
+    partition: str,
+    embedding: Optional[List[float]] = None
+) -> Dict[str, Any]:
+    """Backend record for a memory entry"""
+    return {
+        "id": entry.id,
+        "memory_type": entry.memory_type.value,
+        "partition": partition,
+        "content": entry.content,
+        "embedding": embedding,
+        "metadata": entry.metadata,
+        "importance": entry.importance,
+        "access_count": entry.access_count,
+        "created_at": entry.created_at,
+        "last_accessed": entry.last_accessed
+    }
+
+
+def entry_from_record(record: Dict[str, Any]) -> MemoryEntry:
+    """Memory entry for a backend record (the embedding stays in the record)"""
+    return MemoryEntry(
+        id=record["id"],
+        memory_type=record["memory_type"],
+        content=record["content"],
+        metadata=record.get("metadata") or {},
+        importance=record.get("importance", 0.5),
+        access_count=record.get("access_count", 0),
+        created_at=_as_datetime(record.get("created_at")),
+        last_accessed=_as_datetime(record.get("last_accessed"))
+    )
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class MemoryBackend(ABC):
+    """Persistent storage for memory records"""
+
+    @abstractmethod
+    async def load_partition(self, memory_type: str, partition: str) -> List[Dict[str, Any]]:
+        """
+        Load every record of one partition
+
+        Args:
+            memory_type: MemoryType value
+            partition: User ID (episodic) or GLOBAL_PARTITION
+
+        Returns:
+            Records in entry_to_record format
+        """
+        pass
+
+    @abstractmethod
+    async def save(self, memory_type: str, records: Sequence[Dict[str, Any]]):
+        """Insert or replace records"""
+        pass
+
+    @abstractmethod
+    async def delete(self, memory_type: str, memory_ids: Sequence[str]):
+        """Delete records by ID"""
+        pass
+
+    async def close(self):
+        """Release resources"""
+        pass
+
+
+class FileMemoryBackend(MemoryBackend):
+    """
+    Append-only JSONL log per memory type
+
+    Every save/delete appends lines; the log is replayed on first access
+    and rewritten without superseded lines once it holds more than twice
+    as many lines as live records. Single process only: use the Postgres
+    backend to share memories across replicas.
+    """
+
+    COMPACT_MIN_LINES = 1000
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.MEMORY_FILE_DIR
+        self._records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._line_counts: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    def _path(self, memory_type: str) -> str:
+        return os.path.join(self.directory, f"{memory_type}.jsonl")
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> Dict[str, Any]:
+        encoded = dict(record)
+        for key in ("created_at", "last_accessed"):
+            if isinstance(encoded.get(key), datetime):
+                encoded[key] = encoded[key].isoformat()
+        return encoded
+
+    def _replay(self, memory_type: str) -> Dict[str, Dict[str, Any]]:
+        records = self._records.get(memory_type)
+        if records is not None:
+            return records
+
+        records = {}
+        lines = 0
+        path = self._path(memory_type)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    lines += 1
+                    if op.get("op") == "delete":
+                        records.pop(op["id"], None)
+                    else:
+                        records[op["record"]["id"]] = op["record"]
+
+        self._records[memory_type] = records
+        self._line_counts[memory_type] = lines
+        return records
+
+    def _append(self, memory_type: str, ops: List[Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(memory_type), "a", encoding="utf-8") as f:
+            for op in ops:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+        self._line_counts[memory_type] += len(ops)
+
+        records = self._records[memory_type]
+        lines = self._line_counts[memory_type]
+        if lines > self.COMPACT_MIN_LINES and lines > 2 * len(records):
+            self._compact(memory_type)
+
+    def _compact(self, memory_type: str):
+        records = self._records[memory_type]
+        path = self._path(memory_type)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records.values():
+                f.write(json.dumps({"op": "save", "record": record}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+        self._line_counts[memory_type] = len(records)
+        logger.info(f"🧹 Compacted {memory_type} memory log ({len(records)} records)")
+
+    async def load_partition(self, memory_type: str, partition: str) -> List[Dict[str, Any]]:
+        async with self._lock:
+            records = await asyncio.to_thread(self._replay, memory_type)
+            return [dict(r) for r in records.values() if r.get("partition") == partition]
+
+    async def save(self, memory_type: str, records: Sequence[Dict[str, Any]]):
+        if not records:
+            return
+        async with self._lock:
+            stored = await asyncio.to_thread(self._replay, memory_type)
+            encoded = [self._encode(r) for r in records]
+            for record in encoded:
+                stored[record["id"]] = record
+            await asyncio.to_thread(
+                self._append, memory_type, [{"op": "save", "record": r} for r in encoded]
+            )
+
+    async def delete(self, memory_type: str, memory_ids: Sequence[str]):
+        if not memory_ids:
+            return
+        async with self._lock:
+            stored = await asyncio.to_thread(self._replay, memory_type)
+            for memory_id in memory_ids:
+                stored.pop(memory_id, None)
+            await asyncio.to_thread(
+                self._append, memory_type, [{"op": "delete", "id": i} for i in memory_ids]
+            )
+
+
+class PostgresMemoryBackend(MemoryBackend):
+    """
+    agent_memories table, shared by every replica
+
+    Uses the given asyncpg pool, or opens a small one from settings on
+    first use. The table is created if missing.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool
+        self._owns_pool = pool is None
+        self._ready = False
+        self._init_lock = asyncio.Lock()
+
+    async def _ensure_ready(self):
+        if self._ready:
+            return
+        async with self._init_lock:
+            if self._ready:
+                return
+            if self.pool is None:
+                if not HAS_ASYNCPG:
+                    raise RuntimeError("asyncpg is required for MEMORY_BACKEND=postgres")
+                self.pool = await asyncpg.create_pool(
+                    host=settings.POSTGRES_HOST,
+                    port=settings.POSTGRES_PORT,
+                    user=settings.POSTGRES_USER,
+                    password=settings.POSTGRES_PASSWORD,
+                    database=settings.POSTGRES_DB,
+                    min_size=1,
+                    max_size=5
+                )
+            async with self.pool.acquire() as conn:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS agent_memories (
+                        id TEXT PRIMARY KEY,
+                        memory_type TEXT NOT NULL,
+                        partition_key TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        embedding REAL[],
+                        metadata JSONB NOT NULL DEFAULT '{}',
+                        importance DOUBLE PRECISION NOT NULL DEFAULT 0.5,
+                        access_count INTEGER NOT NULL DEFAULT 0,
+                        created_at TIMESTAMP NOT NULL,
+                        last_accessed TIMESTAMP NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_agent_memories_partition
+                        ON agent_memories (memory_type, partition_key);
+                """)
+            self._ready = True
+
+    async def load_partition(self, memory_type: str, partition: str) -> List[Dict[str, Any]]:
+        await self._ensure_ready()
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT id, memory_type, partition_key, content, embedding, metadata,
+                       importance, access_count, created_at, last_accessed
+                FROM agent_memories
+                WHERE memory_type = $1 AND partition_key = $2
+                """,
+                memory_type,
+                partition
+            )
+        return [
+            {
+                "id": row["id"],
+                "memory_type": row["memory_type"],
+                "partition": row["partition_key"],
+                "content": row["content"],
+                "embedding": list(row["embedding"]) if row["embedding"] is not None else None,
+                "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+                "importance": row["importance"],
+                "access_count": row["access_count"],
+                "created_at": row["created_at"],
+                "last_accessed": row["last_accessed"]
+            }
+            for row in rows
+        ]
+
+    async def save(self, memory_type: str, records: Sequence[Dict[str, Any]]):
+        if not records:
+            return
+        await self._ensure_ready()
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO agent_memories (
+                    id, memory_type, partition_key, content, embedding, metadata,
+                    importance, access_count, created_at, last_accessed
+                )
+                VALUES ($1, $2, $3, $4, $5, $6::jsonb, $7, $8, $9, $10)
+                ON CONFLICT (id) DO UPDATE SET
+                    content = EXCLUDED.content,
+                    embedding = COALESCE(EXCLUDED.embedding, agent_memories.embedding),
+                    metadata = EXCLUDED.metadata,
+                    importance = EXCLUDED.importance,
+                    access_count = EXCLUDED.access_count,
+                    last_accessed = EXCLUDED.last_accessed
+                """,
+                [
+                    (
+                        r["id"],
+                        memory_type,
+                        r["partition"],
+                        r["content"],
+                        r["embedding"],
+                        json.dumps(r["metadata"], ensure_ascii=False, default=str),
+                        float(r["importance"]),
+                        int(r["access_count"]),
+                        r["created_at"],
+                        r["last_accessed"]
+                    )
+                    for r in records
+                ]
+            )
+
+    async def delete(self, memory_type: str, memory_ids: Sequence[str]):
+        if not memory_ids:
+            return
+        await self._ensure_ready()
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "DELETE FROM agent_memories WHERE memory_type = $1 AND id = ANY($2::text[])",
+                memory_type,
+                list(memory_ids)
+            )
+
+    async def close(self):
+        if self._owns_pool and self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            self._ready = False
+
+
+def create_memory_backend(kind: Optional[str] = None) -> Optional[MemoryBackend]:
+    """
+    Backend selected by settings.MEMORY_BACKEND
+
+    Args:
+        kind: "memory" (no persistence), "file" or "postgres"
+
+    Returns:
+        MemoryBackend, or None for process-local memory only
+    """
+    kind = (kind or settings.MEMORY_BACKEND).lower()
+    if kind == "file":
+        return FileMemoryBackend()
+    if kind == "postgres":
+        return PostgresMemoryBackend()
+    if kind != "memory":
+        logger.warning(f"⚠️  Unknown MEMORY_BACKEND '{kind}', keeping memories in process only")
+    return None
@@ -10,11 +10,15 @@ Examples:
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
+import time
 
-from .base import MemoryStore, MemoryEntry, MemoryType, MemoryQuery
+from shared.config import settings
+from .base import MemoryEntry, MemoryType, MemoryQuery
+from .backends import MemoryBackend
+from .persistent_store import PersistentMemoryStore, QueryEmbedder, recency_scores, importance_scores, top_k
 
 
-class EpisodicMemory(MemoryStore):
+class EpisodicMemory(PersistentMemoryStore):
     """
     Episodic Memory Store
 
@@ -23,13 +27,29 @@ class EpisodicMemory(MemoryStore):
     - Search results and outcomes
     - User preferences and feedback
     - Interaction patterns
+
+    Partitioned by user: a query only scores the requesting user's
+    memories, and each user keeps at most max_per_user of them.
     """
 
-    def __init__(self):
-        super().__init__(MemoryType.EPISODIC)
-        self.memories: Dict[str, MemoryEntry] = {}
+    def __init__(
+        self,
+        backend: Optional[MemoryBackend] = None,
+        embedder: Optional[QueryEmbedder] = None,
+        max_per_user: Optional[int] = None
+    ):
+        super().__init__(
+            MemoryType.EPISODIC,
+            backend=backend,
+            embedder=embedder,
+            max_per_partition=max_per_user or settings.MEMORY_MAX_PER_USER
+        )
         self.logger = logging.getLogger("EpisodicMemory")
 
+    def partition_key(self, entry: MemoryEntry) -> str:
+        """One partition per user"""
+        return str(entry.metadata.get('user_id', 'unknown'))
+
     async def store(self, entry: MemoryEntry) -> str:
         """
         Store episodic memory
@@ -42,8 +62,8 @@ class EpisodicMemory(MemoryStore):
         """
         entry.memory_type = MemoryType.EPISODIC
 
-        # Store
-        self.memories[entry.id] = entry
+        # Store (indexed in the user's partition, written through to the backend)
+        await self._put(entry)
 
         self.logger.info(f"📝 Stored episodic memory: {entry.id[:8]}... (user: {entry.metadata.get('user_id', 'unknown')})")
 
@@ -54,55 +74,60 @@ class EpisodicMemory(MemoryStore):
         Retrieve relevant past interactions
 
         Ranking by:
-        - Semantic similarity (if embeddings available)
+        - Semantic similarity (embedding cosine; keyword overlap without embeddings)
         - Recency
-        - Importance
+        - Access count
+
+        Only the requesting user's partition is scored (all loaded
+        partitions when no user_id is given).
         """
-        results = []
+        if query.user_id:
+            partitions = [await self._ensure_partition(query.user_id)]
+        else:
+            partitions = list(self._partitions.values())
 
-        # Filter by user_id if provided
-        for memory in self.memories.values():
-            if query.user_id and memory.metadata.get('user_id') != query.user_id:
-                continue
+        query_vector = await self._embed_query(query.query)
+        query_words = set(query.query.lower().split())
+        now = time.time()
 
-            # Filter by importance
-            if memory.importance < query.min_importance:
+        results = []
+        for partition in partitions:
+            slots = partition.live_slots()
+            if not len(slots):
                 continue
 
-            # Filter by time range
+            # Filter by importance and time range
+            created = partition.created[slots]
+            eligible = partition.importance[slots] >= query.min_importance
             if query.time_range:
-                if "start" in query.time_range and memory.created_at < query.time_range["start"]:
-                    continue
-                if "end" in query.time_range and memory.created_at > query.time_range["end"]:
-                    continue
-
-            # Compute relevance (simple keyword matching for MVP)
-            relevance = self._compute_relevance(query.query, memory.content)
-
-            # Compute recency
-            recency = self.compute_recency(memory.created_at)
+                if "start" in query.time_range:
+                    eligible &= created >= query.time_range["start"].timestamp()
+                if "end" in query.time_range:
+                    eligible &= created <= query.time_range["end"].timestamp()
+            slots = slots[eligible]
+            if not len(slots):
+                continue
 
-            # Compute importance
-            importance = self.compute_importance(
-                recency=recency,
+            relevance, _ = partition.relevance(slots, query_vector, query_words)
+            scores = importance_scores(
+                recency=recency_scores(partition.created[slots], now),
                 relevance=relevance,
-                access_count=memory.access_count
+                access_count=partition.access_count[slots]
             )
 
-            # Update importance
-            memory.importance = importance
-
-            results.append((memory, importance))
+            for i in top_k(scores, query.limit):
+                results.append((self.memories[partition.slot_ids[slots[i]]], float(scores[i])))
 
         # Sort by importance
         results.sort(key=lambda x: x[1], reverse=True)
+        results = results[:query.limit]
 
-        # Take top K
-        top_memories = [mem for mem, score in results[:query.limit]]
-
-        # Update access counts
-        for memory in top_memories:
+        # Update importance and access counts of the returned memories
+        top_memories = []
+        for memory, importance in results:
+            memory.importance = importance
             await self.increment_access(memory.id)
+            top_memories.append(memory)
 
         self.logger.info(f"🔍 Retrieved {len(top_memories)} episodic memories for query: '{query.query}'")
 
@@ -121,12 +146,13 @@ class EpisodicMemory(MemoryStore):
             else:
                 setattr(memory, key, value)
 
+        # Persisted by the next flush()
+        self._touch(memory_id)
         return True
 
     async def delete(self, memory_id: str) -> bool:
         """Delete memory entry"""
-        if memory_id in self.memories:
-            del self.memories[memory_id]
+        if await self._remove([memory_id]):
             self.logger.info(f"🗑️  Deleted memory: {memory_id[:8]}...")
             return True
         return False
@@ -134,11 +160,10 @@ class EpisodicMemory(MemoryStore):
     async def consolidate(self) -> int:
         """
         Consolidate memories:
-        - Merge similar memories
         - Decay old, unimportant memories
+        - Evict lowest importance/recency memories beyond each user's capacity
+        - Persist pending access/importance updates
         """
-        consolidated = 0
-
         # Delete low-importance, old memories
         to_delete = []
         for mem_id, memory in self.memories.items():
@@ -146,29 +171,14 @@ class EpisodicMemory(MemoryStore):
             if memory.importance < 0.2 and recency < 0.1:
                 to_delete.append(mem_id)
 
-        for mem_id in to_delete:
-            await self.delete(mem_id)
-            consolidated += 1
+        consolidated = await self._remove(to_delete)
+        consolidated += await self._evict_all()
+        await self.flush()
 
         self.logger.info(f"🧹 Consolidated {consolidated} episodic memories")
 
         return consolidated
 
-    def _compute_relevance(self, query: str, content: str) -> float:
-        """
-        Compute semantic relevance (simple keyword matching for MVP)
-
-        TODO: Replace with embedding-based similarity
-        """
-        query_words = set(query.lower().split())
-        content_words = set(content.lower().split())
-
-        if not query_words:
-            return 0.0
-
-        matches = len(query_words & content_words)
-        return min(1.0, matches / len(query_words))
-
     async def store_interaction(
         self,
         user_id: str,
@@ -2,10 +2,12 @@
 Memory Manager
 Unified interface for all memory types
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 import logging
 
 from .base import MemoryType, MemoryEntry, MemoryQuery
+from .backends import MemoryBackend
+from .persistent_store import QueryEmbedder
 from .episodic_memory import EpisodicMemory
 from .semantic_memory import SemanticMemory
 from .procedural_memory import ProceduralMemory
@@ -23,13 +25,31 @@ class MemoryManager:
     Implements CTO's Agentic Memory Architecture
     """
 
-    def __init__(self):
-        self.episodic = EpisodicMemory()
-        self.semantic = SemanticMemory()
-        self.procedural = ProceduralMemory()
+    def __init__(
+        self,
+        backend: Optional[MemoryBackend] = None,
+        embed_fn: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None
+    ):
+        """
+        Args:
+            backend: Persistence shared by all memory types (None = process memory only,
+                see create_memory_backend)
+            embed_fn: Async function mapping texts to embedding vectors
+                (None = keyword relevance)
+        """
+        self.backend = backend
+        self.embedder = QueryEmbedder(embed_fn) if embed_fn else None
+
+        self.episodic = EpisodicMemory(backend=backend, embedder=self.embedder)
+        self.semantic = SemanticMemory(backend=backend, embedder=self.embedder)
+        self.procedural = ProceduralMemory(backend=backend, embedder=self.embedder)
 
         self.logger = logging.getLogger("MemoryManager")
-        self.logger.info("🧠 Memory Manager initialized with 3 memory types")
+        self.logger.info(
+            f"🧠 Memory Manager initialized with 3 memory types "
+            f"(backend: {type(backend).__name__ if backend else 'in-process'}, "
+            f"embeddings: {'on' if self.embedder else 'off'})"
+        )
 
     async def store(
         self,
@@ -189,6 +209,9 @@ class MemoryManager:
                     success=success
                 )
 
+        # Persist access counts / skill statistics touched by this interaction
+        await self.flush()
+
         self.logger.info(f"📝 Recorded interaction for user {user_id}: success={success}")
 
     async def learn_from_patterns(self):
@@ -236,11 +259,26 @@ class MemoryManager:
 
         return total
 
+    async def flush(self):
+        """Persist pending access/importance/skill updates of all memory types"""
+        await self.episodic.flush()
+        await self.semantic.flush()
+        await self.procedural.flush()
+
+    async def close(self):
+        """Flush pending updates and close the backend"""
+        await self.flush()
+        if self.backend is not None:
+            await self.backend.close()
+
     def get_memory_stats(self) -> Dict[str, Any]:
-        """Get statistics about memory usage"""
+        """Get statistics about memory usage (loaded partitions only)"""
         return {
             "episodic_count": len(self.episodic.memories),
             "semantic_count": len(self.semantic.memories),
             "procedural_count": len(self.procedural.memories),
-            "total_count": len(self.episodic.memories) + len(self.semantic.memories) + len(self.procedural.memories)
+            "total_count": len(self.episodic.memories) + len(self.semantic.memories) + len(self.procedural.memories),
+            "loaded_users": self.episodic.get_stats()["loaded_partitions"],
+            "evicted": self.episodic.evicted,
+            "embedding_errors": self.embedder.errors if self.embedder else 0
         }
@@ -0,0 +1,494 @@
+"""
+Persistent Memory Store
+Partitioned, embedding-indexed MemoryStore on top of a MemoryBackend
+
+- Entries are grouped in partitions (one per user for episodic memory,
+  one global partition for facts and skills); retrieval only scans the
+  partition(s) a query can match
+- Each partition keeps unit-normalized embeddings in a float32 matrix:
+  relevance for a whole partition is one matrix-vector product
+- Partitions are loaded from the backend on first use; least recently
+  used ones are unloaded once MEMORY_MAX_LOADED_PARTITIONS is exceeded
+- New entries are written through; access counts, importance and skill
+  statistics are written in batches by flush()
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from shared.config import settings
+from .base import MemoryStore, MemoryEntry, MemoryType
+from .backends import MemoryBackend, GLOBAL_PARTITION, entry_to_record, entry_from_record
+
+
+def _unit_vector(values: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+    """Embedding as a unit float32 vector (None if missing or zero)"""
+    if values is None or len(values) == 0:
+        return None
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+def recency_scores(created: np.ndarray, now: float, decay_days: int = 30) -> np.ndarray:
+    """Vectorized MemoryStore.compute_recency over creation timestamps"""
+    days_old = np.floor((now - created) / 86400.0)
+    return np.exp(math.log(0.5) / decay_days * days_old)
+
+
+def importance_scores(recency: np.ndarray, relevance: np.ndarray, access_count: np.ndarray) -> np.ndarray:
+    """Vectorized MemoryStore.compute_importance"""
+    access_score = np.minimum(1.0, np.log(access_count + 1.0) / 5.0)
+    return np.clip(0.4 * recency + 0.4 * relevance + 0.2 * access_score, 0.0, 1.0)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first"""
+    if k <= 0 or len(scores) == 0:
+        return np.arange(0)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class QueryEmbedder:
+    """
+    Async embedding function with a small LRU memo
+
+    Shared by the stores of one MemoryManager, so a query is embedded once
+    even though several memory types search it. Failures are counted and
+    reported as missing vectors (callers fall back to keyword relevance).
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        cache_size: int = 256
+    ):
+        self.embed_fn = embed_fn
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.errors = 0
+        self.logger = logging.getLogger("QueryEmbedder")
+
+    async def embed(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Unit vectors for texts (None for blank texts or on failure)"""
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                vectors[i] = cached
+            elif text.strip():
+                missing.append(i)
+
+        if not missing:
+            return vectors
+
+        try:
+            embedded = await self.embed_fn([texts[i] for i in missing])
+        except Exception as e:
+            self.errors += 1
+            self.logger.warning(f"⚠️  Memory embedding failed, using keyword relevance: {e}")
+            return vectors
+
+        for i, values in zip(missing, embedded):
+            vector = _unit_vector(values)
+            if vector is None:
+                continue
+            vectors[i] = vector
+            self._cache[texts[i]] = vector
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vectors
+
+
+class MemoryPartition:
+    """
+    Index over one partition's entries
+
+    Rows are slots: a slot map gives O(1) insert/delete, freed slots are
+    reused and the arrays double when full. Rows without an embedding
+    (embedding service unavailable) are scored by keyword overlap.
+    """
+
+    def __init__(self):
+        self.slot_ids: List[Optional[str]] = []
+        self.id_to_slot: Dict[str, int] = {}
+        self.free_slots: List[int] = []
+        self.tokens: List[Optional[frozenset]] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.has_vector = np.zeros(0, dtype=bool)
+        self.created = np.zeros(0)
+        self.importance = np.zeros(0)
+        self.access_count = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self.id_to_slot)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.id_to_slot
+
+    def _grow(self):
+        old = len(self.slot_ids)
+        new = max(16, old * 2)
+        extra = new - old
+        self.slot_ids.extend([None] * extra)
+        self.tokens.extend([None] * extra)
+        self.free_slots.extend(range(new - 1, old - 1, -1))
+        self.has_vector = np.concatenate((self.has_vector, np.zeros(extra, dtype=bool)))
+        self.created = np.concatenate((self.created, np.zeros(extra)))
+        self.importance = np.concatenate((self.importance, np.zeros(extra)))
+        self.access_count = np.concatenate((self.access_count, np.zeros(extra)))
+        if self.matrix is not None:
+            self.matrix = np.vstack((self.matrix, np.zeros((extra, self.matrix.shape[1]), dtype=np.float32)))
+
+    def add(self, entry: MemoryEntry, vector: Optional[np.ndarray]):
+        """Insert or replace an entry (vector: unit embedding or None)"""
+        slot = self.id_to_slot.get(entry.id)
+        if slot is None:
+            if not self.free_slots:
+                self._grow()
+            slot = self.free_slots.pop()
+            self.id_to_slot[entry.id] = slot
+            self.slot_ids[slot] = entry.id
+
+        self.tokens[slot] = frozenset(entry.content.lower().split())
+        self.created[slot] = entry.created_at.timestamp()
+        self.sync(entry)
+
+        self.has_vector[slot] = False
+        if vector is not None:
+            if self.matrix is None:
+                self.matrix = np.zeros((len(self.slot_ids), vector.shape[0]), dtype=np.float32)
+            # A different dimension means the embedding model changed: keyword-score this row
+            if vector.shape[0] == self.matrix.shape[1]:
+                self.matrix[slot] = vector
+                self.has_vector[slot] = True
+
+    def sync(self, entry: MemoryEntry):
+        """Refresh the scoring columns after importance/access_count changed"""
+        slot = self.id_to_slot[entry.id]
+        self.importance[slot] = entry.importance
+        self.access_count[slot] = entry.access_count
+
+    def remove(self, memory_id: str):
+        slot = self.id_to_slot.pop(memory_id, None)
+        if slot is None:
+            return
+        self.slot_ids[slot] = None
+        self.tokens[slot] = None
+        self.has_vector[slot] = False
+        self.free_slots.append(slot)
+
+    def vector(self, memory_id: str) -> Optional[np.ndarray]:
+        slot = self.id_to_slot.get(memory_id)
+        if slot is None or not self.has_vector[slot]:
+            return None
+        return self.matrix[slot]
+
+    def live_slots(self) -> np.ndarray:
+        return np.fromiter(self.id_to_slot.values(), dtype=np.int64, count=len(self.id_to_slot))
+
+    def relevance(
+        self,
+        slots: np.ndarray,
+        query_vector: Optional[np.ndarray],
+        query_words: Set[str],
+        keyword_scale: float = 1.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Relevance of the given rows to a query
+
+        Returns:
+            (scores in [0, 1], mask of rows scored by cosine similarity)
+        """
+        scores = np.zeros(len(slots))
+        by_vector = np.zeros(len(slots), dtype=bool)
+
+        if (
+            query_vector is not None
+            and self.matrix is not None
+            and query_vector.shape[0] == self.matrix.shape[1]
+        ):
+            by_vector = self.has_vector[slots]
+            if by_vector.any():
+                scores[by_vector] = np.clip(self.matrix[slots[by_vector]] @ query_vector, 0.0, 1.0)
+
+        if query_words:
+            for pos in np.flatnonzero(~by_vector):
+                matches = len(query_words & self.tokens[slots[pos]])
+                scores[pos] = min(1.0, matches / len(query_words) * keyword_scale)
+        return scores, by_vector
+
+
+class PersistentMemoryStore(MemoryStore):
+    """
+    MemoryStore with partitioned, backend-persisted, embedding-indexed entries
+
+    Subclasses pick the partition of an entry (partition_key), may provide
+    seed entries for a partition (_seed_entries) and build retrieval on
+    _ensure_partition / MemoryPartition.relevance.
+    """
+
+    def __init__(
+        self,
+        memory_type: MemoryType,
+        backend: Optional[MemoryBackend] = None,
+        embedder: Optional[QueryEmbedder] = None,
+        max_per_partition: Optional[int] = None,
+        max_loaded_partitions: Optional[int] = None
+    ):
+        """
+        Args:
+            memory_type: Memory type stored
+            backend: Persistence (None = process memory only)
+            embedder: Embedding function shared by the manager (None = keyword relevance)
+            max_per_partition: Capacity of a partition (None = unbounded)
+            max_loaded_partitions: Partitions kept in process before unloading
+        """
+        super().__init__(memory_type)
+        self.backend = backend
+        self.embedder = embedder
+        self.max_per_partition = max_per_partition
+        self.max_loaded_partitions = max_loaded_partitions or settings.MEMORY_MAX_LOADED_PARTITIONS
+
+        # Every loaded entry by ID, and the partition index over them
+        self.memories: Dict[str, MemoryEntry] = {}
+        self._partitions: "OrderedDict[str, MemoryPartition]" = OrderedDict()
+        self._entry_partition: Dict[str, str] = {}
+        self._loading: Dict[str, "asyncio.Task"] = {}
+        self._dirty: Set[str] = set()
+        self.evicted = 0
+
+    # ==================== PARTITIONS ====================
+
+    def partition_key(self, entry: MemoryEntry) -> str:
+        """Partition an entry belongs to"""
+        return GLOBAL_PARTITION
+
+    def _seed_entries(self, partition: str) -> List[MemoryEntry]:
+        """Entries every copy of a partition starts with (stable IDs)"""
+        return []
+
+    async def _ensure_partition(self, key: str) -> MemoryPartition:
+        """Loaded partition for key (loads it from the backend once)"""
+        partition = self._partitions.get(key)
+        if partition is not None:
+            self._partitions.move_to_end(key)
+            return partition
+
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_partition(key))
+            self._loading[key] = task
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await task
+
+    async def _load_partition(self, key: str) -> MemoryPartition:
+        records: List[Dict[str, Any]] = []
+        if self.backend is not None:
+            try:
+                records = await self.backend.load_partition(self.memory_type.value, key)
+            except Exception as e:
+                self.logger.error(f"❌ Failed to load {self.memory_type.value} memories ({key}): {e}")
+
+        entries = []
+        vectors = []
+        for record in records:
+            entries.append(entry_from_record(record))
+            vectors.append(_unit_vector(record.get("embedding")))
+
+        loaded_ids = {entry.id for entry in entries}
+        seeds = [seed for seed in self._seed_entries(key) if seed.id not in loaded_ids]
+        entries.extend(seeds)
+        vectors.extend(_unit_vector(seed.embedding) for seed in seeds)
+
+        # Embed seeds and entries stored while the embedding service was down
+        unembedded = [i for i, vector in enumerate(vectors) if vector is None]
+        if unembedded and self.embedder is not None:
+            embedded = await self.embedder.embed([entries[i].content for i in unembedded])
+            for i, vector in zip(unembedded, embedded):
+                if vector is not None:
+                    vectors[i] = vector
+                    self._dirty.add(entries[i].id)
+
+        partition = MemoryPartition()
+        self._partitions[key] = partition
+        for entry, vector in zip(entries, vectors):
+            entry.embedding = None  # Vectors live in the partition matrix
+            self._index(partition, key, entry, vector)
+
+        if seeds:
+            await self._persist(seeds)
+        if self.max_per_partition and len(partition) > self.max_per_partition:
+            await self._evict(key, self.max_per_partition)
+
+        await self._unload_cold_partitions()
+        return partition
+
+    async def _unload_cold_partitions(self):
+        """Drop least recently used partitions beyond max_loaded_partitions"""
+        # Without a backend, unloading would lose memories
+        if self.backend is None:
+            return
+        while len(self._partitions) > self.max_loaded_partitions:
+            key, partition = next(iter(self._partitions.items()))
+            dirty = [memory_id for memory_id in partition.id_to_slot if memory_id in self._dirty]
+            if dirty:
+                await self._persist([self.memories[memory_id] for memory_id in dirty])
+            self._partitions.pop(key, None)
+            for memory_id in list(partition.id_to_slot):
+                self.memories.pop(memory_id, None)
+                self._entry_partition.pop(memory_id, None)
+                self._dirty.discard(memory_id)
+
+    def _index(self, partition: MemoryPartition, key: str, entry: MemoryEntry, vector: Optional[np.ndarray]):
+        partition.add(entry, vector)
+        self.memories[entry.id] = entry
+        self._entry_partition[entry.id] = key
+
+    def _partition_of(self, memory_id: str) -> Optional[MemoryPartition]:
+        key = self._entry_partition.get(memory_id)
+        return self._partitions.get(key) if key is not None else None
+
+    async def _embed_query(self, text: str) -> Optional[np.ndarray]:
+        if self.embedder is None or not text.strip():
+            return None
+        return (await self.embedder.embed([text]))[0]
+
+    # ==================== WRITES ====================
+
+    async def _put(self, entry: MemoryEntry):
+        """Index an entry, enforce partition capacity, write it through"""
+        key = self.partition_key(entry)
+
+        vector = _unit_vector(entry.embedding)
+        if vector is None and self.embedder is not None:
+            vector = (await self.embedder.embed([entry.content]))[0]
+
+        # Ensured after the embedder await (a concurrent load may unload cold
+        # partitions meanwhile); no await between here and the write below
+        partition = await self._ensure_partition(key)
+        entry.embedding = None  # Vectors live in the partition matrix
+        self._index(partition, key, entry, vector)
+
+        await self._persist([entry])
+        if self.max_per_partition and len(partition) > self.max_per_partition:
+            await self._evict(key, self.max_per_partition, keep={entry.id})
+
+    def _touch(self, memory_id: str):
+        """Mark an entry changed (importance, access count, statistics)"""
+        partition = self._partition_of(memory_id)
+        if partition is not None:
+            partition.sync(self.memories[memory_id])
+        self._dirty.add(memory_id)
+
+    def _drop(self, memory_id: str) -> bool:
+        """Remove an entry from the index (not from the backend)"""
+        entry = self.memories.pop(memory_id, None)
+        if entry is None:
+            return False
+        partition = self._partition_of(memory_id)
+        if partition is not None:
+            partition.remove(memory_id)
+        self._entry_partition.pop(memory_id, None)
+        self._dirty.discard(memory_id)
+        return True
+
+    async def _remove(self, memory_ids: List[str]) -> int:
+        """Remove entries from the index and the backend"""
+        removed = [memory_id for memory_id in memory_ids if self._drop(memory_id)]
+        if removed and self.backend is not None:
+            try:
+                await self.backend.delete(self.memory_type.value, removed)
+            except Exception as e:
+                self.logger.error(f"❌ Failed to delete {len(removed)} {self.memory_type.value} memories: {e}")
+        return len(removed)
+
+    async def _persist(self, entries: List[MemoryEntry]):
+        if self.backend is None or not entries:
+            self._dirty.difference_update(entry.id for entry in entries)
+            return
+
+        records = []
+        for entry in entries:
+            key = self._entry_partition.get(entry.id)
+            partition = self._partitions.get(key) if key is not None else None
+            if partition is None:
+                continue  # Unloaded meanwhile (unloading persists dirty entries)
+            vector = partition.vector(entry.id)
+            records.append(entry_to_record(entry, key, vector.tolist() if vector is not None else None))
+
+        try:
+            await self.backend.save(self.memory_type.value, records)
+            self._dirty.difference_update(entry.id for entry in entries)
+        except Exception as e:
+            # Kept dirty: retried by the next flush()
+            self._dirty.update(entry.id for entry in entries if entry.id in self.memories)
+            self.logger.error(f"❌ Failed to persist {len(records)} {self.memory_type.value} memories: {e}")
+
+    async def flush(self) -> int:
+        """Write changed entries to the backend in one batch"""
+        dirty = [self.memories[memory_id] for memory_id in self._dirty if memory_id in self.memories]
+        self._dirty.clear()
+        await self._persist(dirty)
+        return len(dirty)
+
+    # ==================== EVICTION ====================
+
+    async def _evict(self, key: str, capacity: int, keep: Optional[Set[str]] = None) -> int:
+        """
+        Trim a partition to capacity
+
+        Evicts the entries with the lowest 0.5*importance + 0.5*recency;
+        IDs in keep (e.g. the entry just stored) are never evicted.
+        """
+        partition = self._partitions.get(key)
+        if partition is None or len(partition) <= capacity:
+            return 0
+
+        slots = partition.live_slots()
+        retention = 0.5 * partition.importance[slots] + 0.5 * recency_scores(partition.created[slots], time.time())
+        if keep:
+            protected = np.fromiter(
+                (partition.slot_ids[slot] in keep for slot in slots), dtype=bool, count=len(slots)
+            )
+            retention[protected] = np.inf
+
+        excess = len(slots) - capacity
+        victims = np.argpartition(retention, excess - 1)[:excess]
+        removed = await self._remove([partition.slot_ids[slots[i]] for i in victims])
+        self.evicted += removed
+        return removed
+
+    async def _evict_all(self) -> int:
+        """Trim every loaded partition to max_per_partition"""
+        if not self.max_per_partition:
+            return 0
+        evicted = 0
+        for key in list(self._partitions):
+            evicted += await self._evict(key, self.max_per_partition)
+        return evicted
+
+    async def close(self):
+        """Flush pending changes"""
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "count": len(self.memories),
+            "loaded_partitions": len(self._partitions),
+            "dirty": len(self._dirty),
+            "evicted": self.evicted
+        }
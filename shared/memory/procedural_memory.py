@@ -10,12 +10,26 @@ Examples:
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from functools import lru_cache
 import logging
+import re
+import uuid
 
-from .base import MemoryStore, MemoryEntry, MemoryType, MemoryQuery
+from .base import MemoryEntry, MemoryType, MemoryQuery
+from .backends import MemoryBackend, GLOBAL_PARTITION
+from .persistent_store import PersistentMemoryStore, QueryEmbedder
 
 
-class ProceduralMemory(MemoryStore):
+@lru_cache(maxsize=512)
+def _compile_trigger(pattern: str) -> Optional[re.Pattern]:
+    """Compiled trigger pattern (None if the pattern is invalid)"""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+class ProceduralMemory(PersistentMemoryStore):
     """
     Procedural Memory Store
 
@@ -24,18 +38,21 @@ class ProceduralMemory(MemoryStore):
     - Query patterns → Action mappings
     - Operator configurations
     - Success/failure patterns
+
+    Skills share the global partition; usage statistics are persisted by
+    flush(), so success rates survive restarts and are shared by replicas.
     """
 
-    def __init__(self):
-        super().__init__(MemoryType.PROCEDURAL)
-        self.memories: Dict[str, MemoryEntry] = {}
+    def __init__(
+        self,
+        backend: Optional[MemoryBackend] = None,
+        embedder: Optional[QueryEmbedder] = None
+    ):
+        super().__init__(MemoryType.PROCEDURAL, backend=backend, embedder=embedder)
         self.logger = logging.getLogger("ProceduralMemory")
 
-        # Pre-load initial skills
-        self._load_initial_skills()
-
-    def _load_initial_skills(self):
-        """Load initial procedural skills"""
+    def _seed_entries(self, partition: str) -> List[MemoryEntry]:
+        """Initial procedural skills (stable IDs, so replicas and restarts don't duplicate them)"""
         initial_skills = [
             {
                 "skill_name": "international_school_query_handler",
@@ -111,22 +128,26 @@ class ProceduralMemory(MemoryStore):
             }
         ]
 
-        for skill in initial_skills:
-            entry = MemoryEntry(
+        entries = [
+            MemoryEntry(
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"ree-ai/memory/procedural/{skill['skill_name']}")),
                 memory_type=MemoryType.PROCEDURAL,
                 content=skill["content"],
-                metadata=skill["metadata"],
+                metadata={"skill_name": skill["skill_name"], **skill["metadata"]},
                 importance=skill["importance"]
             )
-            self.memories[entry.id] = entry
+            for skill in initial_skills
+        ]
 
         self.logger.info(f"🧠 Loaded {len(initial_skills)} procedural skills")
 
+        return entries
+
     async def store(self, entry: MemoryEntry) -> str:
         """Store procedural skill"""
         entry.memory_type = MemoryType.PROCEDURAL
 
-        self.memories[entry.id] = entry
+        await self._put(entry)
 
         self.logger.info(f"📝 Stored procedural skill: {entry.metadata.get('skill_name', 'unknown')}")
 
@@ -134,15 +155,17 @@ class ProceduralMemory(MemoryStore):
 
     async def retrieve(self, query: MemoryQuery) -> List[MemoryEntry]:
         """Retrieve applicable skills for query"""
-        import re
+        partition = await self._ensure_partition(GLOBAL_PARTITION)
 
         results = []
 
-        for memory in self.memories.values():
-            # Check trigger pattern
+        for memory_id in partition.id_to_slot:
+            memory = self.memories[memory_id]
+            # Check trigger pattern (compiled once per pattern)
             trigger_pattern = memory.metadata.get("trigger_pattern")
             if trigger_pattern:
-                if re.search(trigger_pattern, query.query, re.IGNORECASE):
+                trigger = _compile_trigger(trigger_pattern)
+                if trigger is not None and trigger.search(query.query):
                     # Pattern matched!
                     success_rate = memory.metadata.get("success_rate", 0.5)
                     results.append((memory, success_rate))
@@ -177,14 +200,13 @@ class ProceduralMemory(MemoryStore):
             else:
                 setattr(memory, key, value)
 
+        # Persisted by the next flush()
+        self._touch(memory_id)
         return True
 
     async def delete(self, memory_id: str) -> bool:
         """Delete procedural skill"""
-        if memory_id in self.memories:
-            del self.memories[memory_id]
-            return True
-        return False
+        return bool(await self._remove([memory_id]))
 
     async def consolidate(self) -> int:
         """
@@ -192,8 +214,6 @@ class ProceduralMemory(MemoryStore):
         - Remove skills with very low success rate
         - Promote frequently used skills
         """
-        consolidated = 0
-
         to_delete = []
         for mem_id, memory in self.memories.items():
             success_rate = memory.metadata.get("success_rate", 0.5)
@@ -203,9 +223,8 @@ class ProceduralMemory(MemoryStore):
             if usage_count >= 10 and success_rate < 0.3:
                 to_delete.append(mem_id)
 
-        for mem_id in to_delete:
-            await self.delete(mem_id)
-            consolidated += 1
+        consolidated = await self._remove(to_delete)
+        await self.flush()
 
         if consolidated > 0:
             self.logger.info(f"🧹 Removed {consolidated} low-performing skills")
@@ -11,11 +11,17 @@ Examples:
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
+import uuid
 
-from .base import MemoryStore, MemoryEntry, MemoryType, MemoryQuery
+import numpy as np
 
+from shared.config import settings
+from .base import MemoryEntry, MemoryType, MemoryQuery
+from .backends import MemoryBackend, GLOBAL_PARTITION
+from .persistent_store import PersistentMemoryStore, QueryEmbedder, top_k
 
-class SemanticMemory(MemoryStore):
+
+class SemanticMemory(PersistentMemoryStore):
     """
     Semantic Memory Store
 
@@ -24,18 +30,21 @@ class SemanticMemory(MemoryStore):
     - Market knowledge (trends, patterns)
     - Rules and constraints
     - Statistical insights
+
+    All facts share the global partition; initial domain knowledge is
+    seeded into it when it is first loaded.
     """
 
-    def __init__(self):
-        super().__init__(MemoryType.SEMANTIC)
-        self.memories: Dict[str, MemoryEntry] = {}
+    def __init__(
+        self,
+        backend: Optional[MemoryBackend] = None,
+        embedder: Optional[QueryEmbedder] = None
+    ):
+        super().__init__(MemoryType.SEMANTIC, backend=backend, embedder=embedder)
         self.logger = logging.getLogger("SemanticMemory")
 
-        # Pre-load domain knowledge
-        self._load_initial_knowledge()
-
-    def _load_initial_knowledge(self):
-        """Load initial domain facts"""
+    def _seed_entries(self, partition: str) -> List[MemoryEntry]:
+        """Initial domain facts (stable IDs, so replicas and restarts don't duplicate them)"""
         initial_facts = [
             {
                 "content": "Thảo Điền is a premium expat area in District 2 with international schools",
@@ -106,51 +115,76 @@ class SemanticMemory(MemoryStore):
             }
         ]
 
-        for fact in initial_facts:
-            entry = MemoryEntry(
+        entries = [
+            MemoryEntry(
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"ree-ai/memory/semantic/{fact['content']}")),
                 memory_type=MemoryType.SEMANTIC,
                 content=fact["content"],
                 metadata=fact["metadata"],
                 importance=fact["importance"]
             )
-            self.memories[entry.id] = entry
+            for fact in initial_facts
+        ]
 
         self.logger.info(f"📚 Loaded {len(initial_facts)} semantic facts")
 
+        return entries
+
     async def store(self, entry: MemoryEntry) -> str:
         """Store semantic fact"""
         entry.memory_type = MemoryType.SEMANTIC
 
-        self.memories[entry.id] = entry
+        await self._put(entry)
 
         self.logger.info(f"📝 Stored semantic fact: {entry.content[:50]}...")
 
         return entry.id
 
     async def retrieve(self, query: MemoryQuery) -> List[MemoryEntry]:
-        """Retrieve relevant domain facts"""
-        results = []
-
-        for memory in self.memories.values():
-            # Filter by category if provided
-            if "category" in query.filters:
-                if memory.metadata.get("category") != query.filters["category"]:
-                    continue
-
-            # Filter by importance
-            if memory.importance < query.min_importance:
-                continue
+        """
+        Retrieve relevant domain facts
 
-            # Compute relevance
-            relevance = self._compute_relevance(query.query, memory.content)
+        Relevance is embedding cosine (kept if >= MEMORY_SEMANTIC_MIN_SIMILARITY),
+        or boosted keyword overlap (kept if > 0.1) without embeddings.
+        """
+        partition = await self._ensure_partition(GLOBAL_PARTITION)
+
+        slots = partition.live_slots()
+
+        # Filter by category if provided
+        if "category" in query.filters:
+            category = query.filters["category"]
+            slots = slots[np.fromiter(
+                (self.memories[partition.slot_ids[slot]].metadata.get("category") == category for slot in slots),
+                dtype=bool,
+                count=len(slots)
+            )]
+
+        # Filter by importance
+        slots = slots[partition.importance[slots] >= query.min_importance]
+
+        # Compute relevance
+        query_vector = await self._embed_query(query.query)
+        relevance, by_vector = partition.relevance(
+            slots,
+            query_vector,
+            set(query.query.lower().split()),
+            keyword_scale=1.5  # Boost for semantic
+        )
 
-            if relevance > 0.1:  # Only include if somewhat relevant
-                results.append((memory, relevance))
+        # Only include if somewhat relevant
+        relevant = np.where(
+            by_vector,
+            relevance >= settings.MEMORY_SEMANTIC_MIN_SIMILARITY,
+            relevance > 0.1
+        )
+        slots, relevance = slots[relevant], relevance[relevant]
 
         # Sort by relevance
-        results.sort(key=lambda x: x[1], reverse=True)
-
-        top_memories = [mem for mem, score in results[:query.limit]]
+        top_memories = [
+            self.memories[partition.slot_ids[slots[i]]]
+            for i in top_k(relevance, query.limit)
+        ]
 
         self.logger.info(f"🔍 Retrieved {len(top_memories)} semantic facts for: '{query.query}'")
 
@@ -165,14 +199,13 @@ class SemanticMemory(MemoryStore):
         for key, value in updates.items():
             setattr(memory, key, value)
 
+        # Persisted by the next flush()
+        self._touch(memory_id)
         return True
 
     async def delete(self, memory_id: str) -> bool:
         """Delete semantic fact"""
-        if memory_id in self.memories:
-            del self.memories[memory_id]
-            return True
-        return False
+        return bool(await self._remove([memory_id]))
 
     async def consolidate(self) -> int:
         """
@@ -181,19 +214,9 @@ class SemanticMemory(MemoryStore):
         - Update outdated facts
         """
         # TODO: Implement fact merging
+        await self.flush()
         return 0
 
-    def _compute_relevance(self, query: str, content: str) -> float:
-        """Compute semantic relevance"""
-        query_words = set(query.lower().split())
-        content_words = set(content.lower().split())
-
-        if not query_words:
-            return 0.0
-
-        matches = len(query_words & content_words)
-        return min(1.0, matches / len(query_words) * 1.5)  # Boost for semantic
-
     async def get_location_facts(self, district: str) -> List[MemoryEntry]:
         """Get facts about a specific district"""
         query = MemoryQuery(
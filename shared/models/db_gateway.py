@@ -32,6 +32,15 @@ class SearchRequest(BaseModel):
     alpha: float = Field(0.5, description="Weight for vector vs BM25 (0=BM25 only, 1=vector only)")
 
 
+class MarketStatsRequest(BaseModel):
+    """Market segment for price statistics (all fields optional)."""
+    city: Optional[str] = None
+    district: Optional[str] = None
+    property_type: Optional[str] = None
+    listing_type: Optional[str] = None  # "sale" or "rent"
+    bedrooms: Optional[int] = Field(None, description="Exact count; aggregated as bucket 1 / 2 / 3 / 4+")
+
+
 class PropertyResult(BaseModel):
     """Property search result with flexible OpenSearch types."""
     property_id: str
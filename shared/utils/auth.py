@@ -0,0 +1,183 @@
+"""
+Shared JWT Authentication
+
+Every authenticated request used to run jwt.decode (HMAC + JSON + claim
+checks), and the auth services then re-read the user row as well. This
+module keeps both off the hot path:
+- TokenCache: LRU of verified token -> claims. An entry is only served
+  until the token's `exp`, so caching never extends a token's lifetime.
+  Failed verifications are not cached.
+- ProfileCache: short-TTL cache of user profiles. Callers invalidate it
+  when they change a profile; other replicas see changes within the TTL.
+- Authenticator: FastAPI middleware that puts the caller's claims on
+  request.state, plus a require_user dependency. BaseService mounts it
+  with auth=True.
+
+With warm caches, authenticating a request is a dictionary lookup.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+from fastapi import HTTPException, Request
+
+from shared.config import settings
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Token from an "Authorization: Bearer <token>" header value"""
+    if not authorization:
+        return None
+    token = authorization.replace("Bearer ", "").strip()
+    return token or None
+
+
+class TokenCache:
+    """Verified JWT claims keyed by token, each entry valid until the token's exp"""
+
+    def __init__(
+        self,
+        secret: str = settings.JWT_SECRET_KEY,
+        algorithm: str = settings.JWT_ALGORITHM,
+        max_entries: int = settings.AUTH_TOKEN_CACHE_SIZE
+    ):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+
+        # token -> (exp, claims)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims of a valid token
+
+        Raises:
+            jwt.ExpiredSignatureError: Token expired
+            jwt.PyJWTError: Bad signature, malformed token or key
+        """
+        entry = self._entries.get(token)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(token)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._entries[token]
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+        self.stats["misses"] += 1
+        claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        exp = claims.get("exp")
+        if exp is not None:  # Tokens without exp are verified every time
+            self._entries[token] = (float(exp), claims)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return claims
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+class ProfileCache:
+    """User profiles by user_id for a few seconds (one instance per service)"""
+
+    def __init__(
+        self,
+        ttl: float = settings.AUTH_PROFILE_CACHE_TTL,
+        max_entries: int = settings.AUTH_PROFILE_CACHE_SIZE
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # user_id -> (expires_at, profile)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: str) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return entry[1]
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, user_id: str, profile: Any):
+        self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+        self._entries.move_to_end(user_id)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """Drop a profile after it changed"""
+        if self._entries.pop(user_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "ttl_s": self.ttl}
+
+
+class Authenticator:
+    """
+    Request authentication on top of a TokenCache.
+
+    Usage:
+        app.middleware("http")(authenticator.middleware)
+
+        @app.get("/users/me")
+        async def me(user_id: str = Depends(authenticator.require_user)): ...
+
+    The middleware never rejects requests (public routes stay public); it
+    sets request.state.claims / user_id for a valid token, or
+    request.state.auth_error for an invalid one, and require_user turns a
+    missing or invalid token into 401.
+    """
+
+    def __init__(self, tokens: Optional[TokenCache] = None):
+        self.tokens = tokens or TokenCache()
+
+    def authenticate(self, authorization: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(claims, error) for an Authorization header value"""
+        token = bearer_token(authorization)
+        if token is None:
+            return None, "Authorization header missing"
+        try:
+            return self.tokens.verify(token), None
+        except jwt.ExpiredSignatureError:
+            return None, "Token expired"
+        except jwt.PyJWTError:
+            return None, "Invalid token"
+
+    def user_id(self, authorization: Optional[str]) -> Optional[str]:
+        """user_id (sub) of a valid token, None otherwise"""
+        claims, _ = self.authenticate(authorization)
+        return claims.get("sub") if claims else None
+
+    async def middleware(self, request: Request, call_next):
+        """FastAPI HTTP middleware: app.middleware("http")(authenticator.middleware)"""
+        authorization = request.headers.get("authorization")
+        if authorization:
+            claims, error = self.authenticate(authorization)
+            request.state.claims = claims
+            request.state.user_id = claims.get("sub") if claims else None
+            request.state.auth_error = error
+        return await call_next(request)
+
+    async def require_user(self, request: Request) -> str:
+        """FastAPI dependency: user_id of the caller, 401 without a valid token"""
+        # async so FastAPI runs it on the event loop instead of the threadpool
+        if hasattr(request.state, "auth_error"):
+            user_id, error = request.state.user_id, request.state.auth_error
+        else:
+            # Middleware not mounted (or no header)
+            claims, error = self.authenticate(request.headers.get("authorization"))
+            user_id = claims.get("sub") if claims else None
+        if error or not user_id:
+            raise HTTPException(status_code=401, detail=error or "Invalid token")
+        return user_id
+
+
+# Shared instance for the process
+authenticator = Authenticator()
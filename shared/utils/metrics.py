@@ -184,6 +184,67 @@ rag_quality_score = Histogram(
     buckets=[0.1, 0.3, 0.5, 0.7, 0.9, 1.0]
 )
 
+# ==================== CRAWLER METRICS ====================
+
+# Per-domain scheduler state (services/crawler/crawl_scheduler.py)
+crawler_domain_tokens = Gauge(
+    'crawler_domain_tokens',
+    'Tokens available in the per-domain bucket',
+    ['domain']
+)
+
+crawler_domain_rate = Gauge(
+    'crawler_domain_rate',
+    'Current per-domain request rate (requests/second)',
+    ['domain']
+)
+
+crawler_domain_in_flight = Gauge(
+    'crawler_domain_in_flight',
+    'Requests in flight per domain',
+    ['domain']
+)
+
+crawler_domain_concurrency_limit = Gauge(
+    'crawler_domain_concurrency_limit',
+    'AIMD concurrency limit per domain',
+    ['domain']
+)
+
+crawler_domain_backoff_seconds = Gauge(
+    'crawler_domain_backoff_seconds',
+    'Seconds until a rate-limited domain may be requested again',
+    ['domain']
+)
+
+crawler_rate_limit_events_total = Counter(
+    'crawler_rate_limit_events_total',
+    'Rate limit responses detected',
+    ['domain', 'event_type']
+)
+
+# ==================== PASSWORD HASHING METRICS ====================
+
+# bcrypt process pool (shared/utils/password_hasher.py)
+password_hash_queue_depth = Gauge(
+    'password_hash_queue_depth',
+    'Password hash/verify calls waiting or running',
+    ['service']
+)
+
+password_hash_duration_seconds = Histogram(
+    'password_hash_duration_seconds',
+    'Password hash/verify duration including queueing',
+    ['service', 'operation'],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+
+password_hash_rejections_total = Counter(
+    'password_hash_rejections_total',
+    'Password hash/verify calls rejected because the queue was full',
+    ['service']
+)
+
 # ==================== DECORATORS ====================
 
 def track_request_metrics(service_name: str):
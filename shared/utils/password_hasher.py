@@ -0,0 +1,165 @@
+"""
+Password Hashing Executor
+
+bcrypt is slow on purpose (tens to hundreds of ms per call, depending on
+the cost) and holds the CPU and the GIL for the whole call, so hashing in
+an async handler stalls every other request on the worker. PasswordHasher
+runs bcrypt in a small process pool instead:
+- Bounded: at most max_queue hash/verify calls waiting or running; beyond
+  that callers get HasherOverloaded (503 + Retry-After) instead of an
+  ever-growing backlog
+- Queue depth, durations and rejections exported as Prometheus metrics
+  and via get_stats()
+- Configurable cost: needs_rehash() tells callers when a stored hash was
+  made with a different cost, so it can be replaced on the next login
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+import bcrypt
+
+from shared.config import settings
+from shared.utils.logger import setup_logger, LogEmoji
+
+try:
+    from shared.utils import metrics
+    HAS_PROMETHEUS = True
+except ImportError:
+    HAS_PROMETHEUS = False
+
+logger = setup_logger("password_hasher")
+
+
+# Run in pool workers (module level so they can be pickled)
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _warm_up() -> None:
+    pass
+
+
+class HasherOverloaded(Exception):
+    """Too many hash/verify calls queued; retry later"""
+
+
+class PasswordHasher:
+    """bcrypt in a bounded process pool (one instance per service)"""
+
+    def __init__(
+        self,
+        service_name: str,
+        rounds: int = settings.PASSWORD_HASH_ROUNDS,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_queue: int = settings.PASSWORD_HASH_MAX_QUEUE
+    ):
+        """
+        Args:
+            service_name: Metrics label
+            rounds: bcrypt cost for new hashes (log2 of the iterations)
+            workers: Pool processes (each hashes one password at a time)
+            max_queue: Calls waiting or running before new ones are rejected
+        """
+        self.service_name = service_name
+        self.rounds = rounds
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.stats = {"hash": 0, "verify": 0, "rejected": 0, "rehashes": 0}
+
+    def start(self):
+        """Start the pool and its workers (so the first login doesn't pay for process start-up)"""
+        if self._executor is not None:
+            return
+        # spawn, not fork: forked workers would inherit the event loop and open sockets
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+        logger.info(f"{LogEmoji.SUCCESS} Password hashing pool: {self.workers} workers, cost {self.rounds}")
+
+    async def stop(self):
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _run(self, operation: str, fn, *args):
+        if self._pending >= self.max_queue:
+            self.stats["rejected"] += 1
+            if HAS_PROMETHEUS:
+                metrics.password_hash_rejections_total.labels(service=self.service_name).inc()
+            raise HasherOverloaded(f"{self._pending} password hash operations queued")
+        if self._executor is None:
+            self.start()
+
+        self.stats[operation] += 1
+        self._pending += 1
+        self._set_queue_depth()
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._set_queue_depth()
+            if HAS_PROMETHEUS:
+                metrics.password_hash_duration_seconds.labels(
+                    service=self.service_name, operation=operation
+                ).observe(time.perf_counter() - start)
+
+    def _set_queue_depth(self):
+        if HAS_PROMETHEUS:
+            metrics.password_hash_queue_depth.labels(service=self.service_name).set(self._pending)
+
+    async def hash(self, password: str) -> str:
+        """
+        bcrypt hash of a password at the configured cost
+
+        Raises:
+            HasherOverloaded: Queue full
+        """
+        hashed = await self._run("hash", _hash, password.encode("utf-8"), self.rounds)
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """
+        Check a password against a stored hash (False for malformed hashes)
+
+        Raises:
+            HasherOverloaded: Queue full
+        """
+        try:
+            return await self._run("verify", _check, password.encode("utf-8"), hashed.encode("utf-8"))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if a stored hash was made with a different cost than configured"""
+        # $2b$12$<salt+hash>
+        parts = hashed.split("$")
+        try:
+            return int(parts[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for /health"""
+        return {
+            **self.stats,
+            "queue_depth": self._pending,
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+            "rounds": self.rounds,
+        }
@@ -22,6 +22,23 @@ from pathlib import Path
 from typing import Dict, List, Optional
 
 
+# Precompiled rewrite patterns (module level: shared by every normalizer)
+
+# 2BR, 3 BR, 2-BR, 2 bedrooms → "2 phòng ngủ"
+_BEDROOM_PATTERN = re.compile(r'(\d+)(?:\s*(?:-\s*)?BR|\s+bedrooms?)\b', re.IGNORECASE)
+
+# 5B, 5 billion → "5 tỷ"; 20M, 20 million → "20 triệu"
+_PRICE_PATTERN = re.compile(r'(\d+)\s*(billion|million|B|M)\b', re.IGNORECASE)
+_PRICE_EXPANSIONS = {"b": "tỷ", "billion": "tỷ", "m": "triệu", "million": "triệu"}
+
+# District lists: "Quận 1, 2, 7", "District 1, 2, 7", "Q1, Q2, 7"
+_VI_DISTRICT_LIST = re.compile(r'(Quận|quan)\s+(\d+)(?:\s*,\s*(\d+))+')
+_EN_DISTRICT_LIST = re.compile(r'(District|district)\s+(\d+)(?:\s*,\s*(\d+))+')
+_ABBR_DISTRICT_LIST = re.compile(r'([QD])(\d+)(?:\s*,\s*[QD]?(\d+))+')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
 class QueryNormalizer:
     """Normalize user queries for better attribute extraction"""
 
@@ -45,10 +62,11 @@ class QueryNormalizer:
         self._build_patterns()
 
     def _build_patterns(self):
-        """Build regex patterns from keywords"""
+        """Build regex patterns from keywords (compiled once, reused for every query)"""
 
         # District abbreviations
         self.district_map = self.keywords.get("district_abbreviations", {}).get("patterns", {})
+        self._district_pattern, self._district_expansions = self._compile_district_map(self.district_map)
 
         # Bedroom patterns
         bedroom_data = self.keywords.get("property_attributes", {}).get("bedrooms", {})
@@ -58,6 +76,36 @@ class QueryNormalizer:
         price_data = self.keywords.get("property_attributes", {}).get("price", {})
         self.price_units = price_data.get("units", {})
 
+    @staticmethod
+    def _compile_district_map(district_map: Dict[str, str]):
+        """
+        One alternation for all district abbreviations
+
+        Expansions used to be applied one re.sub per abbreviation, longest
+        first, so a replacement could be rewritten again by a later (shorter)
+        abbreviation. Each expansion is resolved through those later rules up
+        front, which lets a single substitution pass give the same result.
+
+        Returns:
+            (compiled pattern or None, lowercase abbreviation -> final expansion)
+        """
+        ordered = sorted(district_map.items(), key=lambda x: len(x[0]), reverse=True)
+
+        expansions = {}
+        for idx, (abbr, full) in enumerate(ordered):
+            for later_abbr, later_full in ordered[idx + 1:]:
+                full = re.sub(r'\b' + re.escape(later_abbr) + r'\b', later_full, full, flags=re.IGNORECASE)
+            expansions.setdefault(abbr.lower(), full)
+
+        if not ordered:
+            return None, expansions
+
+        pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(abbr) for abbr, _ in ordered) + r')\b',
+            re.IGNORECASE
+        )
+        return pattern, expansions
+
     def normalize(self, query: str) -> str:
         """
         Normalize query string
@@ -86,7 +134,7 @@ class QueryNormalizer:
         normalized = self._expand_multiple_districts(normalized)
 
         # Step 5: Clean up extra spaces
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
+        normalized = _WHITESPACE.sub(' ', normalized).strip()
 
         return normalized
 
@@ -99,17 +147,14 @@ class QueryNormalizer:
             "D1" → "District 1"
             "District 1" → "Quận 1"
         """
-        result = query
-
-        # Sort by length (descending) to match longer patterns first
-        sorted_patterns = sorted(self.district_map.items(), key=lambda x: len(x[0]), reverse=True)
-
-        for abbr, full in sorted_patterns:
-            # Use word boundary to avoid partial matches
-            pattern = r'\b' + re.escape(abbr) + r'\b'
-            result = re.sub(pattern, full, result, flags=re.IGNORECASE)
+        if self._district_pattern is None:
+            return query
 
-        return result
+        # Longest abbreviation wins at each position (alternation is sorted by length)
+        return self._district_pattern.sub(
+            lambda m: self._district_expansions[m.group(0).lower()],
+            query
+        )
 
     def _expand_bedrooms(self, query: str) -> str:
         """
@@ -120,19 +165,7 @@ class QueryNormalizer:
             "3 BR" → "3 phòng ngủ"
             "2-BR" → "2 phòng ngủ"
         """
-        result = query
-
-        # Pattern: number + optional separator + BR
-        patterns = [
-            (r'(\d+)\s*BR\b', r'\1 phòng ngủ'),           # 2BR → 2 phòng ngủ
-            (r'(\d+)\s*-\s*BR\b', r'\1 phòng ngủ'),       # 2-BR → 2 phòng ngủ
-            (r'(\d+)\s+bedroom(?:s)?\b', r'\1 phòng ngủ'), # 2 bedrooms → 2 phòng ngủ
-        ]
-
-        for pattern, replacement in patterns:
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-
-        return result
+        return _BEDROOM_PATTERN.sub(r'\1 phòng ngủ', query)
 
     def _expand_prices(self, query: str) -> str:
         """
@@ -143,20 +176,10 @@ class QueryNormalizer:
             "20M" → "20 triệu"
             "5 billion" → "5 tỷ"
         """
-        result = query
-
-        # Pattern: number + price unit
-        replacements = {
-            r'(\d+)\s*B\b': r'\1 tỷ',                   # 5B → 5 tỷ
-            r'(\d+)\s*M\b': r'\1 triệu',                # 20M → 20 triệu
-            r'(\d+)\s*billion\b': r'\1 tỷ',             # 5 billion → 5 tỷ
-            r'(\d+)\s*million\b': r'\1 triệu',          # 20 million → 20 triệu
-        }
-
-        for pattern, replacement in replacements.items():
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-
-        return result
+        return _PRICE_PATTERN.sub(
+            lambda m: f"{m.group(1)} {_PRICE_EXPANSIONS[m.group(2).lower()]}",
+            query
+        )
 
     def _expand_multiple_districts(self, query: str) -> str:
         """
@@ -171,26 +194,18 @@ class QueryNormalizer:
         # Pattern: "Quận X, Y, Z" → "Quận X, Quận Y, Quận Z"
         # Match: Quận/District followed by number, then comma-separated numbers
         patterns = [
-            # Vietnamese: Quận 1, 2, 7
-            (
-                r'(Quận|quan)\s+(\d+)(?:\s*,\s*(\d+))+',
-                lambda m: self._expand_district_list(m, 'Quận')
-            ),
-            # English: District 1, 2, 7
-            (
-                r'(District|district)\s+(\d+)(?:\s*,\s*(\d+))+',
-                lambda m: self._expand_district_list(m, 'Quận')
-            ),
-            # Abbreviated: Q1, Q2, Q7 or D1, D2, D7
-            (
-                r'([QD])(\d+)(?:\s*,\s*[QD]?(\d+))+',
-                lambda m: self._expand_abbreviated_district_list(m)
-            ),
+            (_VI_DISTRICT_LIST, lambda m: self._expand_district_list(m, 'Quận')),
+            (_EN_DISTRICT_LIST, lambda m: self._expand_district_list(m, 'Quận')),
+            (_ABBR_DISTRICT_LIST, self._expand_abbreviated_district_list),
         ]
 
         for pattern, handler in patterns:
+            # Cheap pre-check: every list needs a comma
+            if ',' not in result:
+                break
+
             # Find all matches
-            matches = list(re.finditer(pattern, result))
+            matches = list(pattern.finditer(result))
 
             # Replace from end to start to preserve positions
             for match in reversed(matches):
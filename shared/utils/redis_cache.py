@@ -3,14 +3,22 @@ Redis Cache Helper for Layer 2 AI Services
 Provides intelligent caching with semantic similarity support
 """
 import json
+import time
 import hashlib
 import asyncio
-from typing import Optional, Any, Dict, List
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List, Tuple, Callable, Awaitable
 from datetime import timedelta
 import redis.asyncio as redis
 from shared.config import settings
 from shared.utils.logger import setup_logger, LogEmoji
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 logger = setup_logger("redis_cache")
 
 
@@ -154,6 +162,27 @@ class RedisCache:
             logger.error(f"{LogEmoji.ERROR} Cache delete failed: {e}")
             return False
 
+    async def incr(self, key: str) -> Optional[int]:
+        """
+        Atomically increment an integer counter.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            New value, or None if Redis is unavailable
+        """
+        if not self._redis:
+            await self.connect()
+            if not self._redis:
+                return None
+
+        try:
+            return await self._redis.incr(self._make_key(key))
+        except Exception as e:
+            logger.error(f"{LogEmoji.ERROR} Cache incr failed: {e}")
+            return None
+
     async def clear_namespace(self) -> int:
         """
         Clear all keys in current namespace.
@@ -206,6 +235,80 @@ class RedisCache:
             return {"error": str(e)}
 
 
+class _VectorPartition:
+    """
+    Brute-force cosine index over unit-normalized query embeddings.
+
+    Rows live in a preallocated float32 matrix; a slot map plus an
+    OrderedDict give O(1) insert/delete and LRU ordering. Lookup is a
+    single matrix-vector product over the partition.
+    """
+
+    def __init__(self, dim: int, capacity: int):
+        self.dim = dim
+        self.capacity = capacity
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.slot_keys: List[Optional[str]] = [None] * capacity
+        self.key_to_slot: Dict[str, int] = {}
+        self.lru: "OrderedDict[str, None]" = OrderedDict()
+        self.free_slots: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.key_to_slot)
+
+    def add(self, key: str, vector: "np.ndarray", expires_at: float) -> Optional[str]:
+        """Insert or refresh an entry. Returns the evicted LRU key, if any."""
+        evicted = None
+        slot = self.key_to_slot.get(key)
+        if slot is None:
+            if not self.free_slots:
+                evicted, _ = self.lru.popitem(last=False)
+                self._release(evicted)
+            slot = self.free_slots.pop()
+            self.key_to_slot[key] = slot
+            self.slot_keys[slot] = key
+
+        self.matrix[slot] = vector
+        self.expires_at[slot] = expires_at
+        self.valid[slot] = True
+        self.lru[key] = None
+        self.lru.move_to_end(key)
+        return evicted
+
+    def remove(self, key: str):
+        """Drop an entry (e.g. its Redis value expired)."""
+        if key in self.key_to_slot:
+            self.lru.pop(key, None)
+            self._release(key)
+
+    def _release(self, key: str):
+        slot = self.key_to_slot.pop(key)
+        self.valid[slot] = False
+        self.slot_keys[slot] = None
+        self.free_slots.append(slot)
+
+    def search(self, vector: "np.ndarray", now: float) -> Tuple[Optional[str], float]:
+        """Return (key, cosine) of the nearest live entry."""
+        if not self.key_to_slot:
+            return None, 0.0
+
+        live = self.valid & (self.expires_at > now)
+        # Lazily drop TTL-expired rows
+        for slot in np.flatnonzero(self.valid & ~live):
+            self.remove(self.slot_keys[slot])
+        if not live.any():
+            return None, 0.0
+
+        scores = self.matrix @ vector
+        scores[~live] = -np.inf
+        best = int(np.argmax(scores))
+        key = self.slot_keys[best]
+        self.lru.move_to_end(key)
+        return key, float(scores[best])
+
+
 class SemanticCache:
     """
     Semantic caching for LLM queries using embeddings.
@@ -215,26 +318,87 @@ class SemanticCache:
 
     Example:
         "Tìm nhà Q7" ≈ "Tìm nhà Quận 7" → same cache entry
+
+    Responses are stored in Redis together with their query embedding and
+    tagged with model + temperature. Lookup goes:
+    1. Exact match on the normalized query (cheap, shared across replicas)
+    2. Cosine search over an in-process NumPy index for the same
+       (model, temperature) partition, so a hit never crosses models
+
+    Without an embedding function (or NumPy) the cache degrades to the
+    exact-match lookup.
     """
 
-    def __init__(self, namespace: str = "semantic"):
+    def __init__(
+        self,
+        namespace: str = "semantic",
+        embed_fn: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+        max_entries: Optional[int] = None,
+        near_miss_margin: float = 0.05
+    ):
+        """
+        Args:
+            namespace: Redis namespace
+            embed_fn: Async function mapping texts to embedding vectors
+            max_entries: LRU capacity of each (model, temperature) partition
+            near_miss_margin: Similarities within this margin below the
+                threshold are counted as near misses (threshold tuning signal)
+        """
         self.cache = RedisCache(namespace=namespace)
-        self.similarity_threshold = 0.95  # Very high threshold for safety
+        self.similarity_threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.near_miss_margin = near_miss_margin
+
+        self._partitions: Dict[str, _VectorPartition] = {}
+        # Embeddings computed during get_similar, reused by set_similar
+        self._recent_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._warmed = False
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "near_misses": 0,
+            "misses": 0,
+            "evictions": 0,
+            "embedding_errors": 0,
+        }
 
     async def connect(self):
-        """Connect to Redis."""
+        """Connect to Redis and load the vector index from stored entries."""
         await self.cache.connect()
+        if not self._warmed and self.cache._redis is not None:
+            self._warmed = True
+            await self._warm_index()
 
     async def close(self):
         """Close connection."""
         await self.cache.close()
 
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Lowercase and collapse whitespace."""
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def _partition_key(model: Optional[str], temperature: Optional[float]) -> str:
+        """Partition name for a model/temperature combination."""
+        temp = "any" if temperature is None else f"{float(temperature):.2f}"
+        return f"{model or 'any'}@{temp}"
+
+    def _entry_key(self, partition: str, normalized_query: str) -> str:
+        """Redis key for a cached entry."""
+        return f"query:{self.cache._hash_key(partition)}:{self.cache._hash_key(normalized_query)}"
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether embedding-based lookup is available."""
+        return HAS_NUMPY and self.embed_fn is not None
+
     def _compute_simple_similarity(self, text1: str, text2: str) -> float:
         """
         Compute simple text similarity (Jaccard similarity).
 
-        For production, should use embeddings + cosine similarity.
-        This is a simple fallback.
+        Fallback scorer when no embedding function is configured.
         """
         # Normalize
         text1 = text1.lower().strip()
@@ -257,41 +421,130 @@ class SemanticCache:
 
         return len(intersection) / len(union)
 
+    async def _embed(self, normalized_query: str) -> Optional["np.ndarray"]:
+        """Embed a normalized query as a unit float32 vector (memoized)."""
+        if not self.semantic_enabled:
+            return None
+
+        cached = self._recent_embeddings.get(normalized_query)
+        if cached is not None:
+            return cached
+
+        try:
+            vectors = await self.embed_fn([normalized_query])
+            vector = np.asarray(vectors[0], dtype=np.float32)
+        except Exception as e:
+            self.stats["embedding_errors"] += 1
+            logger.warning(f"{LogEmoji.WARNING} Semantic cache embedding failed: {e}")
+            return None
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        vector /= norm
+
+        self._recent_embeddings[normalized_query] = vector
+        if len(self._recent_embeddings) > 256:
+            self._recent_embeddings.popitem(last=False)
+        return vector
+
+    def _index(self, partition: str, key: str, vector: "np.ndarray", ttl: int):
+        """Add an entry to the partition's vector index."""
+        index = self._partitions.get(partition)
+        if index is None or index.dim != vector.shape[0]:
+            index = _VectorPartition(vector.shape[0], self.max_entries)
+            self._partitions[partition] = index
+        if index.add(key, vector, time.time() + ttl) is not None:
+            self.stats["evictions"] += 1
+
+    async def _warm_index(self):
+        """Rebuild the in-process index from entries already in Redis."""
+        if not HAS_NUMPY:
+            return
+
+        loaded = 0
+        try:
+            redis_client = self.cache._redis
+            async for namespaced_key in redis_client.scan_iter(match=self.cache._make_key("query:*")):
+                raw = await redis_client.get(namespaced_key)
+                ttl = await redis_client.ttl(namespaced_key)
+                if not raw or ttl == -2:
+                    continue
+                entry = json.loads(raw)
+                embedding = entry.get("embedding") if isinstance(entry, dict) else None
+                if not embedding:
+                    continue
+                key = namespaced_key[len(self.cache.namespace) + 1:]
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._index(entry["partition"], key, vector, ttl if ttl > 0 else 365 * 86400)
+                loaded += 1
+        except Exception as e:
+            logger.warning(f"{LogEmoji.WARNING} Semantic cache warm-up failed: {e}")
+
+        if loaded:
+            logger.info(f"{LogEmoji.SUCCESS} Semantic cache index warmed with {loaded} entries")
+
     async def get_similar(
         self,
         query: str,
-        threshold: Optional[float] = None
+        threshold: Optional[float] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None
     ) -> Optional[Any]:
         """
         Get cached response for semantically similar query.
 
         Args:
             query: Input query
-            threshold: Similarity threshold (default: 0.95)
+            threshold: Cosine similarity threshold (default: settings)
+            model: Model the response must have been produced by
+            temperature: Sampling temperature the response was produced with
 
         Returns:
             Cached response or None
         """
         threshold = threshold or self.similarity_threshold
-
-        # For MVP: Use simple exact match with normalization
-        # TODO: Implement embedding-based similarity in future
-        normalized_query = query.lower().strip()
-        cache_key = f"query:{self.cache._hash_key(normalized_query)}"
-
-        result = await self.cache.get(cache_key)
-        if result:
-            logger.info(f"{LogEmoji.SUCCESS} Semantic cache HIT for: {query[:50]}...")
-        else:
-            logger.debug(f"{LogEmoji.WARNING} Semantic cache MISS for: {query[:50]}...")
-
-        return result
+        normalized_query = self._normalize_query(query)
+        partition = self._partition_key(model, temperature)
+
+        # 1. Exact match (normalized text)
+        entry = await self.cache.get(self._entry_key(partition, normalized_query))
+        if entry:
+            self.stats["exact_hits"] += 1
+            logger.info(f"{LogEmoji.SUCCESS} Semantic cache HIT (exact) for: {query[:50]}...")
+            return entry.get("response")
+
+        # 2. Nearest neighbour within the same model/temperature partition
+        index = self._partitions.get(partition)
+        vector = await self._embed(normalized_query)
+        if vector is not None and index is not None and index.dim == vector.shape[0]:
+            key, similarity = index.search(vector, time.time())
+            if key is not None and similarity >= threshold:
+                entry = await self.cache.get(key)
+                if entry:
+                    self.stats["semantic_hits"] += 1
+                    logger.info(
+                        f"{LogEmoji.SUCCESS} Semantic cache HIT (cos={similarity:.3f}) for: "
+                        f"{query[:50]}... ≈ {entry.get('query', '')[:50]}"
+                    )
+                    return entry.get("response")
+                # Redis entry expired or was evicted
+                index.remove(key)
+            elif key is not None and similarity >= threshold - self.near_miss_margin:
+                self.stats["near_misses"] += 1
+                logger.debug(f"{LogEmoji.WARNING} Semantic cache near miss (cos={similarity:.3f}) for: {query[:50]}...")
+
+        self.stats["misses"] += 1
+        logger.debug(f"{LogEmoji.WARNING} Semantic cache MISS for: {query[:50]}...")
+        return None
 
     async def set_similar(
         self,
         query: str,
         response: Any,
-        ttl: int = 3600
+        ttl: int = 3600,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None
     ) -> bool:
         """
         Cache response for query.
@@ -300,18 +553,47 @@ class SemanticCache:
             query: Input query
             response: Response to cache
             ttl: Time to live (default: 1 hour)
+            model: Model that produced the response
+            temperature: Sampling temperature used
 
         Returns:
             True if successful
         """
-        normalized_query = query.lower().strip()
-        cache_key = f"query:{self.cache._hash_key(normalized_query)}"
-
-        success = await self.cache.set(cache_key, response, ttl=ttl)
+        normalized_query = self._normalize_query(query)
+        partition = self._partition_key(model, temperature)
+        cache_key = self._entry_key(partition, normalized_query)
+        vector = await self._embed(normalized_query)
+
+        entry = {
+            "query": normalized_query,
+            "partition": partition,
+            "model": model,
+            "temperature": temperature,
+            "embedding": [round(float(x), 6) for x in vector] if vector is not None else None,
+            "response": response,
+        }
+
+        success = await self.cache.set(cache_key, entry, ttl=ttl)
         if success:
+            if vector is not None:
+                self._index(partition, cache_key, vector, ttl)
             logger.info(f"{LogEmoji.SUCCESS} Cached response for: {query[:50]}...")
         return success
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/near-miss counters and index sizes."""
+        lookups = (
+            self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        )
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "semantic_enabled": self.semantic_enabled,
+            "threshold": self.similarity_threshold,
+            "partitions": {name: len(index) for name, index in self._partitions.items()},
+        }
+
 
 # Singleton instances for common namespaces
 _cache_instances: Dict[str, RedisCache] = {}
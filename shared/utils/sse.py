@@ -0,0 +1,45 @@
+"""
+Server-Sent Events helpers
+
+Encoding for the streaming endpoints (Core Gateway, RAG Service,
+Orchestrator) and decoding of an upstream SSE response, so tokens can be
+relayed hop by hop. Relays are plain async generators: a chunk is only
+pulled from upstream once the previous one has been sent downstream, so a
+slow client slows the provider down instead of filling a buffer.
+"""
+import json
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+# Disable proxy buffering (nginx) and caching of event streams
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def sse_event(data: Dict[str, Any]) -> str:
+    """Encode one event as an SSE data frame"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    JSON payloads of a streamed SSE response
+
+    Non-data lines and unparsable payloads are skipped; "[DONE]" (OpenAI)
+    ends the stream.
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if not payload:
+            continue
+        if payload == "[DONE]":
+            return
+        try:
+            yield json.loads(payload)
+        except ValueError:
+            continue
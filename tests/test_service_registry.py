@@ -0,0 +1,83 @@
+"""Client-side load balancing (core/service_registry.py)"""
+import asyncio
+
+import httpx
+
+from core.service_registry import BalancedTransport, ServiceBalancer, ServiceInfo
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """Answers with `status`, or never answers when hang=True"""
+
+    def __init__(self, status: int = 200, hang: bool = False):
+        self.status = status
+        self.hang = hang
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.hang:
+            await asyncio.Event().wait()
+        return httpx.Response(self.status, content=b"ok")
+
+
+def make_client(transport: httpx.AsyncBaseTransport, consecutive_failures: int = 5):
+    balancer = ServiceBalancer("db_gateway", registry=None, mode="off", consecutive_failures=consecutive_failures)
+    balancer._update([ServiceInfo(name="db_gateway", version="1", host="10.0.0.1", port=8080)])
+    client = httpx.AsyncClient(transport=BalancedTransport({"ree-ai-db-gateway": balancer}, transport))
+    return client, balancer, next(iter(balancer.endpoints.values()))
+
+
+def test_completed_request_is_no_longer_outstanding():
+    async def scenario():
+        client, _, endpoint = make_client(StubTransport())
+        response = await client.get("http://ree-ai-db-gateway:8080/health")
+        assert response.status_code == 200
+        assert endpoint.outstanding == 0
+        assert endpoint.requests == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_requests_are_no_longer_outstanding():
+    async def scenario():
+        client, _, endpoint = make_client(StubTransport(hang=True))
+        tasks = [
+            asyncio.create_task(client.post("http://ree-ai-db-gateway:8080/hybrid-search", json={}))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        assert endpoint.outstanding == 5
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert endpoint.outstanding == 0
+        # Cancellation is not held against the instance
+        assert endpoint.failures == 0
+        assert endpoint.ejected_until == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_server_errors_eject_instance():
+    async def scenario():
+        client, balancer, endpoint = make_client(StubTransport(status=503), consecutive_failures=3)
+        balancer.max_ejection_percent = 100
+        for _ in range(3):
+            await client.get("http://ree-ai-db-gateway:8080/search")
+        assert endpoint.failures == 3
+        assert endpoint.ejected_until > 0
+        assert endpoint.outstanding == 0
+
+    asyncio.run(scenario())
+
+
+def test_advertise_host_rejects_loopback(monkeypatch):
+    from core import service_registry
+
+    monkeypatch.setattr(service_registry.settings, "SERVICE_ADVERTISE_HOST", "")
+    monkeypatch.setattr(service_registry.socket, "gethostbyname", lambda _: "127.0.1.1")
+    assert service_registry.advertise_host("ree-ai-db-gateway") == "ree-ai-db-gateway"
+
+    monkeypatch.setattr(service_registry.socket, "gethostbyname", lambda _: "172.18.0.5")
+    assert service_registry.advertise_host("ree-ai-db-gateway") == "172.18.0.5"